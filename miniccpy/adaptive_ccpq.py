@@ -0,0 +1,182 @@
+import time
+import numpy as np
+from miniccpy.crcc23 import moments_ijk, leftamps_ijk
+from miniccpy.hbar_diagonal import get_3body_hbar_triples_diagonal, vv_denom_abc, vvvv_denom_abc, voov_denom_abc, voo_denom_abc, vov_denom_abc
+from miniccpy.pspace import get_combinations, as_excitation_list, is_empty_pspace
+from miniccpy.utilities import get_memory_usage
+
+def kernel(fock, g, o, v, t3_excitations=None, growth_fraction=0.01, max_iter=10, energy_threshold=1.0e-05,
+           maxit=80, convergence=1.0e-07, energy_shift=0.0, diis_size=6, n_start_diis=0, out_of_core=False,
+           point_group="C1", orbsym=None, target_irrep=None):
+    """Adaptive CC(P;Q) calculation for triples. Starting from the P space given by
+    `t3_excitations` (default: empty, i.e., CCSD), each macroiteration solves the
+    CCSDT(P) equations, warm-started from the previous amplitudes, and computes the
+    CR-CC(2,3)-type moment correction for the triples in the Q space using the
+    two-body approximation of crcc23. The `growth_fraction` of all (symmetry-allowed)
+    triples with the largest contributions are then moved from Q to P. The process
+    stops when the CC(P;Q) energy changes by less than `energy_threshold`, after
+    `max_iter` macroiterations, or when the Q space is exhausted.
+    Returns the CC(P) amplitudes (t1, t2, t3), the CC(P) correlation energy, the
+    dictionary of Q-space corrections, and the final P space (aligned with t3)."""
+    from miniccpy.ccsd import kernel as ccsd_kernel
+    from miniccpy.ccsdt_p import kernel as ccsdt_p_kernel
+    from miniccpy.left_ccsd import kernel as left_ccsd_kernel
+    from miniccpy.hbar import build_hbar_ccsd
+    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
+
+    no, nu = fock[o, v].shape
+
+    # symmetry of the triples entering the P space
+    pg_irrep_to_number = get_pg_irreps(point_group)
+    if orbsym is None:
+        orbsym = ["A" for i in range(no + nu)]
+    isym = np.array([pg_irrep_to_number[x] for x in orbsym], dtype=np.int32)
+    sym_ref = pg_irrep_to_number[get_reference_symmetry(no, point_group, isym)]
+    sym_target = sym_ref if target_irrep is None else pg_irrep_to_number[target_irrep]
+
+    abc = get_combinations(nu, 3)
+    ijk = get_combinations(no, 3)
+    sym_abc = np.bitwise_xor.reduce(isym[abc + no], axis=1)
+    sym_ijk = sym_ref ^ np.bitwise_xor.reduce(isym[ijk], axis=1) ^ sym_target
+    n_total = sum(np.count_nonzero(sym_abc == s) for s in sym_ijk)
+    num_add = max(1, int(growth_fraction * n_total))
+
+    if t3_excitations is None or is_empty_pspace(t3_excitations):
+        t3_excitations = np.zeros((0, 6))
+    t3_excitations = as_excitation_list(t3_excitations)
+
+    print("    ==> Adaptive CC(P;Q) calculation <==")
+    print("    Total number of triples = ", n_total)
+    print("    Number of triples added per iteration = ", num_add)
+    print("")
+
+    T = None
+    e_ccpq_old = 0.0
+    history = []
+    for it in range(max_iter):
+        tic = time.time()
+        # Solve the CC(P) equations, warm-started from the previous amplitudes
+        if t3_excitations.shape[0] == 0:
+            (t1, t2), e_corr = ccsd_kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, False)
+            t3 = np.zeros(0)
+        else:
+            (t1, t2, t3), e_corr = ccsdt_p_kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, False,
+                                                  t3_excitations, T0=T)
+        # Obtain the CCSD-like HBar and left-CCSD vector defining the moment correction
+        H1, H2 = build_hbar_ccsd((t1, t2), fock, g, o, v)
+        L, _ = left_ccsd_kernel((t1, t2), fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core)
+        delta_T, selection = moment_correction(t1, t2, L[0], L[1], fock, H1, H2, o, v, t3_excitations, num_add, abc, ijk, sym_abc, sym_ijk)
+
+        e_ccpq = e_corr + delta_T["D"]
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        history.append((t3_excitations.shape[0], e_corr, e_ccpq))
+        print("")
+        print("    Adaptive CC(P;Q) iteration", it + 1)
+        print("    Number of triples in P = ", t3_excitations.shape[0])
+        print("    CC(P) correlation energy = {: 20.12f}".format(e_corr))
+        print("    CC(P;Q) correlation energy = {: 20.12f}".format(e_ccpq))
+        print("    Completed in {:.2f}m {:.2f}s".format(minutes, seconds))
+        print(f"    Memory usage: {get_memory_usage()} MB")
+        print("")
+
+        if (it > 0 and abs(e_ccpq - e_ccpq_old) < energy_threshold) or selection.shape[0] == 0 or it == max_iter - 1:
+            break
+        e_ccpq_old = e_ccpq
+
+        # Enlarge the P space and pad the amplitudes with zeros for the new triples
+        t3_excitations = as_excitation_list(np.vstack((t3_excitations, selection + 1)))
+        T = (t1, t2, np.hstack((t3, np.zeros(selection.shape[0]))))
+
+    print("    Summary of adaptive CC(P;Q) iterations")
+    print("    Iter    Triples in P          CC(P) Energy        CC(P;Q) Energy")
+    for it, (n3, e_p, e_pq) in enumerate(history):
+        print("    {: 4d} {: 15d} {: 21.12f} {: 21.12f}".format(it + 1, n3, e_p, e_pq))
+    print("")
+
+    return (t1, t2, t3), e_corr, delta_T, t3_excitations
+
+def moment_correction(t1, t2, l1, l2, fock, H1, H2, o, v, t3_excitations, num_add, abc, ijk, sym_abc, sym_ijk):
+    """Compute the CR-CC(2,3)-type corrections (variants A-D) due to the triples
+    outside of the P space, together with the (0-based) rows [a, b, c, i, j, k] of
+    the `num_add` Q-space triples with the largest contributions to variant D."""
+
+    no, nu = t1.shape[1], t1.shape[0]
+
+    # get 3-body Hbar triples diagonal
+    d3v, d3o = get_3body_hbar_triples_diagonal(H2[o, o, v, v], t2)
+    # Compute adjusted h(vooo) intermediate
+    I_vooo = H2[v, o, o, o] - np.einsum("me,aeij->amij", H1[o, v], t2, optimize=True)
+
+    # precompute blocks of diagonal that do not depend on occupied indices
+    denom_A_v = vv_denom_abc(fock, v)
+    denom_B_v = vv_denom_abc(H1, v)
+    denom_C_vvvv = vvvv_denom_abc(H2[v, v, v, v])
+
+    # position of each a<b<c triple in the list of unoccupied strings
+    abc_index = np.full((nu, nu, nu), -1)
+    abc_index[abc[:, 0], abc[:, 1], abc[:, 2]] = np.arange(abc.shape[0])
+    # P-space unoccupied strings grouped by their occupied string
+    p_abc = {}
+    if t3_excitations.shape[0] > 0:
+        exc = t3_excitations.astype(np.int64) - 1
+        occ_key = (exc[:, 3] * no + exc[:, 4]) * no + exc[:, 5]
+        order = np.argsort(occ_key, kind="stable")
+        keys, starts = np.unique(occ_key[order], return_index=True)
+        for key, rows in zip(keys, np.split(order, starts[1:])):
+            p_abc[key] = abc_index[exc[rows, 0], exc[rows, 1], exc[rows, 2]]
+
+    delta_A = 0.0
+    delta_B = 0.0
+    delta_C = 0.0
+    delta_D = 0.0
+    cand_val = np.zeros(0)
+    cand_rows = np.zeros((0, 6), dtype=np.int32)
+    for n, (i, j, k) in enumerate(ijk):
+        # Q-space unoccupied strings for this i,j,k
+        qmask = sym_abc == sym_ijk[n]
+        pos = p_abc.get((i * no + j) * no + k)
+        if pos is not None:
+            qmask[pos] = False
+        if not np.any(qmask):
+            continue
+        a, b, c = abc[qmask, 0], abc[qmask, 1], abc[qmask, 2]
+
+        # compute i,j,k part of triples denominator
+        denom_A_o = fock[o, o][i, i] + fock[o, o][j, j] + fock[o, o][k, k]
+        denom_B_o = H1[o, o][i, i] + H1[o, o][j, j] + H1[o, o][k, k]
+        denom_C_voov = voov_denom_abc(i, j, k, H2[v, o, o, v])
+        denom_C_oooo = -H2[o, o, o, o][j, i, j, i] - H2[o, o, o, o][k, i, k, i] - H2[o, o, o, o][k, j, k, j]
+        denom_D_voo = voo_denom_abc(i, j, k, d3o)
+        denom_D_vov = vov_denom_abc(i, j, k, d3v)
+        denom_C = denom_B_o + denom_B_v + denom_C_voov + denom_C_oooo + denom_C_vvvv
+        denom_D = denom_C + denom_D_voo + denom_D_vov
+
+        # compute a,b,c part of moments and left vector
+        m3 = moments_ijk(i, j, k, I_vooo, H2[v, v, o, v], t2)
+        l3 = leftamps_ijk(i, j, k, H1[o, v], H2[o, o, v, v], H2[v, o, v, v], H2[o, o, o, v], l1, l2)
+        LM = (m3 * l3)[a, b, c]
+
+        delta_A += np.sum(LM / (denom_A_o + denom_A_v)[a, b, c])
+        delta_B += np.sum(LM / (denom_B_o + denom_B_v)[a, b, c])
+        delta_C += np.sum(LM / denom_C[a, b, c])
+        contrib_D = LM / denom_D[a, b, c]
+        delta_D += np.sum(contrib_D)
+
+        # keep the largest contributions as candidates for the next P space
+        val = np.abs(contrib_D)
+        keep = np.flatnonzero(val > 0.0)
+        if len(keep) > num_add:
+            keep = keep[np.argpartition(-val[keep], num_add - 1)[:num_add]]
+        rows = np.empty((len(keep), 6), dtype=np.int32)
+        rows[:, 0], rows[:, 1], rows[:, 2] = a[keep], b[keep], c[keep]
+        rows[:, 3], rows[:, 4], rows[:, 5] = i, j, k
+        cand_val = np.concatenate((cand_val, val[keep]))
+        cand_rows = np.concatenate((cand_rows, rows))
+        if len(cand_val) > 2 * num_add:
+            top = np.argpartition(-cand_val, num_add - 1)[:num_add]
+            cand_val, cand_rows = cand_val[top], cand_rows[top]
+
+    top = np.argsort(-cand_val, kind="stable")[:num_add]
+    delta_T = {"A": delta_A, "B": delta_B, "C": delta_C, "D": delta_D}
+    return delta_T, cand_rows[top]
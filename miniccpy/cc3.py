@@ -103,9 +103,10 @@ def add_t3_contributions(singles_res, doubles_res, t1, t2, f, g, I_vooo, I_vvov,
         doubles_res[:, :, i, i] *= 0.0
     return singles_res, doubles_res
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, T0=None):
     """Solve the CCSDT system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2) is provided."""
 
     #eps = np.kron(np.diagonal(fock)[::2], np.ones(2))
     eps = np.diagonal(fock)
@@ -121,8 +122,11 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc))
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    else:
+        t1, t2 = (np.copy(t) for t in T0)
 
     old_energy = cc_energy(t1, t2, fock, g, o, v)
 
@@ -113,9 +113,10 @@ def compute_t4(t1, t2, t3, f, g, o, v, e_abcdijkl):
     quadruples_residual -= np.transpose(quadruples_residual, (1, 0, 2, 3, 4, 5, 6, 7)) + np.transpose(quadruples_residual, (2, 1, 0, 3, 4, 5, 6, 7)) + np.transpose(quadruples_residual, (3, 1, 2, 0, 4, 5, 6, 7)) # (a/bcd)
     return e_abcdijkl * quadruples_residual
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, T0=None):
     """Solve the CC4 system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2, t3) is provided."""
 
     eps = np.diagonal(fock)
     n = np.newaxis
@@ -134,9 +135,12 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
-    t3 = np.zeros((nunocc, nunocc, nunocc, nocc, nocc, nocc))
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc))
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+        t3 = np.zeros((nunocc, nunocc, nunocc, nocc, nocc, nocc))
+    else:
+        t1, t2, t3 = (np.copy(t) for t in T0)
     old_energy = cc_energy(t1, t2, fock, g, o, v)
 
     print("    ==> CC4 amplitude equations <==")
@@ -3,7 +3,9 @@ import numpy as np
 from miniccpy.energy import cc_energy, hf_energy, hf_energy_from_fock
 from miniccpy.helper_cc import get_ccs_intermediates
 from miniccpy.diis import DIIS
-from miniccpy.utilities import get_memory_usage
+from miniccpy.checkpoint import save_checkpoint, load_checkpoint
+from miniccpy.utilities import (get_memory_usage, check_mixed_precision_threshold, SinglePrecisionView,
+                               MIXED_PRECISION_MIN_DECREASE, MIXED_PRECISION_MAX_STALL)
 
 from miniccpy.updates import update_t1, update_t2
 
@@ -72,47 +74,82 @@ def doubles_residual(t1, t2, f, g, o, v):
     return doubles_res
 
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, T0=None,
+           checkpoint=None, checkpoint_interval=1, restart=None, return_unconverged=False,
+           mixed_precision_threshold=None, stats=None):
     """Solve the CCSD system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2) is provided or the solve is resumed
+    from the checkpoint file `restart`. If `checkpoint` is given, T and the DIIS
+    history are written to it every `checkpoint_interval` iterations. With
+    `return_unconverged`, the amplitudes with the smallest residual are returned
+    instead of raising an error if the iterations do not converge. If
+    `mixed_precision_threshold` is given, the iterations start in single precision
+    and switch to double precision, converting the DIIS history, once the residual
+    norm drops below it (at least MIXED_PRECISION_MIN_THRESHOLD) or stops decreasing;
+    energies and the final amplitudes are always in double precision.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"]."""
 
     eps = np.diagonal(fock)
     n = np.newaxis
     e_abij = 1.0 / (-eps[v, n, n, n] - eps[n, v, n, n] + eps[n, n, o, n] + eps[n, n, n, o] + energy_shift)
     e_ai = 1.0 / (-eps[v, n] + eps[n, o] + energy_shift)
 
+    # Working precision of the amplitudes, residuals, and integrals used to build them;
+    # the two-electron integral blocks are converted to single precision as they are read
+    if mixed_precision_threshold is None:
+        dtype = np.float64
+        f_w, g_w = fock, g
+    else:
+        check_mixed_precision_threshold(mixed_precision_threshold)
+        dtype = np.float32
+        f_w, g_w = fock.astype(dtype), SinglePrecisionView(g)
+    best_norm32, nstall = np.inf, 0
+
     nunocc, nocc = e_ai.shape
     n1 = nocc * nunocc
     n2 = nocc**2 * nunocc**2
     ndim = n1 + n2
 
-    diis_engine = DIIS(ndim, diis_size, out_of_core)
+    diis_engine = DIIS(ndim, diis_size, out_of_core, dtype=dtype)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc), dtype=dtype)
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc), dtype=dtype)
+    else:
+        t1, t2 = (np.array(t, dtype=dtype) for t in T0)
     old_energy = cc_energy(t1, t2, fock, g, o, v)
+    idx0 = 0
+    if restart is not None:
+        idx0, old_energy = load_checkpoint(restart, (t1, t2), diis_engine)
+        idx0 += 1
+    best_norm, T_best = np.inf, None
 
     print("    ==> CCSD amplitude equations <==")
     print("")
     print("     Iter               Energy                 |dE|                 |dT|     Wall Time     Memory")
-    for idx in range(maxit):
+    for idx in range(idx0, idx0 + maxit):
 
         tic = time.time()
 
-        residual_singles = singles_residual(t1, t2, fock, g, o, v)
-        residual_doubles = doubles_residual(t1, t2, fock, g, o, v)
+        residual_singles = singles_residual(t1, t2, f_w, g_w, o, v)
+        residual_doubles = doubles_residual(t1, t2, f_w, g_w, o, v)
 
         res_norm = np.linalg.norm(residual_singles) + np.linalg.norm(residual_doubles)
 
+        # the residual belongs to the amplitudes before the update
+        if return_unconverged and res_norm < best_norm:
+            best_norm, T_best = res_norm, tuple(t.copy() for t in (t1, t2))
+
         #t1 += residual_singles * e_ai
-        t1 = update_t1(t1, t2, residual_singles, fock, g, o, v, energy_shift, quasi=use_quasi)
+        t1 = update_t1(t1, t2, residual_singles, f_w, g_w, o, v, energy_shift, quasi=use_quasi)
         #t2 += residual_doubles * e_abij
-        t2 = update_t2(t2, residual_doubles, fock, g, o, v, energy_shift, quasi=use_quasi)
+        t2 = update_t2(t2, residual_doubles, f_w, g_w, o, v, energy_shift, quasi=use_quasi)
 
         current_energy = cc_energy(t1, t2, fock, g, o, v)
         delta_e = np.abs(old_energy - current_energy)
 
-        if delta_e < convergence and res_norm < convergence:
+        if dtype == np.float64 and delta_e < convergence and res_norm < convergence:
             break
 
         if idx >= n_start_diis:
@@ -122,15 +159,36 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
             t1 = T_extrap[:n1].reshape((nunocc, nocc))
             t2 = T_extrap[n1:].reshape((nunocc, nunocc, nocc, nocc))
 
+        if checkpoint is not None and (idx + 1) % checkpoint_interval == 0:
+            save_checkpoint(checkpoint, (t1, t2), diis_engine, idx, current_energy)
+
         old_energy = current_energy
 
         toc = time.time()
         minutes, seconds = divmod(toc - tic, 60)
         print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(idx, current_energy, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+
+        if dtype == np.float32:
+            # switch once the threshold is reached or the residual stops decreasing substantially
+            best_norm32, nstall = (res_norm, 0) if res_norm < MIXED_PRECISION_MIN_DECREASE * best_norm32 else (best_norm32, nstall + 1)
+            if nstall >= MIXED_PRECISION_MAX_STALL:
+                print("    Single-precision residual has stagnated")
+            if res_norm < mixed_precision_threshold or nstall >= MIXED_PRECISION_MAX_STALL:
+                print("    Switching to double precision")
+                dtype = np.float64
+                f_w, g_w = fock, g
+                t1, t2 = (t.astype(dtype) for t in (t1, t2))
+                diis_engine.set_dtype(dtype)
     else:
-        raise ValueError("CCSD iterations did not converge")
+        if not return_unconverged:
+            raise ValueError("CCSD iterations did not converge")
+        print("    CCSD iterations did not converge; returning the amplitudes with the smallest residual")
+        t1, t2 = T_best
+    if stats is not None:
+        stats["niter"] = idx - idx0 + 1
 
     diis_engine.cleanup()
+    t1, t2 = (t.astype(np.float64, copy=False) for t in (t1, t2))
     e_corr = cc_energy(t1, t2, fock, g, o, v)
 
     return (t1, t2), e_corr
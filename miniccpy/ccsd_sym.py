@@ -0,0 +1,200 @@
+import time
+import numpy as np
+from miniccpy.symmetry import SymmetryBlocking, SymTensor, BlockedOperator, sym_einsum
+from miniccpy.diis import DIIS
+from miniccpy.utilities import get_memory_usage
+
+def get_ccs_intermediates(t1, f, g, o, v):
+    """Symmetry-blocked analog of helper_cc.get_ccs_intermediates, calculating
+    the quantities related to the one- and two-body components of the CCS
+    similarity-transformed Hamiltonian, [H_N exp(T1)]_C.
+    """
+
+    H1 = BlockedOperator(t1.blocking, o, v)
+    H2 = BlockedOperator(t1.blocking, o, v)
+
+    # 1-body components
+    H1["ov"] = f["ov"] + sym_einsum("mnef,fn->me", g["oovv"], t1)
+    H1["vv"] = f["vv"] + (
+        sym_einsum("anef,fn->ae", g["vovv"], t1)
+        - sym_einsum("me,am->ae", H1["ov"], t1)
+    )
+    H1["oo"] = f["oo"] + (
+        sym_einsum("mnif,fn->mi", g["ooov"], t1)
+        + sym_einsum("me,ei->mi", H1["ov"], t1)
+    )
+    # 2-body components
+    H2["ooov"] = sym_einsum("mnfe,fi->mnie", g["oovv"], t1)
+
+    X_oooo = 0.5 * g["oooo"] + sym_einsum("nmje,ei->mnij", g["ooov"] + 0.5 * H2["ooov"], t1) # no(4)nu(1)
+    H2["oooo"] = X_oooo - X_oooo.transpose((0, 1, 3, 2))
+
+    H2["vovv"] = -sym_einsum("mnfe,an->amef", g["oovv"], t1) # no(2)nu(3)
+
+    H2["voov"] = g["voov"] + (
+              sym_einsum("amfe,fi->amie", g["vovv"] + 0.5 * H2["vovv"], t1)
+            - sym_einsum("nmie,an->amie", g["ooov"] + 0.5 * H2["ooov"], t1)
+    )
+
+    L_amie = g["voov"] + 0.5 * sym_einsum("amef,ei->amif", g["vovv"], t1) # no(2)nu(3)
+    X_mnij = g["oooo"] + sym_einsum("mnie,ej->mnij", H2["ooov"], t1) # no(4)nu(1)
+    X_vooo = 0.5 * g["vooo"] + (
+        sym_einsum("amie,ej->amij", L_amie, t1)
+       -0.25 * sym_einsum("mnij,am->anij", X_mnij, t1)
+    )
+    H2["vooo"] = X_vooo - X_vooo.transpose((0, 1, 3, 2))
+
+    L_amie = sym_einsum("mnie,am->anie", g["ooov"], t1)
+    H2["vvov"] = g["vvov"] + sym_einsum("anie,bn->abie", L_amie, t1) # no(1)nu(4)
+
+    return H1, H2
+
+def cc_energy(t1, t2, f, g):
+    """Symmetry-blocked ground-state CC correlation energy (see energy.cc_energy)."""
+    energy = sym_einsum("ia,ai->", f["ov"], t1)
+    energy += 0.25 * sym_einsum("ijab,abij->", g["oovv"], t2)
+    energy += 0.5 * sym_einsum("ijab,ai,bj->", g["oovv"], t1, t1)
+
+    return energy
+
+def singles_residual(t1, t2, f, g, o, v):
+    """Compute the projection of the CCSD Hamiltonian on singles
+        X[a, i] = < ia | (H_N exp(T1+T2))_C | 0 >
+    using only the symmetry-allowed blocks of the operators.
+    """
+
+    chi_vv = f["vv"] + sym_einsum("anef,fn->ae", g["vovv"], t1)
+
+    chi_oo = f["oo"] + sym_einsum("mnif,fn->mi", g["ooov"], t1)
+
+    h_ov = f["ov"] + sym_einsum("mnef,fn->me", g["oovv"], t1)
+
+    h_oo = chi_oo + sym_einsum("me,ei->mi", h_ov, t1)
+
+    h_ooov = g["ooov"] + sym_einsum("mnfe,fi->mnie", g["oovv"], t1)
+
+    h_vovv = g["vovv"] - sym_einsum("mnfe,an->amef", g["oovv"], t1)
+
+    singles_res = -sym_einsum("mi,am->ai", h_oo, t1)
+    singles_res += sym_einsum("ae,ei->ai", chi_vv, t1)
+    singles_res += sym_einsum("anif,fn->ai", g["voov"], t1)
+    singles_res += sym_einsum("me,aeim->ai", h_ov, t2)
+    singles_res -= 0.5 * sym_einsum("mnif,afmn->ai", h_ooov, t2)
+    singles_res += 0.5 * sym_einsum("anef,efin->ai", h_vovv, t2)
+
+    singles_res += f["vo"]
+
+    return singles_res
+
+
+def doubles_residual(t1, t2, f, g, o, v):
+    """Compute the projection of the CCSD Hamiltonian on doubles
+        X[a, b, i, j] = < ijab | (H_N exp(T1+T2))_C | 0 >
+    using only the symmetry-allowed blocks of the operators.
+    """
+
+    H1, H2 = get_ccs_intermediates(t1, f, g, o, v)
+
+    # intermediates
+    I_oo = H1["oo"] + 0.5 * sym_einsum("mnef,efin->mi", g["oovv"], t2)
+
+    I_vv = H1["vv"] - 0.5 * sym_einsum("mnef,afmn->ae", g["oovv"], t2)
+
+    I_voov = H2["voov"] + 0.5 * sym_einsum("mnef,afin->amie", g["oovv"], t2)
+
+    I_oooo = H2["oooo"] + 0.5 * sym_einsum("mnef,efij->mnij", g["oovv"], t2)
+
+    I_vooo = H2["vooo"] + 0.5 * sym_einsum("anef,efij->anij", g["vovv"] + 0.5 * H2["vovv"], t2)
+
+    tau = 0.5 * t2 + sym_einsum("ai,bj->abij", t1, t1)
+
+    doubles_res = -0.5 * sym_einsum("amij,bm->abij", I_vooo, t1)
+    doubles_res += 0.5 * sym_einsum("abie,ej->abij", H2["vvov"], t1)
+    doubles_res += 0.5 * sym_einsum("ae,ebij->abij", I_vv, t2)
+    doubles_res -= 0.5 * sym_einsum("mi,abmj->abij", I_oo, t2)
+    doubles_res += sym_einsum("amie,ebmj->abij", I_voov, t2)
+    doubles_res += 0.25 * sym_einsum("abef,efij->abij", g["vvvv"], tau)
+    doubles_res += 0.125 * sym_einsum("mnij,abmn->abij", I_oooo, t2)
+
+    doubles_res -= doubles_res.transpose((1, 0, 2, 3))
+    doubles_res -= doubles_res.transpose((0, 1, 3, 2))
+
+    doubles_res += g["vvoo"]
+
+    return doubles_res
+
+
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, orbsym=None, point_group="C1"):
+    """Solve the CCSD system of nonlinear equations using Jacobi iterations
+    with DIIS acceleration, storing the integrals and T amplitudes in
+    point-group symmetry-blocked form. `orbsym` holds the irrep labels of the
+    correlated spinorbitals (see run_scf with return_orbsym=True) in the Abelian
+    group `point_group`. The initial values of the T amplitudes are taken to be 0,
+    and the converged amplitudes are returned as dense arrays."""
+
+    if use_quasi:
+        raise ValueError("Quasilinearized updates are not available for symmetry-blocked CCSD")
+
+    nocc, nunocc = fock[o, v].shape
+    if orbsym is None:
+        orbsym, point_group = ["A"] * (nocc + nunocc), "C1"
+    blocking = SymmetryBlocking(orbsym, point_group, nocc, nunocc)
+
+    f = BlockedOperator.from_dense(blocking, fock, o, v, ["oo", "ov", "vo", "vv"])
+    g = BlockedOperator.from_dense(blocking, g, o, v, ["oooo", "ooov", "oovv", "voov", "vooo", "vovv", "vvoo", "vvov", "vvvv"])
+
+    eps = np.diagonal(fock)
+    d_ai = -1.0 * (SymTensor.from_diagonal(blocking, "vo", eps[o], eps[v]) + energy_shift)
+    d_abij = -1.0 * (SymTensor.from_diagonal(blocking, "vvoo", eps[o], eps[v]) + energy_shift)
+
+    t1 = SymTensor(blocking, "vo")
+    t2 = SymTensor(blocking, "vvoo")
+    n1 = t1.size
+    ndim = n1 + t2.size
+
+    diis_engine = DIIS(ndim, diis_size, out_of_core)
+
+    old_energy = cc_energy(t1, t2, f, g)
+
+    print("    ==> CCSD amplitude equations <==")
+    print("    Point group = ", blocking.point_group)
+    print("    Number of symmetry-allowed T amplitudes = ", ndim, "(out of", nocc * nunocc + nocc**2 * nunocc**2, ")")
+    print("")
+    print("     Iter               Energy                 |dE|                 |dT|     Wall Time     Memory")
+    for idx in range(maxit):
+
+        tic = time.time()
+
+        residual_singles = singles_residual(t1, t2, f, g, o, v)
+        residual_doubles = doubles_residual(t1, t2, f, g, o, v)
+
+        res_norm = np.linalg.norm(residual_singles.flatten()) + np.linalg.norm(residual_doubles.flatten())
+
+        t1 += residual_singles / d_ai
+        t2 += residual_doubles / d_abij
+
+        current_energy = cc_energy(t1, t2, f, g)
+        delta_e = np.abs(old_energy - current_energy)
+
+        if delta_e < convergence and res_norm < convergence:
+            break
+
+        if idx >= n_start_diis:
+            diis_engine.push( (t1, t2), (residual_singles, residual_doubles), idx)
+        if idx >= diis_size + n_start_diis:
+            T_extrap = diis_engine.extrapolate()
+            t1 = t1.from_vector(T_extrap[:n1])
+            t2 = t2.from_vector(T_extrap[n1:])
+
+        old_energy = current_energy
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(idx, current_energy, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        raise ValueError("CCSD iterations did not converge")
+
+    diis_engine.cleanup()
+    e_corr = cc_energy(t1, t2, f, g)
+
+    return (t1.to_dense(), t2.to_dense()), e_corr
@@ -4,7 +4,7 @@ from miniccpy.energy import cc_energy
 from miniccpy.helper_cc import get_ccs_intermediates, get_ccsd_intermediates
 from miniccpy.diis import DIIS
 from miniccpy.lib import ccsdt_p
-from miniccpy.pspace import get_active_triples_pspace
+from miniccpy.pspace import get_active_triples_pspace, as_excitation_list, is_empty_pspace, get_sort_plan
 
 def singles_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
     """Compute the projection of the CCSDT Hamiltonian on singles
@@ -73,7 +73,7 @@ def doubles_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
     )
     return t2, doubles_res
 
-def triples_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
+def triples_residual(t1, t2, t3, t3_excitations, plan, f, g, o, v, shift):
     """Compute the projection of the CCSDT Hamiltonian on triples
         X[a, b, c, i, j, k] = < ijkabc | (H_N exp(T1+T2+T3))_C | 0 >
     """
@@ -83,8 +83,8 @@ def triples_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
     I2_vooo = H2[v, o, o, o] - np.einsum("me,aeij->amij", H1[o, v], t2, optimize=True)
     I2_vooo = I2_vooo.transpose(1, 0, 2, 3)
 
-    triples_res, t3, t3_excitations = ccsdt_p.ccsdt_p.update_t3_p(
-        t3, t3_excitations,
+    triples_res, t3 = ccsdt_p.ccsdt_p.update_t3_p(
+        t3, t3_excitations, *plan,
         t2,
         H1[o, o], H1[v, v].T,
         g[o, o, v, v], H2[v, v, o, v].transpose(3, 0, 1, 2), I2_vooo,
@@ -104,11 +104,16 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
     # get active space
     t3_excitations = get_active_triples_pspace(nacto, nactu, nocc, nunocc, num_active=1)
 
+    t3_excitations = as_excitation_list(t3_excitations)
+
     # determine whether t3 updates should be done. Stupid compatibility with
     # empty sections of t3_excitations
     do_t3 = True
-    if np.array_equal(t3_excitations[0, :], np.array([1., 1., 1., 1., 1., 1.])):
+    if is_empty_pspace(t3_excitations):
         do_t3 = False
+    else:
+        # the sorting plan of update_t3_p only depends on the (fixed) P space
+        plan = get_sort_plan(ccsdt_p.ccsdt_p, t3_excitations, nocc, nunocc)
 
     n1 = nocc * nunocc
     n2 = nocc**2 * nunocc**2
@@ -133,7 +138,7 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
         t1, residual_singles = singles_residual(t1, t2, t3, t3_excitations, fock, g, o, v, energy_shift)
         t2, residual_doubles = doubles_residual(t1, t2, t3, t3_excitations, fock, g, o, v, energy_shift)
         if do_t3:
-            t3, t3_excitations, residual_triples = triples_residual(t1, t2, t3, t3_excitations, fock, g, o, v, energy_shift)
+            t3, t3_excitations, residual_triples = triples_residual(t1, t2, t3, t3_excitations, plan, fock, g, o, v, energy_shift)
 
         res_norm = np.linalg.norm(residual_singles) + np.linalg.norm(residual_doubles) + np.linalg.norm(residual_triples)
 
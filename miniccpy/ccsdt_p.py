@@ -4,6 +4,7 @@ from miniccpy.energy import cc_energy
 from miniccpy.helper_cc import get_ccs_intermediates, get_ccsd_intermediates
 from miniccpy.diis import DIIS
 from miniccpy.utilities import get_memory_usage
+from miniccpy.pspace import as_excitation_list, is_empty_pspace, get_sort_plan
 from miniccpy.lib import ccsdt_p
 
 def singles_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
@@ -73,7 +74,7 @@ def doubles_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
     )
     return t2, doubles_res
 
-def triples_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
+def triples_residual(t1, t2, t3, t3_excitations, plan, f, g, o, v, shift):
     """Compute the projection of the CCSDT Hamiltonian on triples
         X[a, b, c, i, j, k] = < ijkabc | (H_N exp(T1+T2+T3))_C | 0 >
     """
@@ -83,8 +84,8 @@ def triples_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
     I2_vooo = H2[v, o, o, o] - np.einsum("me,aeij->amij", H1[o, v], t2, optimize=True)
     I2_vooo = I2_vooo.transpose(1, 0, 2, 3)
 
-    triples_res, t3, t3_excitations = ccsdt_p.ccsdt_p.update_t3_p(
-        t3, t3_excitations,
+    triples_res, t3 = ccsdt_p.ccsdt_p.update_t3_p(
+        t3, t3_excitations, *plan,
         t2,
         H1[o, o], H1[v, v].T,
         g[o, o, v, v], H2[v, v, o, v].transpose(3, 0, 1, 2), I2_vooo,
@@ -95,17 +96,26 @@ def triples_residual(t1, t2, t3, t3_excitations, f, g, o, v, shift):
     return t3, t3_excitations, triples_res
 
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, t3_excitations):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, t3_excitations, T0=None):
     """Solve the CCSDT system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2, t3), with t3 ordered as t3_excitations,
+    is provided. The sorting plan of the P-space kernel is built once from
+    t3_excitations, which, together with t3, keeps its original order."""
+
+    nunocc, nocc = fock[v, o].shape
+
+    t3_excitations = as_excitation_list(t3_excitations)
 
     # determine whether t3 updates should be done. Stupid compatibility with
     # empty sections of t3_excitations
     do_t3 = True
-    if np.array_equal(t3_excitations[0, :], np.array([1., 1., 1., 1., 1., 1.])):
+    if is_empty_pspace(t3_excitations):
         do_t3 = False
+    else:
+        # the sorting plan of update_t3_p only depends on the (fixed) P space
+        plan = get_sort_plan(ccsdt_p.ccsdt_p, t3_excitations, nocc, nunocc)
 
-    nunocc, nocc = fock[v, o].shape
     n1 = nocc * nunocc
     n2 = nocc**2 * nunocc**2
     n3 = t3_excitations.shape[0]
@@ -113,9 +123,13 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
-    t3 = np.zeros(n3)
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc))
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+        t3 = np.zeros(n3)
+    else:
+        t1, t2, t3 = (np.copy(t) for t in T0)
+    residual_triples = np.zeros(n3)
 
     old_energy = cc_energy(t1, t2, fock, g, o, v)
 
@@ -129,7 +143,7 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
         t1, residual_singles = singles_residual(t1, t2, t3, t3_excitations, fock, g, o, v, energy_shift)
         t2, residual_doubles = doubles_residual(t1, t2, t3, t3_excitations, fock, g, o, v, energy_shift)
         if do_t3:
-            t3, t3_excitations, residual_triples = triples_residual(t1, t2, t3, t3_excitations, fock, g, o, v, energy_shift)
+            t3, t3_excitations, residual_triples = triples_residual(t1, t2, t3, t3_excitations, plan, fock, g, o, v, energy_shift)
 
         res_norm = np.linalg.norm(residual_singles) + np.linalg.norm(residual_doubles) + np.linalg.norm(residual_triples)
 
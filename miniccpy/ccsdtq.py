@@ -3,6 +3,7 @@ import numpy as np
 from miniccpy.energy import cc_energy
 from miniccpy.helper_cc import get_ccs_intermediates, get_ccsd_intermediates
 from miniccpy.diis import DIIS
+from miniccpy.checkpoint import save_checkpoint, load_checkpoint
 from miniccpy.utilities import get_memory_usage
 
 def singles_residual(t1, t2, t3, f, g, o, v):
@@ -148,9 +149,15 @@ def quadruples_residual(t1, t2, t3, t4, f, g, o, v):
     quadruples_residual -= np.transpose(quadruples_residual, (1, 0, 2, 3, 4, 5, 6, 7)) + np.transpose(quadruples_residual, (2, 1, 0, 3, 4, 5, 6, 7)) + np.transpose(quadruples_residual, (3, 1, 2, 0, 4, 5, 6, 7)) # (a/bcd)
     return quadruples_residual
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, T0=None,
+           checkpoint=None, checkpoint_interval=1, restart=None, return_unconverged=False):
     """Solve the CCSDTQ system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2, t3, t4) is provided or the solve is resumed
+    from the checkpoint file `restart`. If `checkpoint` is given, T and the DIIS
+    history are written to it every `checkpoint_interval` iterations. With
+    `return_unconverged`, the amplitudes with the smallest residual are returned
+    instead of raising an error if the iterations do not converge."""
 
     eps = np.diagonal(fock)
     n = np.newaxis
@@ -170,16 +177,24 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
-    t3 = np.zeros((nunocc, nunocc, nunocc, nocc, nocc, nocc))
-    t4 = np.zeros((nunocc, nunocc, nunocc, nunocc, nocc, nocc, nocc, nocc))
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc))
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+        t3 = np.zeros((nunocc, nunocc, nunocc, nocc, nocc, nocc))
+        t4 = np.zeros((nunocc, nunocc, nunocc, nunocc, nocc, nocc, nocc, nocc))
+    else:
+        t1, t2, t3, t4 = (np.copy(t) for t in T0)
     old_energy = cc_energy(t1, t2, fock, g, o, v)
+    idx0 = 0
+    if restart is not None:
+        idx0, old_energy = load_checkpoint(restart, (t1, t2, t3, t4), diis_engine)
+        idx0 += 1
+    best_norm, T_best = np.inf, None
 
     print("    ==> CCSDTQ amplitude equations <==")
     print("")
     print("     Iter               Energy                 |dE|                 |dT|     Wall Time     Memory")
-    for idx in range(maxit):
+    for idx in range(idx0, idx0 + maxit):
 
         tic = time.time()
 
@@ -190,6 +205,10 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
         res_norm = np.linalg.norm(residual_singles) + np.linalg.norm(residual_doubles) + np.linalg.norm(residual_triples) + np.linalg.norm(residual_quadruples)
 
+        # the residual belongs to the amplitudes before the update
+        if return_unconverged and res_norm < best_norm:
+            best_norm, T_best = res_norm, tuple(t.copy() for t in (t1, t2, t3, t4))
+
         t1 += residual_singles * e_ai
         t2 += residual_doubles * e_abij
         t3 += residual_triples * e_abcijk
@@ -211,13 +230,19 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
             t3 = T_extrap[n1+n2:n1+n2+n3].reshape((nunocc, nunocc, nunocc, nocc, nocc, nocc))
             t4 = T_extrap[n1+n2+n3:].reshape((nunocc, nunocc, nunocc, nunocc, nocc, nocc, nocc, nocc))
 
+        if checkpoint is not None and (idx + 1) % checkpoint_interval == 0:
+            save_checkpoint(checkpoint, (t1, t2, t3, t4), diis_engine, idx, current_energy)
+
         old_energy = current_energy
 
         toc = time.time()
         minutes, seconds = divmod(toc - tic, 60)
         print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(idx, current_energy, delta_e, res_norm, minutes, seconds, get_memory_usage()))
     else:
-        raise ValueError("CCSDTQ iterations did not converge")
+        if not return_unconverged:
+            raise ValueError("CCSDTQ iterations did not converge")
+        print("    CCSDTQ iterations did not converge; returning the amplitudes with the smallest residual")
+        t1, t2, t3, t4 = T_best
 
     diis_engine.cleanup()
     
@@ -0,0 +1,36 @@
+import os
+import h5py
+
+def save_checkpoint(filename, T, diis_engine, iteration, energy):
+    """Write the T amplitudes, the DIIS history, the iteration index, and the
+    current energy of a ground-state CC solve to the HDF5 file `filename`.
+    The checkpoint is first written to a temporary file, which then atomically
+    replaces `filename`, so an interrupted write never corrupts an existing
+    checkpoint."""
+    tmpfile = filename + ".tmp"
+    with h5py.File(tmpfile, "w") as f:
+        for n, t in enumerate(T):
+            f.create_dataset("t" + str(n + 1), data=t)
+        diis_engine.save(f.create_group("diis"))
+        f.attrs["order"] = len(T)
+        f.attrs["iteration"] = iteration
+        f.attrs["energy"] = energy
+    os.replace(tmpfile, filename)
+
+def load_checkpoint(filename, T, diis_engine):
+    """Restore the T amplitudes and the DIIS history from the checkpoint file
+    `filename`. The amplitudes are copied into the arrays of the tuple `T`,
+    which fixes the expected shapes. Returns the iteration index and the energy
+    at which the checkpoint was written."""
+    with h5py.File(filename, "r") as f:
+        if f.attrs["order"] != len(T):
+            raise ValueError("Checkpoint {} holds {} amplitude arrays, expected {}".format(filename, f.attrs["order"], len(T)))
+        for n, t in enumerate(T):
+            if f["t" + str(n + 1)].shape != t.shape:
+                raise ValueError("T{} in checkpoint {} has shape {}, expected {}".format(n + 1, filename, f["t" + str(n + 1)].shape, t.shape))
+            t[...] = f["t" + str(n + 1)][...]
+        diis_engine.load(f["diis"])
+        iteration = int(f.attrs["iteration"])
+        energy = float(f.attrs["energy"])
+    print("    Restarting from checkpoint {} (iteration {}, energy = {:.12f})".format(filename, iteration, energy))
+    return iteration, energy
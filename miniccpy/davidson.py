@@ -0,0 +1,130 @@
+import numpy as np
+
+# preconditioners accepted by the EOM Davidson kernels
+PRECONDITIONERS = ("fock", "hbar")
+
+def check_preconditioner(preconditioner):
+    """Raise a ValueError if `preconditioner` is not one of PRECONDITIONERS."""
+    if preconditioner not in PRECONDITIONERS:
+        raise ValueError(f"Unknown preconditioner '{preconditioner}'; choose one of {PRECONDITIONERS}")
+
+def olsen_correction(q_r, q_x, x):
+    """Apply the Olsen correction to a diagonally preconditioned residual.
+    With M = (omega - D), q_r = M^-1 * r, and q_x = M^-1 * x, the corrected
+    vector is
+        q = q_r - eps * q_x,    eps = < x | q_r > / < x | q_x >,
+    which is the diagonal approximation to the Jacobi-Davidson correction
+    equation. It removes the component of the update along the current Ritz
+    vector x that plain DPR reintroduces when D is a good approximation to H."""
+    eps = np.dot(x, q_r) / np.dot(x, q_x)
+    return q_r - eps * q_x
+
+def select_root(G, B, sigma, root_select="overlap", target_energy=None, R_guess=None):
+    """Solve the projected Davidson eigenproblem G and return the eigenvalue
+    and (real) subspace eigenvector of the root of interest. The basis vectors
+    and their sigma vectors are passed row-wise in B and sigma; only the first
+    G.shape[0] rows are used, and they are only read by the modes that need them.
+
+    Root selection modes (root_select):
+        "overlap"  : largest component along the first basis vector (default)
+        "energy"   : Ritz value closest to target_energy
+        "harmonic" : harmonic Ritz vector closest to target_energy, which is better
+                     suited to interior roots; the returned eigenvalue is the
+                     Rayleigh quotient of the harmonic Ritz vector
+        "guess"    : largest overlap with the full guess vector R_guess, which is
+                     unaffected by subspace restarts
+    """
+    curr_size = G.shape[0]
+
+    if root_select == "harmonic":
+        from scipy.linalg import eig
+        # W = (H - target)*V; solve W^T W y = nu W^T V y for the nu closest to 0
+        W = sigma[:curr_size, :] - target_energy * B[:curr_size, :]
+        nu, alpha_full = eig(np.dot(W, W.T), np.dot(W, B[:curr_size, :].T))
+        iselect = np.argmin(abs(nu))
+        alpha = np.real(alpha_full[:, iselect])
+        alpha /= np.linalg.norm(alpha)
+        omega = np.dot(alpha, np.dot(G, alpha))
+        return omega, alpha
+
+    e, alpha_full = np.linalg.eig(G)
+    if root_select == "energy":
+        iselect = np.argmin(abs(np.real(e) - target_energy))
+    elif root_select == "guess":
+        overlap = np.dot(alpha_full.T, np.dot(B[:curr_size, :], R_guess))
+        iselect = np.argmax(abs(overlap))
+    else:
+        # select root based on maximum overlap with initial guess
+        idx = np.argsort(abs(alpha_full[0, :]))
+        iselect = idx[-1]
+
+    alpha = np.real(alpha_full[:, iselect])
+    omega = np.real(e[iselect])
+    return omega, alpha
+
+def davidson_lowest_roots(matvec, diagonal, nroot, X0=None, convergence=1.0e-08, maxit=200, max_size=None):
+    """Obtain the `nroot` lowest eigenpairs of a (generally non-symmetric) matrix
+    that is only available through its diagonal and the function `matvec`, which
+    returns its action on a vector. The block Davidson iterations start from the
+    columns of X0 or, by default, from the unit vectors of the lowest diagonal
+    elements and use the diagonal preconditioner. Returns the (real) eigenvalues
+    in increasing order and the eigenvectors stored as columns."""
+    ndim = diagonal.shape[0]
+    nroot = min(nroot, ndim)
+    if max_size is None:
+        max_size = max(8 * nroot, 40)
+    max_size = min(max_size, ndim)
+
+    # initial orthonormal subspace
+    if X0 is None:
+        nstart = min(ndim, 2 * nroot)
+        X0 = np.zeros((ndim, nstart))
+        X0[np.argsort(diagonal)[:nstart], np.arange(nstart)] = 1.0
+    B, _ = np.linalg.qr(X0)
+    sigma = np.stack([matvec(B[:, k]) for k in range(B.shape[1])], axis=1)
+
+    for niter in range(maxit):
+        # Ritz pairs of the projected problem
+        G = np.dot(B.T, sigma)
+        e, alpha_full = np.linalg.eig(G)
+        idx = np.argsort(np.real(e))[:nroot]
+        omega = np.real(e[idx])
+        alpha = np.real(alpha_full[:, idx])
+        alpha /= np.linalg.norm(alpha, axis=0)
+        X = np.dot(B, alpha)
+        residual = np.dot(sigma, alpha) - X * omega
+        resnorm = np.linalg.norm(residual, axis=0)
+        if np.all(resnorm < convergence):
+            break
+        # collapse the subspace onto the current Ritz vectors
+        nnew = np.count_nonzero(resnorm >= convergence)
+        if B.shape[1] + nnew > max_size:
+            # orthonormalize within the subspace; this stays well defined when Ritz
+            # vectors coincide (e.g., the real parts of a complex-conjugate pair)
+            Q, _ = np.linalg.qr(alpha)
+            B = np.dot(B, Q)
+            sigma = np.dot(sigma, Q)
+        # add the preconditioned residuals of the unconverged roots
+        nadded = 0
+        for k in np.where(resnorm >= convergence)[0]:
+            if B.shape[1] >= ndim:
+                break
+            denom = omega[k] - diagonal
+            denom[abs(denom) < 1.0e-08] = 1.0e-08
+            q = residual[:, k] / denom
+            for _ in range(2):
+                q -= np.dot(B, np.dot(B.T, q))
+            qnorm = np.linalg.norm(q)
+            if qnorm < 1.0e-10:
+                continue
+            q /= qnorm
+            B = np.hstack((B, q[:, np.newaxis]))
+            sigma = np.hstack((sigma, matvec(q)[:, np.newaxis]))
+            nadded += 1
+        if nadded == 0:
+            print(f"   Davidson guess stagnated after {niter + 1} iterations (max |r| = {np.max(resnorm):.2e})")
+            break
+    else:
+        print(f"   Davidson guess did not converge in {maxit} iterations (max |r| = {np.max(resnorm):.2e})")
+
+    return omega, X
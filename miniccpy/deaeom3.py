@@ -2,8 +2,9 @@ import time
 import numpy as np
 import h5py
 from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root
 
-def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False):
+def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, root_select="overlap", target_energy=None):
     """
     Diagonalize the similarity-transformed CCSD Hamiltonian using the
     non-Hermitian Davidson algorithm for a specific root defined by an initial
@@ -41,6 +42,11 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
     restart_block = np.zeros((ndim, nrest))
     G = np.zeros((max_size, max_size))
 
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
     # Initial values
     B[0, :] = R
     sigma[0, :] = HR(R[:n1].reshape(nunocc, nunocc),
@@ -59,16 +65,8 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
         # solve projection subspace eigenproblem
         G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
         G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
-        e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
-
-        # select root based on maximum overlap with initial guess
-        idx = np.argsort(abs(alpha_full[0, :]))
-        iselect = idx[-1]
-
-        alpha = np.real(alpha_full[:, iselect])
-
-        # Get the eigenpair of interest
-        omega = np.real(e[iselect])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
         R = np.dot(B[:curr_size, :].T, alpha)
         restart_block[:, niter % nrest] = R
 
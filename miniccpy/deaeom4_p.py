@@ -0,0 +1,287 @@
+import time
+import numpy as np
+import h5py
+from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root
+from miniccpy.pspace import as_excitation_list, is_empty_pspace
+from miniccpy.lib import deaeom4_p
+
+def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, root_select="overlap", target_energy=None):
+    """
+    Diagonalize the similarity-transformed CCSD Hamiltonian using the
+    non-Hermitian Davidson algorithm for a specific root defined by an initial
+    guess vector. The 4p-2h part of R is restricted to the P space given by
+    r3_excitations.
+    """
+    from miniccpy.energy import calc_rel_dea
+
+    remove_file("eomcc-vectors.hdf5")
+    if out_of_core:
+        f = h5py.File("eomcc-vectors.hdf5", "w")
+
+    r3_excitations = as_excitation_list(r3_excitations)
+
+    # determine whether r3 updates should be done
+    do_r3 = True
+    if is_empty_pspace(r3_excitations):
+        do_r3 = False
+
+    t1, t2 = T
+
+    nunocc, nocc = t1.shape
+
+    # the lookup plan of build_hr3_p only depends on the (fixed) P space
+    plan = build_lookup_plan(r3_excitations, nocc, nunocc) if do_r3 else None
+
+    n1 = nunocc**2
+    n2 = nunocc**3 * nocc
+    n3 = r3_excitations.shape[0]
+    ndim = n1 + n2 + n3
+
+    if len(R0) <= ndim:
+        R = np.zeros(ndim)
+        R[:len(R0)] = R0
+    else:
+        raise ValueError("The initial guess has {} elements, but the DEA-EOMCC(4p-2h)(P) problem only has {}".format(len(R0), ndim))
+
+    # Allocate the B and sigma matrices
+    if out_of_core:
+        sigma = f.create_dataset("sigma", (max_size, ndim), dtype=np.float64)
+        B = f.create_dataset("bmatrix", (max_size, ndim), dtype=np.float64)
+    else:
+        sigma = np.zeros((max_size, ndim))
+        B = np.zeros((max_size, ndim))
+    restart_block = np.zeros((ndim, nrest))
+    G = np.zeros((max_size, max_size))
+
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
+    # Initial values
+    B[0, :] = R
+    sigma[0, :] = HR(R[:n1].reshape(nunocc, nunocc),
+                     R[n1:n1+n2].reshape(nunocc, nunocc, nunocc, nocc),
+                     R[n1+n2:], r3_excitations, plan,
+                     t1, t2, H1, H2, o, v, do_r3)
+
+    print("    ==> DEA-EOMCC(4p-2h)(P) iterations <==")
+    print("")
+    print("     Iter               Energy                 |dE|                 |dR|     Wall Time     Memory")
+    curr_size = 1
+    for niter in range(maxit):
+        tic = time.time()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem
+        G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
+        G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
+        R = np.dot(B[:curr_size, :].T, alpha)
+        restart_block[:, niter % nrest] = R
+
+        # calculate residual vector
+        residual = np.dot(sigma[:curr_size, :].T, alpha) - omega * R
+        res_norm = np.linalg.norm(residual)
+        delta_e = omega - omega_old
+
+        if res_norm < convergence and abs(delta_e) < convergence:
+            toc = time.time()
+            minutes, seconds = divmod(toc - tic, 60)
+            print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+            break
+
+        # update residual vector
+        q = update(residual[:n1].reshape(nunocc, nunocc),
+                   residual[n1:n1+n2].reshape(nunocc, nunocc, nunocc, nocc),
+                   residual[n1+n2:], r3_excitations,
+                   omega,
+                   H1[o, o], H1[v, v])
+        for p in range(curr_size):
+            b = B[p, :] / np.linalg.norm(B[p, :])
+            q -= np.dot(b, q) * b
+        q /= np.linalg.norm(q)
+
+        # If below maximum subspace size, expand the subspace
+        if curr_size < max_size:
+            B[curr_size, :] = q
+            sigma[curr_size, :] = HR(q[:n1].reshape(nunocc, nunocc),
+                                     q[n1:n1+n2].reshape(nunocc, nunocc, nunocc, nocc),
+                                     q[n1+n2:], r3_excitations, plan,
+                                     t1, t2, H1, H2, o, v, do_r3)
+        else:
+            # Basic restart - use the last approximation to the eigenvector
+            print("       **Deflating subspace**")
+            restart_block, _ = np.linalg.qr(restart_block)
+            for j in range(restart_block.shape[1]):
+                B[j, :] = restart_block[:, j]
+                sigma[j, :] = HR(restart_block[:n1, j].reshape(nunocc, nunocc),
+                                 restart_block[n1:n1+n2, j].reshape(nunocc, nunocc, nunocc, nocc),
+                                 restart_block[n1+n2:, j], r3_excitations, plan,
+                                 t1, t2, H1, H2, o, v, do_r3)
+            curr_size = restart_block.shape[1] - 1
+
+        curr_size += 1
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        print("DEA-EOMCC(4p-2h)(P) iterations did not converge")
+
+    # Save the final converged root in an excitation tuple
+    R = (R[:n1].reshape(nunocc, nunocc), R[n1:n1+n2].reshape(nunocc, nunocc, nunocc, nocc), R[n1+n2:])
+    # r0 for a root in DEA is 0 by definition
+    r0 = 0.0
+    # Compute relative excitation level diagnostic
+    rel = calc_rel_dea(R[0], R[1])
+    # remove the HDF5 file
+    remove_file("eomcc-vectors.hdf5")
+    return R, omega, r0, rel
+
+def build_lookup_plan(r3_excitations, no, nu):
+    """Build the lookup plan used by build_hr3_p for a fixed list of 4p-2h excitations.
+    Every term of HBar linear in r3 connects a determinant |abcdkl> only to determinants
+    that share with it either the four unoccupied indices (h1(oo), h2(oooo)), three
+    unoccupied and both occupied indices (h1(vv)), two unoccupied and both occupied
+    indices (h2(vvvv)), or three unoccupied and one occupied index (h2(voov)). Each
+    determinant is entered once for every way of dropping indices to form such a key,
+    together with the dropped indices and the sign of moving them to the front. The
+    entries are sorted by key, so that the kernel finds all kets connected to a bra by
+    a binary search over the distinct keys. In contrast to the dense index tables of the
+    DIP kernels, the size of the plan only grows with the number of P-space excitations.
+    It is returned as the tuple (keys, loc, det, ind, sgn) and is only valid for the list
+    in its current order."""
+    exc = as_excitation_list(r3_excitations).astype(np.int64) - 1
+    ndet = exc.shape[0]
+    det = np.arange(1, ndet + 1, dtype=np.int32)
+    v = [exc[:, p] for p in range(4)]
+    k, l = exc[:, 4], exc[:, 5]
+
+    keys, inds, sgns = [], [], []
+    def add(key, kind, ind1, ind2, sgn):
+        keys.append(4 * key + kind)
+        inds.append(np.stack((ind1 + 1, ind2 + 1)))
+        sgns.append(np.full(ndet, sgn, dtype=np.int8))
+
+    # h1(oo) and h2(oooo): all four unoccupied indices
+    add(((v[0] * nu + v[1]) * nu + v[2]) * nu + v[3], 0, k, l, 1)
+    for p in range(4):
+        kept = [v[q] for q in range(4) if q != p]
+        # h1(vv): drop one unoccupied index
+        add(((((kept[0] * nu + kept[1]) * nu + kept[2]) * no + k) * no) + l, 1, v[p], np.full(ndet, -1), (-1)**p)
+        # h2(voov): drop one unoccupied and one occupied index
+        add(((kept[0] * nu + kept[1]) * nu + kept[2]) * no + l, 3, v[p], k, (-1)**p)
+        add(((kept[0] * nu + kept[1]) * nu + kept[2]) * no + k, 3, v[p], l, -(-1)**p)
+    for p1 in range(4):
+        for p2 in range(p1 + 1, 4):
+            # h2(vvvv): drop a pair of unoccupied indices
+            kept = [v[q] for q in range(4) if q not in (p1, p2)]
+            add(((kept[0] * nu + kept[1]) * no + k) * no + l, 2, v[p1], v[p2], -(-1)**(p1 + p2))
+
+    keys = np.concatenate(keys)
+    order = np.argsort(keys, kind="stable")
+    unique_keys, starts = np.unique(keys[order], return_index=True)
+    loc = np.append(starts, len(keys)).astype(np.int32) + 1
+    dets = np.tile(det, len(inds))[order]
+    inds = np.asfortranarray(np.concatenate(inds, axis=1)[:, order].astype(np.int16))
+    sgns = np.concatenate(sgns)[order]
+    return unique_keys, loc, dets, inds, sgns
+
+def update(r1, r2, r3, r3_excitations, omega, h1_oo, h1_vv):
+    """Perform the diagonally preconditioned residual (DPR) update
+    to get the next correction vector."""
+    r1, r2, r3 = deaeom4_p.deaeom4_p.update_r(r1, r2, r3, r3_excitations, omega, h1_oo, h1_vv)
+    return np.hstack([r1.flatten(), r2.flatten(), r3])
+
+def HR(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v, do_r3):
+    """Compute the matrix-vector product H * R, where
+    H is the CCSD similarity-transformed Hamiltonian and R is
+    the DEA-EOMCC linear excitation operator."""
+    # update R1
+    HR1 = build_HR1(r1, r2, r3, r3_excitations, H1, H2, o, v)
+    # update R2
+    HR2 = build_HR2(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v)
+    # update R3
+    if do_r3:
+        HR3 = build_HR3(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v)
+    else:
+        HR3 = np.zeros(r3.shape[0])
+    return np.hstack([HR1.flatten(), HR2.flatten(), HR3])
+
+def build_HR1(r1, r2, r3, r3_excitations, H1, H2, o, v):
+    """Compute the projection of HR on 2p excitations
+        X[a, b] = < ab | [ HBar(CCSD) * (R1 + R2 + R3) ]_C | 0 >
+    """
+    X1 = np.einsum("ae,eb->ab", H1[v, v], r1, optimize=True)
+    X1 += 0.25 * np.einsum("abef,ef->ab", H2[v, v, v, v], r1, optimize=True)
+    X1 += 0.5 * np.einsum("me,abem->ab", H1[o, v], r2, optimize=True)
+    X1 += 0.5 * np.einsum("anef,ebfn->ab", H2[v, o, v, v], r2, optimize=True)
+    X1 = deaeom4_p.deaeom4_p.build_hr1(X1, r3, r3_excitations, H2[o, o, v, v])
+    # antisymmetrize A(ab)
+    X1 -= np.transpose(X1, (1, 0))
+    return X1
+
+def build_HR2(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v):
+    """Compute the projection of HR on 3p-1h excitations
+        X[a, b, c, k] = < kabc | [ HBar(CCSD) * (R1 + R2 + R3) ]_C | 0 >
+    """
+    I_vo = (
+            0.5 * np.einsum("amef,ef->am", H2[v, o, v, v], r1, optimize=True)
+            + 0.5 * np.einsum("mnef,bfem->bn", H2[o, o, v, v], r2, optimize=True)
+    )
+
+    X2 = -(3.0 / 6.0) * np.einsum("am,bcmk->abck", I_vo, t2, optimize=True)
+    X2 += (3.0 / 6.0) * np.einsum("cbke,ae->abck", H2[v, v, o, v], r1, optimize=True)
+    X2 -= (1.0 / 6.0) * np.einsum("mk,abcm->abck", H1[o, o], r2, optimize=True)
+    X2 += (3.0 / 6.0) * np.einsum("be,aeck->abck", H1[v, v], r2, optimize=True)
+    X2 += (3.0 / 12.0) * np.einsum("abef,efck->abck", H2[v, v, v, v], r2, optimize=True)
+    X2 += (3.0 / 6.0) * np.einsum("cmke,abem->abck", H2[v, o, o, v], r2, optimize=True)
+    # parts contracted with R(4p-2h)
+    X2 = deaeom4_p.deaeom4_p.build_hr2(X2, r3, r3_excitations, H1[o, v], H2[v, o, v, v], H2[o, o, o, v])
+    # antisymmetrize A(abc)
+    X2 -= np.transpose(X2, (0, 2, 1, 3)) # A(bc)
+    X2 -= np.transpose(X2, (1, 0, 2, 3)) + np.transpose(X2, (2, 1, 0, 3)) # A(a/bc)
+    return X2
+
+def build_HR3(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v):
+    """Compute the projection of HR on the P-space 4p-2h excitations
+        X[a, b, c, d, k, l] = < klabcd | [ HBar(CCSD) * (R1 + R2 + R3) ]_C | 0 >
+    """
+    # I(mn)
+    I_oo = (
+            # 1/2 h(mnef) r1(ef)
+            0.5 * np.einsum("mnef,ef->mn", H2[o, o, v, v], r1, optimize=True)
+    )
+    # I(abce)
+    I_vvvv = (
+          (3.0 / 6.0) * np.einsum("cmfe,abem->abcf", H2[v, o, v, v], r2, optimize=True)
+        + (3.0 / 6.0) * np.einsum("acef,eb->abcf", H2[v, v, v, v], r1, optimize=True)
+    )
+    I_vvvv = deaeom4_p.deaeom4_p.build_i_vvvv(I_vvvv, r3, r3_excitations, H2[o, o, v, v])
+    # antisymmetrize A(abc)
+    I_vvvv -= np.transpose(I_vvvv, (0, 2, 1, 3)) # A(bc)
+    I_vvvv -= np.transpose(I_vvvv, (1, 0, 2, 3)) + np.transpose(I_vvvv, (2, 1, 0, 3)) # A(a/bc)
+    # I(abmk)
+    I_vvoo = (
+        (1.0 / 2.0) * np.einsum("nmke,abem->abnk", H2[o, o, o, v], r2, optimize=True)
+        - np.einsum("bmje,ec->bcmj", H2[v, o, o, v], r1, optimize=True)
+        + 0.5 * np.einsum("amfe,fbek->abmk", H2[v, o, v, v], r2, optimize=True)
+        # contribution from 4-body HBar here
+        - (1.0 / 4.0) * np.einsum("mn,bcnk->bcmk", I_oo, t2, optimize=True) # an extra factor of 1/2 applied here compensate. Net weight should be (6.0 / 48.0) in final contraction.
+    )
+    I_vvoo = deaeom4_p.deaeom4_p.build_i_vvoo(I_vvoo, r3, r3_excitations, H2[o, o, v, v])
+    # antisymmetrize A(ab)
+    I_vvoo -= np.transpose(I_vvoo, (1, 0, 2, 3))
+
+    X3 = deaeom4_p.deaeom4_p.build_hr3_p(
+            r3, r3_excitations, *plan,
+            t2, r2,
+            H1[o, o], H1[v, v],
+            H2[v, v, o, v], H2[v, o, o, o], I_vvvv, I_vvoo,
+            H2[o, o, o, o], H2[v, o, o, v], H2[v, v, v, v].transpose(3, 2, 1, 0),
+    )
+    return X3
@@ -17,28 +17,57 @@ class DIIS:
         File name of Numpy memory map holding the previous vectors
     residfile : str (default="dt.npy")
         File name of Numpy memory map holding the previous residuals
+    dtype : numpy dtype (default=np.float64)
+        Floating-point type of the stored vectors and residuals
     """
-    def __init__(self, ndim, diis_size, out_of_core, vecfile="t.npy", residfile="dt.npy"):
+    def __init__(self, ndim, diis_size, out_of_core, vecfile="t.npy", residfile="dt.npy", dtype=np.float64):
 
         self.diis_size = diis_size
         self.out_of_core = out_of_core
         self.ndim = ndim
         self.vecfile = vecfile
         self.residfile = residfile
+        self.dtype = dtype
 
         remove_file("cc-diis-vectors.hdf5")
         if self.out_of_core:
-            f = h5py.File("cc-diis-vectors.hdf5", "w")
-            self.T_list = f.create_dataset("t-vectors", (self.diis_size, self.ndim), dtype=np.float64)
-            self.T_residuum_list = f.create_dataset("resid_vectors", (self.diis_size, self.ndim), dtype=np.float64)
+            self.file = h5py.File("cc-diis-vectors.hdf5", "w")
+            self.T_list = self.file.create_dataset("t-vectors", (self.diis_size, self.ndim), dtype=dtype)
+            self.T_residuum_list = self.file.create_dataset("resid_vectors", (self.diis_size, self.ndim), dtype=dtype)
         else:
-            self.T_list = np.zeros((self.diis_size, self.ndim))
-            self.T_residuum_list = np.zeros((self.diis_size, self.ndim))
+            self.T_list = np.zeros((self.diis_size, self.ndim), dtype=dtype)
+            self.T_residuum_list = np.zeros((self.diis_size, self.ndim), dtype=dtype)
+
+    def set_dtype(self, dtype):
+        """Convert the stored vectors and residuals to the floating-point type `dtype`."""
+        if dtype == self.dtype:
+            return
+        if self.out_of_core:
+            T_list, T_residuum_list = self.T_list[...], self.T_residuum_list[...]
+            del self.file["t-vectors"], self.file["resid_vectors"]
+            self.T_list = self.file.create_dataset("t-vectors", data=T_list.astype(dtype))
+            self.T_residuum_list = self.file.create_dataset("resid_vectors", data=T_residuum_list.astype(dtype))
+        else:
+            self.T_list = self.T_list.astype(dtype)
+            self.T_residuum_list = self.T_residuum_list.astype(dtype)
+        self.dtype = dtype
 
     def cleanup(self):
         if self.out_of_core:
             remove_file("cc-diis-vectors.hdf5")
             
+    def save(self, group):
+        """Write the stored vectors and residuals to the HDF5 group `group`."""
+        group.create_dataset("t-vectors", data=self.T_list[...])
+        group.create_dataset("resid_vectors", data=self.T_residuum_list[...])
+
+    def load(self, group):
+        """Restore the stored vectors and residuals from the HDF5 group `group`."""
+        if group["t-vectors"].shape != (self.diis_size, self.ndim):
+            raise ValueError("DIIS history in checkpoint has shape {}, expected {}".format(group["t-vectors"].shape, (self.diis_size, self.ndim)))
+        self.T_list[...] = group["t-vectors"][...]
+        self.T_residuum_list[...] = group["resid_vectors"][...]
+
     def push(self, T_tuple, T_residuum_tuple, iteration):
         self.T_list[iteration % self.diis_size, :] = np.hstack([t.flatten() for t in T_tuple])
         self.T_residuum_list[iteration % self.diis_size, :] = np.hstack([dt.flatten() for dt in T_residuum_tuple])
@@ -69,7 +98,7 @@ class DIIS:
         # B*c = rhs
         # c = B\rhs
         coeff = solve_gauss(B, rhs)
-        x_xtrap = np.zeros(self.ndim)
+        x_xtrap = np.zeros(self.ndim, dtype=self.dtype)
         for i in range(m):
             x_xtrap += coeff[i] * self.T_list[i, :]
 
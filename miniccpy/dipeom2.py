@@ -1,8 +1,9 @@
 import time
 import numpy as np
 from miniccpy.utilities import get_memory_usage
+from miniccpy.davidson import select_root
 
-def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False):
+def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, root_select="overlap", target_energy=None):
     """
     Diagonalize the similarity-transformed CCSD Hamiltonian using the
     non-Hermitian Davidson algorithm for a specific root defined by an initial
@@ -27,6 +28,11 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
     B = np.zeros((ndim, max_size))
     restart_block = np.zeros((ndim, nrest))
 
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
     # Initial values
     B[:, 0] = R
     sigma[:, 0] = HR(R.reshape(nocc, nocc), t1, t2, H1, H2, o, v)
@@ -42,14 +48,8 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
 
         # solve projection subspace eigenproblem
         G = np.dot(B[:, :curr_size].T, sigma[:, :curr_size])
-        e, alpha = np.linalg.eig(G)
-
-        # select root based on maximum overlap with initial guess
-        idx = np.argsort(abs(alpha[0, :]))
-        alpha = np.real(alpha[:, idx[-1]])
-
-        # Get the eigenpair of interest
-        omega = np.real(e[idx[-1]])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G, B.T, sigma.T, root_select, target_energy, R_guess)
         R = np.dot(B[:, :curr_size], alpha)
         restart_block[:, niter % nrest] = R
 
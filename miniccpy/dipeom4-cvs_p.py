@@ -2,6 +2,8 @@ import time
 import numpy as np
 import h5py
 from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root
+from miniccpy.pspace import as_excitation_list, is_empty_pspace, get_sort_plan
 from miniccpy.lib import dipeom4_p
 
 # IMPORTANT NOTE:
@@ -9,7 +11,7 @@ from miniccpy.lib import dipeom4_p
 # update and r3_amps/HR3 and r3_excitations will be out of alignment. This behavior
 # can be checked using the tmp variables.
 
-def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False):
+def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, root_select="overlap", target_energy=None):
     """
     Diagonalize the similarity-transformed CCSD Hamiltonian using the
     non-Hermitian Davidson algorithm for a specific root defined by an initial
@@ -21,14 +23,20 @@ def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxi
     if out_of_core:
         f = h5py.File("eomcc-vectors.hdf5", "w")
 
+    r3_excitations = as_excitation_list(r3_excitations)
+
     # determine whether r3 updates should be done
     do_r3 = True
-    if np.array_equal(r3_excitations[0, :], np.array([1., 1., 1., 1., 1., 1.])):
+    if is_empty_pspace(r3_excitations):
         do_r3 = False
 
     t1, t2 = T
 
     nunocc, nocc = t1.shape
+
+    # the sorting plan of build_hr4_p_cvs only depends on the (fixed) P space
+    plan = get_sort_plan(dipeom4_p.dipeom4_p, r3_excitations, nocc, nunocc) if do_r3 else None
+
     n1 = nocc**2
     n2 = nocc**3 * nunocc
     n3 = r3_excitations.shape[0]
@@ -49,11 +57,16 @@ def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxi
     restart_block = np.zeros((ndim, nrest))
     G = np.zeros((max_size, max_size))
 
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
     # Initial values
     B[0, :] = R
     sigma[0, :], r3_excitations = HR(R[:n1].reshape(nocc, nocc),
                      R[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
-                     R[n1+n2:], r3_excitations,
+                     R[n1+n2:], r3_excitations, plan,
                      t1, t2, H1, H2, o, v, do_r3,
                      cvsmin, cvsmax)
 
@@ -69,16 +82,8 @@ def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxi
         # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
         G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
         G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
-        e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
-
-        # select root based on maximum overlap with initial guess
-        idx = np.argsort(abs(alpha_full[0, :]))
-        iselect = idx[-1]
-
-        alpha = np.real(alpha_full[:, iselect])
-
-        # Get the eigenpair of interest
-        omega = np.real(e[iselect])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
         R = np.dot(B[:curr_size, :].T, alpha)
         restart_block[:, niter % nrest] = R
 
@@ -110,7 +115,7 @@ def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxi
             B[curr_size, :] = q
             sigma[curr_size, :], r3_excitations = HR(q[:n1].reshape(nocc, nocc),
                                      q[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
-                                     q[n1+n2:], r3_excitations,
+                                     q[n1+n2:], r3_excitations, plan,
                                      t1, t2, H1, H2, o, v, do_r3,
                                      cvsmin, cvsmax)
         else:
@@ -121,7 +126,7 @@ def kernel(R0, T, omega, H1, H2, o, v, cvsmin, cvsmax, r3_excitations=None, maxi
                 B[j, :] = restart_block[:, j]
                 sigma[j, :], r3_excitations = HR(restart_block[:n1, j].reshape(nocc, nocc),
                                  restart_block[n1:n1+n2, j].reshape(nocc, nocc, nunocc, nocc),
-                                 restart_block[n1+n2:, j], r3_excitations,
+                                 restart_block[n1+n2:, j], r3_excitations, plan,
                                  t1, t2, H1, H2, o, v, do_r3,
                                  cvsmin, cvsmax)
             curr_size = restart_block.shape[1] - 1
@@ -152,7 +157,7 @@ def update(r1, r2, r3, r3_excitations, omega, h1_oo, h1_vv, h2_oooo, h2_voov, h2
                                                   cvsmin + 1, cvsmax + 1)
     return np.hstack([r1.flatten(), r2.flatten(), r3])
 
-def HR(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, do_r3, cvsmin, cvsmax):
+def HR(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v, do_r3, cvsmin, cvsmax):
     """Compute the matrix-vector product H * R, where
     H is the CCSD similarity-transformed Hamiltonian and R is
     the DIP-EOMCC linear excitation operator."""
@@ -162,7 +167,7 @@ def HR(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, do_r3, cvsmin, cvsmax):
     HR2 = build_HR2(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v)
     # update R3
     if do_r3:
-        HR3, r3_excitations = build_HR3(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, cvsmin, cvsmax)
+        HR3, r3_excitations = build_HR3(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v, cvsmin, cvsmax)
     # Zero out elements that do not contain at least 1 core orbital
     # Core region is defined as cvsmin <= i <= cvsmax
     no, _, nu, _ = r2.shape
@@ -213,7 +218,7 @@ def build_HR2(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v):
     X2 = dipeom4_p.dipeom4_p.build_hr2(X2, r3, r3_excitations, H1[o, v], H2[v, o, v, v], H2[o, o, o, v])
     return X2
 
-def build_HR3(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, cvsmin, cvsmax):
+def build_HR3(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v, cvsmin, cvsmax):
     """Compute the projection of HR on 4h-2p excitations
         X[i, j, c, d, k, l] = < ijklcd | [ HBar(CCSD) * (R1 + R2 + R3) ]_C | 0 >
     """
@@ -239,7 +244,7 @@ def build_HR3(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, cvsmin, cvsmax):
     I_oovv = dipeom4_p.dipeom4_p.build_i_oovv(I_oovv, r3, r3_excitations, H2[o, o, v, v])
 
     X3, r3, r3_excitations = dipeom4_p.dipeom4_p.build_hr4_p_cvs(
-            r3, r3_excitations,
+            r3, r3_excitations, *plan,
             t2, r2,
             H1[o, o], H1[v, v],
             H2[v, v, o, v], H2[v, o, o, o], I_oooo, I_oovv,
@@ -2,6 +2,8 @@ import time
 import numpy as np
 import h5py
 from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root, olsen_correction, check_preconditioner
+from miniccpy.pspace import as_excitation_list, is_empty_pspace, get_sort_plan
 from miniccpy.lib import dipeom4_p
 
 # IMPORTANT NOTE:
@@ -9,26 +11,38 @@ from miniccpy.lib import dipeom4_p
 # update and r3_amps/HR3 and r3_excitations will be out of alignment. This behavior
 # can be checked using the tmp variables.
 
-def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False):
+def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, preconditioner="fock", olsen=False, root_select="overlap", target_energy=None, stats=None):
     """
     Diagonalize the similarity-transformed CCSD Hamiltonian using the
     non-Hermitian Davidson algorithm for a specific root defined by an initial
-    guess vector.
+    guess vector. Use preconditioner="hbar" to precondition with the diagonal
+    of the 2h, 3h-1p, and P-space 4h-2p blocks of HBar and olsen=True to
+    apply the Olsen correction to each new direction.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"].
     """
     from miniccpy.energy import calc_rel_dip
+    from miniccpy.hbar_diagonal import dipeom4_hbar_diagonal
+
+    check_preconditioner(preconditioner)
 
     remove_file("eomcc-vectors.hdf5")
     if out_of_core:
         f = h5py.File("eomcc-vectors.hdf5", "w")
 
+    r3_excitations = as_excitation_list(r3_excitations)
+
     # determine whether r3 updates should be done
     do_r3 = True
-    if np.array_equal(r3_excitations[0, :], np.array([1., 1., 1., 1., 1., 1.])):
+    if is_empty_pspace(r3_excitations):
         do_r3 = False
 
     t1, t2 = T
 
     nunocc, nocc = t1.shape
+
+    # the sorting plan of build_hr4_p only depends on the (fixed) P space
+    plan = get_sort_plan(dipeom4_p.dipeom4_p, r3_excitations, nocc, nunocc) if do_r3 else None
+
     n1 = nocc**2
     n2 = nocc**3 * nunocc
     n3 = r3_excitations.shape[0]
@@ -49,11 +63,20 @@ def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergenc
     restart_block = np.zeros((ndim, nrest))
     G = np.zeros((max_size, max_size))
 
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
+    # HBar diagonal in the ordering of r3_excitations, which build_hr4_p restores on exit
+    if preconditioner == "hbar":
+        d_ij, d_ijck, d_abijkl = dipeom4_hbar_diagonal(H1, H2, o, v, r3_excitations)
+
     # Initial values
     B[0, :] = R
     sigma[0, :], r3_excitations = HR(R[:n1].reshape(nocc, nocc),
                      R[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
-                     R[n1+n2:], r3_excitations,
+                     R[n1+n2:], r3_excitations, plan,
                      t1, t2, H1, H2, o, v, do_r3)
 
     print("    ==> DIP-EOMCC(4h-2p)(P) iterations <==")
@@ -68,16 +91,8 @@ def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergenc
         # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
         G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
         G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
-        e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
-
-        # select root based on maximum overlap with initial guess
-        idx = np.argsort(abs(alpha_full[0, :]))
-        iselect = idx[-1]
-
-        alpha = np.real(alpha_full[:, iselect])
-
-        # Get the eigenpair of interest
-        omega = np.real(e[iselect])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
         R = np.dot(B[:curr_size, :].T, alpha)
         restart_block[:, niter % nrest] = R
 
@@ -93,11 +108,32 @@ def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergenc
             break
 
         # update residual vector
-        q = update(residual[:n1].reshape(nocc, nocc),
-                   residual[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
-                   residual[n1+n2:], r3_excitations,
-                   omega,
-                   H1[o, o], H1[v, v])
+        if preconditioner == "hbar":
+            q = update_hbar(residual[:n1].reshape(nocc, nocc),
+                            residual[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
+                            residual[n1+n2:],
+                            omega,
+                            d_ij, d_ijck, d_abijkl)
+            if olsen:
+                q_x = update_hbar(R[:n1].reshape(nocc, nocc).copy(),
+                                  R[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc).copy(),
+                                  R[n1+n2:].copy(),
+                                  omega,
+                                  d_ij, d_ijck, d_abijkl)
+                q = olsen_correction(q, q_x, R)
+        else:
+            q = update(residual[:n1].reshape(nocc, nocc),
+                       residual[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
+                       residual[n1+n2:], r3_excitations,
+                       omega,
+                       H1[o, o], H1[v, v])
+            if olsen:
+                q_x = update(R[:n1].reshape(nocc, nocc).copy(),
+                             R[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc).copy(),
+                             R[n1+n2:].copy(), r3_excitations,
+                             omega,
+                             H1[o, o], H1[v, v])
+                q = olsen_correction(q, q_x, R)
         for p in range(curr_size):
             b = B[p, :] / np.linalg.norm(B[p, :])
             q -= np.dot(b, q) * b
@@ -108,7 +144,7 @@ def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergenc
             B[curr_size, :] = q
             sigma[curr_size, :], r3_excitations = HR(q[:n1].reshape(nocc, nocc),
                                      q[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc),
-                                     q[n1+n2:], r3_excitations,
+                                     q[n1+n2:], r3_excitations, plan,
                                      t1, t2, H1, H2, o, v, do_r3)
         else:
             # Basic restart - use the last approximation to the eigenvector
@@ -118,7 +154,7 @@ def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergenc
                 B[j, :] = restart_block[:, j]
                 sigma[j, :], r3_excitations = HR(restart_block[:n1, j].reshape(nocc, nocc),
                                  restart_block[n1:n1+n2, j].reshape(nocc, nocc, nunocc, nocc),
-                                 restart_block[n1+n2:, j], r3_excitations,
+                                 restart_block[n1+n2:, j], r3_excitations, plan,
                                  t1, t2, H1, H2, o, v, do_r3)
             curr_size = restart_block.shape[1] - 1
 
@@ -129,6 +165,8 @@ def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergenc
         print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
     else:
         print("DIP-EOMCC(4h-2p)(P) iterations did not converge")
+    if stats is not None:
+        stats["niter"] = niter + 1
 
     # Save the final converged root in an excitation tuple
     R = (R[:n1].reshape(nocc, nocc), R[n1:n1+n2].reshape(nocc, nocc, nunocc, nocc), R[n1+n2:])
@@ -146,7 +184,15 @@ def update(r1, r2, r3, r3_excitations, omega, h1_oo, h1_vv):
     r1, r2, r3 = dipeom4_p.dipeom4_p.update_r(r1, r2, r3, r3_excitations, omega, h1_oo, h1_vv)
     return np.hstack([r1.flatten(), r2.flatten(), r3])
 
-def HR(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, do_r3):
+def update_hbar(r1, r2, r3, omega, d_ij, d_ijck, d_abijkl):
+    """Perform the diagonally preconditioned residual (DPR) update using
+    the diagonal of HBar, including the P-space 4h-2p part."""
+    r1 /= (omega - d_ij)
+    r2 /= (omega - d_ijck)
+    r3 /= (omega - d_abijkl)
+    return np.hstack([r1.flatten(), r2.flatten(), r3])
+
+def HR(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v, do_r3):
     """Compute the matrix-vector product H * R, where
     H is the CCSD similarity-transformed Hamiltonian and R is
     the DIP-EOMCC linear excitation operator."""
@@ -156,7 +202,7 @@ def HR(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v, do_r3):
     HR2 = build_HR2(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v)
     # update R3
     if do_r3:
-        HR3, r3_excitations = build_HR3(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v)
+        HR3, r3_excitations = build_HR3(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v)
     return np.hstack([HR1.flatten(), HR2.flatten(), HR3]), r3_excitations
 
 def build_HR1(r1, r2, r3, r3_excitations, H1, H2, o, v):
@@ -188,7 +234,7 @@ def build_HR2(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v):
     X2 = dipeom4_p.dipeom4_p.build_hr2(X2, r3, r3_excitations, H1[o, v], H2[v, o, v, v], H2[o, o, o, v])
     return X2
 
-def build_HR3(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v):
+def build_HR3(r1, r2, r3, r3_excitations, plan, t1, t2, H1, H2, o, v):
     """Compute the projection of HR on 4h-2p excitations
         X[i, j, c, d, k, l] = < ijklcd | [ HBar(CCSD) * (R1 + R2 + R3) ]_C | 0 >
     """
@@ -214,7 +260,7 @@ def build_HR3(r1, r2, r3, r3_excitations, t1, t2, H1, H2, o, v):
     I_oovv = dipeom4_p.dipeom4_p.build_i_oovv(I_oovv, r3, r3_excitations, H2[o, o, v, v])
 
     X3, r3, r3_excitations = dipeom4_p.dipeom4_p.build_hr4_p(
-            r3, r3_excitations,
+            r3, r3_excitations, *plan,
             t2, r2,
             H1[o, o], H1[v, v],
             H2[v, v, o, v], H2[v, o, o, o], I_oooo, I_oovv,
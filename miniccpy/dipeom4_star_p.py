@@ -2,6 +2,8 @@ import time
 import numpy as np
 import h5py
 from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root
+from miniccpy.pspace import as_excitation_list, is_empty_pspace
 from miniccpy.lib import dipeom4_star_p
 
 # IMPORTANT NOTE:
@@ -9,7 +11,7 @@ from miniccpy.lib import dipeom4_star_p
 # update and r3_amps/HR3 and r3_excitations will be out of alignment. This behavior
 # can be checked using the tmp variables.
 
-def kernel(R0, T, omega, fock, g, H1, H2, o, v, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False):
+def kernel(R0, T, omega, fock, g, H1, H2, o, v, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, root_select="overlap", target_energy=None):
     """
     Diagonalize the similarity-transformed CCSD Hamiltonian using the
     non-Hermitian Davidson algorithm for a specific root defined by an initial
@@ -21,9 +23,11 @@ def kernel(R0, T, omega, fock, g, H1, H2, o, v, r3_excitations=None, maxit=80, c
     if out_of_core:
         f = h5py.File("eomcc-vectors.hdf5", "w")
 
+    r3_excitations = as_excitation_list(r3_excitations)
+
     # determine whether r3 updates should be done
     do_r3 = True
-    if np.array_equal(r3_excitations[0, :], np.array([1., 1., 1., 1., 1., 1.])):
+    if is_empty_pspace(r3_excitations):
         do_r3 = False
 
     t1, t2 = T
@@ -49,6 +53,11 @@ def kernel(R0, T, omega, fock, g, H1, H2, o, v, r3_excitations=None, maxit=80, c
     restart_block = np.zeros((ndim, nrest))
     G = np.zeros((max_size, max_size))
 
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
     # Initial values
     B[0, :] = R
     sigma[0, :], r3_excitations = HR(R[:n1].reshape(nocc, nocc),
@@ -68,16 +77,8 @@ def kernel(R0, T, omega, fock, g, H1, H2, o, v, r3_excitations=None, maxit=80, c
         # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
         G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
         G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
-        e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
-
-        # select root based on maximum overlap with initial guess
-        idx = np.argsort(abs(alpha_full[0, :]))
-        iselect = idx[-1]
-
-        alpha = np.real(alpha_full[:, iselect])
-
-        # Get the eigenpair of interest
-        omega = np.real(e[iselect])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
         R = np.dot(B[:curr_size, :].T, alpha)
         restart_block[:, niter % nrest] = R
 
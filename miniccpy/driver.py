@@ -3,14 +3,23 @@ import numpy as np
 from importlib import import_module
 from os.path import dirname, basename, isfile, join
 import glob
-from miniccpy.utilities import get_memory_usage
+from miniccpy.utilities import get_memory_usage, set_fortran_threads, get_fortran_threads
 
 # Obtain all modules in Miniccpy
 modules = glob.glob(join(dirname(__file__), "*.py"))
 __all__ = [ basename(f)[:-3] for f in modules if isfile(f) and not f.endswith('__init__.py')]
 MODULES = [module for module in __all__]
 # Manually specify those modules that are RHF non-orthogonally spin-adapted codes
-RHF_MODULES = ["rlccd", "rccd", "rccsd", "rccsdt", "left_rccsd", "left_eomrccsd", "eomrccsd", "rcc3", "rccsdt", "eomrccsdt"]
+RHF_MODULES = ["rlccd", "rccd", "rccsd", "rccsdpt", "rcrcc23", "rcreomcc23", "rccsdt", "left_rccsd", "left_eomrccsd", "eomrccsd", "rcc3", "rccsdt", "eomrccsdt", "ripeom2", "reaeom2", "left_ripeom2", "left_reaeom2", "eomrccsd_triplet", "left_eomrccsd_triplet", "rccsd_pno"]
+
+# Modules working with point-group symmetry-blocked tensors, which take the orbital irreps `orbsym`
+SYMMETRY_MODULES = ["ccsd_sym"]
+
+# Ground-state modules supporting checkpoint/restart and returning unconverged amplitudes
+CHECKPOINT_MODULES = ["ccsd", "rccsd", "ccsdt", "rccsdt", "ccsdtq"]
+
+# Modules whose kernels report their number of iterations through the `stats` argument
+ITERATION_STATS_MODULES = ["ccsd", "rccsd", "left_ccsd", "left_rccsd", "eomccsd", "eomrccsd", "eomccsdt", "eomccsd_sym", "dipeom4_p", "eomccsdt_p"]
 
 # amplitude printing threshold
 PRINT_THRESH = 0.025
@@ -39,10 +48,14 @@ def run_scf_gamess(fcidump, nelectron, norbitals, nfrozen=0, rhf=False):
 def run_scf(geometry, basis, nfrozen=0, multiplicity=1, charge=0, 
             maxit=200, level_shift=0.0, damp=0.0, convergence=1.0e-10,
             symmetry=None, cartesian=False, unit="Bohr", uhf=False, rhf=False,
-            return_orbsym=False, x2c=False, multipole=0):
+            return_orbsym=False, x2c=False, multipole=0, dm0=None, mo_reference=None, return_meanfield=False):
     """Run the ROHF calculation using PySCF and obtain the molecular
     orbital integrals in normal-ordered form as well as the occupied/
-    unoccupied slicing arrays for correlated calculations."""
+    unoccupied slicing arrays for correlated calculations. The SCF is started
+    from the density matrix `dm0`, if given. With mo_reference = (mol, mo_coeff)
+    from a previous calculation (e.g., a neighboring geometry), the MOs are reordered
+    and their phases fixed to maximize the overlap with the reference MOs. With
+    `return_meanfield`, the PySCF mean-field object is appended to the returned values."""
     from pyscf import gto, scf, symm
     from miniccpy.printing import print_system_information, print_custom_system_information
     from miniccpy.integrals import get_integrals_from_pyscf, get_integrals_from_pyscf_uhf, get_integrals_from_pyscf_rhf
@@ -83,7 +96,14 @@ def run_scf(geometry, basis, nfrozen=0, multiplicity=1, charge=0,
     mf.damp = damp
     mf.max_cycle = maxit
     mf.conv_tol = convergence
-    mf.kernel()
+    mf.kernel(dm0=dm0)
+
+    # Align the MOs with those of the reference calculation
+    if mo_reference is not None:
+        from miniccpy.scan import align_orbitals
+        if uhf:
+            raise ValueError("MO alignment is not implemented for UHF references")
+        mf.mo_coeff, mf.mo_energy = align_orbitals(*mo_reference, mol, mf.mo_coeff, mf.mo_energy, mf.mo_occ)
 
     # Get list of orbital symmetry labels
     orbsym = [x.upper() for x in symm.label_orb_symm(mol, mol.irrep_name, mol.symm_orb, mf.mo_coeff)]
@@ -112,17 +132,42 @@ def run_scf(geometry, basis, nfrozen=0, multiplicity=1, charge=0,
     else:
         print_system_information(mf, nfrozen, e_hf)
 
+    output = (fock, e2int, e_hf, corr_occ, corr_unocc)
     if multipole != 0:
         mu = get_multipole_integrals(multipole, mol, mf) 
-        if return_orbsym:
-            return fock, e2int, e_hf, corr_occ, corr_unocc, mu, sporbsym[2*nfrozen:]
-        else:
-            return fock, e2int, e_hf, corr_occ, corr_unocc, mu
-    else:
-        if return_orbsym:
-            return fock, e2int, e_hf, corr_occ, corr_unocc, sporbsym[2*nfrozen:]
-        else:
-            return fock, e2int, e_hf, corr_occ, corr_unocc
+        output += (mu,)
+    if return_orbsym:
+        output += (sporbsym[2*nfrozen:],)
+    if return_meanfield:
+        output += (mf,)
+    return output
+
+def run_fno(fock, g, o, v, threshold=1.0e-05, rhf=False):
+    """Truncate the virtual orbital space of the integrals returned by `run_scf`
+    using MP2 frozen natural orbitals (FNOs) with occupation numbers of at least
+    `threshold`. Returns the Fock matrix, two-electron integrals, and slicing arrays
+    in the truncated basis, along with the MP2 truncation correction
+    E(MP2, full) - E(MP2, FNO), which may be added to correlation energies computed
+    in the FNO basis."""
+    from miniccpy.fno import kernel
+
+    tic = time.time()
+    nu_full = fock[v, v].shape[0]
+    fock, g, o, v, occupation, de_mp2 = kernel(fock, g, o, v, threshold=threshold, rhf=rhf)
+    nu = fock[v, v].shape[0]
+    toc = time.time()
+    minutes, seconds = divmod(toc - tic, 60)
+
+    print("    ==> Frozen natural orbital truncation <==")
+    print("    Occupation threshold = {:.2e}".format(threshold))
+    print("    Number of unoccupied orbitals = {} (full) -> {} (FNO)".format(nu_full, nu))
+    print("    Largest discarded occupation = {: .6e}".format(max(occupation[occupation < threshold], default=0.0)))
+    print("    MP2 truncation correction: {: 20.12f}".format(de_mp2))
+    print("")
+    print("    FNO truncation completed in {:.2f}m {:.2f}s".format(minutes, seconds))
+    print(f"    Memory usage: {get_memory_usage()} MB")
+    print("")
+    return fock, g, o, v, de_mp2
 
 def run_mpn_calc(fock, g, o, v, method):
     """Compute the Moller-Plesett energy correction specified
@@ -175,8 +220,25 @@ def run_cmx_calc(T, L, Ecorr, H1, H2, o, v, method):
     print("")
     return delta_corr
 
-def run_cc_calc(fock, g, o, v, method, maxit=80, convergence=1.0e-07, energy_shift=0.0, diis_size=6, n_start_diis=0, out_of_core=False, use_quasi=False, t3_excitations=None):
-    """Run the ground-state CC calculation specified by `method`."""
+def run_cc_calc(fock, g, o, v, method, maxit=80, convergence=1.0e-07, energy_shift=0.0, diis_size=6, n_start_diis=0, out_of_core=False, use_quasi=False, t3_excitations=None,
+                orbsym=None, point_group="C1", pno_threshold=None, checkpoint=None, checkpoint_interval=1, restart=None,
+                return_unconverged=False, T0=None, mixed_precision_threshold=None, stats=None):
+    """Run the ground-state CC calculation specified by `method`. The spinorbital
+    irrep labels `orbsym` in the Abelian group `point_group` are passed to the
+    symmetry-blocked methods (e.g., method="ccsd_sym"), and the PNO occupation
+    threshold `pno_threshold` is passed to the PNO-based methods (e.g., method="rccsd_pno").
+    For the methods supporting it (ccsd, rccsd, ccsdt, rccsdt, ccsdtq), T and the DIIS
+    history are written to the HDF5 file `checkpoint` every `checkpoint_interval`
+    iterations, a previous solve is resumed from the checkpoint file `restart`, and
+    `return_unconverged=True` returns the amplitudes with the smallest residual
+    instead of raising an error when `maxit` is reached. The amplitudes are initialized
+    from the starting guess `T0`, if given, which is either "mp2" or a tuple of T amplitudes
+    from a lower- or higher-order calculation on the same integrals (e.g., CCSD T for CCSDT,
+    where T3 is then estimated using the CC3 approximation). For ccsd and ccsdt, setting
+    `mixed_precision_threshold` runs the iterations in single precision until the residual
+    norm drops below it or stagnates, after which they continue in double precision. For the methods
+    in ITERATION_STATS_MODULES, the number of iterations is stored in stats["niter"] if a
+    dictionary `stats` is given."""
     from miniccpy.printing import print_amplitudes
 
     # check if requested CC calculation is implemented in modules
@@ -184,6 +246,8 @@ def run_cc_calc(fock, g, o, v, method, maxit=80, convergence=1.0e-07, energy_shi
         raise NotImplementedError(
             "{} not implemented".format(method)
         )
+    if orbsym is not None and method not in SYMMETRY_MODULES:
+        raise ValueError("Orbital irreps (orbsym) are only used by the symmetry-blocked methods {}, not {}".format(SYMMETRY_MODULES, method))
     if method in RHF_MODULES:
         flag_rhf = True
     else:
@@ -197,11 +261,33 @@ def run_cc_calc(fock, g, o, v, method, maxit=80, convergence=1.0e-07, energy_shi
         print("Turning off DIIS acceleration for small system")
         diis_size = 1000 
 
+    # checkpoint/restart, starting guess, and mixed-precision options are only passed to the kernels when requested
+    if checkpoint is not None or restart is not None or return_unconverged:
+        if method not in CHECKPOINT_MODULES:
+            raise ValueError("Checkpoint/restart options are only supported by {}, not {}".format(CHECKPOINT_MODULES, method))
+        kernel_options = {"checkpoint": checkpoint, "checkpoint_interval": checkpoint_interval, "restart": restart,
+                           "return_unconverged": return_unconverged}
+    else:
+        kernel_options = {}
+    if T0 is not None:
+        from miniccpy.warm_start import get_initial_amplitudes
+        kernel_options["T0"] = get_initial_amplitudes(T0, method, fock, g, o, v, rhf=flag_rhf, t3_excitations=t3_excitations)
+    if mixed_precision_threshold is not None:
+        kernel_options["mixed_precision_threshold"] = mixed_precision_threshold
+    if stats is not None:
+        if method not in ITERATION_STATS_MODULES:
+            raise ValueError("Iteration counts are not available for {}".format(method))
+        kernel_options["stats"] = stats
+
     tic = time.time()
     if t3_excitations is not None:
-        T, e_corr = calculation(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, t3_excitations=t3_excitations)
+        T, e_corr = calculation(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, t3_excitations=t3_excitations, **kernel_options)
+    elif orbsym is not None:
+        T, e_corr = calculation(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, orbsym=orbsym, point_group=point_group, **kernel_options)
+    elif pno_threshold is not None:
+        T, e_corr = calculation(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, pno_threshold=pno_threshold, **kernel_options)
     else:
-        T, e_corr = calculation(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi)
+        T, e_corr = calculation(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, **kernel_options)
     toc = time.time()
 
     minutes, seconds = divmod(toc - tic, 60)
@@ -219,8 +305,11 @@ def run_cc_calc(fock, g, o, v, method, maxit=80, convergence=1.0e-07, energy_shi
 
     return T, e_corr
 
-def run_leftcc_calc(T, fock, H1, H2, o, v, method, maxit=80, convergence=1.0e-07, energy_shift=0.0, diis_size=6, n_start_diis=0, out_of_core=False, davidson=False, g=None):
-    """Run the ground-state left-CC calculation specified by `method`."""
+def run_leftcc_calc(T, fock, H1, H2, o, v, method, maxit=80, convergence=1.0e-07, energy_shift=0.0, diis_size=6, n_start_diis=0, out_of_core=False, davidson=False, g=None,
+                    L0=None, stats=None):
+    """Run the ground-state left-CC calculation specified by `method`. For left_ccsd and
+    left_rccsd, the L amplitudes are initialized from the starting guess `L0`, if given,
+    and the number of iterations is stored in stats["niter"] if a dictionary `stats` is given."""
     from miniccpy.printing import print_amplitudes
 
     # check if requested left-CC calculation is implemented in modules
@@ -239,12 +328,20 @@ def run_leftcc_calc(T, fock, H1, H2, o, v, method, maxit=80, convergence=1.0e-07
     if H1.shape[0] <= 4: 
         print("Turning off DIIS acceleration for small system")
         diis_size = 1000 
+    # starting guess and iteration counts are only passed to the kernels when requested
+    kernel_options = {}
+    if L0 is not None:
+        kernel_options["L0"] = L0
+    if stats is not None:
+        if method not in ITERATION_STATS_MODULES:
+            raise ValueError("Iteration counts are not available for {}".format(method))
+        kernel_options["stats"] = stats
     # Run the linear equation solver
     tic = time.time()
     if method in ["left_cc3", "left_cc3-full"]:
         L, omega = calculation(T, fock, g, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core)
     else:
-        L, omega = calculation(T, fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core)
+        L, omega = calculation(T, fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, **kernel_options)
     toc = time.time()
 
     minutes, seconds = divmod(toc - tic, 60)
@@ -264,6 +361,8 @@ def get_hbar(T, fock, g, o, v, method, **kwargs):
     """Obtain the similarity-transformed Hamiltonian Hbar corresponding
     to the level of ground-state CC theory specified by `method`."""
 
+    if kwargs.get("orbsym") is not None and method.lower() not in SYMMETRY_MODULES:
+        raise ValueError("Orbital irreps (orbsym) are only used by the symmetry-blocked methods {}, not {}".format(SYMMETRY_MODULES, method))
     # import the specific CC method module and get its update function
     mod = import_module("miniccpy.hbar")
     hbar_builder = getattr(mod, 'build_hbar_'+method.lower())
@@ -272,10 +371,16 @@ def get_hbar(T, fock, g, o, v, method, **kwargs):
 
     return H1, H2
 
-def run_guess(H1, H2, o, v, nroot, method, nacto=0, nactu=0, print_threshold=PRINT_THRESH, mult=-1, cvsmin=-1, cvsmax=-1):
-    """Run the CIS initial guess to obtain starting vectors for the EOMCC iterations."""
+def run_guess(H1, H2, o, v, nroot, method, nacto=0, nactu=0, print_threshold=PRINT_THRESH, mult=-1, cvsmin=-1, cvsmax=-1, solver="auto",
+              orbsym=None, point_group="C1", target_irrep=None):
+    """Run the CIS initial guess to obtain starting vectors for the EOMCC iterations.
+    For the cis, cisd, rcis, and rcisd guesses, `solver` selects between the dense
+    eigensolver ("dense"), the matrix-free Davidson solver ("davidson"), or the
+    choice based on the dimension of the guess space ("auto"). Given the orbital
+    irrep labels `orbsym` in the Abelian group `point_group`, the guesses are built
+    from the configurations of symmetry `target_irrep` only."""
     from miniccpy.initial_guess import cis_guess, rcis_guess, rcisd_guess, cisd_guess, eacis_guess, ipcis_guess, deacis_guess, dipcis_guess, dipcis_cvs_guess, dipcisd_guess, dipcisd_cvs_guess
-    from miniccpy.printing import print_cis_vector, print_rcis_vector, print_rcisd_vector, print_cisd_vector, print_1p_vector, print_1h_vector, print_2p_vector, print_2h_vector, print_dip_amplitudes
+    from miniccpy.printing import print_cis_vector, print_rcis_vector, print_rcisd_vector, print_cisd_vector, print_1p_vector, print_1h_vector, print_r1p_vector, print_r1h_vector, print_rhf_triplet_amplitudes, print_2p_vector, print_2h_vector, print_dip_amplitudes
 
     no, nu = H1[o, v].shape
 
@@ -283,37 +388,43 @@ def run_guess(H1, H2, o, v, nroot, method, nacto=0, nactu=0, print_threshold=PRI
     tic = time.perf_counter()
     if method == "cisd":
         nroot = min(nroot, no * nu + int(nacto*(nacto - 1)/2 * nactu*(nactu - 1)/2))
-        R0, omega0 = cisd_guess(H1, H2, o, v, nroot, nacto, nactu, mult)
+        R0, omega0 = cisd_guess(H1, H2, o, v, nroot, nacto, nactu, mult, solver=solver, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
     elif method == "cis":
         nroot = min(nroot, no * nu)
-        R0, omega0 = cis_guess(H1, H2, o, v, nroot, mult)
+        R0, omega0 = cis_guess(H1, H2, o, v, nroot, mult, solver=solver, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
     elif method == "rcis":
         nroot = min(nroot, no * nu)
-        R0, omega0 = rcis_guess(H1, H2, o, v, nroot, mult=1)
+        R0, omega0 = rcis_guess(H1, H2, o, v, nroot, mult=max(mult, 1), solver=solver, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
     elif method == "rcisd":
         nroot = min(nroot, no * nu + int(nacto*(nacto - 1)/2 * nactu*(nactu - 1)/2))
-        R0, omega0 = rcisd_guess(H1, H2, o, v, nroot, nacto, nactu, mult=1)
+        R0, omega0 = rcisd_guess(H1, H2, o, v, nroot, nacto, nactu, mult=max(mult, 1), solver=solver, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
     elif method == "eacis":
         nroot = min(nroot, nu)
-        R0, omega0 = eacis_guess(H1, H2, o, v, nroot)
+        R0, omega0 = eacis_guess(H1, H2, o, v, nroot, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
+    elif method == "reacis":
+        nroot = min(nroot, nu)
+        R0, omega0 = eacis_guess(H1, H2, o, v, nroot, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep, rhf=True)
     elif method == "deacis":
         nroot = min(nroot, nu**2)
-        R0, omega0 = deacis_guess(H1, H2, o, v, nroot, nactu)
+        R0, omega0 = deacis_guess(H1, H2, o, v, nroot, nactu, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
     elif method == "ipcis":
         nroot = min(nroot, no)
-        R0, omega0 = ipcis_guess(H1, H2, o, v, nroot)
+        R0, omega0 = ipcis_guess(H1, H2, o, v, nroot, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
+    elif method == "ripcis":
+        nroot = min(nroot, no)
+        R0, omega0 = ipcis_guess(H1, H2, o, v, nroot, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep, rhf=True)
     elif method == "dipcis":
         nroot = min(nroot, no**2)
         if cvsmin != -1 and cvsmax != -1:
-            R0, omega0 = dipcis_cvs_guess(H1, H2, o, v, nroot, cvsmin, cvsmax)
+            R0, omega0 = dipcis_cvs_guess(H1, H2, o, v, nroot, cvsmin, cvsmax, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
         else:
-            R0, omega0 = dipcis_guess(H1, H2, o, v, nroot)
+            R0, omega0 = dipcis_guess(H1, H2, o, v, nroot, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
     elif method == "dipcisd":
         nroot = min(nroot, int(no*(no - 1)/2 + nacto*(nacto - 1)*(nacto - 2)/6 * nactu))
         if cvsmin != -1 and cvsmax != -1:
-            R0, omega0 = dipcisd_cvs_guess(H1, H2, o, v, nroot, cvsmin, cvsmax, nacto, nactu)
+            R0, omega0 = dipcisd_cvs_guess(H1, H2, o, v, nroot, cvsmin, cvsmax, nacto, nactu, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
         else:
-            R0, omega0 = dipcisd_guess(H1, H2, o, v, nroot, nacto, nactu)
+            R0, omega0 = dipcisd_guess(H1, H2, o, v, nroot, nacto, nactu, orbsym=orbsym, point_group=point_group, target_irrep=target_irrep)
 
     toc = time.perf_counter()
     minutes, seconds = divmod(toc - tic, 60)
@@ -333,6 +444,10 @@ def run_guess(H1, H2, o, v, nroot, method, nacto=0, nactu=0, print_threshold=PRI
             print_cis_vector(R0[:, i].reshape(nu, no), print_threshold=print_threshold)
         elif method == "rcis":
             print_rcis_vector(R0[:, i].reshape(nu, no), print_threshold=print_threshold)
+        elif method == "rcisd" and mult == 3:
+            print_rhf_triplet_amplitudes(R0[:no*nu, i].reshape(nu, no),
+                                         R0[no*nu:no*nu + no**2*nu**2, i].reshape(nu, nu, no, no),
+                                         R0[no*nu + no**2*nu**2:, i].reshape(nu, nu, no, no), print_threshold)
         elif method == "rcisd":
             print_rcisd_vector(R0[:no*nu, i].reshape(nu, no), R0[no*nu:, i].reshape(nu, nu, no, no), print_threshold=print_threshold)
         elif method == "cisd":
@@ -341,6 +456,10 @@ def run_guess(H1, H2, o, v, nroot, method, nacto=0, nactu=0, print_threshold=PRI
             print_1p_vector(R0[:, i], no, print_threshold=print_threshold)
         elif method == "ipcis":
             print_1h_vector(R0[:, i], nu, print_threshold=print_threshold)
+        elif method == "reacis":
+            print_r1p_vector(R0[:, i], no, print_threshold=print_threshold)
+        elif method == "ripcis":
+            print_r1h_vector(R0[:, i], nu, print_threshold=print_threshold)
         elif method == "deacis":
             print_2p_vector(R0[:nu**2, i].reshape(nu, nu), no, print_threshold=print_threshold)
         elif method == "dipcis":
@@ -352,11 +471,56 @@ def run_guess(H1, H2, o, v, nroot, method, nacto=0, nactu=0, print_threshold=PRI
 
     return np.real(R0), np.real(omega0)
 
+def _solve_eomcc_root(method, R0, omega0, T, H1, H2, o, v, fock=None, g=None, maxit=80, convergence=1.0e-07, max_size=20, diis_size=6,
+                      do_diis=True, r3_excitations=None, out_of_core=False, cvsmin=-1, cvsmax=-1, **kwargs):
+    """Solve for a single root of the EOMCC method `method` starting from the
+    guess vector `R0` with energy `omega0`. Returns R, omega, r0, and REL."""
+    mod = import_module("miniccpy."+method.lower())
+    calculation = getattr(mod, 'kernel')
+    # Note: EOMCC3 methods have a difference function call due to needing fock and g matrices
+    if method.lower() == "eomcc3" or method.lower() == "eomrcc3": # Folded EOMCC3 model
+        return calculation(R0, T, omega0, fock, g, H1, H2, o, v, maxit, convergence, diis_size=diis_size, do_diis=do_diis)
+    elif method.lower() == "eomccsdta" or method.lower() == "eomrccsdta":
+        return calculation(R0, T, omega0, fock, g, H1, H2, o, v, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+    elif method.lower() == "dreomcc3": # Folded dressed EOMCC3 model using excited-state DIIS algorithm
+        return calculation(R0, T, omega0, H1, H2, o, v, maxit, convergence, diis_size=diis_size, do_diis=do_diis)
+    elif method.lower() == "eomcc3-lin": # Linear EOMCC3 model using conventional Davidson diagonalization
+        return calculation(R0, T, omega0, fock, g, H1, H2, o, v, maxit, convergence, max_size=max_size, **kwargs)
+    elif method.lower() == "dipeom4_star_p": # Approximate DIP-EOMCCSD(4h-2p)* routine
+        if cvsmin != -1 and cvsmax != -1:
+            return calculation(R0, T, omega0, fock, g, H1, H2, o, v, cvsmin, cvsmax, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+        else:
+            return calculation(R0, T, omega0, fock, g, H1, H2, o, v, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+    else: # All other EOMCC calculations using conventional Davidson
+        if r3_excitations is not None:
+            if cvsmin != -1 and cvsmax != -1:
+                return calculation(R0, T, omega0, H1, H2, o, v, cvsmin, cvsmax, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+            else:
+                return calculation(R0, T, omega0, H1, H2, o, v, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+        else:
+            if cvsmin != -1 and cvsmax != -1:
+                return calculation(R0, T, omega0, H1, H2, o, v, cvsmin, cvsmax, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+            else:
+                return calculation(R0, T, omega0, H1, H2, o, v, maxit, convergence, max_size=max_size, out_of_core=out_of_core, **kwargs)
+
+def _solve_eomcc_root_stats(*args, **kwargs):
+    """Same as _solve_eomcc_root, but also returns the number of Davidson iterations."""
+    stats = {}
+    result = _solve_eomcc_root(*args, stats=stats, **kwargs)
+    return result, stats["niter"]
+
 def run_eomcc_calc(R0, omega0, T, H1, H2, o, v, method, state_index, fock=None, g=None, maxit=80, convergence=1.0e-07, max_size=20, diis_size=6,
-                   do_diis=True, r3_excitations=None, out_of_core=False, cvsmin=-1, cvsmax=-1):
+                   do_diis=True, r3_excitations=None, out_of_core=False, cvsmin=-1, cvsmax=-1, nproc=1, nthreads=None, stats=None, **kwargs):
     """Run the IP-/EA- or EE-EOMCC calculation specified by `method`.
-    Currently, this module only supports CIS-type initial guesses."""
-    from miniccpy.printing import print_amplitudes, print_dip_amplitudes
+    Currently, this module only supports CIS-type initial guesses. Any additional
+    keyword arguments (e.g., preconditioner="hbar", olsen=True, or root_select="energy"
+    with target_energy=...) are passed to the Davidson kernel of `method`.
+    With nproc > 1, the roots are solved simultaneously by a pool of nproc processes
+    that share T, H1, H2, fock, and g through shared memory, each using nthreads BLAS
+    threads (by default, the available cores divided among the processes). If a dictionary
+    `stats` is given, the number of Davidson iterations of each root is stored in the
+    list stats["niter"]."""
+    from miniccpy.printing import print_amplitudes, print_dip_amplitudes, print_rhf_triplet_amplitudes
 
     # check if requested EOMCC calculation is implemented in modules
     if method not in MODULES:
@@ -367,46 +531,45 @@ def run_eomcc_calc(R0, omega0, T, H1, H2, o, v, method, state_index, fock=None,
         flag_rhf = True
     else:
         flag_rhf = False
-    # import the specific CC method module and get its update function
-    mod = import_module("miniccpy."+method.lower())
-    calculation = getattr(mod, 'kernel')
+
+    if stats is not None and method not in ITERATION_STATS_MODULES:
+        raise ValueError("Iteration counts are not available for {}".format(method))
+    solver = _solve_eomcc_root if stats is None else _solve_eomcc_root_stats
 
     nroot = len(state_index)
 
+    options = {"maxit": maxit, "convergence": convergence, "max_size": max_size, "diis_size": diis_size, "do_diis": do_diis,
+               "r3_excitations": r3_excitations, "out_of_core": out_of_core, "cvsmin": cvsmin, "cvsmax": cvsmax, **kwargs}
+    if stats is not None:
+        stats["niter"] = []
+
+    if nproc > 1 and nroot > 1:
+        from miniccpy.parallel import solve_roots_parallel
+        jobs = [(method, R0[:, state_index[n]], omega0[state_index[n]]) for n in range(nroot)]
+        # the P-space kernels reorder r3_excitations in place, so each root gets its own copy
+        shared = {"T": T, "H1": H1, "H2": H2, "fock": fock, "g": g}
+        private = {"o": o, "v": v, **options}
+        results = solve_roots_parallel(solver, jobs, shared, nproc, nthreads, private)
+
     R = [0 for i in range(nroot)]
     omega = [0 for i in range(nroot)]
     r0 = [0 for i in range(nroot)]
     for n in range(nroot):
         print(f"    Solving for state #{state_index[n]}")
-        tic = time.time()
-        # Note: EOMCC3 methods have a difference function call due to needing fock and g matrices
-        if method.lower() == "eomcc3" or method.lower() == "eomrcc3": # Folded EOMCC3 model
-            R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], fock, g, H1, H2, o, v, maxit, convergence, diis_size=diis_size, do_diis=do_diis)
-        elif method.lower() == "eomccsdta" or method.lower() == "eomrccsdta":
-            R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], fock, g, H1, H2, o, v, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-        elif method.lower() == "dreomcc3": # Folded dressed EOMCC3 model using excited-state DIIS algorithm
-            R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], H1, H2, o, v, maxit, convergence, diis_size=diis_size, do_diis=do_diis)
-        elif method.lower() == "eomcc3-lin": # Linear EOMCC3 model using conventional Davidson diagonalization
-            R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], fock, g, H1, H2, o, v, maxit, convergence, max_size=max_size)
-        elif method.lower() == "dipeom4_star_p": # Approximate DIP-EOMCCSD(4h-2p)* routine
-            if cvsmin != -1 and cvsmax != -1:
-                R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], fock, g, H1, H2, o, v, cvsmin, cvsmax, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-            else:
-                R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], fock, g, H1, H2, o, v, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-        else: # All other EOMCC calculations using conventional Davidson
-            if r3_excitations is not None:
-                if cvsmin != -1 and cvsmax != -1:
-                    R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], H1, H2, o, v, cvsmin, cvsmax, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-                else:
-                    R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], H1, H2, o, v, r3_excitations, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-            else:
-                if cvsmin != -1 and cvsmax != -1:
-                    R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], H1, H2, o, v, cvsmin, cvsmax, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-                else:
-                    R[n], omega[n], r0[n], rel = calculation(R0[:, state_index[n]], T, omega0[state_index[n]], H1, H2, o, v, maxit, convergence, max_size=max_size, out_of_core=out_of_core)
-        toc = time.time()
+        if nproc > 1 and nroot > 1:
+            result, elapsed, log = results[n]
+            print(log, end="")
+        else:
+            tic = time.time()
+            result = solver(method, R0[:, state_index[n]], omega0[state_index[n]], T, H1, H2, o, v, fock, g, **options)
+            toc = time.time()
+            elapsed = toc - tic
+        if stats is not None:
+            result, niter = result
+            stats["niter"].append(niter)
+        R[n], omega[n], r0[n], rel = result
 
-        minutes, seconds = divmod(toc - tic, 60)
+        minutes, seconds = divmod(elapsed, 60)
 
         print("")
         print("    EOMCC Excitation Energy: {: 20.12f}".format(omega[n]))
@@ -415,8 +578,10 @@ def run_eomcc_calc(R0, omega0, T, H1, H2, o, v, method, state_index, fock=None,
         print("")
         print("    Largest Singly and Doubly Excited Amplitudes")
         print("    --------------------------------------------")
-        if method.lower() in ["eomccsd", "eomccsdt", "eomrccsd", "eomrccsdt", "eomcc3", "eomcc3-lin"]:
+        if method.lower() in ["eomccsd", "eomccsd_sym", "eomccsdt", "eomccsdt_p", "eomrccsd", "eomrccsdt", "eomcc3", "eomcc3-lin"]:
             print_amplitudes(R[n][0], R[n][1], PRINT_THRESH, rhf=flag_rhf)
+        if method.lower() == "eomrccsd_triplet":
+            print_rhf_triplet_amplitudes(*R[n], PRINT_THRESH)
         if method.lower() in ["dipeom3", "dipeom3-cvs", "dipeom4", "dipeom4_p", "dipeom4-cvs", "dipeom4_star_p"]:
             print_dip_amplitudes(R[n][0], R[n][1], PRINT_THRESH)
         print("")
@@ -426,8 +591,21 @@ def run_eomcc_calc(R0, omega0, T, H1, H2, o, v, method, state_index, fock=None,
 
     return R, omega, r0
 
-def run_lefteomcc_calc(R, omega0, T, H1, H2, o, v, method, fock=None, g=None, maxit=80, convergence=1.0e-07, max_size=20, diis_size=6, do_diis=True, r3_excitations=None):
-    from miniccpy.printing import print_amplitudes
+def _solve_lefteomcc_root(method, R, omega0, T, H1, H2, o, v, fock=None, g=None, maxit=80, convergence=1.0e-07, max_size=20, diis_size=6, do_diis=True):
+    """Solve for the left eigenvector of the EOMCC method `method` corresponding
+    to the right eigenvector `R` with energy `omega0`. Returns L and omega."""
+    mod = import_module("miniccpy."+method.lower())
+    calculation = getattr(mod, 'kernel')
+    if method.lower()  == "left_eomcc3-lin": # Linear EOMCC3 model using conventional Davidson diagonalization
+        return calculation(R, T, omega0, fock, g, H1, H2, o, v, maxit, convergence, max_size=max_size)
+    elif method.lower() == "left_eomcc3": # Folded EOMCC3 model using excited-state DIIS algorithm
+        return calculation(R, T, omega0, fock, g, H1, H2, o, v, maxit, convergence, diis_size=diis_size, do_diis=do_diis)
+    else:
+        return calculation(R, T, omega0, H1, H2, o, v, maxit, convergence, max_size=max_size)
+
+def run_lefteomcc_calc(R, omega0, T, H1, H2, o, v, method, fock=None, g=None, maxit=80, convergence=1.0e-07, max_size=20, diis_size=6, do_diis=True, r3_excitations=None,
+                       nproc=1, nthreads=None):
+    from miniccpy.printing import print_amplitudes, print_rhf_triplet_amplitudes
     from miniccpy.utilities import biorthogonalize
     # check if requested EOMCC calculation is implemented in modules
     if method not in MODULES:
@@ -438,26 +616,32 @@ def run_lefteomcc_calc(R, omega0, T, H1, H2, o, v, method, fock=None, g=None, ma
         flag_rhf = True
     else:
         flag_rhf = False
-    # import the specific CC method module and get its update function
-    mod = import_module("miniccpy."+method.lower())
-    calculation = getattr(mod, 'kernel')
 
     nroot = len(R)
 
+    options = {"maxit": maxit, "convergence": convergence, "max_size": max_size, "diis_size": diis_size, "do_diis": do_diis}
+
+    if nproc > 1 and nroot > 1:
+        from miniccpy.parallel import solve_roots_parallel
+        jobs = [(method, R[n], omega0[n]) for n in range(nroot)]
+        shared = {"T": T, "H1": H1, "H2": H2, "fock": fock, "g": g}
+        private = {"o": o, "v": v, **options}
+        results = solve_roots_parallel(_solve_lefteomcc_root, jobs, shared, nproc, nthreads, private)
+
     L = [0 for i in range(nroot)]
     omega = [0 for i in range(nroot)]
     for n in range(nroot):
         print(f"    Solving for state #{n + 1}")
-        tic = time.time()
-        if method.lower()  == "left_eomcc3-lin": # Linear EOMCC3 model using conventional Davidson diagonalization
-            L[n], omega[n] = calculation(R[n], T, omega0[n], fock, g, H1, H2, o, v, maxit, convergence, max_size=max_size)
-        elif method.lower() == "left_eomcc3": # Folded EOMCC3 model using excited-state DIIS algorithm
-            L[n], omega[n] = calculation(R[n], T, omega0[n], fock, g, H1, H2, o, v, maxit, convergence, diis_size=diis_size, do_diis=do_diis)
+        if nproc > 1 and nroot > 1:
+            (L[n], omega[n]), elapsed, log = results[n]
+            print(log, end="")
         else:
-            L[n], omega[n] = calculation(R[n], T, omega0[n], H1, H2, o, v, maxit, convergence, max_size=max_size)
-        toc = time.time()
+            tic = time.time()
+            L[n], omega[n] = _solve_lefteomcc_root(method, R[n], omega0[n], T, H1, H2, o, v, fock, g, **options)
+            toc = time.time()
+            elapsed = toc - tic
 
-        minutes, seconds = divmod(toc - tic, 60)
+        minutes, seconds = divmod(elapsed, 60)
 
         print("")
         print("    Left-EOMCC Excitation Energy: {: 20.12f}".format(omega[n]))
@@ -466,6 +650,8 @@ def run_lefteomcc_calc(R, omega0, T, H1, H2, o, v, method, fock=None, g=None, ma
         print("    --------------------------------------------")
         if method.lower() in ["left_eomccsd", "left_eomccsdt", "left_eomrccsd", "left_eomrccsdt", "left_eomcc3", "left_eomcc3-lin"]:
             print_amplitudes(L[n][0], L[n][1], PRINT_THRESH, rhf=flag_rhf)
+        if method.lower() == "left_eomrccsd_triplet":
+            print_rhf_triplet_amplitudes(*L[n], PRINT_THRESH)
         print("")
         print("    Left-EOMCC calculation completed in {:.2f}m {:.2f}s".format(minutes, seconds))
         print(f"    Memory usage: {get_memory_usage()} MB")
@@ -508,6 +694,34 @@ def run_correction(T, L, fock, H1, H2, o, v, method, **kwargs):
     print("")
     return e_correction
 
+def run_adaptive_ccpq(fock, g, o, v, t3_excitations=None, growth_fraction=0.01, max_iter=10, energy_threshold=1.0e-05, **kwargs):
+    """Run the adaptive CC(P;Q) calculation, in which the P space of triples used in
+    CCSDT(P) is grown by the `growth_fraction` of triples with the largest CR-CC(2,3)
+    moment contributions until the CC(P;Q) energy is stable. Returns the CC(P)
+    amplitudes, the CC(P) correlation energy, the Q-space corrections, and the final
+    list of triples in the P space."""
+    from miniccpy.adaptive_ccpq import kernel
+
+    # Turn off DIIS for small systems; it becomes singular!
+    if fock.shape[0] <= 4:
+        print("Turning off DIIS acceleration for small system")
+        kwargs["diis_size"] = 1000
+
+    tic = time.time()
+    T, e_corr, delta_T, t3_excitations = kernel(fock, g, o, v, t3_excitations, growth_fraction, max_iter, energy_threshold, **kwargs)
+    toc = time.time()
+    minutes, seconds = divmod(toc - tic, 60)
+
+    print("")
+    print("    CC(P) Correlation Energy: {: 20.12f}".format(e_corr))
+    for key, value in delta_T.items():
+        print(f"    CC(P;Q) correction energy ({key}): {value}")
+    print("")
+    print("    Adaptive CC(P;Q) calculation completed in {:.2f}m {:.2f}s".format(minutes, seconds))
+    print(f"    Memory usage: {get_memory_usage()} MB")
+    print("")
+    return T, e_corr, delta_T, t3_excitations
+
 def run_eom_correction(T, R, L, r0, omega, fock, H1, H2, o, v, method, g=None):
     """Run the excited-state EOMCC correction specified by `method`."""
 
@@ -655,3 +869,119 @@ def run_lrcc1_calc(T, H1, H2, W, o, v, method, maxit=80, convergence=1.0e-07, en
     print("")
 
     return eta, prop_corr
+
+def run_pes_scan(geometries, basis, method, nfrozen=0, left_method=None, eom_method=None, nroot=10, guess_method="cis",
+                 state_index=None, mult=-1, continuation=True, scf_options=None, cc_options=None, left_options=None,
+                 eom_options=None):
+    """Run the ground-state CC calculation specified by `method`, and optionally the
+    left-CC (`left_method`) and EOMCC (`eom_method`) calculations, at each geometry
+    in `geometries`. With `continuation`, each point after the first starts from the
+    previous point: the SCF is seeded with its density matrix, the MOs are aligned with
+    its MOs by overlap (fixing orbital ordering and phases), and its T and EOM R vectors
+    are used as starting guesses, with the EOMCC roots tracked by maximum overlap with the
+    previous R vectors, and the left-CC starts from T + (L' - T'), where L' and T' are
+    the amplitudes of the previous point. Otherwise, the EOMCC roots `state_index` of the
+    `guess_method` initial guess with `nroot` roots are computed at every point. Any additional options
+    are passed through the dictionaries `scf_options`, `cc_options`, `left_options`, and
+    `eom_options`. Returns a dictionary with the lists of HF energies, correlation energies,
+    excitation energies, SCF cycles, wall times, and the CC, left-CC, and EOMCC (per root)
+    iteration counts of each point. The iteration counts are None for methods that do not
+    report them (see ITERATION_STATS_MODULES); comparing them with those of a scan with
+    `continuation=False` shows the iterations saved by the continuation."""
+    from miniccpy.scan import flatten_vectors
+
+    scf_options = dict(scf_options or {})
+    cc_options = dict(cc_options or {})
+    left_options = dict(left_options or {})
+    eom_options = dict(eom_options or {})
+    if state_index is None:
+        state_index = [0]
+    rhf = method in RHF_MODULES
+
+    results = {"e_hf": [], "e_corr": [], "omega": [], "scf_cycles": [], "overlap": [], "time": [],
+               "cc_iterations": [], "left_iterations": [], "eom_iterations": []}
+    mf = T = L = R = omega = None
+    for n, geometry in enumerate(geometries):
+        print("    ==> PES scan: point {} of {} <==".format(n + 1, len(geometries)))
+        print("")
+        restart = continuation and n > 0
+        timings = {}
+
+        # Mean-field calculation
+        tic = time.time()
+        options = dict(scf_options)
+        if restart:
+            options["dm0"] = mf.make_rdm1()
+            options["mo_reference"] = (mf.mol, mf.mo_coeff)
+        fock, g, e_hf, o, v, mf = run_scf(geometry, basis, nfrozen, rhf=rhf, return_meanfield=True, **options)
+        timings["scf"] = time.time() - tic
+
+        # Ground-state CC calculation
+        tic = time.time()
+        cc_stats = {} if method in ITERATION_STATS_MODULES else None
+        T_prev = T
+        T, e_corr = run_cc_calc(fock, g, o, v, method, T0=T if restart else None, stats=cc_stats, **cc_options)
+        timings["cc"] = time.time() - tic
+
+        if left_method is not None or eom_method is not None:
+            H1, H2 = get_hbar(T, fock, g, o, v, method)
+
+        # Left-CC calculation
+        left_stats = None
+        if left_method is not None:
+            tic = time.time()
+            left_stats = {} if left_method in ITERATION_STATS_MODULES else None
+            L0 = tuple(t + l - t_prev for t, l, t_prev in zip(T, L, T_prev)) if restart else None
+            L = run_leftcc_calc(T, fock, H1, H2, o, v, left_method, L0=L0, stats=left_stats, **left_options)
+            timings["left"] = time.time() - tic
+
+        # EOMCC calculation, tracking the roots by overlap with those of the previous point
+        overlap = []
+        eom_stats = None
+        if eom_method is not None:
+            tic = time.time()
+            eom_stats = {} if eom_method in ITERATION_STATS_MODULES else None
+            if restart:
+                R0, omega0 = flatten_vectors(R), np.array(omega)
+                options = {"root_select": "guess", **eom_options}
+                R_prev = R0 / np.linalg.norm(R0, axis=0)
+                R, omega, r0 = run_eomcc_calc(R0, omega0, T, H1, H2, o, v, eom_method, list(range(len(R))), fock=fock, g=g, stats=eom_stats, **options)
+                R_curr = flatten_vectors(R)
+                overlap = list(np.abs(np.sum(R_prev * R_curr, axis=0)) / np.linalg.norm(R_curr, axis=0))
+            else:
+                R0, omega0 = run_guess(H1, H2, o, v, nroot, guess_method, mult=mult)
+                R, omega, r0 = run_eomcc_calc(R0, omega0, T, H1, H2, o, v, eom_method, state_index, fock=fock, g=g, stats=eom_stats, **eom_options)
+            timings["eom"] = time.time() - tic
+
+        results["e_hf"].append(e_hf)
+        results["e_corr"].append(e_corr)
+        results["omega"].append(list(omega) if omega is not None else [])
+        results["scf_cycles"].append(mf.cycles)
+        results["overlap"].append(overlap)
+        results["time"].append(timings)
+        results["cc_iterations"].append(cc_stats["niter"] if cc_stats is not None else None)
+        results["left_iterations"].append(left_stats["niter"] if left_stats is not None else None)
+        results["eom_iterations"].append(eom_stats["niter"] if eom_stats is not None else None)
+
+    print("    ==> PES scan summary <==")
+    print("")
+    print("    Point           E(HF)                 E(corr)     SCF cycles     SCF (s)      CC (s)    Left (s)     EOM (s)")
+    for n in range(len(geometries)):
+        timings = results["time"][n]
+        print("    {: 5d} {: 15.10f} {: 23.12f} {: 14d} {: 11.2f} {: 11.2f} {: 11.2f} {: 11.2f}".format(
+              n + 1, results["e_hf"][n], results["e_corr"][n], results["scf_cycles"][n],
+              timings["scf"], timings["cc"], timings.get("left", 0.0), timings.get("eom", 0.0)))
+    print("")
+    print("    Point    CC iterations    Left iterations    EOM iterations")
+    for n in range(len(geometries)):
+        niter = [results[key][n] for key in ("cc_iterations", "left_iterations", "eom_iterations")]
+        print("    {: 5d} {:>16} {:>18} {:>17}".format(n + 1, *("-" if x is None else str(x) for x in niter)))
+    if eom_method is not None:
+        print("")
+        print("    Point    State        Omega      |<R(prev)|R>|")
+        for n in range(len(geometries)):
+            for i, w in enumerate(results["omega"][n]):
+                s = "{: 17.6f}".format(results["overlap"][n][i]) if results["overlap"][n] else "                -"
+                print("    {: 5d} {: 8d} {: 12.8f} {}".format(n + 1, i, w, s))
+    print("")
+    return results
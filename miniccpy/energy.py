@@ -105,6 +105,17 @@ def calc_rel_rhf(r0, r1, r2):
     rel = (rel_1 + 2.0 * rel_2)/(rel_0 + rel_1 + rel_2)
     return rel
 
+def calc_rel_rhf_triplet(r0, r1, r2ab, r2aa):
+    """Calculate the relative excitation level (REL) for RHF-based triplet EOMCC."""
+    rel_0 = r0**2
+    rel_1 = 2.0 * np.einsum("ai,ai->", r1, r1, optimize=True)
+    rel_2 = (
+                np.einsum("abij,abij->", r2ab, r2ab, optimize=True)
+                + 0.5 * np.einsum("abij,abij->", r2aa, r2aa, optimize=True)
+    )
+    rel = (rel_1 + 2.0 * rel_2)/(rel_0 + rel_1 + rel_2)
+    return rel
+
 def calc_rel_ea(r1, r2):
     """Calculate the relative excitation level (REL) for EA-EOMCC calculations"""
     rel_1 = np.einsum("a,a->", r1, r1, optimize=True)
@@ -112,6 +123,16 @@ def calc_rel_ea(r1, r2):
     rel = (rel_1 + 2.0 * rel_2)/(rel_1 + rel_2)
     return rel
 
+def calc_rel_ea_rhf(r1, r2):
+    """Calculate the relative excitation level (REL) for RHF-based EA-EOMCC calculations"""
+    rel_1 = np.einsum("a,a->", r1, r1, optimize=True)
+    rel_2 = (
+                2.0 * np.einsum("abj,abj->", r2, r2, optimize=True)
+                    - np.einsum("abj,baj->", r2, r2, optimize=True)
+    )
+    rel = (rel_1 + 2.0 * rel_2)/(rel_1 + rel_2)
+    return rel
+
 def calc_rel_dea(r1, r2):
     """Calculate the relative excitation level (REL) for DEA-EOMCC calculations"""
     rel_1 = 0.5 * np.einsum("ab,ab->", r1, r1, optimize=True)
@@ -126,6 +147,16 @@ def calc_rel_ip(r1, r2):
     rel = (rel_1 + 2.0 * rel_2)/(rel_1 + rel_2)
     return rel
 
+def calc_rel_ip_rhf(r1, r2):
+    """Calculate the relative excitation level (REL) for RHF-based IP-EOMCC calculations"""
+    rel_1 = -np.einsum("i,i->", r1, r1, optimize=True)
+    rel_2 = -(
+                2.0 * np.einsum("ibj,ibj->", r2, r2, optimize=True)
+                    - np.einsum("ibj,jbi->", r2, r2, optimize=True)
+    )
+    rel = (rel_1 + 2.0 * rel_2)/(rel_1 + rel_2)
+    return rel
+
 def calc_rel_dip(r1, r2):
     """Calculate the relative excitation level (REL) for DIP-EOMCC calculations"""
     rel_1 = 0.5 * np.einsum("ij,ij->", r1, r1, optimize=True)
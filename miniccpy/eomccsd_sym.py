@@ -0,0 +1,230 @@
+import time
+import numpy as np
+import h5py
+from miniccpy.symmetry import SymTensor, sym_einsum
+from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root, olsen_correction, check_preconditioner
+
+def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, preconditioner="fock", olsen=False,
+           root_select="overlap", target_energy=None, target_irrep=None, stats=None):
+    """
+    Diagonalize the similarity-transformed CCSD Hamiltonian using the
+    non-Hermitian Davidson algorithm for a specific root defined by an initial
+    guess vector, working within the symmetry-blocked space of a single irrep.
+    H1 and H2 are the BlockedOperator objects returned by build_hbar_ccsd_sym.
+    The irrep of the target state is `target_irrep` (e.g., "B2") or, by default,
+    the irrep of the largest component of R0, onto which R0 is projected.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"].
+    """
+    from miniccpy.energy import calc_r0, calc_rel
+    from miniccpy.hbar_diagonal import eomccsd_sym_hbar_diagonal
+
+    check_preconditioner(preconditioner)
+
+    blocking = H1.blocking
+    t1, t2 = T
+    if not isinstance(t1, SymTensor):
+        t1 = SymTensor.from_dense(blocking, t1, "vo")
+        t2 = SymTensor.from_dense(blocking, t2, "vvoo")
+
+    nunocc, nocc = H1[v, o].shape
+    n1 = nunocc * nocc
+    n2 = nocc**2 * nunocc**2
+
+    # Pad the initial guess vector to fill the dimension of the problem
+    R_dense = np.zeros(n1 + n2)
+    R_dense[:len(R0)] = R0
+    r1_dense = R_dense[:n1].reshape(nunocc, nocc)
+    r2_dense = R_dense[n1:].reshape(nunocc, nunocc, nocc, nocc)
+
+    # Determine the symmetry of the excitation operator and project the guess onto it
+    if target_irrep is None:
+        if np.any(r1_dense):
+            a, i = np.unravel_index(np.argmax(abs(r1_dense)), r1_dense.shape)
+            sym = blocking.isym[nocc + a] ^ blocking.isym[i]
+        else:
+            a, b, i, j = np.unravel_index(np.argmax(abs(r2_dense)), r2_dense.shape)
+            sym = blocking.isym[nocc + a] ^ blocking.isym[nocc + b] ^ blocking.isym[i] ^ blocking.isym[j]
+    else:
+        sym = blocking.irrep_numbers[target_irrep.upper()] ^ blocking.reference_irrep
+    r1 = SymTensor.from_dense(blocking, r1_dense, "vo", sym)
+    r2 = SymTensor.from_dense(blocking, r2_dense, "vvoo", sym)
+    n1 = r1.size
+    ndim = n1 + r2.size
+    R = np.hstack([r1.flatten(), r2.flatten()])
+    if np.linalg.norm(R) == 0.0:
+        raise ValueError("Initial guess has no component of symmetry {}".format(blocking.irrep_of_excitation(sym)))
+    R /= np.linalg.norm(R)
+
+    if preconditioner == "hbar":
+        e_ai, e_abij = eomccsd_sym_hbar_diagonal(H1, H2, sym)
+    else:
+        eps_o = np.diagonal(H1[o, o])
+        eps_v = np.diagonal(H1[v, v])
+        e_ai = SymTensor.from_diagonal(blocking, "vo", eps_o, eps_v, sym)
+        e_abij = SymTensor.from_diagonal(blocking, "vvoo", eps_o, eps_v, sym)
+
+    remove_file("eomcc-vectors.hdf5")
+    if out_of_core:
+        f = h5py.File("eomcc-vectors.hdf5", "w")
+
+    # Allocate the B and sigma matrices
+    if out_of_core:
+        sigma = f.create_dataset("sigma", (max_size, ndim), dtype=np.float64)
+        B = f.create_dataset("bmatrix", (max_size, ndim), dtype=np.float64)
+    else:
+        sigma = np.zeros((max_size, ndim))
+        B = np.zeros((max_size, ndim))
+
+    restart_block = np.zeros((ndim, nrest))
+    G = np.zeros((max_size, max_size))
+
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
+    # Initial values
+    B[0, :] = R
+    sigma[0, :] = HR(r1.from_vector(R[:n1]), r2.from_vector(R[n1:]), t1, t2, H1, H2, o, v)
+
+    print("    ==> EOMCCSD iterations <==")
+    print("    Target symmetry = ", blocking.irrep_of_excitation(sym))
+    print("    Number of symmetry-allowed R amplitudes = ", ndim, "(out of", nocc * nunocc + nocc**2 * nunocc**2, ")")
+    print("    The initial guess energy = ", omega)
+    print("")
+    print("     Iter               Energy                 |dE|                 |dR|     Wall Time     Memory")
+    curr_size = 1
+    for niter in range(maxit):
+        tic = time.time()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
+        G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
+        G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
+        R = np.dot(B[:curr_size, :].T, alpha)
+        restart_block[:, niter % nrest] = R
+
+        # calculate residual vector
+        residual = np.dot(sigma[:curr_size, :].T, alpha) - omega * R
+        res_norm = np.linalg.norm(residual)
+        delta_e = omega - omega_old
+
+        if res_norm < convergence and abs(delta_e) < convergence:
+            toc = time.time()
+            minutes, seconds = divmod(toc - tic, 60)
+            print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+            break
+
+        # update residual vector
+        q = update(r1.from_vector(residual[:n1]), r2.from_vector(residual[n1:]), omega, e_ai, e_abij)
+        if olsen:
+            q_x = update(r1.from_vector(R[:n1]), r2.from_vector(R[n1:]), omega, e_ai, e_abij)
+            q = olsen_correction(q, q_x, R)
+        for p in range(curr_size):
+            b = B[p, :] / np.linalg.norm(B[p, :])
+            q -= np.dot(b.T, q) * b
+        q *= 1.0 / np.linalg.norm(q)
+
+        # If below maximum subspace size, expand the subspace
+        if curr_size < max_size:
+            B[curr_size, :] = q
+            sigma[curr_size, :] = HR(r1.from_vector(q[:n1]), r2.from_vector(q[n1:]), t1, t2, H1, H2, o, v)
+        else:
+            # Basic restart - use the last approximation to the eigenvector
+            print("       **Deflating subspace**")
+            restart_block, _ = np.linalg.qr(restart_block)
+            for j in range(restart_block.shape[1]):
+                B[j, :] = restart_block[:, j]
+                sigma[j, :] = HR(r1.from_vector(restart_block[:n1, j]), r2.from_vector(restart_block[n1:, j]), t1, t2, H1, H2, o, v)
+            curr_size = restart_block.shape[1] - 1
+
+        curr_size += 1
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        print("EOMCCSD iterations did not converge")
+    if stats is not None:
+        stats["niter"] = niter + 1
+
+    # Save the final converged root in a dense excitation tuple
+    R = (r1.from_vector(R[:n1]).to_dense(), r2.from_vector(R[n1:]).to_dense())
+    # Calculate r0 for the root
+    r0 = calc_r0(R[0], R[1], H1, H2, omega, o, v)
+    # Compute relative excitation level diagnostic
+    rel = calc_rel(r0, R[0], R[1])
+    # remove the HDF5 file
+    remove_file("eomcc-vectors.hdf5")
+    return R, omega, r0, rel
+
+def update(r1, r2, omega, e_ai, e_abij):
+    """Perform the diagonally preconditioned residual (DPR) update
+    to get the next correction vector."""
+
+    r1 = r1 / (omega - e_ai)
+    r2 = r2 / (omega - e_abij)
+
+    return np.hstack([r1.flatten(), r2.flatten()])
+
+
+def HR(r1, r2, t1, t2, H1, H2, o, v):
+    """Compute the matrix-vector product H * R, where
+    H is the CCSD similarity-transformed Hamiltonian and R is
+    the EOMCCSD linear excitation operator, both symmetry blocked."""
+
+    # update R1
+    HR1 = build_HR1(r1, r2, H1, H2, o, v)
+    # update R2
+    HR2 = build_HR2(r1, r2, t1, t2, H1, H2, o, v)
+
+    return np.hstack( [HR1.flatten(), HR2.flatten()] )
+
+
+def build_HR1(r1, r2, H1, H2, o, v):
+    """Compute the projection of HR on singles
+        X[a, i] = < ia | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+
+    X1 = -sym_einsum("mi,am->ai", H1["oo"], r1)
+    X1 += sym_einsum("ae,ei->ai", H1["vv"], r1)
+    X1 += sym_einsum("amie,em->ai", H2["voov"], r1)
+    X1 -= 0.5 * sym_einsum("mnif,afmn->ai", H2["ooov"], r2)
+    X1 += 0.5 * sym_einsum("anef,efin->ai", H2["vovv"], r2)
+    X1 += sym_einsum("me,aeim->ai", H1["ov"], r2)
+
+    return X1
+
+
+def build_HR2(r1, r2, t1, t2, H1, H2, o, v):
+    """Compute the projection of HR on doubles
+        X[a, b, i, j] = < ijab | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+
+    X2 = -0.5 * sym_einsum("mi,abmj->abij", H1["oo"], r2)  # A(ij)
+    X2 += 0.5 * sym_einsum("ae,ebij->abij", H1["vv"], r2)  # A(ab)
+    X2 += 0.5 * 0.25 * sym_einsum("mnij,abmn->abij", H2["oooo"], r2)
+    X2 += 0.5 * 0.25 * sym_einsum("abef,efij->abij", H2["vvvv"], r2)
+    X2 += sym_einsum("amie,ebmj->abij", H2["voov"], r2)  # A(ij)A(ab)
+    X2 -= 0.5 * sym_einsum("bmji,am->abij", H2["vooo"], r1)  # A(ab)
+    X2 += 0.5 * sym_einsum("baje,ei->abij", H2["vvov"], r1)  # A(ij)
+
+    Q1 = -0.5 * sym_einsum("mnef,bfmn->eb", H2["oovv"], r2)
+    X2 += 0.5 * sym_einsum("eb,aeij->abij", Q1, t2)  # A(ab)
+
+    Q1 = 0.5 * sym_einsum("mnef,efjn->mj", H2["oovv"], r2)
+    X2 -= 0.5 * sym_einsum("mj,abim->abij", Q1, t2)  # A(ij)
+
+    Q1 = sym_einsum("amfe,em->af", H2["vovv"], r1)
+    X2 += 0.5 * sym_einsum("af,fbij->abij", Q1, t2)  # A(ab)
+    Q2 = sym_einsum("nmie,em->ni", H2["ooov"], r1)
+    X2 -= 0.5 * sym_einsum("ni,abnj->abij", Q2, t2)  # A(ij)
+
+    X2 -= X2.transpose((0, 1, 3, 2))
+    X2 -= X2.transpose((1, 0, 2, 3))
+
+    return X2
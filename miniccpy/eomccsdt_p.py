@@ -0,0 +1,345 @@
+import time
+import numpy as np
+import h5py
+from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root, olsen_correction, check_preconditioner
+from miniccpy.pspace import as_excitation_list, is_empty_pspace, get_sort_plan
+from miniccpy.lib import eomccsdt_p
+
+def kernel(R0, T, omega, H1, H2, o, v, r3_excitations=None, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, preconditioner="fock", olsen=False,
+           root_select="overlap", target_energy=None, t3_excitations=None, stats=None):
+    """
+    Diagonalize the similarity-transformed CCSDT(P) Hamiltonian using the
+    non-Hermitian Davidson algorithm for a specific root defined by an initial
+    guess vector, where R3 is restricted to the P space given by `r3_excitations`.
+    T = (t1, t2, t3) are the CCSDT(P) amplitudes, with t3 defined on the P space
+    `t3_excitations` (by default, the same as r3_excitations), and H1, H2 are obtained
+    with get_hbar(..., method="ccsdt_p", t3_excitations=...). Neither list is reordered.
+    Use preconditioner="hbar" to precondition with the diagonal of the singles,
+    doubles, and P-space triples blocks of HBar and olsen=True to apply the Olsen
+    correction to each new direction.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"].
+    """
+    from miniccpy.energy import calc_r0, calc_rel
+    from miniccpy.hbar_diagonal import eomccsdt_p_hbar_diagonal
+
+    check_preconditioner(preconditioner)
+
+    remove_file("eomcc-vectors.hdf5")
+    if out_of_core:
+        f = h5py.File("eomcc-vectors.hdf5", "w")
+
+    r3_excitations = as_excitation_list(r3_excitations)
+
+    # determine whether r3 updates should be done
+    do_r3 = True
+    if is_empty_pspace(r3_excitations):
+        do_r3 = False
+
+    t1, t2, t3 = T
+
+    nunocc, nocc = t1.shape
+
+    # the sorting plans of build_hr3_p only depend on the (fixed) P spaces
+    r3_plan = t3_plan = None
+    if do_r3:
+        r3_plan = get_sort_plan(eomccsdt_p.eomccsdt_p, r3_excitations, nocc, nunocc)
+        if t3_excitations is None:
+            t3_excitations = r3_excitations
+        t3_excitations = as_excitation_list(t3_excitations)
+        if is_empty_pspace(t3_excitations):
+            # no T3 in the ground state: use the R3 list with vanishing amplitudes
+            t3_excitations, t3, t3_plan = r3_excitations, np.zeros(r3_excitations.shape[0]), r3_plan
+        else:
+            t3_plan = get_sort_plan(eomccsdt_p.eomccsdt_p, t3_excitations, nocc, nunocc)
+
+    if preconditioner == "hbar":
+        e_ai, e_abij, e_abcijk = eomccsdt_p_hbar_diagonal(H1, H2, o, v, r3_excitations)
+    else:
+        eps = np.diagonal(H1)
+        n = np.newaxis
+        e_abij = (eps[v, n, n, n] + eps[n, v, n, n] - eps[n, n, o, n] - eps[n, n, n, o])
+        e_ai = (eps[v, n] - eps[n, o])
+        exc = r3_excitations.astype(np.int64) - 1
+        eps_o, eps_v = eps[o], eps[v]
+        e_abcijk = (eps_v[exc[:, 0]] + eps_v[exc[:, 1]] + eps_v[exc[:, 2]]
+                    - eps_o[exc[:, 3]] - eps_o[exc[:, 4]] - eps_o[exc[:, 5]])
+
+    n1 = nunocc * nocc
+    n2 = nocc**2 * nunocc**2
+    n3 = r3_excitations.shape[0]
+    ndim = n1 + n2 + n3
+
+    if len(R0) < ndim:
+        R = np.zeros(ndim)
+        R[:len(R0)] = R0
+    else:
+        R = R0.copy()
+
+    # Allocate the B and sigma matrices
+    if out_of_core:
+        sigma = f.create_dataset("sigma", (max_size, ndim), dtype=np.float64)
+        B = f.create_dataset("bmatrix", (max_size, ndim), dtype=np.float64)
+    else:
+        sigma = np.zeros((max_size, ndim))
+        B = np.zeros((max_size, ndim))
+
+    restart_block = np.zeros((ndim, nrest))
+    G = np.zeros((max_size, max_size))
+
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
+    # Initial values
+    B[0, :] = R
+    sigma[0, :] = HR(R[:n1].reshape(nunocc, nocc),
+                     R[n1:n1+n2].reshape(nunocc, nunocc, nocc, nocc),
+                     R[n1+n2:], r3_excitations, r3_plan,
+                     t1, t2, t3, t3_excitations, t3_plan, H1, H2, o, v, do_r3)
+
+    print("    ==> EOMCCSDT(P) iterations <==")
+    print("    Number of triples in P = ", n3 if do_r3 else 0)
+    print("    The initial guess energy = ", omega)
+    print("")
+    print("     Iter               Energy                 |dE|                 |dR|     Wall Time     Memory")
+    curr_size = 1
+    for niter in range(maxit):
+        tic = time.time()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
+        G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
+        G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
+        R = np.dot(B[:curr_size, :].T, alpha)
+        restart_block[:, niter % nrest] = R
+
+        # calculate residual vector
+        residual = np.dot(sigma[:curr_size, :].T, alpha) - omega * R
+        res_norm = np.linalg.norm(residual)
+        delta_e = omega - omega_old
+
+        if res_norm < convergence and abs(delta_e) < convergence:
+            toc = time.time()
+            minutes, seconds = divmod(toc - tic, 60)
+            print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+            break
+
+        # update residual vector
+        q = update(residual[:n1].reshape(nunocc, nocc),
+                   residual[n1:n1+n2].reshape(nunocc, nunocc, nocc, nocc),
+                   residual[n1+n2:],
+                   omega,
+                   e_ai,
+                   e_abij,
+                   e_abcijk)
+        if olsen:
+            q_x = update(R[:n1].reshape(nunocc, nocc).copy(),
+                         R[n1:n1+n2].reshape(nunocc, nunocc, nocc, nocc).copy(),
+                         R[n1+n2:].copy(),
+                         omega,
+                         e_ai,
+                         e_abij,
+                         e_abcijk)
+            q = olsen_correction(q, q_x, R)
+        for p in range(curr_size):
+            b = B[p, :] / np.linalg.norm(B[p, :])
+            q -= np.dot(b.T, q) * b
+        q *= 1.0 / np.linalg.norm(q)
+
+        # If below maximum subspace size, expand the subspace
+        if curr_size < max_size:
+            B[curr_size, :] = q
+            sigma[curr_size, :] = HR(q[:n1].reshape(nunocc, nocc),
+                                     q[n1:n1+n2].reshape(nunocc, nunocc, nocc, nocc),
+                                     q[n1+n2:], r3_excitations, r3_plan,
+                                     t1, t2, t3, t3_excitations, t3_plan, H1, H2, o, v, do_r3)
+        else:
+            # Basic restart - use the last approximation to the eigenvector
+            print("       **Deflating subspace**")
+            restart_block, _ = np.linalg.qr(restart_block)
+            for j in range(restart_block.shape[1]):
+                B[j, :] = restart_block[:, j]
+                sigma[j, :] = HR(restart_block[:n1, j].reshape(nunocc, nocc),
+                                 restart_block[n1:n1+n2, j].reshape(nunocc, nunocc, nocc, nocc),
+                                 restart_block[n1+n2:, j], r3_excitations, r3_plan,
+                                 t1, t2, t3, t3_excitations, t3_plan, H1, H2, o, v, do_r3)
+            curr_size = restart_block.shape[1] - 1
+
+        curr_size += 1
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        print("EOMCCSDT(P) iterations did not converge")
+    if stats is not None:
+        stats["niter"] = niter + 1
+
+    # Save the final converged root in an excitation tuple
+    R = (R[:n1].reshape(nunocc, nocc), R[n1:n1+n2].reshape(nunocc, nunocc, nocc, nocc), R[n1+n2:])
+    # Calculate r0 for the root
+    r0 = calc_r0(R[0], R[1], H1, H2, omega, o, v)
+    # Compute relative excitation level diagnostic
+    rel = calc_rel(r0, R[0], R[1])
+    # remove the HDF5 file
+    remove_file("eomcc-vectors.hdf5")
+    return R, omega, r0, rel
+
+def update(r1, r2, r3, omega, e_ai, e_abij, e_abcijk):
+    """Perform the diagonally preconditioned residual (DPR) update
+    to get the next correction vector."""
+
+    r1 /= (omega - e_ai)
+    r2 /= (omega - e_abij)
+    r3 /= (omega - e_abcijk)
+
+    return np.hstack([r1.flatten(), r2.flatten(), r3])
+
+def HR(r1, r2, r3, r3_excitations, r3_plan, t1, t2, t3, t3_excitations, t3_plan, H1, H2, o, v, do_r3):
+    """Compute the matrix-vector product H * R, where
+    H is the CCSDT(P) similarity-transformed Hamiltonian and R is
+    the EOMCCSDT(P) linear excitation operator."""
+
+    if do_r3:
+        # update R1
+        HR1 = build_HR1(r1, r2, r3, r3_excitations, H1, H2, o, v)
+        # update R2
+        HR2 = build_HR2(r1, r2, r3, r3_excitations, t1, t2, t3, t3_excitations, H1, H2, o, v)
+        # update R3
+        HR3 = build_HR3(r1, r2, r3, r3_excitations, r3_plan, t1, t2, t3, t3_excitations, t3_plan, H1, H2, o, v)
+    else:
+        HR1 = build_HR1(r1, r2, None, None, H1, H2, o, v)
+        HR2 = build_HR2(r1, r2, None, None, t1, t2, None, None, H1, H2, o, v)
+        HR3 = np.zeros_like(r3)
+
+    return np.hstack( [HR1.flatten(), HR2.flatten(), HR3] )
+
+
+def build_HR1(r1, r2, r3, r3_excitations, H1, H2, o, v):
+    """Compute the projection of HR on singles
+        X[a, i] = < ia | [ HBar(CCSDT) * (R1 + R2 + R3) ]_C | 0 >
+    """
+
+    X1 = -np.einsum("mi,am->ai", H1[o, o], r1, optimize=True)
+    X1 += np.einsum("ae,ei->ai", H1[v, v], r1, optimize=True)
+    X1 += np.einsum("amie,em->ai", H2[v, o, o, v], r1, optimize=True)
+    X1 -= 0.5 * np.einsum("mnif,afmn->ai", H2[o, o, o, v], r2, optimize=True)
+    X1 += 0.5 * np.einsum("anef,efin->ai", H2[v, o, v, v], r2, optimize=True)
+    X1 += np.einsum("me,aeim->ai", H1[o, v], r2, optimize=True)
+    if r3 is not None:
+        X1 = eomccsdt_p.eomccsdt_p.build_hr1(X1, r3, r3_excitations, H2[o, o, v, v])
+    return X1
+
+
+def build_HR2(r1, r2, r3, r3_excitations, t1, t2, t3, t3_excitations, H1, H2, o, v):
+    """Compute the projection of HR on doubles
+        X[a, b, i, j] = < ijab | [ HBar(CCSDT) * (R1 + R2 + R3) ]_C | 0 >
+    """
+
+    X2 = -0.5 * np.einsum("mi,abmj->abij", H1[o, o], r2, optimize=True)  # A(ij)
+    X2 += 0.5 * np.einsum("ae,ebij->abij", H1[v, v], r2, optimize=True)  # A(ab)
+    X2 += 0.5 * 0.25 * np.einsum("mnij,abmn->abij", H2[o, o, o, o], r2, optimize=True)
+    X2 += 0.5 * 0.25 * np.einsum("abef,efij->abij", H2[v, v, v, v], r2, optimize=True)
+    X2 += np.einsum("amie,ebmj->abij", H2[v, o, o, v], r2, optimize=True)  # A(ij)A(ab)
+    X2 -= 0.5 * np.einsum("bmji,am->abij", H2[v, o, o, o], r1, optimize=True)  # A(ab)
+    X2 += 0.5 * np.einsum("baje,ei->abij", H2[v, v, o, v], r1, optimize=True)  # A(ij)
+
+    Q1 = -0.5 * np.einsum("mnef,bfmn->eb", H2[o, o, v, v], r2, optimize=True)
+    X2 += 0.5 * np.einsum("eb,aeij->abij", Q1, t2, optimize=True)  # A(ab)
+
+    Q1 = 0.5 * np.einsum("mnef,efjn->mj", H2[o, o, v, v], r2, optimize=True)
+    X2 -= 0.5 * np.einsum("mj,abim->abij", Q1, t2, optimize=True)  # A(ij)
+
+    Q1 = np.einsum("amfe,em->af", H2[v, o, v, v], r1, optimize=True)
+    X2 += 0.5 * np.einsum("af,fbij->abij", Q1, t2, optimize=True)  # A(ab)
+    Q2 = np.einsum("nmie,em->ni", H2[o, o, o, v], r1, optimize=True)
+    X2 -= 0.5 * np.einsum("ni,abnj->abij", Q2, t2, optimize=True)  # A(ij)
+
+    if r3 is None:
+        X2 -= np.transpose(X2, (0, 1, 3, 2))
+        X2 -= np.transpose(X2, (1, 0, 2, 3))
+        return X2
+
+    # the kernels add the R3 (and X(ov) * T3) parts and antisymmetrize
+    I_ov = np.einsum("mnef,fn->me", H2[o, o, v, v], r1, optimize=True)
+    zero_ooov = np.zeros_like(H2[o, o, o, v])
+    zero_vovv = np.zeros_like(H2[v, o, v, v])
+    X2 = eomccsdt_p.eomccsdt_p.build_hr2(X2, r3, r3_excitations, H1[o, v], H2[o, o, o, v], H2[v, o, v, v])
+    X2 += eomccsdt_p.eomccsdt_p.build_hr2(np.zeros_like(X2), t3, t3_excitations, I_ov, zero_ooov, zero_vovv)
+
+    return X2
+
+def build_HR3(r1, r2, r3, r3_excitations, r3_plan, t1, t2, t3, t3_excitations, t3_plan, H1, H2, o, v):
+    """Compute the projection of HR on the P-space triples
+        X[a, b, c, i, j, k] = < ijkabc | [ HBar(CCSDT) * (R1 + R2 + R3) ]_C | 0 >
+    """
+
+    # Intermediates
+    X1_ov = np.einsum("mnef,fn->me", H2[o, o, v, v], r1, optimize=True)
+
+    X1_oo = (
+            np.einsum("me,ej->mj", H1[o, v], r1, optimize=True)
+            + np.einsum("mnjf,fn->mj", H2[o, o, o, v], r1, optimize=True)
+            + 0.5 * np.einsum("mnef,efjn->mj", H2[o, o, v, v], r2, optimize=True)
+    )
+    X1_vv = (
+            -1.0 * np.einsum("me,bm->be", H1[o, v], r1, optimize=True)
+            + np.einsum("bnef,fn->be", H2[v, o, v, v], r1, optimize=True)
+            - 0.5 * np.einsum("mnef,bfmn->be", H2[o, o, v, v], r2, optimize=True)
+    )
+    X2_oooo = (
+        np.einsum("nmje,ei->mnij", H2[o, o, o, v], r1, optimize=True)
+        + 0.25 * np.einsum("mnef,efij->mnij", H2[o, o, v, v], r2, optimize=True)
+    )
+    X2_oooo -= np.transpose(X2_oooo, (0, 1, 3, 2))
+    X2_vvvv = (
+        -1.0 * np.einsum("amef,bm->abef", H2[v, o, v, v], r1, optimize=True)
+        + 0.25 * np.einsum("mnef,abmn->abef", H2[o, o, v, v], r2, optimize=True)
+    )
+    X2_vvvv -= np.transpose(X2_vvvv, (1, 0, 2, 3))
+    X2_voov = (
+        -1.0 * np.einsum("nmje,bn->bmje", H2[o, o, o, v], r1, optimize=True)
+        + np.einsum("bmfe,fj->bmje", H2[v, o, v, v], r1, optimize=True)
+        + np.einsum("mnef,fcnk->cmke", H2[o, o, v, v], r2, optimize=True)
+    )
+    X2_vvov =(
+        np.einsum("amje,bm->baje", H2[v, o, o, v], r1, optimize=True)
+        + np.einsum("amfe,bejm->bajf", H2[v, o, v, v], r2, optimize=True)
+        + 0.5 * np.einsum("abfe,ej->bajf", H2[v, v, v, v], r1, optimize=True)
+        + 0.25 * np.einsum("nmje,abmn->baje", H2[o, o, o, v], r2, optimize=True)
+        - 0.5 * np.einsum("me,abmj->baje", X1_ov, t2, optimize=True)
+    )
+    X2_vvov -= np.transpose(X2_vvov, (1, 0, 2, 3))
+    X2_vooo = (
+        -np.einsum("bmie,ej->bmji", H2[v, o, o, v], r1, optimize=True)
+        +np.einsum("nmie,bejm->bnji", H2[o, o, o, v], r2, optimize=True)
+        - 0.5 * np.einsum("nmij,bm->bnji", H2[o, o, o, o], r1, optimize=True)
+        + 0.25 * np.einsum("bmfe,efij->bmji", H2[v, o, v, v], r2, optimize=True)
+    )
+    X2_vooo -= np.transpose(X2_vooo, (0, 1, 3, 2))
+
+    # add the R3 parts of X2(vvov) and X2(vooo); the kernels expect the halved (and reordered)
+    # intermediates and antisymmetrize them
+    X2_vooo = np.asfortranarray(0.5 * X2_vooo.transpose(1, 0, 2, 3))
+    eomccsdt_p.eomccsdt_p.calc_i2_vooo(X2_vooo, H2[o, o, v, v], r3_excitations, r3)
+    X2_vvov = np.asfortranarray(0.5 * X2_vvov.transpose(3, 0, 1, 2))
+    eomccsdt_p.eomccsdt_p.calc_i2_vvov(X2_vvov, H2[o, o, v, v], r3_excitations, r3)
+
+    X3 = eomccsdt_p.eomccsdt_p.build_hr3_p(
+            r3, r3_excitations,
+            t3, t3_excitations,
+            *r3_plan, *t3_plan,
+            t2, r2,
+            H1[o, o], H1[v, v].T,
+            H2[v, v, o, v].transpose(3, 0, 1, 2), H2[v, o, o, o].transpose(1, 0, 2, 3),
+            H2[o, o, o, o], H2[v, o, o, v].transpose(1, 3, 0, 2), H2[v, v, v, v].transpose(3, 2, 1, 0),
+            X1_oo, X1_vv.T,
+            X2_vvov, X2_vooo,
+            X2_oooo, X2_voov.transpose(1, 3, 0, 2), X2_vvvv.transpose(3, 2, 1, 0),
+    )
+    return X3
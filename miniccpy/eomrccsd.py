@@ -2,23 +2,33 @@ import time
 import numpy as np
 import h5py
 from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root, olsen_correction, check_preconditioner
 
-def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False):
+def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, preconditioner="fock", olsen=False, root_select="overlap", target_energy=None, stats=None):
     """
     Diagonalize the similarity-transformed CCSD Hamiltonian using the
     non-Hermitian Davidson algorithm for a specific root defined by an initial
-    guess vector.
+    guess vector. Use preconditioner="hbar" to precondition with the diagonal
+    of the spin-free singles and doubles blocks of HBar and olsen=True to
+    apply the Olsen correction to each new direction.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"].
     """
     from miniccpy.energy import calc_r0_rhf, calc_rel_rhf
+    from miniccpy.hbar_diagonal import eomrccsd_hbar_diagonal
+
+    check_preconditioner(preconditioner)
 
     remove_file("eomcc-vectors.hdf5")
     if out_of_core:
         f = h5py.File("eomcc-vectors.hdf5", "w")
 
-    eps = np.diagonal(H1)
-    n = np.newaxis
-    e_abij = (eps[v, n, n, n] + eps[n, v, n, n] - eps[n, n, o, n] - eps[n, n, n, o])
-    e_ai = (eps[v, n] - eps[n, o])
+    if preconditioner == "hbar":
+        e_ai, e_abij = eomrccsd_hbar_diagonal(H1, H2, o, v)
+    else:
+        eps = np.diagonal(H1)
+        n = np.newaxis
+        e_abij = (eps[v, n, n, n] + eps[n, v, n, n] - eps[n, n, o, n] - eps[n, n, n, o])
+        e_ai = (eps[v, n] - eps[n, o])
 
     t1, t2 = T
 
@@ -45,6 +55,11 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
     restart_block = np.zeros((ndim, nrest))
     G = np.zeros((max_size, max_size))
 
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
     # Initial values
     B[0, :] = R
     sigma[0, :] = HR(R[:n1].reshape(nunocc, nocc),
@@ -64,16 +79,8 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
         # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
         G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
         G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
-        e, alpha_full = np.linalg.eig(G[:curr_size, :curr_size])
-
-        # select root based on maximum overlap with initial guess
-        idx = np.argsort(abs(alpha_full[0, :]))
-        iselect = idx[-1]
-
-        alpha = np.real(alpha_full[:, iselect])
-
-        # Get the eigenpair of interest
-        omega = np.real(e[iselect])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
         R = np.dot(B[:curr_size, :].T, alpha)
         restart_block[:, niter % nrest] = R
 
@@ -94,6 +101,13 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
                    omega,
                    e_ai,
                    e_abij)
+        if olsen:
+            q_x = update(R[:n1].reshape(nunocc, nocc).copy(),
+                         R[n1:].reshape(nunocc, nunocc, nocc, nocc).copy(),
+                         omega,
+                         e_ai,
+                         e_abij)
+            q = olsen_correction(q, q_x, R)
         for p in range(curr_size):
             b = B[p, :] / np.linalg.norm(B[p, :])
             q -= np.dot(b.T, q) * b
@@ -123,6 +137,8 @@ def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=2
         print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
     else:
         print("EOMCCSD iterations did not converge")
+    if stats is not None:
+        stats["niter"] = niter + 1
 
     # Save the final converged root in an excitation tuple
     R = (R[:n1].reshape(nunocc, nocc), R[n1:].reshape(nunocc, nunocc, nocc, nocc))
@@ -0,0 +1,237 @@
+import time
+import numpy as np
+import h5py
+from miniccpy.utilities import get_memory_usage, remove_file
+from miniccpy.davidson import select_root, olsen_correction
+
+def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, olsen=False, root_select="overlap", target_energy=None):
+    """
+    Diagonalize the similarity-transformed CCSD Hamiltonian using the
+    non-Hermitian Davidson algorithm for a specific M_s = 0 triplet root
+    defined by an initial guess vector. The triplet EOM vector is stored
+    as R = (r1, r2ab, r2aa), where
+        r1(a,i) = r(a_alpha, i_alpha) = -r(a_beta, i_beta)
+        r2ab(a,b,i,j) = r(a_alpha b_beta, i_alpha j_beta) = -r(a_beta b_alpha, i_beta j_alpha)
+        r2aa(a,b,i,j) = r(a_alpha b_alpha, i_alpha j_alpha) = -r(a_beta b_beta, i_beta j_beta)
+    so that r2ab(a,b,i,j) = -r2ab(b,a,j,i) and r2aa is antisymmetric in (ab) and (ij).
+    Use olsen=True to apply the Olsen correction to each new direction.
+    """
+    from miniccpy.energy import calc_rel_rhf_triplet
+
+    remove_file("eomcc-vectors.hdf5")
+    if out_of_core:
+        f = h5py.File("eomcc-vectors.hdf5", "w")
+
+    eps = np.diagonal(H1)
+    n = np.newaxis
+    e_abij = (eps[v, n, n, n] + eps[n, v, n, n] - eps[n, n, o, n] - eps[n, n, n, o])
+    e_ai = (eps[v, n] - eps[n, o])
+
+    t1, t2 = T
+
+    nunocc, nocc = e_ai.shape
+    n1 = nunocc * nocc
+    n2 = nocc**2 * nunocc**2
+    ndim = n1 + 2 * n2
+
+    # Pad the initial guess vector to fill the dimension of the problem
+    if len(R0) < ndim:
+        R = np.zeros(ndim)
+        R[:len(R0)] = R0
+    else:
+        R = R0.copy()
+
+    # Allocate the B and sigma matrices
+    if out_of_core:
+        sigma = f.create_dataset("sigma", (max_size, ndim), dtype=np.float64)
+        B = f.create_dataset("bmatrix", (max_size, ndim), dtype=np.float64)
+    else:
+        sigma = np.zeros((max_size, ndim))
+        B = np.zeros((max_size, ndim))
+
+    restart_block = np.zeros((ndim, nrest))
+    G = np.zeros((max_size, max_size))
+
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
+    # Initial values
+    B[0, :] = R
+    sigma[0, :] = HR(*unflatten(R, nunocc, nocc), t1, t2, H1, H2, o, v)
+
+    print("    ==> R-EOMCCSD (triplet) iterations <==")
+    print("    The initial guess energy = ", omega)
+    print("")
+    print("     Iter               Energy                 |dE|                 |dR|     Wall Time     Memory")
+    curr_size = 1
+    for niter in range(maxit):
+        tic = time.time()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem: G_{IJ} = sum_K B_{KI} S_{KJ} (vectorized)
+        G[curr_size - 1, :curr_size] = np.einsum("k,pk->p", B[curr_size - 1, :], sigma[:curr_size, :])
+        G[:curr_size, curr_size - 1] = np.einsum("k,pk->p", sigma[curr_size - 1, :], B[:curr_size, :])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G[:curr_size, :curr_size], B, sigma, root_select, target_energy, R_guess)
+        R = np.dot(B[:curr_size, :].T, alpha)
+        restart_block[:, niter % nrest] = R
+
+        # calculate residual vector
+        residual = np.dot(sigma[:curr_size, :].T, alpha) - omega * R
+        res_norm = np.linalg.norm(residual)
+        delta_e = omega - omega_old
+
+        if res_norm < convergence and abs(delta_e) < convergence:
+            toc = time.time()
+            minutes, seconds = divmod(toc - tic, 60)
+            print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+            break
+
+        # update residual vector
+        q = update(*unflatten(residual, nunocc, nocc), omega, e_ai, e_abij)
+        if olsen:
+            q_x = update(*unflatten(R.copy(), nunocc, nocc), omega, e_ai, e_abij)
+            q = olsen_correction(q, q_x, R)
+        for p in range(curr_size):
+            b = B[p, :] / np.linalg.norm(B[p, :])
+            q -= np.dot(b.T, q) * b
+        q *= 1.0 / np.linalg.norm(q)
+
+        # If below maximum subspace size, expand the subspace
+        if curr_size < max_size:
+            B[curr_size, :] = q
+            sigma[curr_size, :] = HR(*unflatten(q, nunocc, nocc), t1, t2, H1, H2, o, v)
+        else:
+            # Basic restart - use the last approximation to the eigenvector
+            print("       **Deflating subspace**")
+            restart_block, _ = np.linalg.qr(restart_block)
+            for j in range(restart_block.shape[1]):
+                B[j, :] = restart_block[:, j]
+                sigma[j, :] = HR(*unflatten(restart_block[:, j], nunocc, nocc), t1, t2, H1, H2, o, v)
+            curr_size = restart_block.shape[1] - 1
+
+        curr_size += 1
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        print("EOMCCSD iterations did not converge")
+
+    # Save the final converged root in an excitation tuple
+    R = unflatten(R, nunocc, nocc)
+    # Triplet states do not couple to the closed-shell ground state, so r0 = 0
+    r0 = 0.0
+    # Compute relative excitation level diagnostic
+    rel = calc_rel_rhf_triplet(r0, *R)
+    # remove the HDF5 file
+    remove_file("eomcc-vectors.hdf5")
+    return R, omega, r0, rel
+
+def unflatten(R, nunocc, nocc):
+    """Split the flattened triplet vector into its r1, r2ab, and r2aa parts."""
+    n1 = nunocc * nocc
+    n2 = nocc**2 * nunocc**2
+    return (R[:n1].reshape(nunocc, nocc),
+            R[n1:n1 + n2].reshape(nunocc, nunocc, nocc, nocc),
+            R[n1 + n2:].reshape(nunocc, nunocc, nocc, nocc))
+
+def update(r1, r2ab, r2aa, omega, e_ai, e_abij):
+    """Perform the diagonally preconditioned residual (DPR) update
+    to get the next correction vector."""
+
+    r1 /= (omega - e_ai + 1.0e-012)
+    r2ab /= (omega - e_abij + 1.0e-012)
+    r2aa /= (omega - e_abij + 1.0e-012)
+
+    return np.hstack([r1.flatten(), r2ab.flatten(), r2aa.flatten()])
+
+def HR(r1, r2ab, r2aa, t1, t2, H1, H2, o, v):
+    """Compute the matrix-vector product H * R, where
+    H is the CCSD similarity-transformed Hamiltonian and R is
+    the triplet EOMCCSD linear excitation operator."""
+
+    # the singles projection and the one-body intermediates only
+    # depend on the doubles through r2ab + r2aa
+    r2_ss = r2ab + r2aa
+    # update R1
+    HR1 = build_HR1(r1, r2_ss, H1, H2, o, v)
+    # update R2
+    X_oo, X_vv = get_intermediates(r1, r2_ss, H2, o, v)
+    HR2ab = build_HR2ab(r1, r2ab, r2aa, t2, H1, H2, X_oo, X_vv, o, v)
+    HR2aa = build_HR2aa(r1, r2ab, r2aa, t2, H1, H2, X_oo, X_vv, o, v)
+
+    return np.hstack( [HR1.flatten(), HR2ab.flatten(), HR2aa.flatten()] )
+
+def build_HR1(r1, r2_ss, H1, H2, o, v):
+    """Compute the projection of HR on singles
+        X[a, i] = < i_alpha a_alpha | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+    X1 = -np.einsum("mi,am->ai", H1[o, o], r1, optimize=True)
+    X1 += np.einsum("ae,ei->ai", H1[v, v], r1, optimize=True)
+    X1 -= np.einsum("amei,em->ai", H2[v, o, v, o], r1, optimize=True)
+    X1 += np.einsum("me,aeim->ai", H1[o, v], r2_ss, optimize=True)
+    X1 -= np.einsum("mnif,afmn->ai", H2[o, o, o, v], r2_ss, optimize=True)
+    X1 += np.einsum("anef,efin->ai", H2[v, o, v, v], r2_ss, optimize=True)
+    return X1
+
+def get_intermediates(r1, r2_ss, H2, o, v):
+    """Compute the one-body intermediates entering the T2 terms of
+    both doubles projections."""
+    X_oo = (
+            - np.einsum("nmjf,fn->mj", H2[o, o, o, v], r1, optimize=True)
+            + np.einsum("mnef,efjn->mj", H2[o, o, v, v], r2_ss, optimize=True)
+    )
+    X_vv = (
+            - np.einsum("bnfe,fn->be", H2[v, o, v, v], r1, optimize=True)
+            - np.einsum("mnfe,bfnm->be", H2[o, o, v, v], r2_ss, optimize=True)
+    )
+    return X_oo, X_vv
+
+def build_HR2ab(r1, r2ab, r2aa, t2, H1, H2, X_oo, X_vv, o, v):
+    """Compute the projection of HR on the opposite-spin doubles
+        X[a, b, i, j] = < i_alpha j_beta a_alpha b_beta | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+    X2 = np.einsum("ae,ebij->abij", H1[v, v], r2ab, optimize=True)
+    X2 -= np.einsum("mi,abmj->abij", H1[o, o], r2ab, optimize=True)
+    X2 += 0.5 * np.einsum("mnij,abmn->abij", H2[o, o, o, o], r2ab, optimize=True)
+    X2 += 0.5 * np.einsum("abef,efij->abij", H2[v, v, v, v], r2ab, optimize=True)
+    X2 += np.einsum("baje,ei->abij", H2[v, v, o, v], r1, optimize=True)
+    X2 -= np.einsum("bmji,am->abij", H2[v, o, o, o], r1, optimize=True)
+    X2 += np.einsum("ae,ebij->abij", X_vv, t2, optimize=True)
+    X2 -= np.einsum("mi,abmj->abij", X_oo, t2, optimize=True)
+    X2 += np.einsum("amie,ebmj->abij", H2[v, o, o, v], r2ab - r2aa, optimize=True)
+    X2 -= np.einsum("amei,ebmj->abij", H2[v, o, v, o], r2ab, optimize=True)
+    X2 -= np.einsum("amej,ebim->abij", H2[v, o, v, o], r2ab, optimize=True)
+    X2 -= X2.transpose(1, 0, 3, 2)
+    return X2
+
+def build_HR2aa(r1, r2ab, r2aa, t2, H1, H2, X_oo, X_vv, o, v):
+    """Compute the projection of HR on the same-spin doubles
+        X[a, b, i, j] = < i_alpha j_alpha a_alpha b_alpha | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+    # same-spin T2 and 2-body HBar elements
+    t2_aa = t2 - t2.transpose(0, 1, 3, 2)
+    h_voov = H2[v, o, o, v] - H2[v, o, v, o].transpose(0, 1, 3, 2)
+
+    # terms antisymmetrized in (ab)
+    X2 = np.einsum("ae,ebij->abij", H1[v, v], r2aa, optimize=True)
+    X2 -= np.einsum("bmji,am->abij", H2[v, o, o, o] - H2[v, o, o, o].transpose(0, 1, 3, 2), r1, optimize=True)
+    X2 += np.einsum("ae,ebij->abij", X_vv, t2_aa, optimize=True)
+    X2 -= X2.transpose(1, 0, 2, 3)
+    # terms antisymmetrized in (ij)
+    Y2 = -np.einsum("mi,abmj->abij", H1[o, o], r2aa, optimize=True)
+    Y2 += np.einsum("baje,ei->abij", H2[v, v, o, v] - H2[v, v, v, o].transpose(0, 1, 3, 2), r1, optimize=True)
+    Y2 -= np.einsum("mi,abmj->abij", X_oo, t2_aa, optimize=True)
+    X2 += Y2 - Y2.transpose(0, 1, 3, 2)
+    # terms antisymmetrized in both (ab) and (ij)
+    Z2 = np.einsum("amie,ebmj->abij", h_voov, r2aa, optimize=True)
+    Z2 -= np.einsum("amie,ebmj->abij", H2[v, o, o, v], r2ab, optimize=True)
+    Z2 -= Z2.transpose(1, 0, 2, 3)
+    X2 += Z2 - Z2.transpose(0, 1, 3, 2)
+    X2 += np.einsum("mnij,abmn->abij", H2[o, o, o, o], r2aa, optimize=True)
+    X2 += np.einsum("abef,efij->abij", H2[v, v, v, v], r2aa, optimize=True)
+    return X2
@@ -0,0 +1,86 @@
+import numpy as np
+from miniccpy.mp2 import get_amplitudes
+from miniccpy.energy import ccd_energy, rccd_energy
+
+def mp2_virtual_density(t2, rhf=False):
+    """Compute the spin-summed MP2 virtual-virtual density matrix in the
+    basis of spatial virtual orbitals,
+    D[a, b] = sum_{sigma} < 0 | (1 + T2^+) a_{a sigma}^+ a_{b sigma} T2 | 0 >.
+    For spin-orbital amplitudes, this requires a closed-shell reference, where
+    the alpha and beta virtual spinorbitals are interleaved pairs."""
+    if rhf:
+        t2_ss = 2.0 * t2 - t2.transpose(0, 1, 3, 2)
+        D = 2.0 * np.einsum("acij,bcij->ab", t2_ss, t2, optimize=True)
+    else:
+        D = 0.5 * np.einsum("acij,bcij->ab", t2, t2, optimize=True)
+        D = D[0::2, 0::2] + D[1::2, 1::2]
+    # symmetrize to remove numerical noise
+    return 0.5 * (D + D.T)
+
+def transform_integrals(fock, g, U):
+    """Transform the Fock matrix and two-electron integrals to the orbital
+    basis defined by the columns of U."""
+    fock = np.einsum("pq,pr,qs->rs", fock, U, U, optimize=True)
+    g = np.einsum("pqrs,pw,qx,ry,sz->wxyz", g, U, U, U, U, optimize=True)
+    return fock, g
+
+def kernel(fock, g, o, v, threshold=1.0e-05, rhf=False):
+    """Truncate the virtual orbital space using frozen natural orbitals (FNOs).
+
+    The MP2 virtual-virtual density is diagonalized, virtual natural orbitals with
+    occupation numbers below `threshold` are discarded, and the retained virtuals are
+    re-canonicalized by diagonalizing the virtual-virtual block of the Fock matrix
+    within the retained space. Returns the Fock matrix, two-electron integrals, and
+    slicing arrays in the truncated basis, the FNO occupation numbers, and the MP2
+    truncation correction E(MP2, full) - E(MP2, FNO)."""
+    nocc = v.start
+    norb = fock.shape[0]
+    if rhf:
+        nvir = norb - nocc
+        fvv = fock[v, v]
+    else:
+        if nocc % 2 != 0 or not np.allclose(fock[v, v][0::2, 0::2], fock[v, v][1::2, 1::2]):
+            raise ValueError("FNO truncation in the spin-orbital basis requires a closed-shell reference")
+        nvir = (norb - nocc) // 2
+        fvv = fock[v, v][0::2, 0::2]
+
+    # MP2 in the full virtual space
+    t2 = get_amplitudes(fock, g, o, v)
+    if rhf:
+        e_mp2_full = rccd_energy(t2, g, o, v)
+    else:
+        e_mp2_full = ccd_energy(t2, g, o, v)
+
+    # Virtual natural orbitals, sorted in order of decreasing occupation
+    occupation, C = np.linalg.eigh(mp2_virtual_density(t2, rhf=rhf))
+    idx = np.argsort(occupation)[::-1]
+    occupation = occupation[idx]
+    C = C[:, idx]
+    nkeep = int(np.sum(occupation >= threshold))
+    C = C[:, :nkeep]
+
+    # Re-canonicalize the retained virtuals
+    _, W = np.linalg.eigh(np.einsum("ab,ak,bl->kl", fvv, C, C, optimize=True))
+    C = C @ W
+
+    # Build the orbital transformation; the occupied orbitals are left untouched
+    if rhf:
+        U = np.zeros((norb, nocc + nkeep))
+        U[:nocc, :nocc] = np.eye(nocc)
+        U[nocc:, nocc:] = C
+    else:
+        U = np.zeros((norb, nocc + 2 * nkeep))
+        U[:nocc, :nocc] = np.eye(nocc)
+        U[nocc::2, nocc::2] = C
+        U[nocc + 1::2, nocc + 1::2] = C
+    fock, g = transform_integrals(fock, g, U)
+    v = slice(nocc, U.shape[1])
+
+    # MP2 in the truncated virtual space
+    t2 = get_amplitudes(fock, g, o, v)
+    if rhf:
+        e_mp2_fno = rccd_energy(t2, g, o, v)
+    else:
+        e_mp2_fno = ccd_energy(t2, g, o, v)
+
+    return fock, g, o, v, occupation, e_mp2_full - e_mp2_fno
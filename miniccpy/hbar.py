@@ -752,6 +752,95 @@ def build_hbar_ccsd(T, f, g, o, v):
 
     return H1, H2
 
+def build_hbar_ccsd_sym(T, f, g, o, v, orbsym=None, point_group="C1"):
+    """Calculate the one- and two-body components of the CCSD
+    similarity-transformed Hamiltonian [H_N exp(T1+T2)]_C in point-group
+    symmetry-blocked form, where `orbsym` holds the irrep labels of the
+    correlated spinorbitals in the Abelian group `point_group`. The result
+    is a pair of BlockedOperator objects, so that H2["voov"] is the blocked
+    slice used by eomccsd_sym while H2[v, o, o, v] expands it into a dense array.
+    """
+    from miniccpy.symmetry import SymmetryBlocking, SymTensor, BlockedOperator, sym_einsum
+
+    nunocc, nocc = f[v, o].shape
+    if orbsym is None:
+        orbsym, point_group = ["A"] * (nocc + nunocc), "C1"
+    blocking = SymmetryBlocking(orbsym, point_group, nocc, nunocc)
+
+    t1, t2 = T
+    if not isinstance(t1, SymTensor):
+        t1 = SymTensor.from_dense(blocking, t1, "vo")
+        t2 = SymTensor.from_dense(blocking, t2, "vvoo")
+    f = BlockedOperator.from_dense(blocking, f, o, v, ["oo", "ov", "vv"])
+    g = BlockedOperator.from_dense(blocking, g, o, v, ["oooo", "ooov", "oovv", "ovov", "voov", "vooo", "vovv", "vvov", "vvvv"])
+
+    H1 = BlockedOperator(blocking, o, v)
+    H2 = BlockedOperator(blocking, o, v)
+
+    # 1-body components
+    H1["ov"] = f["ov"] + sym_einsum("imae,em->ia", g["oovv"], t1)
+
+    H1["oo"] = f["oo"] + (
+            sym_einsum("je,ei->ji", H1["ov"], t1)
+            + sym_einsum("jmie,em->ji", g["ooov"], t1)
+            + 0.5 * sym_einsum("jnef,efin->ji", g["oovv"], t2)
+    )
+
+    H1["vv"] = f["vv"] + (
+            - sym_einsum("mb,am->ab", H1["ov"], t1)
+            + sym_einsum("ambe,em->ab", g["vovv"], t1)
+            - 0.5 * sym_einsum("mnbf,afmn->ab", g["oovv"], t2)
+    )
+
+    # 2-body components
+    Q1 = -sym_einsum("mnfe,an->amef", g["oovv"], t1)
+    I_vovv = g["vovv"] + 0.5 * Q1
+    H2["vovv"] = I_vovv + 0.5 * Q1
+
+    Q1 = sym_einsum("mnfe,fi->mnie", g["oovv"], t1)
+    I_ooov = g["ooov"] + 0.5 * Q1
+    H2["ooov"] = I_ooov + 0.5 * Q1
+
+    Q1 = -sym_einsum("bmfe,am->abef", I_vovv, t1)
+    Q1 -= Q1.transpose((1, 0, 2, 3))
+    H2["vvvv"] = g["vvvv"] + 0.5 * sym_einsum("mnef,abmn->abef", g["oovv"], t2) + Q1
+
+    Q1 = +sym_einsum("nmje,ei->mnij", I_ooov, t1)
+    Q1 -= Q1.transpose((0, 1, 3, 2))
+    H2["oooo"] = g["oooo"] + 0.5 * sym_einsum("mnef,efij->mnij", g["oovv"], t2) + Q1
+
+    H2["voov"] = g["voov"] + (
+            sym_einsum("amfe,fi->amie", I_vovv, t1)
+            - sym_einsum("nmie,an->amie", I_ooov, t1)
+            + sym_einsum("nmfe,afin->amie", g["oovv"], t2)
+    )
+
+    Q1 = sym_einsum("mnjf,afin->amij", H2["ooov"], t2)
+    Q2 = g["voov"] + 0.5 * sym_einsum("amef,ei->amif", g["vovv"], t1)
+    Q2 = sym_einsum("amif,fj->amij", Q2, t1)
+    Q1 += Q2
+    Q1 -= Q1.transpose((0, 1, 3, 2))
+    H2["vooo"] = g["vooo"] + Q1 + (
+            sym_einsum("me,aeij->amij", H1["ov"], t2)
+            - sym_einsum("nmij,an->amij", H2["oooo"], t1)
+            + 0.5 * sym_einsum("amef,efij->amij", g["vovv"], t2)
+    )
+
+    Q1 = sym_einsum("bnef,afin->abie", H2["vovv"], t2)
+    Q2 = g["ovov"] - 0.5 * sym_einsum("mnie,bn->mbie", g["ooov"], t1)
+    Q2 = -sym_einsum("mbie,am->abie", Q2, t1)
+    Q1 += Q2
+    Q1 -= Q1.transpose((1, 0, 2, 3))
+    H2["vvov"] = g["vvov"] + Q1 + (
+            - sym_einsum("me,abim->abie", H1["ov"], t2)
+            + sym_einsum("abfe,fi->abie", H2["vvvv"], t1)
+            + 0.5 * sym_einsum("mnie,abmn->abie", g["ooov"], t2)
+    )
+
+    H2["oovv"] = g["oovv"].copy()
+
+    return H1, H2
+
 def build_hbar_ccsdt(T, f, g, o, v):
     """Calculate the one- and two-body components of the CCSDT 
     similarity-transformed Hamiltonian [H_N exp(T1+T2+T3)]_C,
@@ -835,6 +924,32 @@ def build_hbar_ccsdt(T, f, g, o, v):
 
     return H1, H2
 
+def build_hbar_ccsdt_p(T, f, g, o, v, t3_excitations=None):
+    """Calculate the one- and two-body components of the CCSDT(P)
+    similarity-transformed Hamiltonian [H_N exp(T1+T2+T3)]_C, where
+    the T3 amplitudes t3 are defined on the P space given by `t3_excitations`.
+    Only the vooo and vvov components differ from those of CCSD and their T3
+    parts are computed by the P-space kernels.
+    """
+    from miniccpy.pspace import as_excitation_list, is_empty_pspace
+    from miniccpy.lib import ccsdt_p
+
+    t1, t2, t3 = T
+
+    H1, H2 = build_hbar_ccsd((t1, t2), f, g, o, v)
+
+    t3_excitations = as_excitation_list(t3_excitations)
+    if not is_empty_pspace(t3_excitations):
+        # the kernels expect the halved (and reordered) intermediates and antisymmetrize them
+        I2_vooo = np.asfortranarray(0.5 * H2[v, o, o, o].transpose(1, 0, 2, 3))
+        ccsdt_p.ccsdt_p.calc_i2_vooo(I2_vooo, g[o, o, v, v], t3_excitations, t3)
+        H2[v, o, o, o] = I2_vooo.transpose(1, 0, 2, 3)
+        I2_vvov = np.asfortranarray(0.5 * H2[v, v, o, v].transpose(3, 0, 1, 2))
+        ccsdt_p.ccsdt_p.calc_i2_vvov(I2_vvov, g[o, o, v, v], t3_excitations, t3)
+        H2[v, v, o, v] = I2_vvov.transpose(1, 2, 3, 0)
+
+    return H1, H2
+
 def build_hbar_cc3(T, f, g, o, v):
     """Calculate the one- and two-body components of the CCSDT 
     similarity-transformed Hamiltonian [H_N exp(T1+T2+T3)]_C,
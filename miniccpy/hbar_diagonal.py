@@ -1,3 +1,4 @@
+import itertools
 import numpy as np
 
 def get_3body_hbar_triples_diagonal(g_oovv, t2):
@@ -107,3 +108,274 @@ def vov_denom_abc_3p2h(j, k, d3v):
             -eps_k[:, :, n] - eps_k[:, n, :] - eps_k[n, :, :]
     )
     return e_abc
+
+def get_3body_hbar_triples_diagonal_rhf(g_oovv, t2):
+    """< ijkabc | (V_V*T2)_C | ijkabc > diagonal for RHF-based spin-free T2. The
+    same-spin (ss) pieces have all indices of the same spin, while in the opposite-spin
+    (os) pieces, the last index is of opposite spin to the others."""
+    g_as = g_oovv - np.transpose(g_oovv, (0, 1, 3, 2))
+    t2_as = t2 - np.transpose(t2, (0, 1, 3, 2))
+
+    d3v_ss = -np.einsum("imab,abim->aib", g_as, t2_as, optimize=True)
+    d3v_os = -np.einsum("imab,abim->aib", g_oovv, t2, optimize=True)
+    d3o_ss = np.einsum("ijae,aeij->aij", g_as, t2_as, optimize=True)
+    d3o_os = np.einsum("ijae,aeij->aij", g_oovv, t2, optimize=True)
+
+    return d3v_ss, d3v_os, d3o_ss, d3o_os
+
+def get_2body_hbar_triples_diagonal_rhf(H2, o, v):
+    """Same-spin (ss) and opposite-spin (os) diagonals h(aiia), h(jiji), and h(baba)
+    of the RHF-based CCSD HBar entering the triples denominators."""
+    h_voov_os = -np.einsum("aiai->ai", H2[v, o, v, o])
+    h_voov_ss = np.einsum("aiia->ai", H2[v, o, o, v]) + h_voov_os
+    h_oooo_os = np.einsum("jiji->ij", H2[o, o, o, o])
+    h_oooo_ss = h_oooo_os - np.einsum("jiij->ij", H2[o, o, o, o])
+    h_vvvv_os = np.einsum("baba->ab", H2[v, v, v, v])
+    h_vvvv_ss = h_vvvv_os - np.einsum("baab->ab", H2[v, v, v, v])
+    return (h_voov_ss, h_voov_os), (h_oooo_ss, h_oooo_os), (h_vvvv_ss, h_vvvv_os)
+
+def _broadcast_abc(x, axes):
+    """Place the array x along the given axes of a 3-index (abc) array."""
+    missing = tuple(p for p in range(3) if p not in axes)
+    return np.expand_dims(x, missing)
+
+def voov_denom_abc_rhf(i, j, k, spins, h_voov):
+    """Spin-resolved analog of voov_denom_abc, where spins[p] is the spin of the
+    p-th (virtual, occupied) pair of the triple excitation."""
+    h_voov_ss, h_voov_os = h_voov
+    occ = (i, j, k)
+    e_abc = 0.0
+    for p in range(3):
+        eps = 0.0
+        for q in range(3):
+            if spins[p] == spins[q]:
+                eps -= h_voov_ss[:, occ[q]]
+            else:
+                eps -= h_voov_os[:, occ[q]]
+        e_abc = e_abc + _broadcast_abc(eps, (p,))
+    return e_abc
+
+def oooo_denom_rhf(i, j, k, spins, h_oooo):
+    """Spin-resolved analog of the oooo part of the triples denominator."""
+    occ = (i, j, k)
+    e_ijk = 0.0
+    for p, q in itertools.combinations(range(3), 2):
+        if spins[p] == spins[q]:
+            e_ijk -= h_oooo[0][occ[p], occ[q]]
+        else:
+            e_ijk -= h_oooo[1][occ[p], occ[q]]
+    return e_ijk
+
+def vvvv_denom_abc_rhf(spins, h_vvvv):
+    """Spin-resolved analog of vvvv_denom_abc."""
+    e_abc = 0.0
+    for p, r in itertools.combinations(range(3), 2):
+        if spins[p] == spins[r]:
+            e_abc = e_abc - _broadcast_abc(h_vvvv[0], (p, r))
+        else:
+            e_abc = e_abc - _broadcast_abc(h_vvvv[1], (p, r))
+    return e_abc
+
+def voo_denom_abc_rhf(i, j, k, spins, d3o):
+    """Spin-resolved analog of voo_denom_abc."""
+    d3o_ss, d3o_os = d3o
+    occ = (i, j, k)
+    e_abc = 0.0
+    for p in range(3):
+        for q, r in itertools.combinations(range(3), 2):
+            if spins[q] == spins[r]:
+                if spins[p] != spins[q]:
+                    continue
+                eps = d3o_ss[:, occ[q], occ[r]]
+            elif spins[p] == spins[q]:
+                eps = d3o_os[:, occ[q], occ[r]]
+            else:
+                eps = d3o_os[:, occ[r], occ[q]]
+            e_abc = e_abc + _broadcast_abc(eps, (p,))
+    return e_abc
+
+def vov_denom_abc_rhf(i, j, k, spins, d3v):
+    """Spin-resolved analog of vov_denom_abc."""
+    d3v_ss, d3v_os = d3v
+    occ = (i, j, k)
+    e_abc = 0.0
+    for q in range(3):
+        for p, r in itertools.combinations(range(3), 2):
+            if spins[p] == spins[r]:
+                if spins[q] != spins[p]:
+                    continue
+                eps = d3v_ss[:, occ[q], :]
+            elif spins[q] == spins[p]:
+                eps = d3v_os[:, occ[q], :]
+            else:
+                eps = d3v_os[:, occ[q], :].T
+            e_abc = e_abc - _broadcast_abc(eps, (p, r))
+    return e_abc
+
+def eomccsd_hbar_diagonal(H1, H2, o, v):
+    """Diagonal of the singles and doubles blocks of the CCSD HBar,
+    < ia | HBar | ia > and < ijab | HBar | ijab >, keeping the one-body
+    parts together with the two-body oooo, vvvv, and voov pieces."""
+    n = np.newaxis
+    h_oo = np.diagonal(H1[o, o])
+    h_vv = np.diagonal(H1[v, v])
+    # two-body diagonals h(mnmn), h(efef), and h(emme)
+    h_oooo = np.einsum("ijij->ij", H2[o, o, o, o])
+    h_vvvv = np.einsum("abab->ab", H2[v, v, v, v])
+    h_voov = np.einsum("aiia->ai", H2[v, o, o, v])
+
+    d_ai = h_vv[:, n] - h_oo[n, :] + h_voov
+    d_abij = (
+            h_vv[:, n, n, n] + h_vv[n, :, n, n] - h_oo[n, n, :, n] - h_oo[n, n, n, :]
+            + h_oooo[n, n, :, :] + h_vvvv[:, :, n, n]
+            + h_voov[:, n, :, n] + h_voov[:, n, n, :] + h_voov[n, :, :, n] + h_voov[n, :, n, :]
+    )
+    return d_ai, d_abij
+
+def eomccsd_sym_hbar_diagonal(H1, H2, sym):
+    """Symmetry-blocked counterpart of eomccsd_hbar_diagonal for the BlockedOperator
+    HBar of build_hbar_ccsd_sym. The one- and two-body diagonals are gathered from
+    the symmetry blocks and the result is returned as SymTensors of symmetry `sym`,
+    so no dense HBar slice is formed."""
+    from miniccpy.symmetry import SymTensor
+
+    blocking = H1.blocking
+    idx_o, idx_v = blocking.index["o"], blocking.index["v"]
+    no, nu = sum(blocking.dims["o"]), sum(blocking.dims["v"])
+    n = np.newaxis
+    # one-body diagonals and the two-body diagonals h(mnmn), h(efef), and h(emme)
+    h_oo = np.zeros(no)
+    h_vv = np.zeros(nu)
+    h_oooo = np.zeros((no, no))
+    h_vvvv = np.zeros((nu, nu))
+    h_voov = np.zeros((nu, no))
+    for (h1, h2), x in H1["oo"].blocks.items():
+        if h1 == h2:
+            h_oo[idx_o[h1]] = np.diagonal(x)
+    for (h1, h2), x in H1["vv"].blocks.items():
+        if h1 == h2:
+            h_vv[idx_v[h1]] = np.diagonal(x)
+    for (h1, h2, h3, h4), x in H2["oooo"].blocks.items():
+        if (h1, h2) == (h3, h4):
+            h_oooo[np.ix_(idx_o[h1], idx_o[h2])] = np.einsum("ijij->ij", x)
+    for (h1, h2, h3, h4), x in H2["vvvv"].blocks.items():
+        if (h1, h2) == (h3, h4):
+            h_vvvv[np.ix_(idx_v[h1], idx_v[h2])] = np.einsum("abab->ab", x)
+    for (h1, h2, h3, h4), x in H2["voov"].blocks.items():
+        if h1 == h4 and h2 == h3:
+            h_voov[np.ix_(idx_v[h1], idx_o[h2])] = np.einsum("aiia->ai", x)
+
+    d_ai = SymTensor(blocking, "vo", sym)
+    for (ha, hi), x in d_ai.blocks.items():
+        a, i = idx_v[ha], idx_o[hi]
+        x[...] = h_vv[a][:, n] - h_oo[i][n, :] + h_voov[np.ix_(a, i)]
+    d_abij = SymTensor(blocking, "vvoo", sym)
+    for (ha, hb, hi, hj), x in d_abij.blocks.items():
+        a, b, i, j = idx_v[ha], idx_v[hb], idx_o[hi], idx_o[hj]
+        x[...] = (
+                h_vv[a][:, n, n, n] + h_vv[b][n, :, n, n] - h_oo[i][n, n, :, n] - h_oo[j][n, n, n, :]
+                + h_oooo[np.ix_(i, j)][n, n, :, :] + h_vvvv[np.ix_(a, b)][:, :, n, n]
+                + h_voov[np.ix_(a, i)][:, n, :, n] + h_voov[np.ix_(a, j)][:, n, n, :]
+                + h_voov[np.ix_(b, i)][n, :, :, n] + h_voov[np.ix_(b, j)][n, :, n, :]
+        )
+    return d_ai, d_abij
+
+def eomrccsd_hbar_diagonal(H1, H2, o, v):
+    """Diagonal of the singles and doubles blocks of the RHF-based
+    CCSD HBar used to precondition the spin-free EOMCCSD equations."""
+    n = np.newaxis
+    h_oo = np.diagonal(H1[o, o])
+    h_vv = np.diagonal(H1[v, v])
+    h_oooo = np.einsum("ijij->ij", H2[o, o, o, o])
+    h_vvvv = np.einsum("abab->ab", H2[v, v, v, v])
+    # spin-free combinations 2*h(amie) - h(amei) for the same-index diagonal
+    h_voov = 2.0 * np.einsum("aiia->ai", H2[v, o, o, v]) - np.einsum("aiai->ai", H2[v, o, v, o])
+    h_vovo = np.einsum("aiai->ai", H2[v, o, v, o])
+
+    d_ai = h_vv[:, n] - h_oo[n, :] + h_voov
+    d_abij = (
+            h_vv[:, n, n, n] + h_vv[n, :, n, n] - h_oo[n, n, :, n] - h_oo[n, n, n, :]
+            + h_oooo[n, n, :, :] + h_vvvv[:, :, n, n]
+            + h_voov[:, n, :, n] + h_voov[n, :, n, :]
+            - h_vovo[:, n, n, :] - h_vovo[n, :, :, n]
+    )
+    return d_ai, d_abij
+
+def eomccsdt_hbar_diagonal(H1, H2, o, v):
+    """Diagonal of the singles, doubles, and triples blocks of the CCSDT HBar
+    built from the same one-body and oooo, vvvv, voov two-body pieces."""
+    n = np.newaxis
+    h_oo = np.diagonal(H1[o, o])
+    h_vv = np.diagonal(H1[v, v])
+    h_oooo = np.einsum("ijij->ij", H2[o, o, o, o])
+    h_vvvv = np.einsum("abab->ab", H2[v, v, v, v])
+    h_voov = np.einsum("aiia->ai", H2[v, o, o, v])
+
+    d_ai, d_abij = eomccsd_hbar_diagonal(H1, H2, o, v)
+    d_abcijk = (
+            h_vv[:, n, n, n, n, n] + h_vv[n, :, n, n, n, n] + h_vv[n, n, :, n, n, n]
+            - h_oo[n, n, n, :, n, n] - h_oo[n, n, n, n, :, n] - h_oo[n, n, n, n, n, :]
+            + h_oooo[n, n, n, :, :, n] + h_oooo[n, n, n, :, n, :] + h_oooo[n, n, n, n, :, :]
+            + h_vvvv[:, :, n, n, n, n] + h_vvvv[:, n, :, n, n, n] + h_vvvv[n, :, :, n, n, n]
+            + h_voov[:, n, n, :, n, n] + h_voov[:, n, n, n, :, n] + h_voov[:, n, n, n, n, :]
+            + h_voov[n, :, n, :, n, n] + h_voov[n, :, n, n, :, n] + h_voov[n, :, n, n, n, :]
+            + h_voov[n, n, :, :, n, n] + h_voov[n, n, :, n, :, n] + h_voov[n, n, :, n, n, :]
+    )
+    return d_ai, d_abij, d_abcijk
+
+def eomccsdt_p_hbar_diagonal(H1, H2, o, v, r3_excitations):
+    """Diagonal of the singles, doubles, and P-space triples blocks of the CCSDT HBar
+    for the EOMCCSDT(P) problem, built from the same pieces as eomccsdt_hbar_diagonal.
+    The triples part is returned as a vector aligned with the (1-based) rows of
+    `r3_excitations`."""
+    h_oo = np.diagonal(H1[o, o])
+    h_vv = np.diagonal(H1[v, v])
+    h_oooo = np.einsum("ijij->ij", H2[o, o, o, o])
+    h_vvvv = np.einsum("abab->ab", H2[v, v, v, v])
+    h_voov = np.einsum("aiia->ai", H2[v, o, o, v])
+
+    d_ai, d_abij = eomccsd_hbar_diagonal(H1, H2, o, v)
+
+    exc = np.asarray(r3_excitations, dtype=np.int64) - 1
+    particles = [exc[:, 0], exc[:, 1], exc[:, 2]]
+    holes = [exc[:, 3], exc[:, 4], exc[:, 5]]
+    d_abcijk = np.zeros(exc.shape[0])
+    for p, x in enumerate(particles):
+        d_abcijk += h_vv[x]
+        for y in particles[p + 1:]:
+            d_abcijk += h_vvvv[x, y]
+        for y in holes:
+            d_abcijk += h_voov[x, y]
+    for p, x in enumerate(holes):
+        d_abcijk -= h_oo[x]
+        for y in holes[p + 1:]:
+            d_abcijk += h_oooo[x, y]
+    return d_ai, d_abij, d_abcijk
+
+def dipeom4_hbar_diagonal(H1, H2, o, v, r3_excitations):
+    """Diagonal of the 2h, 3h-1p, and P-space 4h-2p blocks of the CCSD HBar
+    for the DIP-EOMCCSD(4h-2p)(P) problem. The 4h-2p part is returned as a
+    vector aligned with the (1-based) rows of `r3_excitations`."""
+    n = np.newaxis
+    h_oo = np.diagonal(H1[o, o])
+    h_vv = np.diagonal(H1[v, v])
+    h_oooo = np.einsum("ijij->ij", H2[o, o, o, o])
+    h_vvvv = np.einsum("abab->ab", H2[v, v, v, v])
+    h_voov = np.einsum("aiia->ai", H2[v, o, o, v])
+
+    d_ij = -h_oo[:, n] - h_oo[n, :] + h_oooo
+    d_ijck = (
+            -h_oo[:, n, n, n] - h_oo[n, :, n, n] - h_oo[n, n, n, :] + h_vv[n, n, :, n]
+            + h_oooo[:, :, n, n] + h_oooo[:, n, n, :] + h_oooo[n, :, n, :]
+            + h_voov.T[:, n, :, n] + h_voov.T[n, :, :, n] + h_voov[n, n, :, :]
+    )
+
+    exc = np.asarray(r3_excitations, dtype=np.int64) - 1
+    a, b = exc[:, 0], exc[:, 1]
+    holes = [exc[:, 2], exc[:, 3], exc[:, 4], exc[:, 5]]
+    d_abijkl = h_vv[a] + h_vv[b] + h_vvvv[a, b]
+    for p, x in enumerate(holes):
+        d_abijkl += -h_oo[x] + h_voov[a, x] + h_voov[b, x]
+        for y in holes[p + 1:]:
+            d_abijkl += h_oooo[x, y]
+    return d_ij, d_ijck, d_abijkl
@@ -213,9 +213,11 @@ def get_ccs_intermediates(t1, f, g, o, v):
     """
 
     norbitals = f.shape[0]
+    # the intermediates follow the precision of the amplitudes and integrals
+    dtype = np.result_type(t1, f)
 
-    H1 = np.zeros((norbitals, norbitals))
-    H2 = np.zeros((norbitals, norbitals, norbitals, norbitals))
+    H1 = np.zeros((norbitals, norbitals), dtype=dtype)
+    H2 = np.zeros((norbitals, norbitals, norbitals, norbitals), dtype=dtype)
 
     # 1-body components
     H1[o, v] = f[o, v] + np.einsum("mnef,fn->me", g[o, o, v, v], t1, optimize=True)
@@ -264,9 +266,11 @@ def get_ccsd_intermediates(t1, t2, f, g, o, v):
     """
 
     norbitals = f.shape[0]
+    # the intermediates follow the precision of the amplitudes and integrals
+    dtype = np.result_type(t1, f)
 
-    H1 = np.zeros((norbitals, norbitals))
-    H2 = np.zeros((norbitals, norbitals, norbitals, norbitals))
+    H1 = np.zeros((norbitals, norbitals), dtype=dtype)
+    H2 = np.zeros((norbitals, norbitals, norbitals, norbitals), dtype=dtype)
 
     # 1-body components
     H1[o, v] = f[o, v] + np.einsum("imae,em->ia", g[o, o, v, v], t1, optimize=True)
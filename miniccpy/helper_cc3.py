@@ -196,7 +196,7 @@ def compute_t3(t1, t2, f, g, o, v):
     eps = np.diagonal(f)
     n = np.newaxis
     e_abcijk = 1.0 / (- eps[v, n, n, n, n, n] - eps[n, v, n, n, n, n] - eps[n, n, v, n, n, n]
-                    + eps[n, n, n, o, n, n] + eps[n, n, n, n, o, n] + eps[n, n, n, n, n, o] + energy_shift )
+                    + eps[n, n, n, o, n, n] + eps[n, n, n, n, o, n] + eps[n, n, n, n, n, o])
 
     triples_res = -0.25 * np.einsum("amij,bcmk->abcijk", I_vooo, t2, optimize=True)
     triples_res += 0.25 * np.einsum("abie,ecjk->abcijk", I_vvov, t2, optimize=True)
@@ -208,6 +208,29 @@ def compute_t3(t1, t2, f, g, o, v):
 
     return triples_res * e_abcijk
 
+def compute_t3_pspace(t1, t2, f, g, o, v, t3_excitations):
+    """Compute the T3 estimate of `compute_t3` only for the triples in the P space
+    `t3_excitations` (1-based rows a, b, c, i, j, k), returned in the same order.
+    The full T3 array is never formed."""
+    h_vvov, h_vooo = compute_ccs_intermediates(t1, t2, f, g, o, v)[:2]
+    idx = np.asarray(t3_excitations, dtype=np.int64) - 1
+    # signed permutations making up the antisymmetrizers A(abc) and A(ijk)
+    perms = [((0, 1, 2), 1.0), ((1, 0, 2), -1.0), ((2, 1, 0), -1.0), ((0, 2, 1), -1.0), ((1, 2, 0), 1.0), ((2, 0, 1), 1.0)]
+
+    t3 = np.zeros(idx.shape[0])
+    for p_abc, sign_abc in perms:
+        a, b, c = (idx[:, p] for p in p_abc)
+        for p_ijk, sign_ijk in perms:
+            i, j, k = (idx[:, 3 + p] for p in p_ijk)
+            X = -0.25 * np.einsum("pm,pm->p", h_vooo[a, :, i, j], t2[b, c, :, k], optimize=True)
+            X += 0.25 * np.einsum("pe,ep->p", h_vvov[a, b, i, :], t2[:, c, j, k], optimize=True)
+            t3 += sign_abc * sign_ijk * X
+
+    eps = np.diagonal(f)
+    e_abcijk = (- eps[v][idx[:, 0]] - eps[v][idx[:, 1]] - eps[v][idx[:, 2]]
+                + eps[o][idx[:, 3]] + eps[o][idx[:, 4]] + eps[o][idx[:, 5]])
+    return t3 / e_abcijk
+
 def compute_l3(l1, l2, t1, t2, omega, f, g, o, v):
 
     # < 0 | L1 * H(2) | ijkabc >
@@ -1,12 +1,28 @@
 import numpy as np
+from miniccpy.symmetry import sym_einsum
 
-def cisd_guess(f, g, o, v, nroot, nacto, nactu, mult=-1):
+# largest guess dimension diagonalized with the dense eigensolver when solver="auto"
+DENSE_GUESS_DIMENSION = 1000
+
+def cisd_guess(f, g, o, v, nroot, nacto, nactu, mult=-1, solver="auto", orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the CISd Hamiltonian
-    to serve as the initial guesses for the EOMCC calculations."""
+    to serve as the initial guesses for the EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    configurations of that symmetry are included."""
 
     nu, no = f[v, o].shape
     nacto = min(nacto, no)
     nactu = min(nactu, nu)
+    # Decide whether reference is a closed shell or not
+    if no % 2 == 0:
+        is_closed_shell = True
+    else:
+        is_closed_shell = False
+    # The spin-adapted space needs both spinorbitals of every active spatial orbital
+    if is_closed_shell and mult in (1, 3) and (nacto % 2 != 0 or nactu % 2 != 0):
+        print("   Rounding the active spaces up to whole spatial orbitals for spin adaptation")
+        nacto += nacto % 2
+        nactu += nactu % 2
     # print dimensions of initial guess procedure
     print("   CISd initial guess")
     print("   Multiplicity = ", mult)
@@ -15,53 +31,49 @@ def cisd_guess(f, g, o, v, nroot, nacto, nactu, mult=-1):
     print("   Active occupied = ", nacto)
     print("   Active unoccupied = ", nactu)
     print("   -----------------------------------")
-    # Decide whether reference is a closed shell or not
-    if no % 2 == 0:
-        is_closed_shell = True
-    else:
-        is_closed_shell = False
 
-    # Build the CISd Hamiltonian and diagonalize
-    H = build_cisd_hamiltonian(f, g, o, v, nacto, nactu)
-    omega, C_act = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C_act = np.real(C_act[:, idx])
+    # Restrict the guess space to the configurations of the target symmetry
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed = get_cisd_symmetry_mask(isym, sym, no, nu, nacto, nactu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    # Diagonalize the CISd Hamiltonian, either built explicitly or through its sigma function
+    basis = None
+    if is_closed_shell and mult in (1, 3):
+        # For closed shells, work directly in the space of spin-adapted singlets or triplets
+        basis = get_spin_adapted_cisd_basis(no, nu, nacto, nactu, mult, allowed)
+        print("   Spin-adapted dimension = ", basis.shape[1])
+    if allowed is None:
+        matvec = lambda c: cisd_sigma(c, f, g, o, v, nacto, nactu)
+        diagonal = cisd_diagonal(f, g, o, v, nacto, nactu)
+    else:
+        blocking = get_guess_blocking(no, nu, orbsym, point_group, nacto, nactu)
+        matvec = symmetry_blocked_sigma("cisd", f, g, o, v, nacto, nactu, blocking, sym, allowed)
+        diagonal = cisd_diagonal(f, g, o, v, nacto, nactu)[allowed]
+    omega, C_act = solve_guess_eigenproblem(lambda: build_cisd_hamiltonian(f, g, o, v, nacto, nactu, allowed),
+                                            matvec, diagonal, nroot, solver, basis, allowed)
 
     nroot = min(nroot, C_act.shape[1])
     no, nu = f[o, v].shape
     ndim = no*nu + no**2*nu**2
     C = np.zeros((ndim, nroot))
 
-    # For closed shells, we can pick out singlets and triplets numerically
-    if is_closed_shell and mult != -1:
-        omega_guess = np.zeros(nroot)
-        C_spin = np.zeros((C.shape[0], nroot))
-        n_spin = 0
-        for n in range(C.shape[1]):
-            if spin_function1(C_act[:no*nu, n], mult, no, nu) <= 1.0e-06:
-                C_spin[:, n_spin] = cisd_scatter(C_act[:, n], nacto, nactu, no, nu)
-                omega_guess[n_spin] = omega[n]
-                n_spin += 1
-            if n_spin >= nroot:
-                break
-        else:
-            print(f"    Could not find {nroot} roots with mult = {mult}. Returning {n_spin} found roots.\n")
-        # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
-        R_guess, _ = np.linalg.qr(C_spin[:, :min(n_spin, nroot)])
-        omega_guess = omega_guess[:min(n_spin, nroot)]
-    else:
-        for i in range(nroot):
-            C[:, i] = cisd_scatter(C_act[:, i], nacto, nactu, no, nu)
-        # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
-        R_guess, _ = np.linalg.qr(C[:, :nroot])
-        omega_guess = omega[:nroot]
+    for i in range(nroot):
+        C[:, i] = cisd_scatter(C_act[:, i], nacto, nactu, no, nu)
+    # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
+    R_guess, _ = np.linalg.qr(C[:, :nroot])
+    omega_guess = omega[:nroot]
 
     return R_guess, omega_guess
 
-def cis_guess(f, g, o, v, nroot, mult=-1):
+def cis_guess(f, g, o, v, nroot, mult=-1, solver="auto", orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the CIS Hamiltonian
-    to serve as the initial guesses for the EOMCC calculations."""
+    to serve as the initial guesses for the EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    configurations of that symmetry are included."""
 
     nu, no = f[v, o].shape
     # print dimensions of initial guess procedure
@@ -76,75 +88,110 @@ def cis_guess(f, g, o, v, nroot, mult=-1):
     else:
         is_closed_shell = False
 
-    H = build_cis_hamiltonian(f, g, o, v)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
-
-    # For closed shells, we can pick out singlets and triplets numerically
-    if is_closed_shell and mult != -1:
-        omega_guess = np.zeros(nroot)
-        C_spin = np.zeros((C.shape[0], nroot))
-        n_spin = 0
-        for n in range(C.shape[1]):
-            if spin_function1(C[:, n], mult, no, nu) <= 1.0e-06:
-                C_spin[:, n_spin] = C[:, n]
-                omega_guess[n_spin] = omega[n]
-                n_spin += 1
-            if n_spin >= nroot:
-                break
-        else:
-            print(f"    Could not find {nroot} roots with mult = {mult}. Returning {n_spin} found roots.\n")
-        # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
-        R_guess, _ = np.linalg.qr(C_spin[:, :min(n_spin, nroot)])
-        omega_guess = omega_guess[:min(n_spin, nroot)]
+    # Restrict the guess space to the configurations of the target symmetry
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed = get_cis_symmetry_mask(isym, sym, no, nu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    # Diagonalize the CIS Hamiltonian, either built explicitly or through its sigma function
+    basis = None
+    if is_closed_shell and mult in (1, 3):
+        # For closed shells, work directly in the space of spin-adapted singlets or triplets
+        basis = get_spin_adapted_cis_basis(no, nu, mult, allowed)
+        print("   Spin-adapted dimension = ", basis.shape[1])
+    if allowed is None:
+        matvec = lambda c: cis_sigma(c, f, g, o, v)
+        diagonal = cis_diagonal(f, g, o, v)
     else:
-        # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
-        R_guess, _ = np.linalg.qr(C[:, :nroot])
-        omega_guess = omega[:nroot]
+        blocking = get_guess_blocking(no, nu, orbsym, point_group)
+        matvec = symmetry_blocked_sigma("cis", f, g, o, v, 0, 0, blocking, sym, allowed)
+        diagonal = cis_diagonal(f, g, o, v)[allowed]
+    omega, C = solve_guess_eigenproblem(lambda: build_cis_hamiltonian(f, g, o, v, allowed),
+                                        matvec, diagonal, nroot, solver, basis, allowed)
+
+    nroot = min(nroot, C.shape[1])
+    # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
+    R_guess, _ = np.linalg.qr(C[:, :nroot])
+    omega_guess = omega[:nroot]
 
     return R_guess, omega_guess
 
-def rcisd_guess(f, g, o, v, nroot, nacto, nactu, mult=1):
+def rcisd_guess(f, g, o, v, nroot, nacto, nactu, mult=1, solver="auto", orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the RHF CISd Hamiltonian
-    to serve as the initial guesses for the EOMCC calculations."""
+    to serve as the initial guesses for the EOMCC calculations. For triplets
+    (mult = 3), the guess vectors are in the (r1, r2ab, r2aa) form used by
+    eomrccsd_triplet. When the orbital irreps `orbsym` and a `target_irrep`
+    are given, only the configurations of that symmetry are included."""
 
     nu, no = f[v, o].shape
     nacto = min(nacto, no)
     nactu = min(nactu, nu)
+    if mult not in (1, 3):
+        raise ValueError("RCISd initial guess requires mult = 1 (singlet) or mult = 3 (triplet)")
+    if mult == 1:
+        n2 = (nacto + 1)*nacto/2 * (nactu + 1)*nactu/2
+    else:
+        n2 = sum(np.count_nonzero(mask) for mask in _rcisd_triplet_masks(nacto, nactu))
     # print dimensions of initial guess procedure
     print("   CISd initial guess")
     print("   Multiplicity = ", mult)
     print("   Number of roots = ", nroot)
-    print("   Dimension of eigenvalue problem = ", no*nu + (nacto + 1)*nacto/2 * (nactu + 1)*nactu/2)
+    print("   Dimension of eigenvalue problem = ", no*nu + n2)
     print("   Active occupied = ", nacto)
     print("   Active unoccupied = ", nactu)
     print("   -----------------------------------")
 
-    # Build the CISd Hamiltonian and diagonalize
-    H = build_rcisd_hamiltonian(f, g, o, v, nacto, nactu)
-    omega, C_act = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C_act = np.real(C_act[:, idx])
+    # Restrict the guess space to the configurations of the target symmetry
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep, rhf=True)
+        if mult == 1:
+            allowed = get_rcisd_symmetry_mask(isym, sym, no, nu, nacto, nactu)
+        else:
+            allowed = get_rcisd_triplet_symmetry_mask(isym, sym, no, nu, nacto, nactu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    # Diagonalize the CISd Hamiltonian, either built explicitly or through its sigma function
+    if mult == 1:
+        kind = "rcisd"
+        build_hamiltonian, sigma, diagonal = build_rcisd_hamiltonian, rcisd_sigma, rcisd_diagonal
+        scatter = rcisd_scatter
+        ndim = no*nu + no**2*nu**2
+    else:
+        kind = "rcisd_triplet"
+        build_hamiltonian, sigma, diagonal = build_rcisd_triplet_hamiltonian, rcisd_triplet_sigma, rcisd_triplet_diagonal
+        scatter = rcisd_triplet_scatter
+        ndim = no*nu + 2*no**2*nu**2
+    if allowed is None:
+        matvec = lambda c: sigma(c, f, g, o, v, nacto, nactu)
+        d = diagonal(f, g, o, v, nacto, nactu)
+    else:
+        blocking = get_guess_blocking(no, nu, orbsym, point_group, nacto, nactu, rhf=True)
+        matvec = symmetry_blocked_sigma(kind, f, g, o, v, nacto, nactu, blocking, sym, allowed)
+        d = diagonal(f, g, o, v, nacto, nactu)[allowed]
+    omega, C_act = solve_guess_eigenproblem(lambda: build_hamiltonian(f, g, o, v, nacto, nactu, allowed),
+                                            matvec, d, nroot, solver, allowed=allowed)
 
     nroot = min(nroot, C_act.shape[1])
-    no, nu = f[o, v].shape
-    ndim = no*nu + no**2*nu**2
     C = np.zeros((ndim, nroot))
 
     for i in range(nroot):
-        C[:, i] = rcisd_scatter(C_act[:, i], nacto, nactu, no, nu)
+        C[:, i] = scatter(C_act[:, i], nacto, nactu, no, nu)
     # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
     R_guess, _ = np.linalg.qr(C[:, :nroot])
     omega_guess = omega[:nroot]
 
     return R_guess, omega_guess
 
-def rcis_guess(f, g, o, v, nroot, mult=1):
+def rcis_guess(f, g, o, v, nroot, mult=1, solver="auto", orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the RCIS Hamiltonian
-    to serve as the initial guesses for the RHF-EOMCC calculations."""
+    to serve as the initial guesses for the RHF-EOMCC calculations. When the
+    orbital irreps `orbsym` and a `target_irrep` are given, only the
+    configurations of that symmetry are included."""
 
     nu, no = f[v, o].shape
     # print dimensions of initial guess procedure
@@ -154,30 +201,53 @@ def rcis_guess(f, g, o, v, nroot, mult=1):
     print("   Dimension of eigenvalue problem = ", no*nu)
     print("   -----------------------------------")
 
-    H = build_rcis_hamiltonian(f, g, o, v)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
+    if mult not in (1, 3):
+        raise ValueError("RCIS initial guess requires mult = 1 (singlet) or mult = 3 (triplet)")
+
+    # Restrict the guess space to the configurations of the target symmetry
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep, rhf=True)
+        allowed = get_cis_symmetry_mask(isym, sym, no, nu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    # Diagonalize the RCIS Hamiltonian, either built explicitly or through its sigma function
+    if allowed is None:
+        matvec = lambda c: rcis_sigma(c, f, g, o, v, mult)
+        diagonal = rcis_diagonal(f, g, o, v, mult)
+    else:
+        blocking = get_guess_blocking(no, nu, orbsym, point_group, rhf=True)
+        matvec = symmetry_blocked_sigma("rcis", f, g, o, v, 0, 0, blocking, sym, allowed, mult)
+        diagonal = rcis_diagonal(f, g, o, v, mult)[allowed]
+    omega, C = solve_guess_eigenproblem(lambda: build_rcis_hamiltonian(f, g, o, v, mult, allowed),
+                                        matvec, diagonal, nroot, solver, allowed=allowed)
+    nroot = min(nroot, C.shape[1])
     # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
     R_guess, _ = np.linalg.qr(C[:, :nroot])
     omega_guess = omega[:nroot]
 
     return R_guess, omega_guess
 
-def deacis_guess(f, g, o, v, nroot, nactu):
+def deacis_guess(f, g, o, v, nroot, nactu, orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the 2p Hamiltonian
-    to serve as the initial guesses for the DEA-EOMCC calculations."""
-
-    H = build_2p_hamiltonian(f, g, o, v, nactu)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
-
+    to serve as the initial guesses for the DEA-EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    2p configurations of that symmetry are included."""
     no, nu = f[o, v].shape
     n1 = nu**2
 
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed = get_deacis_symmetry_mask(isym, sym, no, nu, nactu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    H = build_2p_hamiltonian(f, g, o, v, nactu, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
+    nroot = min(nroot, C.shape[1])
+
     R_guess = np.zeros((n1, nroot))
     for i in range(nroot):
         R_guess[:, i] = deacis_scatter(C[:, i], nactu, no, nu)
@@ -187,18 +257,25 @@ def deacis_guess(f, g, o, v, nroot, nactu):
 
     return R_guess, omega[:nroot]
 
-def dipcis_guess(f, g, o, v, nroot):
+def dipcis_guess(f, g, o, v, nroot, orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the 2h Hamiltonian
-    to serve as the initial guesses for the DIP-EOMCC calculations."""
-    H = build_2h_hamiltonian(f, g, o, v)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
-
+    to serve as the initial guesses for the DIP-EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    2h configurations of that symmetry are included."""
     no, nu = f[o, v].shape
     n1 = no**2
 
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed = get_dipcis_symmetry_mask(isym, sym, no)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    H = build_2h_hamiltonian(f, g, o, v, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
+    nroot = min(nroot, C.shape[1])
+
     R_guess = np.zeros((n1, nroot))
     for i in range(nroot):
         R_guess[:, i] = dipcis_scatter(C[:, i], no)
@@ -208,44 +285,53 @@ def dipcis_guess(f, g, o, v, nroot):
 
     return R_guess, omega[:nroot]
 
-def dipcis_cvs_guess(f, g, o, v, nroot, cvsmin, cvsmax):
-    """Obtain the lowest `nroot` roots of the 2h Hamiltonian
-    to serve as the initial guesses for the DIP-EOMCC calculations."""
-
-    H = build_2h_cvs_hamiltonian(f, g, o, v, cvsmin, cvsmax)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)[::-1]
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
-
+def dipcis_cvs_guess(f, g, o, v, nroot, cvsmin, cvsmax, orbsym=None, point_group="C1", target_irrep=None):
+    """Obtain the highest `nroot` roots of the 2h Hamiltonian in the space of the
+    configurations with at least one core hole (cvsmin <= i <= cvsmax) to serve as
+    the initial guesses for the CVS DIP-EOMCC calculations. When the spinorbital
+    irreps `orbsym` and a `target_irrep` are given, only the configurations of that
+    symmetry are included."""
     no, nu = f[o, v].shape
     n1 = no**2
 
+    allowed = get_dipcis_cvs_mask(no, cvsmin, cvsmax)
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed &= get_dipcis_symmetry_mask(isym, sym, no)
+        print("   Target symmetry = ", target_irrep)
+    print("   CVS dimension = ", np.count_nonzero(allowed))
+
+    H = build_2h_hamiltonian(f, g, o, v, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
+    # the core-ionized states are the highest roots of the CVS space
+    omega, C = omega[::-1], C[:, ::-1]
+    nroot = min(nroot, C.shape[1])
+
     R_guess = np.zeros((n1, nroot))
     for i in range(nroot):
-        R_guess_i = dipcis_scatter(C[:, i], no).copy().reshape(no, no)
-        # apply CVS separation to the guess vector
-        for j in range(no):
-            for k in range(j + 1, no):
-                if (j < cvsmin or j > cvsmax) and (k < cvsmin or k > cvsmax):
-                    R_guess_i[j, k] = 0.0
-                    R_guess_i[k, j] = 0.0
-        R_guess[:, i] = R_guess_i.flatten()
+        R_guess[:, i] = dipcis_scatter(C[:, i], no)
     # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
     R_guess, _ = np.linalg.qr(R_guess[:, :nroot])
     return R_guess, omega[:nroot]
 
-def dipcisd_guess(f, g, o, v, nroot, nacto=0, nactu=0):
+def dipcisd_guess(f, g, o, v, nroot, nacto=0, nactu=0, orbsym=None, point_group="C1", target_irrep=None):
     """Obtain the lowest `nroot` roots of the 2h + active 3h1p Hamiltonian
-    to serve as the initial guesses for the DIP-EOMCC calculations."""
-    H = build_dipcisd_hamiltonian(f, g, o, v, nacto, nactu)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
-
+    to serve as the initial guesses for the DIP-EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    configurations of that symmetry are included."""
     no, nu = f[o, v].shape
     n1 = no**2
+
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed = get_dipcisd_symmetry_mask(isym, sym, no, nu, nacto, nactu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    H = build_dipcisd_hamiltonian(f, g, o, v, nacto, nactu, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
+    nroot = min(nroot, C.shape[1])
     n2 = no**3 * nu
 
     R_guess = np.zeros((n1 + n2, nroot))
@@ -256,70 +342,80 @@ def dipcisd_guess(f, g, o, v, nroot, nacto=0, nactu=0):
     R_guess, _ = np.linalg.qr(R_guess[:, :nroot])
     return R_guess, omega[:nroot]
 
-def dipcisd_cvs_guess(f, g, o, v, nroot, cvsmin, cvsmax, nacto=0, nactu=0):
-    """Obtain the lowest `nroot` roots of the 2h + active 3h1p Hamiltonian
-    to serve as the initial guesses for the DIP-EOMCC calculations."""
-    H = build_dipcisd_hamiltonian(f, g, o, v, nacto, nactu)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)[::-1]
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
-
+def dipcisd_cvs_guess(f, g, o, v, nroot, cvsmin, cvsmax, nacto=0, nactu=0, orbsym=None, point_group="C1", target_irrep=None):
+    """Obtain the highest `nroot` roots of the 2h + active 3h1p Hamiltonian and
+    project them onto the configurations with at least one core hole
+    (cvsmin <= i <= cvsmax) to serve as the initial guesses for the CVS DIP-EOMCC
+    calculations. When the spinorbital irreps `orbsym` and a `target_irrep` are
+    given, only the configurations of that symmetry are included."""
     no, nu = f[o, v].shape
     n1 = no**2
     n2 = no**3 * nu
 
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep)
+        allowed = get_dipcisd_symmetry_mask(isym, sym, no, nu, nacto, nactu)
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    H = build_dipcisd_hamiltonian(f, g, o, v, nacto, nactu, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
+    # the core-ionized states are the highest roots; the CVS separation is applied
+    # to their eigenvectors, which are obtained in the full space
+    omega, C = omega[::-1], C[:, ::-1]
+    C[~get_dipcisd_cvs_mask(no, nu, nacto, nactu, cvsmin, cvsmax), :] = 0.0
+    nroot = min(nroot, C.shape[1])
+
     R_guess = np.zeros((n1 + n2, nroot))
     for i in range(nroot):
-        R_guess_i = dipcisd_scatter(C[:, i], no, nu, nacto, nactu)
-        r1 = R_guess_i[:n1].reshape(no, no)
-        r2 = R_guess_i[n1:].reshape(no, no, nu, no)
-        # apply CVS separation to the guess vector
-        for j in range(no):
-            for k in range(j + 1, no):
-                if (j < cvsmin or j > cvsmax) and (k < cvsmin or k > cvsmax):
-                    r1[j, k] = 0.0
-                    r1[k, j] = 0.0
-        for j in range(no):
-            for k in range(j + 1, no):
-                for l in range(k + 1, no):
-                    for d in range(nu):
-                        if (j < cvsmin or j > cvsmax) and (k < cvsmin or k > cvsmax) and (l < cvsmin or l > cvsmax):
-                            r2[j, k, d, l] = 0.0
-                            r2[j, l, d, k] = 0.0
-                            r2[k, j, d, l] = 0.0
-                            r2[k, l, d, j] = 0.0
-                            r2[l, j, d, k] = 0.0
-                            r2[l, k, d, j] = 0.0
-        R_guess[:, i] = np.hstack((r1.flatten(), r2.flatten()))
+        R_guess[:, i] = dipcisd_scatter(C[:, i], no, nu, nacto, nactu)
     # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
     R_guess, _ = np.linalg.qr(R_guess[:, :nroot])
     return R_guess, omega[:nroot]
 
-def eacis_guess(f, g, o, v, nroot):
+def eacis_guess(f, g, o, v, nroot, orbsym=None, point_group="C1", target_irrep=None, rhf=False):
     """Obtain the lowest `nroot` roots of the 1p Hamiltonian
-    to serve as the initial guesses for the EA-EOMCC calculations."""
-
-    H = build_1p_hamiltonian(f, g, o, v)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
+    to serve as the initial guesses for the EA-EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    1p configurations of that symmetry are included. With rhf=True, f is the
+    spatial-orbital RHF Fock (or HBar) matrix and the guesses are the alpha 1p
+    configurations used by the spin-adapted EA-EOMCC solvers."""
+
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        no, nu = f[o, v].shape
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep, rhf=rhf)
+        allowed = isym[no:] == sym
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    H = build_1p_hamiltonian(f, g, o, v, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
 
     # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
     R_guess, _ = np.linalg.qr(C)
 
     return R_guess[:, :nroot], omega[:nroot]
 
-def ipcis_guess(f, g, o, v, nroot):
+def ipcis_guess(f, g, o, v, nroot, orbsym=None, point_group="C1", target_irrep=None, rhf=False):
     """Obtain the lowest `nroot` roots of the 1h Hamiltonian
-    to serve as the initial guesses for the IP-EOMCC calculations."""
-
-    H = build_1h_hamiltonian(f, g, o, v)
-    omega, C = np.linalg.eig(H)
-    idx = np.argsort(omega)
-    omega = np.real(omega[idx])
-    C = np.real(C[:, idx])
+    to serve as the initial guesses for the IP-EOMCC calculations. When the
+    spinorbital irreps `orbsym` and a `target_irrep` are given, only the
+    1h configurations of that symmetry are included. With rhf=True, f is the
+    spatial-orbital RHF Fock (or HBar) matrix and the guesses are the alpha 1h
+    configurations used by the spin-adapted IP-EOMCC solvers."""
+
+    allowed = None
+    if orbsym is not None and target_irrep is not None:
+        no, nu = f[o, v].shape
+        isym, sym = get_target_symmetry(no, nu, orbsym, point_group, target_irrep, rhf=rhf)
+        allowed = isym[:no] == sym
+        print("   Target symmetry = ", target_irrep)
+        print("   Symmetry-allowed dimension = ", np.count_nonzero(allowed))
+
+    H = build_1h_hamiltonian(f, g, o, v, allowed)
+    omega, C = solve_guess_eigenproblem(lambda: H, None, np.diagonal(H), nroot, "dense", allowed=allowed)
 
     # orthonormalize the initial trial space; this is important when using doubles in EOMCCSd guess
     R_guess, _ = np.linalg.qr(C)
@@ -378,6 +474,23 @@ def rcisd_scatter(V_in, nacto, nactu, no, nu):
                         offset += 1
     return np.hstack((V1_out.flatten(), V2_out.flatten()))
 
+def rcisd_triplet_scatter(V_in, nacto, nactu, no, nu):
+
+    # set active space parameters
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    n1 = no * nu
+
+    # allocate full-length output vectors
+    V2ab_out = np.zeros((nu, nu, no, no))
+    V2aa_out = np.zeros((nu, nu, no, no))
+    # fill in the active doubles, which are stored at the active
+    # unoccupied (first nactu) and occupied (last nacto) orbitals
+    r2ab, r2aa = _rcisd_triplet_unpack(V_in[n1:], nacto, nactu)
+    V2ab_out[:nactu, :nactu, no - nacto:, no - nacto:] = r2ab
+    V2aa_out[:nactu, :nactu, no - nacto:, no - nacto:] = r2aa
+    return np.hstack((V_in[:n1], V2ab_out.flatten(), V2aa_out.flatten()))
+
 def deacis_scatter(V_in, nactu, no, nu):
 
     # set active space parameters
@@ -461,736 +574,1173 @@ def dipcis_scatter(V_in, no):
             offset += 1
     return V1_out.flatten()
 
-def build_cisd_hamiltonian(fock, g, o, v, nacto, nactu):
+def build_cis_hamiltonian(f, g, o, v, allowed=None):
+    """ Construct the CIS Hamiltonian with matrix elements
+        given by:
+        < ia | H_N | jb > = < a | f | b > * delta(i, j)
+                          - < j | f | i > * delta(a, b)
+                          + < aj | v | ib >
+        over the single excitations selected by the mask `allowed` (all by default).
+    """
+
+    nunocc, nocc = f[v, o].shape
+    a, i = _single_excitations(nocc, nunocc, allowed)
+    a, i, b, j = a[:, np.newaxis], i[:, np.newaxis], a[np.newaxis, :], i[np.newaxis, :]
+    H = (
+          f[v, v][a, b] * (i == j)
+        - f[o, o][j, i] * (a == b)
+        + g[v, o, o, v][a, j, i, b]
+    )
+    return H
+
+def build_rcis_hamiltonian(f, g, o, v, mult=1, allowed=None):
+    """ Construct the RCIS Hamiltonian for singlet (mult = 1) or
+        triplet (mult = 3) states, for which r1b(ai) = +/- r1a(ai),
+        over the single excitations selected by the mask `allowed` (all by default).
+    """
+
+    nu, no = f[v, o].shape
+    # r1b = +r1a for singlets and r1b = -r1a for triplets
+    phase = 1.0 if mult == 1 else -1.0
+    a, i = _single_excitations(no, nu, allowed)
+    a, i, e, m = a[:, np.newaxis], i[:, np.newaxis], a[np.newaxis, :], i[np.newaxis, :]
+    H = (
+          f[v, v][a, e] * (i == m)
+        - f[o, o][m, i] * (a == e)
+        + (1.0 + phase) * g[v, o, o, v][a, m, i, e]
+        - g[v, o, v, o][a, m, e, i]
+    )
+    return H
+
+def build_1p_hamiltonian(f, g, o, v, allowed=None):
+    """ Construct the 1p Hamiltonian with matrix elements
+        given by:
+        < a | H_N | b > = < a | f | b >
+        over the unoccupied orbitals selected by the mask `allowed` (all by default).
+    """
+
+    nunocc, nocc = f[v, o].shape
+    a = np.arange(nunocc) if allowed is None else np.where(allowed)[0]
+    return f[v, v][np.ix_(a, a)]
+
+def build_1h_hamiltonian(f, g, o, v, allowed=None):
+    """ Construct the 1h Hamiltonian with matrix elements
+        given by:
+        < i | H_N | j > = -< j | f | i >
+        over the occupied orbitals selected by the mask `allowed` (all by default).
+    """
+
+    nunocc, nocc = f[v, o].shape
+    i = np.arange(nocc) if allowed is None else np.where(allowed)[0]
+    return -f[o, o][np.ix_(i, i)].T
+
+def build_cisd_hamiltonian(fock, g, o, v, nacto, nactu, allowed=None):
+    """Vectorized construction of the CISd Hamiltonian. Each term is accumulated
+    by gathering the determinant addresses from the index arrays over the full
+    index grid, with the phases applied as arrays. Only the configurations
+    selected by the mask `allowed` (all by default) are included."""
 
     no, nu = fock[o, v].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
     # set dimensions of CISD problem
     n1 = no * nu
     n2 = int(nacto * (nacto - 1) / 2 * nactu * (nactu - 1) / 2)
     # get index addressing arrays
     idx_1, idx_2 = get_cisd_index_arrays(no, nu, nacto, nactu)
+    if allowed is not None:
+        idx_1, idx_2 = _restrict_addresses(idx_1, allowed[:n1]), _restrict_addresses(idx_2, allowed[n1:])
+        n1, n2 = np.count_nonzero(allowed[:n1]), np.count_nonzero(allowed[n1:])
+    f_oo, f_vv, f_ov = fock[o, o], fock[v, v], fock[o, v]
+    h_voov = g[v, o, o, v]
+    # ranges of all/active occupied and unoccupied orbitals
+    O, V = np.arange(no), np.arange(nu)
+    Oact, Vact = np.arange(no - nacto, no), np.arange(nactu)
     ###########
     # SINGLES #
     ###########
     s_H_s = np.zeros((n1, n1))
     s_H_d = np.zeros((n1, n2))
-    for a in range(nu):
-        for i in range(no):
-            idet = idx_1[a, i]
-            if idet == 0: continue
-            I = abs(idet) - 1
-            # -h1a(mi) * r1a(am)
-            for m in range(no):
-                jdet = idx_1[a, m]
-                if jdet == 0: continue
-                J = abs(jdet) - 1
-                s_H_s[I, J] -= fock[o, o][m, i]
-            # h1a(ae) * r1a(ei)
-            for e in range(nu):
-                jdet = idx_1[e, i]
-                if jdet == 0: continue
-                J = abs(jdet) - 1
-                s_H_s[I, J] += fock[v, v][a, e]
-            # h2a(amie) * r1a(em)
-            for e in range(nu):
-                for m in range(no):
-                    jdet = idx_1[e, m]
-                    if jdet == 0: continue
-                    J = abs(jdet) - 1
-                    s_H_s[I, J] += g[v, o, o, v][a, m, i, e]
-            # h1a(me) * r2a(aeim)
-            for e in range(nactu):
-                for m in range(no - nacto, no):
-                    jdet = idx_2[a, e, i, m]
-                    if jdet != 0:
-                        J = abs(jdet) - 1
-                        phase = np.sign(jdet)
-                        s_H_d[I, J] += fock[o, v][m, e] * phase
-            # -1/2 h2a(mnif) * r2a(afmn)
-            for m in range(no - nacto, no):
-                for n in range(m + 1, no):
-                    for f in range(nactu):
-                        jdet = idx_2[a, f, m, n]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            s_H_d[I, J] -= g[o, o, o, v][m, n, i, f] * phase
-            # 1/2 h2a(anef) * r2a(efin)
-            for e in range(nactu):
-                for f in range(e + 1, nactu):
-                    for n in range(no - nacto, no):
-                        jdet = idx_2[e, f, i, n]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            s_H_d[I, J] += g[v, o, v, v][a, n, e, f] * phase
+    a, i, m = np.ix_(V, O, O)
+    _accumulate(s_H_s, idx_1[a, i], idx_1[a, m], -f_oo[m, i])
+    a, i, e = np.ix_(V, O, V)
+    _accumulate(s_H_s, idx_1[a, i], idx_1[e, i], f_vv[a, e])
+    a, i, e, m = np.ix_(V, O, V, O)
+    _accumulate(s_H_s, idx_1[a, i], idx_1[e, m], h_voov[a, m, i, e])
+    a, i, e, m = np.ix_(V, O, Vact, Oact)
+    _accumulate(s_H_d, idx_1[a, i], idx_2[a, e, i, m], f_ov[m, e])
+    a, i, m, n, f = np.ix_(V, O, Oact, Oact, Vact)
+    _accumulate(s_H_d, idx_1[a, i], idx_2[a, f, m, n], -g[o, o, o, v][m, n, i, f] * (n > m))
+    a, i, e, f, n = np.ix_(V, O, Vact, Vact, Oact)
+    _accumulate(s_H_d, idx_1[a, i], idx_2[e, f, i, n], g[v, o, v, v][a, n, e, f] * (f > e))
     ###########
     # DOUBLES #
     ###########
     d_H_s = np.zeros((n2, n1))
     d_H_d = np.zeros((n2, n2))
-    for a in range(nactu):
-        for b in range(a + 1, nactu):
-            for i in range(no - nacto, no):
-                for j in range(i + 1, no):
-                    idet = idx_2[a, b, i, j]
-                    if idet == 0: continue
-                    I = abs(idet) - 1
-                    # -A(ab) h2a(amij) * r1a(bm)
-                    for m in range(no):
-                        # (1)
-                        jdet = idx_1[b, m]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_s[I, J] -= g[v, o, o, o][a, m, i, j]
-                        # (ab)
-                        jdet = idx_1[a, m]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_s[I, J] += g[v, o, o, o][b, m, i, j]
-                    # A(ij) h2a(abie) * r1a(ej)
-                    for e in range(nu):
-                        # (1)
-                        jdet = idx_1[e, i]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_s[I, J] += g[v, v, o, v][b, a, j, e]
-                        # (ij)
-                        jdet = idx_1[e, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_s[I, J] -= g[v, v, o, v][b, a, i, e]
-                    # -A(ij) h1a(mi) * r2a(abmj)
-                    for m in range(no - nacto, no):
-                        # (1)
-                        jdet = idx_2[a, b, m, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] -= fock[o, o][m, i] * phase
-                        # (ij)
-                        jdet = idx_2[a, b, m, i]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] += fock[o, o][m, j] * phase
-                    # A(ab) h1a(ae) * r2a(ebij)
-                    for e in range(nactu):
-                        # (1)
-                        jdet = idx_2[e, b, i, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] += fock[v, v][a, e] * phase
-                        # (ab)
-                        jdet = idx_2[e, a, i, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] -= fock[v, v][b, e] * phase
-                    # 1/2 h2a(mnij) * r2a(abmn)
-                    for m in range(no - nacto, no):
-                        for n in range(m + 1, no):
-                            jdet = idx_2[a, b, m, n]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] += g[o, o, o, o][m, n, i, j] * phase
-                    # 1/2 h2a(abef) * r2a(efij)
-                    for e in range(nactu):
-                        for f in range(e + 1, nactu):
-                            jdet = idx_2[e, f, i, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] += g[v, v, v, v][a, b, e, f] * phase
-                    # A(ij)A(ab) h2a(amie) * r2a(ebmj)
-                    for e in range(nactu):
-                        for m in range(no - nacto, no):
-                            # (1)
-                            jdet = idx_2[e, b, m, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] += g[v, o, o, v][a, m, i, e] * phase
-                            # (ij)
-                            jdet = idx_2[e, b, m, i]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] -= g[v, o, o, v][a, m, j, e] * phase
-                            # (ab)
-                            jdet = idx_2[e, a, m, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] -= g[v, o, o, v][b, m, i, e] * phase
-                            # (ij)(ab)
-                            jdet = idx_2[e, a, m, i]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] += g[v, o, o, v][b, m, j, e] * phase
+    # rows run over the unique a < b, i < j active doubles
+    unique = lambda a, b, i, j: np.where((b > a) & (j > i), idx_2[a, b, i, j], 0)
+    a, b, i, j, m = np.ix_(Vact, Vact, Oact, Oact, O)
+    idet = unique(a, b, i, j)
+    _accumulate(d_H_s, idet, idx_1[b, m], -g[v, o, o, o][a, m, i, j])
+    _accumulate(d_H_s, idet, idx_1[a, m], g[v, o, o, o][b, m, i, j])
+    a, b, i, j, e = np.ix_(Vact, Vact, Oact, Oact, V)
+    idet = unique(a, b, i, j)
+    _accumulate(d_H_s, idet, idx_1[e, i], g[v, v, o, v][b, a, j, e])
+    _accumulate(d_H_s, idet, idx_1[e, j], -g[v, v, o, v][b, a, i, e])
+    a, b, i, j, m = np.ix_(Vact, Vact, Oact, Oact, Oact)
+    idet = unique(a, b, i, j)
+    _accumulate(d_H_d, idet, idx_2[a, b, m, j], -f_oo[m, i])
+    _accumulate(d_H_d, idet, idx_2[a, b, m, i], f_oo[m, j])
+    a, b, i, j, e = np.ix_(Vact, Vact, Oact, Oact, Vact)
+    idet = unique(a, b, i, j)
+    _accumulate(d_H_d, idet, idx_2[e, b, i, j], f_vv[a, e])
+    _accumulate(d_H_d, idet, idx_2[e, a, i, j], -f_vv[b, e])
+    a, b, i, j, m, n = np.ix_(Vact, Vact, Oact, Oact, Oact, Oact)
+    _accumulate(d_H_d, unique(a, b, i, j), idx_2[a, b, m, n], g[o, o, o, o][m, n, i, j] * (n > m))
+    a, b, i, j, e, f = np.ix_(Vact, Vact, Oact, Oact, Vact, Vact)
+    _accumulate(d_H_d, unique(a, b, i, j), idx_2[e, f, i, j], g[v, v, v, v][a, b, e, f] * (f > e))
+    a, b, i, j, e, m = np.ix_(Vact, Vact, Oact, Oact, Vact, Oact)
+    idet = unique(a, b, i, j)
+    _accumulate(d_H_d, idet, idx_2[e, b, m, j], h_voov[a, m, i, e])
+    _accumulate(d_H_d, idet, idx_2[e, b, m, i], -h_voov[a, m, j, e])
+    _accumulate(d_H_d, idet, idx_2[e, a, m, j], -h_voov[b, m, i, e])
+    _accumulate(d_H_d, idet, idx_2[e, a, m, i], h_voov[b, m, j, e])
 
     # Assemble and return full matrix
     return np.concatenate((np.concatenate((s_H_s, s_H_d), axis=1),
                            np.concatenate((d_H_s, d_H_d), axis=1),), axis=0)
 
-def build_cis_hamiltonian(f, g, o, v):
-    """ Construct the CIS Hamiltonian with matrix elements
-        given by:
-        < ia | H_N | jb > = < a | f | b > * delta(i, j)
-                          - < j | f | i > * delta(a, b)
-                          + < aj | v | ib >
-    """
-
-    nunocc, nocc = f[v, o].shape
-    n1 = nocc * nunocc
-
-    H = np.zeros((n1, n1))
-
-    ct1 = 0 
-    for a in range(nunocc):
-        for i in range(nocc):
-            ct2 = 0
-            for b in range(nunocc):
-                for j in range(nocc):
-                    H[ct1, ct2] = (
-                          f[v, v][a, b] * (i == j)
-                        - f[o, o][j, i] * (a == b)
-                        + g[v, o, o, v][a, j, i, b]
-                    )
-                    ct2 += 1
-            ct1 += 1
-
-    return H
-
-def build_rcis_hamiltonian(f, g, o, v):
-    """ Construct the RCIS Hamiltonian.
-    """
-
-    nu, no = f[v, o].shape
-    n1 = no * nu
-
-    idx = np.zeros((nu, no), dtype=np.int32)
-    kout = 1
-    for a in range(nu):
-        for i in range(no):
-            idx[a, i] = kout
-            kout += 1
-
-    H = np.zeros((n1, n1))
-    for a in range(nu):
-        for i in range(no):
-            idet = idx[a, i]
-            if idet == 0: continue
-            I = abs(idet) - 1
-            # -h1a(mi) * r1a(am)
-            for m in range(no):
-                jdet = idx[a, m]
-                if jdet == 0: continue
-                J = abs(jdet) - 1
-                H[I, J] -= f[o, o][m, i]
-            # h1a(ae) * r1a(ei)
-            for e in range(nu):
-                jdet = idx[e, i]
-                if jdet == 0: continue
-                J = abs(jdet) - 1
-                H[I, J] += f[v, v][a, e]
-            # h2a(amie) * r1a(em)
-            for e in range(nu):
-                for m in range(no):
-                    jdet = idx[e, m]
-                    if jdet == 0: continue
-                    J = abs(jdet) - 1
-                    H[I, J] += g[v, o, o, v][a, m, i, e] - g[v, o, v, o][a, m, e, i]
-            # h2b(amie) * r1b(em)
-            for e in range(nu):
-                for m in range(no):
-                    jdet = idx[e, m]
-                    if jdet == 0: continue
-                    J = abs(jdet) - 1
-                    H[I, J] += g[v, o, o, v][a, m, i, e]
-    return H
-
-def build_rcisd_hamiltonian(fock, g, o, v, nacto, nactu):
+def build_rcisd_hamiltonian(fock, g, o, v, nacto, nactu, allowed=None):
+    """Vectorized construction of the RHF CISd Hamiltonian in the space of
+    singles and active doubles (a <= b, i <= j) of get_rcisd_index_arrays,
+    restricted to the configurations selected by the mask `allowed` (if given)."""
 
     no, nu = fock[o, v].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
     # set dimensions of CISD problem
     n1 = no * nu
     n2 = int(nacto * (nacto + 1) / 2 * nactu * (nactu + 1) / 2)
     # get index addressing arrays
     idx_1, idx_2 = get_rcisd_index_arrays(no, nu, nacto, nactu)
+    if allowed is not None:
+        idx_1, idx_2 = _restrict_addresses(idx_1, allowed[:n1]), _restrict_addresses(idx_2, allowed[n1:])
+        n1, n2 = np.count_nonzero(allowed[:n1]), np.count_nonzero(allowed[n1:])
+    f_oo, f_vv, f_ov = fock[o, o], fock[v, v], fock[o, v]
+    h_voov = g[v, o, o, v]
+    h_vovo = g[v, o, v, o]
+    # ranges of all/active occupied and unoccupied orbitals
+    O, V = np.arange(no), np.arange(nu)
+    Oact, Vact = np.arange(no - nacto, no), np.arange(nactu)
     ###########
     # SINGLES #
     ###########
     s_H_s = np.zeros((n1, n1))
     s_H_d = np.zeros((n1, n2))
-    for a in range(nu):
-        for i in range(no):
-            idet = idx_1[a, i]
-            if idet == 0: continue
-            I = abs(idet) - 1
-            # -h1a(mi) * r1a(am)
-            for m in range(no):
-                jdet = idx_1[a, m]
-                if jdet == 0: continue
-                J = abs(jdet) - 1
-                s_H_s[I, J] -= fock[o, o][m, i]
-            # h1a(ae) * r1a(ei)
-            for e in range(nu):
-                jdet = idx_1[e, i]
-                if jdet == 0: continue
-                J = abs(jdet) - 1
-                s_H_s[I, J] += fock[v, v][a, e]
-            # h2a(amie) * r1a(em)
-            for e in range(nu):
-                for m in range(no):
-                    jdet = idx_1[e, m]
-                    if jdet == 0: continue
-                    J = abs(jdet) - 1
-                    s_H_s[I, J] += g[v, o, o, v][a, m, i, e] - g[v, o, v, o][a, m, e, i]
-            # h1b(me) * r2b(aeim)
-            for e in range(nactu):
-                for m in range(no - nacto, no):
-                    jdet = idx_2[a, e, i, m]
-                    if jdet != 0:
-                        J = abs(jdet) - 1
-                        s_H_d[I, J] += fock[o, v][m, e]
-            # -h2b(mnif) * r2b(afmn)
-            for m in range(no - nacto, no):
-                for n in range(no - nacto, no):
-                    for f in range(nactu):
-                        jdet = idx_2[a, f, m, n]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            s_H_d[I, J] -= g[o, o, o, v][m, n, i, f]
-            # h2b(anef) * r2b(efin)
-            for e in range(nactu):
-                for f in range(nactu):
-                    for n in range(no - nacto, no):
-                        jdet = idx_2[e, f, i, n]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            s_H_d[I, J] += g[v, o, v, v][a, n, e, f]
+    a, i, m = np.ix_(V, O, O)
+    _accumulate(s_H_s, idx_1[a, i], idx_1[a, m], -f_oo[m, i])
+    a, i, e = np.ix_(V, O, V)
+    _accumulate(s_H_s, idx_1[a, i], idx_1[e, i], f_vv[a, e])
+    a, i, e, m = np.ix_(V, O, V, O)
+    _accumulate(s_H_s, idx_1[a, i], idx_1[e, m], 2.0 * h_voov[a, m, i, e] - h_vovo[a, m, e, i])
+    # the doubles addresses are all positive, so the phases are trivially 1
+    a, i, e, m = np.ix_(V, O, Vact, Oact)
+    _accumulate(s_H_d, idx_1[a, i], idx_2[a, e, i, m], f_ov[m, e])
+    a, i, m, n, f = np.ix_(V, O, Oact, Oact, Vact)
+    _accumulate(s_H_d, idx_1[a, i], idx_2[a, f, m, n], -g[o, o, o, v][m, n, i, f])
+    a, i, e, f, n = np.ix_(V, O, Vact, Vact, Oact)
+    _accumulate(s_H_d, idx_1[a, i], idx_2[e, f, i, n], g[v, o, v, v][a, n, e, f])
     ###########
     # DOUBLES #
     ###########
     d_H_s = np.zeros((n2, n1))
     d_H_d = np.zeros((n2, n2))
-    for a in range(nactu):
-        for b in range(nactu):
-            for i in range(no - nacto, no):
-                for j in range(no - nacto, no):
-                    idet = idx_2[a, b, i, j]
-                    if idet == 0: continue
-                    I = abs(idet) - 1
-                    # -h2b(mbij) * r1a(am)
-                    for m in range(no):
-                        jdet = idx_1[a, m]
-                        if jdet == 0: continue
-                        J = abs(jdet) - 1
-                        d_H_s[I, J] -= g[o, v, o, o][m, b, i, j]
-                    # h2b(abej) * r1a(ei)
-                    for e in range(nu):
-                        jdet = idx_1[e, i]
-                        if jdet == 0: continue
-                        J = abs(jdet) - 1
-                        d_H_s[I, J] += g[v, v, v, o][a, b, e, j]
-                    # -h2b(amij) * r1b(bm)
-                    for m in range(no):
-                        jdet = idx_1[b, m]
-                        if jdet == 0: continue
-                        J = abs(jdet) - 1
-                        d_H_s[I, J] -= g[v, o, o, o][a, m, i, j]
-                    # h2b(abie) * r1b(ej)
-                    for e in range(nu):
-                        jdet = idx_1[e, j]
-                        if jdet == 0: continue
-                        J = abs(jdet) - 1
-                        d_H_s[I, J] += g[v, v, o, v][a, b, i, e]
-                    # -h1a(mi) * r2b(abmj)
-                    for m in range(no - nacto, no):
-                        jdet = idx_2[a, b, m, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_d[I, J] -= fock[o, o][m, i]
-                    # -h1b(mj) * r2b(abim)
-                    for m in range(no - nacto, no):
-                        jdet = idx_2[a, b, i, m]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_d[I, J] -= fock[o, o][m, j]
-                    # h1a(ae) * r2b(ebij)
-                    for e in range(nactu):
-                        jdet = idx_2[e, b, i, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_d[I, J] += fock[v, v][a, e]
-                    # h1a(be) * r2b(aeij)
-                    for e in range(nactu):
-                        jdet = idx_2[a, e, i, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            d_H_d[I, J] += fock[v, v][b, e]
-                    # h2b(mnij) * r2b(abmn)
-                    for m in range(no - nacto, no):
-                        for n in range(no - nacto, no):
-                            jdet = idx_2[a, b, m, n]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                d_H_d[I, J] += g[o, o, o, o][m, n, i, j]
-                    # h2b(abef) * r2b(efij)
-                    for e in range(nactu):
-                        for f in range(nactu):
-                            jdet = idx_2[e, f, i, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                d_H_d[I, J] += g[v, v, v, v][a, b, e, f]
-                    # h2a(amie) * r2b(ebmj)
-                    for e in range(nactu):
-                        for m in range(no - nacto, no):
-                            jdet = idx_2[e, b, m, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                d_H_d[I, J] += g[v, o, o, v][a, m, i, e] - g[v, o, v, o][a, m, e, i]
-                    # h2c(bmje) * r2b(aeim)
-                    for e in range(nactu):
-                        for m in range(no - nacto, no):
-                            jdet = idx_2[a, e, i, m]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                d_H_d[I, J] += g[v, o, o, v][b, m, j, e] - g[v, o, v, o][b, m, e, j]
-                    # -h2b(amej) * r2b(ebim)
-                    for e in range(nactu):
-                        for m in range(no - nacto, no):
-                            jdet = idx_2[e, b, i, m]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                d_H_d[I, J] -= g[v, o, v, o][a, m, e, j]
-                    # -h2b(mbie) * r2b(aemj)
-                    for e in range(nactu):
-                        for m in range(no - nacto, no):
-                            jdet = idx_2[a, e, m, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                d_H_d[I, J] -= g[o, v, o, v][m, b, i, e]
+    # rows run over both addresses abij and baji of each active double
+    a, b, i, j, m = np.ix_(Vact, Vact, Oact, Oact, O)
+    idet = idx_2[a, b, i, j]
+    _accumulate(d_H_s, idet, idx_1[a, m], -g[o, v, o, o][m, b, i, j])
+    _accumulate(d_H_s, idet, idx_1[b, m], -g[v, o, o, o][a, m, i, j])
+    a, b, i, j, e = np.ix_(Vact, Vact, Oact, Oact, V)
+    idet = idx_2[a, b, i, j]
+    _accumulate(d_H_s, idet, idx_1[e, i], g[v, v, v, o][a, b, e, j])
+    _accumulate(d_H_s, idet, idx_1[e, j], g[v, v, o, v][a, b, i, e])
+    a, b, i, j, m = np.ix_(Vact, Vact, Oact, Oact, Oact)
+    idet = idx_2[a, b, i, j]
+    _accumulate(d_H_d, idet, idx_2[a, b, m, j], -f_oo[m, i])
+    _accumulate(d_H_d, idet, idx_2[a, b, i, m], -f_oo[m, j])
+    a, b, i, j, e = np.ix_(Vact, Vact, Oact, Oact, Vact)
+    idet = idx_2[a, b, i, j]
+    _accumulate(d_H_d, idet, idx_2[e, b, i, j], f_vv[a, e])
+    _accumulate(d_H_d, idet, idx_2[a, e, i, j], f_vv[b, e])
+    a, b, i, j, m, n = np.ix_(Vact, Vact, Oact, Oact, Oact, Oact)
+    _accumulate(d_H_d, idx_2[a, b, i, j], idx_2[a, b, m, n], g[o, o, o, o][m, n, i, j])
+    a, b, i, j, e, f = np.ix_(Vact, Vact, Oact, Oact, Vact, Vact)
+    _accumulate(d_H_d, idx_2[a, b, i, j], idx_2[e, f, i, j], g[v, v, v, v][a, b, e, f])
+    a, b, i, j, e, m = np.ix_(Vact, Vact, Oact, Oact, Vact, Oact)
+    idet = idx_2[a, b, i, j]
+    _accumulate(d_H_d, idet, idx_2[e, b, m, j], h_voov[a, m, i, e] - h_vovo[a, m, e, i])
+    _accumulate(d_H_d, idet, idx_2[a, e, i, m], h_voov[b, m, j, e] - h_vovo[b, m, e, j])
+    _accumulate(d_H_d, idet, idx_2[e, b, i, m], -h_vovo[a, m, e, j])
+    _accumulate(d_H_d, idet, idx_2[a, e, m, j], -g[o, v, o, v][m, b, i, e])
 
     # Assemble and return full matrix
     return np.concatenate((np.concatenate((s_H_s, s_H_d), axis=1),
                            np.concatenate((d_H_s, d_H_d), axis=1),), axis=0)
 
-def build_2p_hamiltonian(f, g, o, v, nactu):
-    # get orbital parameters
-    no, nu = f[o, v].shape
-    # set active space parameters
-    nactu = min(nactu, nu)
-    # allocate active-space 2p hamiltonian
-    ndim = int(nactu * (nactu - 1) / 2)
-    H = np.zeros((ndim, ndim))
-    ct1 = 0
-    for a in range(nactu):
-        for b in range(a + 1, nactu):
-            ct2 = 0
-            for c in range(nactu):
-                for d in range(c + 1, nactu):
-                    H[ct1, ct2] = (
-                        +(b == d) * f[v, v][a, c]
-                        -(a == d) * f[v, v][b, c]
-                        -(b == c) * f[v, v][a, d]
-                        +(a == c) * f[v, v][b, d]
-                        + g[v, v, v, v][a, b, c, d]
-                    )
-                    ct2 += 1
-            ct1 += 1
-
+def build_rcisd_triplet_hamiltonian(fock, g, o, v, nacto, nactu, allowed=None):
+    """Construct the triplet RHF CISd Hamiltonian by applying rcisd_triplet_sigma
+    to the unit vectors of the compressed space, or of the configurations
+    selected by the mask `allowed` only."""
+
+    ndim = rcisd_triplet_diagonal(fock, g, o, v, nacto, nactu).shape[0]
+    configurations = np.arange(ndim) if allowed is None else np.where(allowed)[0]
+    H = np.zeros((len(configurations), len(configurations)))
+    e = np.zeros(ndim)
+    for J, jdet in enumerate(configurations):
+        e[jdet] = 1.0
+        H[:, J] = rcisd_triplet_sigma(e, fock, g, o, v, nacto, nactu)[configurations]
+        e[jdet] = 0.0
     return H
 
-def build_2h_hamiltonian(f, g, o, v):
-    """ Construct the 2h Hamiltonian with matrix elements
-        given by:
-        < ij | H_N | kl > = A(ij)A(kl)[d(i,k)f(l,j)] + g(k,l,i,j) 
-    """
-
+def build_2p_hamiltonian(f, g, o, v, nactu, allowed=None):
+    """Vectorized construction of the active-space 2p Hamiltonian
+        < ab | H_N | cd > = A(ab)A(cd)[d(b,d)f(a,c)] + g(a,b,c,d)
+    over the unique pairs a < b and c < d selected by the mask `allowed` (all by default)."""
     # get orbital parameters
     no, nu = f[o, v].shape
-    # allocate active-space 2p hamiltonian
-    ndim = int(no * (no - 1) / 2)
-    H = np.zeros((ndim, ndim))
-    ct1 = 0
-    for i in range(no):
-        for j in range(i + 1, no):
-            ct2 = 0
-            for k in range(no):
-                for l in range(k + 1, no):
-                    H[ct1, ct2] = (
-                        -(j == l) * f[o, o][k, i]
-                        +(i == l) * f[o, o][k, j]
-                        +(j == k) * f[o, o][l, i]
-                        -(i == k) * f[o, o][l, j]
-                        + g[o, o, o, o][k, l, i, j]
-                    )
-                    ct2 += 1
-            ct1 += 1
+    # set active space parameters
+    nactu = min(nactu, nu)
+    a, b = np.triu_indices(nactu, k=1)
+    if allowed is not None:
+        a, b = a[allowed], b[allowed]
+    a, b, c, d = a[:, np.newaxis], b[:, np.newaxis], a[np.newaxis, :], b[np.newaxis, :]
+    f_vv = f[v, v]
+    H = (
+        + f_vv[a, c] * (b == d)
+        - f_vv[b, c] * (a == d)
+        - f_vv[a, d] * (b == c)
+        + f_vv[b, d] * (a == c)
+        + g[v, v, v, v][a, b, c, d]
+    )
     return H
 
-def build_2h_cvs_hamiltonian(f, g, o, v, cvsmin, cvsmax):
-    """ Construct the 2h Hamiltonian with matrix elements
-        given by:
-        < ij | H_N | kl > = A(ij)A(kl)[d(i,k)f(l,j)] + g(k,l,i,j) 
-    """
+def build_2h_hamiltonian(f, g, o, v, allowed=None):
+    """Vectorized construction of the 2h Hamiltonian
+        < ij | H_N | kl > = A(ij)A(kl)[d(i,k)f(l,j)] + g(k,l,i,j)
+    over the unique pairs i < j and k < l selected by the mask `allowed` (all by default)."""
     # get orbital parameters
     no, nu = f[o, v].shape
-    # allocate active-space 2p hamiltonian
-    ndim = int(no * (no - 1) / 2)
-    H = np.zeros((ndim, ndim))
-    ct1 = 0
-    for i in range(no):
-        for j in range(i + 1, no):
-            if (i < cvsmin or i > cvsmax) and (j < cvsmin or j > cvsmax): continue
-            ct2 = 0
-            for k in range(no):
-                for l in range(k + 1, no):
-                    if (k < cvsmin or k > cvsmax) and (l < cvsmin or l > cvsmax): continue
-                    H[ct1, ct2] = (
-                        -(j == l) * f[o, o][k, i]
-                        +(i == l) * f[o, o][k, j]
-                        +(j == k) * f[o, o][l, i]
-                        -(i == k) * f[o, o][l, j]
-                        + g[o, o, o, o][k, l, i, j]
-                    )
-                    ct2 += 1
-            ct1 += 1
+    i, j = np.triu_indices(no, k=1)
+    if allowed is not None:
+        i, j = i[allowed], j[allowed]
+    i, j, k, l = i[:, np.newaxis], j[:, np.newaxis], i[np.newaxis, :], j[np.newaxis, :]
+    f_oo = f[o, o]
+    H = (
+        - f_oo[k, i] * (j == l)
+        + f_oo[k, j] * (i == l)
+        + f_oo[l, i] * (j == k)
+        - f_oo[l, j] * (i == k)
+        + g[o, o, o, o][k, l, i, j]
+    )
     return H
 
-def build_dipcisd_hamiltonian(fock, g, o, v, nacto, nactu):
-    """ Construct the 2h + active(3h-1p) Hamiltonian with matrix elements"""
+def build_dipcisd_hamiltonian(fock, g, o, v, nacto, nactu, allowed=None):
+    """Vectorized construction of the 2h + active(3h-1p) Hamiltonian in the
+    space of get_dipcisd_index_arrays, restricted to the configurations
+    selected by the mask `allowed` (if given)."""
     no, nu = fock[o, v].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
     n1 = int(no*(no - 1)/2)
     n2 = int(nacto*(nacto - 1)*(nacto - 2)/6 * nactu)
     # get index addressing arrays
     idx_1, idx_2 = get_dipcisd_index_arrays(no, nu, nacto, nactu)
+    if allowed is not None:
+        idx_1, idx_2 = _restrict_addresses(idx_1, allowed[:n1]), _restrict_addresses(idx_2, allowed[n1:])
+        n1, n2 = np.count_nonzero(allowed[:n1]), np.count_nonzero(allowed[n1:])
+    f_oo, f_vv, f_ov = fock[o, o], fock[v, v], fock[o, v]
+    h_vooo = g[v, o, o, o]
+    h_oooo = g[o, o, o, o]
+    h_voov = g[v, o, o, v]
+    # ranges of all/active occupied and unoccupied orbitals
+    O = np.arange(no)
+    Oact, Vact = np.arange(no - nacto, no), np.arange(nactu)
+    # rows run over the unique i < j 2h and i < j < k 3h-1p determinants
+    unique_1 = lambda i, j: np.where(j > i, idx_1[i, j], 0)
+    unique_2 = lambda i, j, c, k: np.where((j > i) & (k > j), idx_2[i, j, c, k], 0)
     ######
     # 2h #
     ######
     s_H_s = np.zeros((n1, n1))
     s_H_d = np.zeros((n1, n2))
-    for i in range(no):
-        for j in range(i + 1, no):
-            idet = idx_1[i, j]
-            if idet == 0: continue
-            I = abs(idet) - 1
-            # -A(ij) h1(mi)*r1(mj)
-            for m in range(no):
-                # (1)
-                jdet = idx_1[m, j]
-                if jdet != 0:
-                    J = abs(jdet) - 1
-                    phase = np.sign(jdet)
-                    s_H_s[I, J] -= fock[o, o][m, i] * phase
-                # (ij)
-                jdet = idx_1[m, i]
-                if jdet != 0:
-                    J = abs(jdet) - 1
-                    phase = np.sign(jdet)
-                    s_H_s[I, J] += fock[o, o][m, j] * phase
-            # h2(mnij)*r1(mn)
-            for m in range(no):
-                for n in range(m + 1, no):
-                    # (1)
-                    jdet = idx_1[m, n]
-                    if jdet != 0:
-                        J = abs(jdet) - 1
-                        phase = np.sign(jdet)
-                        s_H_s[I, J] += g[o, o, o, o][m, n, i, j] * phase
-            # h1(me)*r2(ijem)
-            for e in range(nactu):
-                for m in range(no - nacto, no):
-                    # (1)
-                    jdet = idx_2[i, j, e, m]
-                    if jdet != 0:
-                        J = abs(jdet) - 1
-                        phase = np.sign(jdet)
-                        s_H_d[I, J] += fock[o, v][m, e] * phase
-            # -A(ij) h2(mnif)*r2(mjfn)
-            for m in range(no - nacto, no):
-                for n in range(m + 1, no):
-                    for f in range(nactu):
-                        # (1)
-                        jdet = idx_2[m, j, f, n]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            s_H_d[I, J] -= g[o, o, o, v][m, n, i, f] * phase
-                        # (ij)
-                        jdet = idx_2[m, i, f, n]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            s_H_d[I, J] += g[o, o, o, v][m, n, j, f] * phase
+    i, j, m = np.ix_(O, O, O)
+    idet = unique_1(i, j)
+    _accumulate(s_H_s, idet, idx_1[m, j], -f_oo[m, i])
+    _accumulate(s_H_s, idet, idx_1[m, i], f_oo[m, j])
+    i, j, m, n = np.ix_(O, O, O, O)
+    _accumulate(s_H_s, unique_1(i, j), idx_1[m, n], h_oooo[m, n, i, j] * (n > m))
+    i, j, e, m = np.ix_(O, O, Vact, Oact)
+    _accumulate(s_H_d, unique_1(i, j), idx_2[i, j, e, m], f_ov[m, e])
+    i, j, m, n, f = np.ix_(O, O, Oact, O, Vact)
+    idet = unique_1(i, j)
+    _accumulate(s_H_d, idet, idx_2[m, j, f, n], -g[o, o, o, v][m, n, i, f] * (n > m))
+    _accumulate(s_H_d, idet, idx_2[m, i, f, n], g[o, o, o, v][m, n, j, f] * (n > m))
     ########
     # 3h1p #
     ########
     d_H_s = np.zeros((n2, n1))
     d_H_d = np.zeros((n2, n2))
-    for i in range(no - nacto, no):
-        for j in range(i + 1, no):
-            for c in range(nactu):
-                for k in range(j + 1, no):
-                    idet = idx_2[i, j, c, k]
-                    if idet == 0: continue
-                    I = abs(idet) - 1
-                    # -A(j/ik) h2(cmki)*r1(mj)
-                    for m in range(no):
-                        # (1)
-                        jdet = idx_1[m, j]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_s[I, J] -= g[v, o, o, o][c, m, k, i] * phase
-                        # (ij)
-                        jdet = idx_1[m, i]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_s[I, J] += g[v, o, o, o][c, m, k, j] * phase
-                        # (jk)
-                        jdet = idx_1[m, k]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_s[I, J] += g[v, o, o, o][c, m, j, i] * phase
-                    # h1(ce)*r2(ijek)
-                    for e in range(nactu):
-                        jdet = idx_2[i, j, e, k]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] += fock[v, v][c, e] * phase
-                    # -A(k/ij) h1(mk)*r2(ijcm)
-                    for m in range(no - nacto, no):
-                        # (1)
-                        jdet = idx_2[i, j, c, m]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] -= fock[o, o][m, k] * phase
-                        # (ik)
-                        jdet = idx_2[k, j, c, m]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] += fock[o, o][m, i] * phase
-                        # (jk)
-                        jdet = idx_2[i, k, c, m]
-                        if jdet != 0:
-                            J = abs(jdet) - 1
-                            phase = np.sign(jdet)
-                            d_H_d[I, J] += fock[o, o][m, j] * phase
-                    # A(k/ij) h2(mnij)*r2(mnck)
-                    for m in range(no - nacto, no):
-                        for n in range(m + 1, no):
-                            # (1)
-                            jdet = idx_2[m, n, c, k]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] += g[o, o, o, o][m, n, i, j] * phase
-                            # (ik)
-                            jdet = idx_2[m, n, c, i]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] -= g[o, o, o, o][m, n, k, j] * phase
-                            # (jk)
-                            jdet = idx_2[m, n, c, j]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] -= g[o, o, o, o][m, n, i, k] * phase
-                    # A(k/ij) h2(cmke)*r2(ijem)
-                    for m in range(no - nacto, no):
-                        for e in range(nactu):
-                            # (1)
-                            jdet = idx_2[i, j, e, m]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] += g[v, o, o, v][c, m, k, e] * phase
-                            # (ik)
-                            jdet = idx_2[k, j, e, m]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] -= g[v, o, o, v][c, m, i, e] * phase
-                            # (jk)
-                            jdet = idx_2[i, k, e, m]
-                            if jdet != 0:
-                                J = abs(jdet) - 1
-                                phase = np.sign(jdet)
-                                d_H_d[I, J] -= g[v, o, o, v][c, m, j, e] * phase
+    i, j, c, k, m = np.ix_(Oact, Oact, Vact, Oact, O)
+    idet = unique_2(i, j, c, k)
+    _accumulate(d_H_s, idet, idx_1[m, j], -h_vooo[c, m, k, i])
+    _accumulate(d_H_s, idet, idx_1[m, i], h_vooo[c, m, k, j])
+    _accumulate(d_H_s, idet, idx_1[m, k], h_vooo[c, m, j, i])
+    i, j, c, k, e = np.ix_(Oact, Oact, Vact, Oact, Vact)
+    _accumulate(d_H_d, unique_2(i, j, c, k), idx_2[i, j, e, k], f_vv[c, e])
+    i, j, c, k, m = np.ix_(Oact, Oact, Vact, Oact, Oact)
+    idet = unique_2(i, j, c, k)
+    _accumulate(d_H_d, idet, idx_2[i, j, c, m], -f_oo[m, k])
+    _accumulate(d_H_d, idet, idx_2[k, j, c, m], f_oo[m, i])
+    _accumulate(d_H_d, idet, idx_2[i, k, c, m], f_oo[m, j])
+    i, j, c, k, m, n = np.ix_(Oact, Oact, Vact, Oact, Oact, Oact)
+    idet = unique_2(i, j, c, k)
+    _accumulate(d_H_d, idet, idx_2[m, n, c, k], h_oooo[m, n, i, j] * (n > m))
+    _accumulate(d_H_d, idet, idx_2[m, n, c, i], -h_oooo[m, n, k, j] * (n > m))
+    _accumulate(d_H_d, idet, idx_2[m, n, c, j], -h_oooo[m, n, i, k] * (n > m))
+    i, j, c, k, m, e = np.ix_(Oact, Oact, Vact, Oact, Oact, Vact)
+    idet = unique_2(i, j, c, k)
+    _accumulate(d_H_d, idet, idx_2[i, j, e, m], h_voov[c, m, k, e])
+    _accumulate(d_H_d, idet, idx_2[k, j, e, m], -h_voov[c, m, i, e])
+    _accumulate(d_H_d, idet, idx_2[i, k, e, m], -h_voov[c, m, j, e])
     # Assemble and return full matrix
     return np.concatenate((np.concatenate((s_H_s, s_H_d), axis=1),
                            np.concatenate((d_H_s, d_H_d), axis=1),), axis=0)
 
-def build_1p_hamiltonian(f, g, o, v):
-    """ Construct the 1p Hamiltonian with matrix elements
-        given by:
-        < a | H_N | b > = < a | f | b >
-    """
-
-    nunocc, nocc = f[v, o].shape
-
-    H = np.zeros((nunocc, nunocc))
-
-    ct1 = 0 
-    for a in range(nunocc):
-        ct2 = 0
-        for b in range(nunocc):
-            H[ct1, ct2] = f[v, v][a, b]
-            ct2 += 1
-        ct1 += 1
-
-    return H
-
-def build_1h_hamiltonian(f, g, o, v):
-    """ Construct the CIS Hamiltonian with matrix elements
-        given by:
-        < i | H_N | j > = -< j | f | i >
-    """
-
-    nunocc, nocc = f[v, o].shape
+def _accumulate(H, idet, jdet, coef):
+    """Vectorized form of the loops in the slow Hamiltonian builders: for every
+    point of the broadcast index grid where both determinant addresses are
+    nonzero, add sign(jdet) * coef to H[|idet| - 1, |jdet| - 1]."""
+    idet, jdet, coef = np.broadcast_arrays(idet, jdet, coef)
+    mask = (idet != 0) & (jdet != 0) & (coef != 0)
+    I = np.abs(idet[mask]).astype(np.int64) - 1
+    J = np.abs(jdet[mask]).astype(np.int64) - 1
+    H += np.bincount(I * H.shape[1] + J, weights=np.sign(jdet[mask]) * coef[mask], minlength=H.size).reshape(H.shape)
+
+def _restrict_addresses(idx, allowed):
+    """Renumber the signed 1-based addresses `idx` of a compressed space so that they
+    run over the configurations selected by the mask `allowed` only; the addresses of
+    the other configurations are set to 0, so that _accumulate skips them."""
+    new = np.zeros(len(allowed) + 1, dtype=idx.dtype)
+    new[1:][allowed] = np.arange(1, np.count_nonzero(allowed) + 1)
+    return np.sign(idx) * new[np.abs(idx)]
+
+def _single_excitations(no, nu, allowed=None):
+    """Unoccupied and occupied indices of the single excitations a <- i, in the (nu, no)
+    layout, selected by the mask `allowed` (all by default)."""
+    a, i = np.divmod(np.arange(no * nu), no)
+    if allowed is not None:
+        a, i = a[allowed], i[allowed]
+    return a, i
+
+def solve_guess_eigenproblem(build_hamiltonian, matvec, diagonal, nroot, solver="auto", basis=None, allowed=None):
+    """Return the lowest eigenvalues (increasing order) and eigenvectors (columns)
+    of a guess Hamiltonian. With solver="dense", the matrix is built and fully
+    diagonalized. With solver="davidson", only the `nroot` lowest roots are found
+    iteratively using the sigma function `matvec`. The default "auto" uses the
+    dense solver for dimensions up to DENSE_GUESS_DIMENSION. The problem can be
+    restricted to the configurations selected by the boolean mask `allowed` (e.g.,
+    those of a given symmetry), in which case build_hamiltonian, matvec, and
+    diagonal only refer to these configurations, and further to the subspace
+    spanned by `basis`, a sparse matrix of orthonormal columns (e.g., spin-adapted
+    functions) over the full space. The eigenvectors are always returned in the
+    full space."""
+    from scipy.sparse import issparse
+    from miniccpy.davidson import davidson_lowest_roots
+
+    if basis is None:
+        to_full = lambda y: y
+        from_full = lambda x: x
+        project = lambda H: H
+        d = diagonal
+    else:
+        if allowed is not None:
+            # the columns of the basis vanish outside of the allowed configurations
+            basis = basis.tocsr()[np.where(allowed)[0]]
+        to_full = lambda y: basis @ y
+        from_full = lambda x: basis.T @ x
+        project = lambda H: basis.T @ (basis.T @ H.T).T
+        d = basis.multiply(basis).T @ diagonal
+
+    nsub = d.shape[0]
+    if nsub == 0:
+        raise ValueError("The guess space restricted by symmetry is empty")
+    nroot = min(nroot, nsub)
+    if solver == "auto":
+        solver = "dense" if nsub <= DENSE_GUESS_DIMENSION else "davidson"
+
+    if solver == "dense":
+        omega, C = np.linalg.eig(project(build_hamiltonian()))
+        idx = np.argsort(omega)
+        omega, Y = np.real(omega[idx]), np.real(C[:, idx])
+    else:
+        omega, Y = davidson_lowest_roots(lambda y: from_full(matvec(to_full(y))), d, nroot)
+    X = to_full(Y)
+    if allowed is None:
+        return omega, X
+    # scatter the eigenvectors of the restricted problem into the full space
+    C = np.zeros((len(allowed), X.shape[1]))
+    C[allowed] = X
+    return omega, C
+
+def get_spin_adapted_cis_basis(no, nu, mult, allowed=None):
+    """Orthonormal basis of the spin-adapted closed-shell single excitations
+    (|a_alpha i_alpha> + |a_beta i_beta>) / sqrt(2) for singlets (mult = 1) and
+    (|a_alpha i_alpha> - |a_beta i_beta>) / sqrt(2) for the M_s = 0 triplets
+    (mult = 3), stored as the columns of a sparse (no*nu, no*nu/4) matrix. If the
+    boolean mask `allowed` is given, only the functions within it are kept."""
+    from scipy.sparse import csc_matrix
+
+    phase = 1.0 if mult == 1 else -1.0
+    a, i = np.meshgrid(np.arange(0, nu, 2), np.arange(0, no, 2), indexing="ij")
+    a = a.flatten()
+    i = i.flatten()
+    if allowed is not None:
+        keep = allowed[:no * nu][a * no + i]
+        a = a[keep]
+        i = i[keep]
+    rows = np.hstack((a * no + i, (a + 1) * no + i + 1))
+    cols = np.tile(np.arange(len(a)), 2)
+    vals = np.repeat([1.0 / np.sqrt(2.0), phase / np.sqrt(2.0)], len(a))
+    return csc_matrix((vals, (rows, cols)), shape=(no * nu, len(a)))
+
+def _spin_adapted_doubles_block(same_v, same_o, mult):
+    """Spin eigenfunctions of one spatial block of the M_s = 0 doubles, i.e., the
+    determinants |a b i j> whose unoccupied (occupied) spinorbitals belong to the
+    spatial orbitals A, B (I, J), with A = B if `same_v` (I = J if `same_o`).
+    S^2 only mixes determinants within such a block, so the eigenvectors of this
+    small problem, expressed in the local spinorbitals 0, 1 (A) and 2, 3 (B),
+    apply to every block of the same kind. Returns the local compressed pairs
+    (a, b, i, j) and the eigenvectors of the target multiplicity as columns."""
+    nv = 2 if same_v else 4
+    nocc = 2 if same_o else 4
+    a, b, i, j = _cisd_pairs(nocc, nv)
+    a, i = [x.flatten() for x in np.meshgrid(a, i, indexing="ij")]
+    b, j = [x.flatten() for x in np.meshgrid(b, j, indexing="ij")]
+    keep = ((a // 2 == b // 2) == same_v) & ((i // 2 == j // 2) == same_o)
+    keep &= (a % 2 == 0).astype(int) + (b % 2 == 0) == (i % 2 == 0).astype(int) + (j % 2 == 0)
+    a, b, i, j = a[keep], b[keep], i[keep], j[keep]
+    ndet = len(a)
+    # S^2 = S_- S_+ over the M_s = 0 determinants
+    X = np.zeros((nv, nv, nocc, nocc, ndet))
+    k = np.arange(ndet)
+    X[a, b, i, j, k] = 1.0
+    X[b, a, i, j, k] = -1.0
+    X[a, b, j, i, k] = -1.0
+    X[b, a, j, i, k] = 1.0
+    S2 = _spin_lower(_spin_raise(X))[a, b, i, j, :]
+    s2, V = np.linalg.eigh(S2)
+    target = 0.0 if mult == 1 else 2.0
+    return a, b, i, j, V[:, abs(s2 - target) < 1.0e-08]
+
+def get_spin_adapted_cisd_basis(no, nu, nacto, nactu, mult, allowed=None):
+    """Orthonormal basis of the singlet (mult = 1) or M_s = 0 triplet (mult = 3)
+    subspace of the compressed CISd space of a closed-shell reference, stored as
+    the columns of a sparse matrix. The singles are spin adapted explicitly, while
+    the doubles are adapted block by block over the M_s = 0 determinants sharing
+    the same spatial orbitals (see _spin_adapted_doubles_block). If the boolean
+    mask `allowed` is given, the basis is restricted to the configurations within
+    it; since S^2 does not mix spatial symmetries, this can be used to select an irrep."""
+    from scipy.sparse import csc_matrix, hstack
 
-    H = np.zeros((nocc, nocc))
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    if nacto % 2 != 0 or nactu % 2 != 0:
+        raise ValueError("Spin-adapted CISd guess requires even numbers of active occupied and unoccupied spinorbitals")
+    n1 = no * nu
+    n2 = (nactu * (nactu - 1) // 2) * (nacto * (nacto - 1) // 2)
+    # compressed address of the active pairs a < b and i < j
+    pair_v = np.zeros((nactu, nactu), dtype=np.int64)
+    pair_o = np.zeros((nacto, nacto), dtype=np.int64)
+    pair_v[np.triu_indices(nactu, k=1)] = np.arange(nactu * (nactu - 1) // 2)
+    pair_o[np.triu_indices(nacto, k=1)] = np.arange(nacto * (nacto - 1) // 2)
+    npair_o = nacto * (nacto - 1) // 2
+
+    rows, cols, vals = [], [], []
+    ncol = 0
+    for same_v in (False, True):
+        for same_o in (False, True):
+            a, b, i, j, V = _spin_adapted_doubles_block(same_v, same_o, mult)
+            if V.shape[1] == 0:
+                continue
+            # spatial orbitals A <= B and I <= J of every block of this kind
+            A, B = np.triu_indices(nactu // 2, k=0 if same_v else 1)
+            I, J = np.triu_indices(nacto // 2, k=0 if same_o else 1)
+            if same_v:
+                A, B = A[A == B], B[A == B]
+            if same_o:
+                I, J = I[I == J], J[I == J]
+            # map the local spinorbitals onto the active ones: 0, 1 -> A and 2, 3 -> B
+            AB = np.stack((A, B), axis=1)[:, np.newaxis, :]
+            IJ = np.stack((I, J), axis=1)[:, np.newaxis, :]
+            ga = 2 * AB[:, :, 0] + a % 2 + 2 * (AB[:, :, 1] - AB[:, :, 0]) * (a // 2)
+            gb = 2 * AB[:, :, 0] + b % 2 + 2 * (AB[:, :, 1] - AB[:, :, 0]) * (b // 2)
+            gi = 2 * IJ[:, :, 0] + i % 2 + 2 * (IJ[:, :, 1] - IJ[:, :, 0]) * (i // 2)
+            gj = 2 * IJ[:, :, 0] + j % 2 + 2 * (IJ[:, :, 1] - IJ[:, :, 0]) * (j // 2)
+            # addresses (block_ab, block_ij, local determinant)
+            addr = (pair_v[ga, gb][:, np.newaxis, :] * npair_o + pair_o[gi, gj][np.newaxis, :, :]).reshape(-1, len(a))
+            if allowed is not None:
+                addr = addr[allowed[n1 + addr[:, 0]]]
+            nblock, nvec = addr.shape[0], V.shape[1]
+            rows.append(n1 + np.repeat(addr, nvec, axis=1).flatten())
+            cols.append(ncol + (np.arange(nblock)[:, np.newaxis, np.newaxis] * nvec
+                                + np.arange(nvec)[np.newaxis, np.newaxis, :]
+                                + np.zeros((1, len(a), 1), dtype=np.int64)).flatten())
+            vals.append(np.tile(V.flatten(), nblock))
+            ncol += nblock * nvec
+    U1 = get_spin_adapted_cis_basis(no, nu, mult, allowed)
+    U2 = csc_matrix((np.hstack(vals) if vals else [], (np.hstack(rows) if rows else [], np.hstack(cols) if cols else [])),
+                    shape=(n1 + n2, ncol))
+    U1.resize((n1 + n2, U1.shape[1]))
+    return hstack((U1, U2), format="csc")
+
+def get_target_symmetry(no, nu, orbsym, point_group, target_irrep, rhf=False):
+    """Return the irrep numbers of the correlated orbitals, given by their labels
+    `orbsym`, together with the symmetry that the excitation (or ionization/attachment)
+    operator must have to reach a state of symmetry `target_irrep` from the reference.
+    For RHF-based guesses (rhf=True), spinorbital labels are reduced to spatial ones."""
+    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
+
+    pg_irrep_to_number = get_pg_irreps(point_group)
+    orbsym = _correlated_orbsym(no, nu, orbsym, rhf)
+    isym = np.array([pg_irrep_to_number[p.upper()] for p in orbsym[:no + nu]], dtype=np.int32)
+    # for RHF, the occupied spatial orbitals are doubly occupied and the reference is totally symmetric
+    sym_ref = 0 if rhf else pg_irrep_to_number[get_reference_symmetry(no, point_group, isym)]
+    return isym, pg_irrep_to_number[target_irrep.upper()] ^ sym_ref
+
+def _correlated_orbsym(no, nu, orbsym, rhf=False):
+    """Irrep labels of the orbitals used by a guess; for RHF-based guesses (rhf=True),
+    spinorbital labels are reduced to spatial ones."""
+    if rhf and len(orbsym) >= 2 * (no + nu):
+        return orbsym[::2]
+    return orbsym
+
+def get_guess_blocking(no, nu, orbsym, point_group, nacto=0, nactu=0, rhf=False):
+    """Symmetry blocking of the orbitals of a guess, including the active spaces
+    ("O" and "V") of its doubles."""
+    from miniccpy.symmetry import SymmetryBlocking
+    return SymmetryBlocking(_correlated_orbsym(no, nu, orbsym, rhf), point_group, no, nu, nacto, nactu)
+
+def get_cis_symmetry_mask(isym, sym, no, nu):
+    """Boolean mask of the single excitations a <- i (in the (nu, no) layout) of symmetry `sym`."""
+    return ((isym[no:, np.newaxis] ^ isym[np.newaxis, :no]) == sym).flatten()
+
+def get_cisd_symmetry_mask(isym, sym, no, nu, nacto, nactu):
+    """Boolean mask of the compressed CISd space (singles followed by the active
+    doubles a < b, i < j) selecting the configurations of symmetry `sym`."""
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    a, b, i, j = _cisd_pairs(nacto, nactu)
+    sym_o = isym[no - nacto:no]
+    sym_v = isym[no:no + nactu]
+    mask2 = ((sym_v[a] ^ sym_v[b])[:, np.newaxis] ^ (sym_o[i] ^ sym_o[j])[np.newaxis, :]) == sym
+    return np.hstack((get_cis_symmetry_mask(isym, sym, no, nu), mask2.flatten()))
+
+def get_rcisd_symmetry_mask(isym, sym, no, nu, nacto, nactu):
+    """Boolean mask of the compressed RCISd space (singles followed by the active
+    doubles a <= b, i <= j) selecting the configurations of symmetry `sym`."""
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    a, b, i, j = _rcisd_pairs(nacto, nactu)
+    sym_o = isym[no - nacto:no]
+    sym_v = isym[no:no + nactu]
+    mask2 = ((sym_v[a] ^ sym_v[b])[:, np.newaxis] ^ (sym_o[i] ^ sym_o[j])[np.newaxis, :]) == sym
+    return np.hstack((get_cis_symmetry_mask(isym, sym, no, nu), mask2.flatten()))
+
+def get_rcisd_triplet_symmetry_mask(isym, sym, no, nu, nacto, nactu):
+    """Boolean mask of the compressed triplet RCISd space (singles followed by the
+    unique active opposite-spin and same-spin doubles) selecting the configurations
+    of symmetry `sym`."""
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    n = np.newaxis
+    sym_o = isym[no - nacto:no]
+    sym_v = isym[no:no + nactu]
+    sym2 = sym_v[:, n, n, n] ^ sym_v[n, :, n, n] ^ sym_o[n, n, :, n] ^ sym_o[n, n, n, :]
+    mask_ab, mask_aa = _rcisd_triplet_masks(nacto, nactu)
+    return np.hstack((get_cis_symmetry_mask(isym, sym, no, nu), sym2[mask_ab] == sym, sym2[mask_aa] == sym))
+
+def get_dipcis_symmetry_mask(isym, sym, no):
+    """Boolean mask of the 2h configurations i < j of symmetry `sym`."""
+    i, j = np.triu_indices(no, k=1)
+    return (isym[i] ^ isym[j]) == sym
+
+def get_dipcisd_symmetry_mask(isym, sym, no, nu, nacto, nactu):
+    """Boolean mask of the compressed 2h + active 3h1p space (i < j < k, c active,
+    in the order used by dipcisd_scatter) selecting the configurations of symmetry `sym`."""
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    mask2 = [isym[i] ^ isym[j] ^ isym[k] ^ isym[no + c] == sym
+             for i in range(no - nacto, no) for j in range(i + 1, no) for c in range(nactu) for k in range(j + 1, no)]
+    return np.hstack((get_dipcis_symmetry_mask(isym, sym, no), np.array(mask2, dtype=bool)))
+
+def get_deacis_symmetry_mask(isym, sym, no, nu, nactu):
+    """Boolean mask of the active 2p configurations a < b of symmetry `sym`."""
+    a, b = np.triu_indices(min(nactu, nu), k=1)
+    return (isym[no + a] ^ isym[no + b]) == sym
+
+def get_dipcis_cvs_mask(no, cvsmin, cvsmax):
+    """Boolean mask of the 2h configurations i < j with at least one core hole (cvsmin <= i <= cvsmax)."""
+    i, j = np.triu_indices(no, k=1)
+    core = (np.arange(no) >= cvsmin) & (np.arange(no) <= cvsmax)
+    return core[i] | core[j]
+
+def get_dipcisd_cvs_mask(no, nu, nacto, nactu, cvsmin, cvsmax):
+    """Boolean mask of the compressed 2h + active 3h1p space (see get_dipcisd_symmetry_mask)
+    selecting the configurations with at least one core hole (cvsmin <= i <= cvsmax)."""
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    core = (np.arange(no) >= cvsmin) & (np.arange(no) <= cvsmax)
+    mask2 = [core[i] or core[j] or core[k]
+             for i in range(no - nacto, no) for j in range(i + 1, no) for c in range(nactu) for k in range(j + 1, no)]
+    return np.hstack((get_dipcis_cvs_mask(no, cvsmin, cvsmax), np.array(mask2, dtype=bool)))
+
+def _spin_raise(X):
+    """Commutator of S_+ with the doubles excitation operator with amplitudes
+    X(a, b, i, j, ...), where even (odd) indices denote alpha (beta) spinorbitals."""
+    Y = np.zeros_like(X)
+    Y[0::2, :, :, :] += X[1::2, :, :, :]
+    Y[:, 0::2, :, :] += X[:, 1::2, :, :]
+    Y[:, :, 1::2, :] -= X[:, :, 0::2, :]
+    Y[:, :, :, 1::2] -= X[:, :, :, 0::2]
+    return Y
+
+def _spin_lower(X):
+    """Commutator of S_- with the doubles excitation operator with amplitudes X(a, b, i, j, ...)."""
+    Y = np.zeros_like(X)
+    Y[1::2, :, :, :] += X[0::2, :, :, :]
+    Y[:, 1::2, :, :] += X[:, 0::2, :, :]
+    Y[:, :, 0::2, :] -= X[:, :, 1::2, :]
+    Y[:, :, :, 0::2] -= X[:, :, :, 1::2]
+    return Y
+
+def cis_sigma(c, f, g, o, v):
+    """Vectorized action of the spin-orbital CIS Hamiltonian (see build_cis_hamiltonian)."""
+    nu, no = f[v, o].shape
+    r1 = c.reshape(nu, no)
+    x1 = (
+            np.dot(f[v, v], r1)
+            - np.dot(r1, f[o, o])
+            + np.einsum("amie,em->ai", g[v, o, o, v], r1, optimize=True)
+    )
+    return x1.flatten()
+
+def rcis_sigma(c, f, g, o, v, mult=1):
+    """Vectorized action of the RHF CIS Hamiltonian (see build_rcis_hamiltonian)."""
+    nu, no = f[v, o].shape
+    phase = 1.0 if mult == 1 else -1.0
+    r1 = c.reshape(nu, no)
+    x1 = (
+            np.dot(f[v, v], r1)
+            - np.dot(r1, f[o, o])
+            + np.einsum("amie,em->ai", (1.0 + phase) * g[v, o, o, v] - g[v, o, v, o].transpose(0, 1, 3, 2), r1, optimize=True)
+    )
+    return x1.flatten()
+
+def cisd_sigma(c, f, g, o, v, nacto, nactu):
+    """Vectorized action of the spin-orbital CISd Hamiltonian on a vector in the
+    compressed singles + active unique doubles (a < b, i < j) space used by
+    build_cisd_hamiltonian."""
+    nu, no = f[v, o].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    n1 = no * nu
+    # active slices within the occupied/unoccupied blocks
+    oa = slice(no - nacto, no)
+    va = slice(0, nactu)
+    a, b, i, j = _cisd_pairs(nacto, nactu)
+
+    r1 = c[:n1].reshape(nu, no)
+    r2 = np.zeros((nactu, nactu, nacto, nacto))
+    x = c[n1:].reshape(len(a), len(i))
+    r2[a[:, None], b[:, None], i[None, :], j[None, :]] = x
+    r2[b[:, None], a[:, None], i[None, :], j[None, :]] = -x
+    r2[a[:, None], b[:, None], j[None, :], i[None, :]] = -x
+    r2[b[:, None], a[:, None], j[None, :], i[None, :]] = x
+
+    h_ov = f[o, v][oa, va]
+    h_ooov = g[o, o, o, v][oa, oa, :, va]
+    h_vovv = g[v, o, v, v][:, oa, va, va]
+    # singles
+    x1 = np.dot(f[v, v], r1) - np.dot(r1, f[o, o]) + np.einsum("amie,em->ai", g[v, o, o, v], r1, optimize=True)
+    x1[va, oa] += np.einsum("me,aeim->ai", h_ov, r2, optimize=True)
+    x1[va, :] -= 0.5 * np.einsum("mnif,afmn->ai", h_ooov, r2, optimize=True)
+    x1[:, oa] += 0.5 * np.einsum("anef,efin->ai", h_vovv, r2, optimize=True)
+    # doubles; terms antisymmetrized in (ab)
+    X2 = (
+            -np.einsum("amij,bm->abij", g[v, o, o, o][va, :, oa, oa], r1[va, :], optimize=True)
+            + np.einsum("ae,ebij->abij", f[v, v][va, va], r2, optimize=True)
+    )
+    X2 -= X2.transpose(1, 0, 2, 3)
+    # terms antisymmetrized in (ij)
+    Y2 = (
+            np.einsum("baje,ei->abij", g[v, v, o, v][va, va, oa, :], r1[:, oa], optimize=True)
+            - np.einsum("mi,abmj->abij", f[o, o][oa, oa], r2, optimize=True)
+    )
+    X2 += Y2 - Y2.transpose(0, 1, 3, 2)
+    # terms antisymmetrized in both (ab) and (ij)
+    Z2 = np.einsum("amie,ebmj->abij", g[v, o, o, v][va, oa, oa, va], r2, optimize=True)
+    Z2 -= Z2.transpose(1, 0, 2, 3)
+    X2 += Z2 - Z2.transpose(0, 1, 3, 2)
+    X2 += 0.5 * np.einsum("mnij,abmn->abij", g[o, o, o, o][oa, oa, oa, oa], r2, optimize=True)
+    X2 += 0.5 * np.einsum("abef,efij->abij", g[v, v, v, v][va, va, va, va], r2, optimize=True)
+    x2 = X2[a[:, None], b[:, None], i[None, :], j[None, :]]
+    return np.hstack((x1.flatten(), x2.flatten()))
+
+def rcisd_sigma(c, f, g, o, v, nacto, nactu):
+    """Vectorized action of the RHF CISd Hamiltonian on a vector in the compressed
+    singles + active doubles (a <= b, i <= j) space used by build_rcisd_hamiltonian.
+    Each doubles element represents both r2(abij) and r2(baji), so the doubles
+    projection sums over the two positions (the transpose of rcisd_scatter)."""
+    nu, no = f[v, o].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    n1 = no * nu
+    # active slices within the occupied/unoccupied blocks
+    oa = slice(no - nacto, no)
+    va = slice(0, nactu)
+    a, b, i, j = _rcisd_pairs(nacto, nactu)
+
+    r1 = c[:n1].reshape(nu, no)
+    r2 = np.zeros((nactu, nactu, nacto, nacto))
+    x = c[n1:].reshape(len(a), len(i))
+    r2[a[:, None], b[:, None], i[None, :], j[None, :]] = x
+    r2[b[:, None], a[:, None], j[None, :], i[None, :]] = x
+
+    h_voov = g[v, o, o, v] - g[v, o, v, o].transpose(0, 1, 3, 2)
+    # singles; the singles-singles block is the singlet RCIS one
+    x1 = rcis_sigma(c[:n1], f, g, o, v, mult=1).reshape(nu, no)
+    x1[va, oa] += np.einsum("me,aeim->ai", f[o, v][oa, va], r2, optimize=True)
+    x1[va, :] -= np.einsum("mnif,afmn->ai", g[o, o, o, v][oa, oa, :, va], r2, optimize=True)
+    x1[:, oa] += np.einsum("anef,efin->ai", g[v, o, v, v][:, oa, va, va], r2, optimize=True)
+    # doubles
+    X2 = (
+            -np.einsum("mbij,am->abij", g[o, v, o, o][:, va, oa, oa], r1[va, :], optimize=True)
+            + np.einsum("abej,ei->abij", g[v, v, v, o][va, va, :, oa], r1[:, oa], optimize=True)
+            - np.einsum("amij,bm->abij", g[v, o, o, o][va, :, oa, oa], r1[va, :], optimize=True)
+            + np.einsum("abie,ej->abij", g[v, v, o, v][va, va, oa, :], r1[:, oa], optimize=True)
+            - np.einsum("mi,abmj->abij", f[o, o][oa, oa], r2, optimize=True)
+            - np.einsum("mj,abim->abij", f[o, o][oa, oa], r2, optimize=True)
+            + np.einsum("ae,ebij->abij", f[v, v][va, va], r2, optimize=True)
+            + np.einsum("be,aeij->abij", f[v, v][va, va], r2, optimize=True)
+            + np.einsum("mnij,abmn->abij", g[o, o, o, o][oa, oa, oa, oa], r2, optimize=True)
+            + np.einsum("abef,efij->abij", g[v, v, v, v][va, va, va, va], r2, optimize=True)
+            + np.einsum("amie,ebmj->abij", h_voov[va, oa, oa, va], r2, optimize=True)
+            + np.einsum("bmje,aeim->abij", h_voov[va, oa, oa, va], r2, optimize=True)
+            - np.einsum("amej,ebim->abij", g[v, o, v, o][va, oa, va, oa], r2, optimize=True)
+            - np.einsum("mbie,aemj->abij", g[o, v, o, v][oa, va, oa, va], r2, optimize=True)
+    )
+    x2 = X2[a[:, None], b[:, None], i[None, :], j[None, :]] + X2[b[:, None], a[:, None], j[None, :], i[None, :]]
+    # elements with a = b and i = j occupy a single position
+    x2[(a == b)[:, None] & (i == j)[None, :]] *= 0.5
+    return np.hstack((x1.flatten(), x2.flatten()))
+
+def rcisd_triplet_sigma(c, f, g, o, v, nacto, nactu):
+    """Vectorized action of the triplet RHF CISd Hamiltonian on a vector in the
+    compressed singles + unique active opposite-spin and same-spin doubles space
+    (see _rcisd_triplet_masks). The singles and doubles follow the conventions
+    of eomrccsd_triplet, where the CISd sigma is the EOMCCSD one with T = 0."""
+    nu, no = f[v, o].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    n1 = no * nu
+    # active slices within the occupied/unoccupied blocks
+    oa = slice(no - nacto, no)
+    va = slice(0, nactu)
+
+    r1 = c[:n1].reshape(nu, no)
+    r2ab, r2aa = _rcisd_triplet_unpack(c[n1:], nacto, nactu)
+    r2_ss = r2ab + r2aa
+
+    h_voov = g[v, o, o, v][va, oa, oa, va]
+    h_vovo = g[v, o, v, o][va, oa, va, oa]
+    # singles
+    x1 = np.dot(f[v, v], r1) - np.dot(r1, f[o, o]) - np.einsum("amei,em->ai", g[v, o, v, o], r1, optimize=True)
+    x1[va, oa] += np.einsum("me,aeim->ai", f[o, v][oa, va], r2_ss, optimize=True)
+    x1[va, :] -= np.einsum("mnif,afmn->ai", g[o, o, o, v][oa, oa, :, va], r2_ss, optimize=True)
+    x1[:, oa] += np.einsum("anef,efin->ai", g[v, o, v, v][:, oa, va, va], r2_ss, optimize=True)
+    # opposite-spin doubles
+    X2 = (
+            np.einsum("baje,ei->abij", g[v, v, o, v][va, va, oa, :], r1[:, oa], optimize=True)
+            - np.einsum("bmji,am->abij", g[v, o, o, o][va, :, oa, oa], r1[va, :], optimize=True)
+            + np.einsum("ae,ebij->abij", f[v, v][va, va], r2ab, optimize=True)
+            - np.einsum("mi,abmj->abij", f[o, o][oa, oa], r2ab, optimize=True)
+            + 0.5 * np.einsum("mnij,abmn->abij", g[o, o, o, o][oa, oa, oa, oa], r2ab, optimize=True)
+            + 0.5 * np.einsum("abef,efij->abij", g[v, v, v, v][va, va, va, va], r2ab, optimize=True)
+            + np.einsum("amie,ebmj->abij", h_voov, r2ab - r2aa, optimize=True)
+            - np.einsum("amei,ebmj->abij", h_vovo, r2ab, optimize=True)
+            - np.einsum("amej,ebim->abij", h_vovo, r2ab, optimize=True)
+    )
+    X2ab = X2 - X2.transpose(1, 0, 3, 2)
+    # same-spin doubles; terms antisymmetrized in (ab)
+    X2 = (
+            np.einsum("ae,ebij->abij", f[v, v][va, va], r2aa, optimize=True)
+            - np.einsum("bmji,am->abij", (g[v, o, o, o] - g[v, o, o, o].transpose(0, 1, 3, 2))[va, :, oa, oa], r1[va, :], optimize=True)
+    )
+    X2aa = X2 - X2.transpose(1, 0, 2, 3)
+    # terms antisymmetrized in (ij)
+    X2 = (
+            - np.einsum("mi,abmj->abij", f[o, o][oa, oa], r2aa, optimize=True)
+            + np.einsum("baje,ei->abij", (g[v, v, o, v] - g[v, v, v, o].transpose(0, 1, 3, 2))[va, va, oa, :], r1[:, oa], optimize=True)
+    )
+    X2aa += X2 - X2.transpose(0, 1, 3, 2)
+    # terms antisymmetrized in both (ab) and (ij)
+    X2 = (
+            np.einsum("amie,ebmj->abij", h_voov - h_vovo.transpose(0, 1, 3, 2), r2aa, optimize=True)
+            - np.einsum("amie,ebmj->abij", h_voov, r2ab, optimize=True)
+    )
+    X2 -= X2.transpose(1, 0, 2, 3)
+    X2aa += X2 - X2.transpose(0, 1, 3, 2)
+    X2aa += np.einsum("mnij,abmn->abij", g[o, o, o, o][oa, oa, oa, oa], r2aa, optimize=True)
+    X2aa += np.einsum("abef,efij->abij", g[v, v, v, v][va, va, va, va], r2aa, optimize=True)
+
+    mask_ab, mask_aa = _rcisd_triplet_masks(nacto, nactu)
+    return np.hstack((x1.flatten(), X2ab[mask_ab], X2aa[mask_aa]))
+
+def symmetry_blocked_sigma(kind, f, g, o, v, nacto, nactu, blocking, sym, allowed, mult=1):
+    """Return the action of the guess Hamiltonian `kind` ("cis", "rcis", "cisd",
+    "rcisd", or "rcisd_triplet") on vectors over the configurations selected by the
+    mask `allowed`, which must be those of symmetry `sym`. The vectors are unpacked
+    into symmetry-blocked tensors over the orbitals of `blocking` (see
+    get_guess_blocking), so that the contractions only involve symmetry-allowed
+    blocks. The operator blocks are extracted on the first call, i.e., only when
+    the Davidson solver is used."""
+    from miniccpy.symmetry import SymTensor
+
+    def setup():
+        no, nu = f[o, v].shape
+        n1 = no * nu
+        sl = lambda spaces: tuple(o if s in "oO" else v for s in spaces)
+        op = lambda spaces, x=None: SymTensor.from_dense(blocking, (f if len(spaces) == 2 else g)[sl(spaces)] if x is None else x, spaces)
+        H = {"oo": op("oo"), "vv": op("vv")}
+        if kind == "cis":
+            H["voov"] = op("voov")
+            sigma, doubles = cis_sigma_sym, []
+        elif kind == "rcis":
+            phase = 1.0 if mult == 1 else -1.0
+            H["voov"] = op("voov", (1.0 + phase) * g[v, o, o, v] - g[v, o, v, o].transpose(0, 1, 3, 2))
+            sigma, doubles = cis_sigma_sym, []
+        elif kind == "cisd":
+            H.update({spaces: op(spaces) for spaces in ["voov", "OV", "OOoV", "vOVV", "VoOO", "VVOv", "OO", "VV", "VOOV", "OOOO", "VVVV"]})
+            sigma, doubles = cisd_sigma_sym, [(get_cisd_index_arrays(no, nu, nacto, nactu)[1], 0.25)]
+        elif kind == "rcisd":
+            H.update({spaces: op(spaces) for spaces in ["OV", "OOoV", "vOVV", "oVOO", "VVvO", "VoOO", "VVOv", "OO", "VV", "OOOO", "VVVV", "VOVO", "OVOV"]})
+            H["voov"] = op("voov", 2.0 * g[v, o, o, v] - g[v, o, v, o].transpose(0, 1, 3, 2))
+            H["h_VOOV"] = op("VOOV", g[v, o, o, v] - g[v, o, v, o].transpose(0, 1, 3, 2))
+            # each doubles element represents both r2(abij) and r2(baji)
+            sigma, doubles = rcisd_sigma_sym, [(get_rcisd_index_arrays(no, nu, nacto, nactu)[1], 1.0)]
+        else:
+            H.update({spaces: op(spaces) for spaces in ["vovo", "OV", "OOoV", "vOVV", "VoOO", "VVOv", "OO", "VV", "OOOO", "VVVV", "VOOV", "VOVO"]})
+            H["x_VoOO"] = op("VoOO", g[v, o, o, o] - g[v, o, o, o].transpose(0, 1, 3, 2))
+            H["x_VVOv"] = op("VVOv", g[v, v, o, v] - g[v, v, v, o].transpose(0, 1, 3, 2))
+            idx_ab, idx_aa = _rcisd_triplet_index_arrays(no, nu, nacto, nactu)
+            sigma, doubles = rcisd_triplet_sigma_sym, [(idx_ab, 0.5), (idx_aa, 0.25)]
+        # addresses of the elements of every symmetry block within the restricted space
+        idx_1 = _restrict_addresses(np.arange(1, n1 + 1).reshape(nu, no), allowed[:n1])
+        addr_1 = {key: idx_1[blocking.ix("vo", key)] for key in blocking.keys("vo", sym)}
+        addr_2 = []
+        for idx_2, weight in doubles:
+            idx_2 = _restrict_addresses(idx_2, allowed[n1:])
+            addr_2.append(({key: idx_2[blocking.ix("VVOO", key)] for key in blocking.keys("VVOO", sym)}, weight))
+        n1r = np.count_nonzero(allowed[:n1])
+        n2r = np.count_nonzero(allowed[n1:])
+
+        def apply(y):
+            r1 = _unpack_blocked(blocking, y[:n1r], addr_1, "vo", sym)
+            r2 = [_unpack_blocked(blocking, y[n1r:], addr, "VVOO", sym) for addr, _ in addr_2]
+            x = sigma(r1, *r2, H)
+            if not isinstance(x, tuple):
+                return _pack_blocked(x, addr_1, n1r)
+            x2 = np.zeros(n2r)
+            for x2_block, (addr, weight) in zip(x[1:], addr_2):
+                x2 += _pack_blocked(x2_block, addr, n2r, weight)
+            return np.hstack((_pack_blocked(x[0], addr_1, n1r), x2))
+        return apply
+
+    apply = []
+
+    def matvec(y):
+        if not apply:
+            apply.append(setup())
+        return apply[0](y)
+    return matvec
+
+def _unpack_blocked(blocking, y, addresses, spaces, sym):
+    """Expand the vector `y` into a SymTensor, given the signed 1-based address in `y`
+    of every element of each block (0 for the elements outside of the space)."""
+    from miniccpy.symmetry import SymTensor
+    y = np.concatenate(([0.0], y))
+    blocks = {key: np.sign(addr) * y[np.abs(addr)] for key, addr in addresses.items()}
+    return SymTensor(blocking, spaces, sym, blocks)
+
+def _pack_blocked(x, addresses, n, weight=1.0):
+    """Transpose of _unpack_blocked: sum the elements of the SymTensor `x` (times their
+    phases) into the `n` positions of the vector, scaled by `weight`."""
+    out = np.zeros(n + 1)
+    for key, addr in addresses.items():
+        out += np.bincount(np.abs(addr).flatten(), weights=(np.sign(addr) * x.blocks[key]).flatten(), minlength=n + 1)
+    return weight * out[1:]
+
+def cis_sigma_sym(r1, H):
+    """Symmetry-blocked form of cis_sigma (and of rcis_sigma, for which H["voov"]
+    holds the spin-adapted combination of the integrals)."""
+    return (
+            sym_einsum("ae,ei->ai", H["vv"], r1)
+            - sym_einsum("mi,am->ai", H["oo"], r1)
+            + sym_einsum("amie,em->ai", H["voov"], r1)
+    )
+
+def cisd_sigma_sym(r1, r2, H):
+    """Symmetry-blocked form of cisd_sigma, where r2 holds the active doubles ("VVOO")."""
+    # singles
+    x1 = cis_sigma_sym(r1, H)
+    x1.accumulate(sym_einsum("me,aeim->ai", H["OV"], r2))
+    x1.accumulate(-0.5 * sym_einsum("mnif,afmn->ai", H["OOoV"], r2))
+    x1.accumulate(0.5 * sym_einsum("anef,efin->ai", H["vOVV"], r2))
+    # doubles; terms antisymmetrized in (ab)
+    X2 = (
+            -sym_einsum("amij,bm->abij", H["VoOO"], r1.restrict("Vo"))
+            + sym_einsum("ae,ebij->abij", H["VV"], r2)
+    )
+    X2 = X2 - X2.transpose((1, 0, 2, 3))
+    # terms antisymmetrized in (ij)
+    Y2 = (
+            sym_einsum("baje,ei->abij", H["VVOv"], r1.restrict("vO"))
+            - sym_einsum("mi,abmj->abij", H["OO"], r2)
+    )
+    X2 = X2 + Y2 - Y2.transpose((0, 1, 3, 2))
+    # terms antisymmetrized in both (ab) and (ij)
+    Z2 = sym_einsum("amie,ebmj->abij", H["VOOV"], r2)
+    Z2 = Z2 - Z2.transpose((1, 0, 2, 3))
+    X2 = X2 + Z2 - Z2.transpose((0, 1, 3, 2))
+    X2 = X2 + 0.5 * sym_einsum("mnij,abmn->abij", H["OOOO"], r2)
+    X2 = X2 + 0.5 * sym_einsum("abef,efij->abij", H["VVVV"], r2)
+    return x1, X2
+
+def rcisd_sigma_sym(r1, r2, H):
+    """Symmetry-blocked form of rcisd_sigma, where r2 holds the active doubles ("VVOO")."""
+    # singles; the singles-singles block is the singlet RCIS one
+    x1 = cis_sigma_sym(r1, H)
+    x1.accumulate(sym_einsum("me,aeim->ai", H["OV"], r2))
+    x1.accumulate(-1.0 * sym_einsum("mnif,afmn->ai", H["OOoV"], r2))
+    x1.accumulate(sym_einsum("anef,efin->ai", H["vOVV"], r2))
+    # doubles
+    r1_Vo, r1_vO = r1.restrict("Vo"), r1.restrict("vO")
+    X2 = (
+            -sym_einsum("mbij,am->abij", H["oVOO"], r1_Vo)
+            + sym_einsum("abej,ei->abij", H["VVvO"], r1_vO)
+            - sym_einsum("amij,bm->abij", H["VoOO"], r1_Vo)
+            + sym_einsum("abie,ej->abij", H["VVOv"], r1_vO)
+            - sym_einsum("mi,abmj->abij", H["OO"], r2)
+            - sym_einsum("mj,abim->abij", H["OO"], r2)
+            + sym_einsum("ae,ebij->abij", H["VV"], r2)
+            + sym_einsum("be,aeij->abij", H["VV"], r2)
+            + sym_einsum("mnij,abmn->abij", H["OOOO"], r2)
+            + sym_einsum("abef,efij->abij", H["VVVV"], r2)
+            + sym_einsum("amie,ebmj->abij", H["h_VOOV"], r2)
+            + sym_einsum("bmje,aeim->abij", H["h_VOOV"], r2)
+            - sym_einsum("amej,ebim->abij", H["VOVO"], r2)
+            - sym_einsum("mbie,aemj->abij", H["OVOV"], r2)
+    )
+    return x1, X2
+
+def rcisd_triplet_sigma_sym(r1, r2ab, r2aa, H):
+    """Symmetry-blocked form of rcisd_triplet_sigma, where r2ab and r2aa hold the
+    active opposite-spin and same-spin doubles ("VVOO")."""
+    r2_ss = r2ab + r2aa
+    r1_Vo, r1_vO = r1.restrict("Vo"), r1.restrict("vO")
+    # singles
+    x1 = (
+            sym_einsum("ae,ei->ai", H["vv"], r1)
+            - sym_einsum("mi,am->ai", H["oo"], r1)
+            - sym_einsum("amei,em->ai", H["vovo"], r1)
+    )
+    x1.accumulate(sym_einsum("me,aeim->ai", H["OV"], r2_ss))
+    x1.accumulate(-1.0 * sym_einsum("mnif,afmn->ai", H["OOoV"], r2_ss))
+    x1.accumulate(sym_einsum("anef,efin->ai", H["vOVV"], r2_ss))
+    # opposite-spin doubles
+    X2 = (
+            sym_einsum("baje,ei->abij", H["VVOv"], r1_vO)
+            - sym_einsum("bmji,am->abij", H["VoOO"], r1_Vo)
+            + sym_einsum("ae,ebij->abij", H["VV"], r2ab)
+            - sym_einsum("mi,abmj->abij", H["OO"], r2ab)
+            + 0.5 * sym_einsum("mnij,abmn->abij", H["OOOO"], r2ab)
+            + 0.5 * sym_einsum("abef,efij->abij", H["VVVV"], r2ab)
+            + sym_einsum("amie,ebmj->abij", H["VOOV"], r2ab - r2aa)
+            - sym_einsum("amei,ebmj->abij", H["VOVO"], r2ab)
+            - sym_einsum("amej,ebim->abij", H["VOVO"], r2ab)
+    )
+    X2ab = X2 - X2.transpose((1, 0, 3, 2))
+    # same-spin doubles; terms antisymmetrized in (ab)
+    X2 = (
+            sym_einsum("ae,ebij->abij", H["VV"], r2aa)
+            - sym_einsum("bmji,am->abij", H["x_VoOO"], r1_Vo)
+    )
+    X2aa = X2 - X2.transpose((1, 0, 2, 3))
+    # terms antisymmetrized in (ij)
+    X2 = (
+            - sym_einsum("mi,abmj->abij", H["OO"], r2aa)
+            + sym_einsum("baje,ei->abij", H["x_VVOv"], r1_vO)
+    )
+    X2aa = X2aa + X2 - X2.transpose((0, 1, 3, 2))
+    # terms antisymmetrized in both (ab) and (ij)
+    X2 = (
+            sym_einsum("amie,ebmj->abij", H["VOOV"] - H["VOVO"].transpose((0, 1, 3, 2)), r2aa)
+            - sym_einsum("amie,ebmj->abij", H["VOOV"], r2ab)
+    )
+    X2 = X2 - X2.transpose((1, 0, 2, 3))
+    X2aa = X2aa + X2 - X2.transpose((0, 1, 3, 2))
+    X2aa = X2aa + sym_einsum("mnij,abmn->abij", H["OOOO"], r2aa)
+    X2aa = X2aa + sym_einsum("abef,efij->abij", H["VVVV"], r2aa)
+    return x1, X2ab, X2aa
+
+def cis_diagonal(f, g, o, v):
+    """Diagonal of the spin-orbital CIS Hamiltonian."""
+    n = np.newaxis
+    d1 = np.diagonal(f[v, v])[:, n] - np.diagonal(f[o, o])[n, :] + np.einsum("aiia->ai", g[v, o, o, v])
+    return d1.flatten()
+
+def rcis_diagonal(f, g, o, v, mult=1):
+    """Diagonal of the RHF CIS Hamiltonian."""
+    n = np.newaxis
+    phase = 1.0 if mult == 1 else -1.0
+    d1 = (
+            np.diagonal(f[v, v])[:, n] - np.diagonal(f[o, o])[n, :]
+            + (1.0 + phase) * np.einsum("aiia->ai", g[v, o, o, v]) - np.einsum("aiai->ai", g[v, o, v, o])
+    )
+    return d1.flatten()
+
+def cisd_diagonal(f, g, o, v, nacto, nactu):
+    """Approximate diagonal of the spin-orbital CISd Hamiltonian in the compressed space."""
+    from miniccpy.hbar_diagonal import eomccsd_hbar_diagonal
 
-    ct1 = 0 
-    for i in range(nocc):
-        ct2 = 0
-        for j in range(nocc):
-            H[ct1, ct2] = -f[o, o][j, i]
-            ct2 += 1
-        ct1 += 1
+    nu, no = f[v, o].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    a, b, i, j = _cisd_pairs(nacto, nactu)
+    oact = slice(o.start + no - nacto, o.stop)
+    vact = slice(v.start, v.start + nactu)
+    _, d2 = eomccsd_hbar_diagonal(f, g, oact, vact)
+    return np.hstack((cis_diagonal(f, g, o, v), d2[a[:, None], b[:, None], i[None, :], j[None, :]].flatten()))
 
-    return H
+def rcisd_diagonal(f, g, o, v, nacto, nactu):
+    """Approximate diagonal of the RHF CISd Hamiltonian in the compressed space."""
+    from miniccpy.hbar_diagonal import eomrccsd_hbar_diagonal
 
-def spin_function1(C1, mult, no, nu):
-    # Reshape the excitation vector into C1
-    c1_arr = np.reshape(np.real(C1), (nu, no))
-    # Create the a->a and b->b single excitation cases
-    c1_a = np.zeros((nu // 2, no // 2))
-    c1_b = np.zeros((nu // 2, no // 2))
-    for a in range(nu):
-        for i in range(no):
-            if a % 2 == 0 and i % 2 == 0:
-                c1_a[a // 2, i // 2] = c1_arr[a, i]
-            elif a % 2 == 1 and i % 2 == 1:
-                c1_b[(a - 1) // 2, (i - 1) // 2] = c1_arr[a, i]
-    # For RHF, singlets have c1_a = c1_b and triplets have c1_a = -c1_b
-    if mult == 1:
-        error = np.linalg.norm(c1_a - c1_b)
-    elif mult == 3:
-        error = np.linalg.norm(c1_a + c1_b)
-    return error
+    nu, no = f[v, o].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    a, b, i, j = _rcisd_pairs(nacto, nactu)
+    oact = slice(o.start + no - nacto, o.stop)
+    vact = slice(v.start, v.start + nactu)
+    _, d2 = eomrccsd_hbar_diagonal(f, g, oact, vact)
+    d2 = d2[a[:, None], b[:, None], i[None, :], j[None, :]] + d2[b[:, None], a[:, None], j[None, :], i[None, :]]
+    d2[(a == b)[:, None] & (i == j)[None, :]] *= 0.5
+    return np.hstack((rcis_diagonal(f, g, o, v, mult=1), d2.flatten()))
+
+def rcisd_triplet_diagonal(f, g, o, v, nacto, nactu):
+    """Diagonal of the triplet RHF CISd Hamiltonian in the compressed space."""
+    nu, no = f[v, o].shape
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    n = np.newaxis
+    # active slices within the occupied/unoccupied blocks
+    oa = slice(no - nacto, no)
+    va = slice(0, nactu)
+    f_oo = np.diagonal(f[o, o])[oa]
+    f_vv = np.diagonal(f[v, v])[va]
+    g_oooo = np.einsum("ijij->ij", g[o, o, o, o][oa, oa, oa, oa])
+    x_oooo = np.einsum("ijji->ij", g[o, o, o, o][oa, oa, oa, oa])
+    g_vvvv = np.einsum("abab->ab", g[v, v, v, v][va, va, va, va])
+    x_vvvv = np.einsum("abba->ab", g[v, v, v, v][va, va, va, va])
+    g_voov = np.einsum("aiia->ai", g[v, o, o, v][va, oa, oa, va])
+    g_vovo = np.einsum("aiai->ai", g[v, o, v, o][va, oa, va, oa])
+
+    d2 = f_vv[:, n, n, n] + f_vv[n, :, n, n] - f_oo[n, n, :, n] - f_oo[n, n, n, :]
+    d2ab = (
+            d2 + g_oooo[n, n, :, :] + g_vvvv[:, :, n, n]
+            + (g_voov - g_vovo)[:, n, :, n] + (g_voov - g_vovo)[n, :, n, :]
+            - g_vovo[:, n, n, :] - g_vovo[n, :, :, n]
+    )
+    # for a = b (i = j), the exchanged amplitude r2ab(abji) (r2ab(baij)) is the same element
+    d2ab -= np.eye(nactu)[:, :, n, n] * x_oooo[n, n, :, :] + np.eye(nacto)[n, n, :, :] * x_vvvv[:, :, n, n]
+    d2aa = (
+            d2 + (g_oooo - x_oooo)[n, n, :, :] + (g_vvvv - x_vvvv)[:, :, n, n]
+            + (g_voov - g_vovo)[:, n, :, n] + (g_voov - g_vovo)[n, :, n, :]
+            + (g_voov - g_vovo)[:, n, n, :] + (g_voov - g_vovo)[n, :, :, n]
+    )
+    mask_ab, mask_aa = _rcisd_triplet_masks(nacto, nactu)
+    return np.hstack((rcis_diagonal(f, g, o, v, mult=3), d2ab[mask_ab], d2aa[mask_aa]))
+
+def _cisd_pairs(nacto, nactu):
+    """Index pairs (a < b) and (i < j), relative to the active blocks, in the
+    order used by get_cisd_index_arrays."""
+    a, b = np.triu_indices(nactu, k=1)
+    i, j = np.triu_indices(nacto, k=1)
+    return a, b, i, j
+
+def _rcisd_pairs(nacto, nactu):
+    """Index pairs (a <= b) and (i <= j), relative to the active blocks, in the
+    order used by get_rcisd_index_arrays."""
+    a, b = np.triu_indices(nactu, k=0)
+    i, j = np.triu_indices(nacto, k=0)
+    return a, b, i, j
+
+def _rcisd_triplet_masks(nacto, nactu):
+    """Boolean masks over the active (nactu, nactu, nacto, nacto) doubles selecting the
+    unique opposite-spin amplitudes r2ab(abij) = -r2ab(baji), i.e., those with a < b
+    or a = b and i < j, and the unique same-spin amplitudes r2aa with a < b and i < j."""
+    n = np.newaxis
+    a = np.arange(nactu)[:, n, n, n]
+    b = np.arange(nactu)[n, :, n, n]
+    i = np.arange(nacto)[n, n, :, n]
+    j = np.arange(nacto)[n, n, n, :]
+    mask_ab = (a < b) | ((a == b) & (i < j))
+    mask_aa = (a < b) & (i < j)
+    return mask_ab, mask_aa
+
+def _rcisd_triplet_index_arrays(no, nu, nacto, nactu):
+    """Signed 1-based addresses of the opposite-spin and same-spin triplet doubles
+    (see _rcisd_triplet_masks) over the full (nu, nu, no, no) index range, numbered
+    as in the compressed doubles space (the opposite-spin ones first)."""
+    nacto = min(nacto, no)
+    nactu = min(nactu, nu)
+    mask_ab, mask_aa = _rcisd_triplet_masks(nacto, nactu)
+    nab = np.count_nonzero(mask_ab)
+    act = (slice(0, nactu), slice(0, nactu), slice(no - nacto, no), slice(no - nacto, no))
+    x = np.zeros(mask_ab.shape, dtype=np.int32)
+    x[mask_ab] = np.arange(1, nab + 1)
+    idx_ab = np.zeros((nu, nu, no, no), dtype=np.int32)
+    idx_ab[act] = x - x.transpose(1, 0, 3, 2)
+    x = np.zeros(mask_aa.shape, dtype=np.int32)
+    x[mask_aa] = np.arange(nab + 1, nab + np.count_nonzero(mask_aa) + 1)
+    x = x - x.transpose(1, 0, 2, 3)
+    idx_aa = np.zeros((nu, nu, no, no), dtype=np.int32)
+    idx_aa[act] = x - x.transpose(0, 1, 3, 2)
+    return idx_ab, idx_aa
+
+def _rcisd_triplet_unpack(x, nacto, nactu):
+    """Expand the unique active triplet doubles x into the full active r2ab and r2aa arrays."""
+    mask_ab, mask_aa = _rcisd_triplet_masks(nacto, nactu)
+    nab = np.count_nonzero(mask_ab)
+    r2ab = np.zeros((nactu, nactu, nacto, nacto))
+    r2ab[mask_ab] = x[:nab]
+    r2ab -= r2ab.transpose(1, 0, 3, 2)
+    r2aa = np.zeros((nactu, nactu, nacto, nacto))
+    r2aa[mask_aa] = x[nab:]
+    r2aa -= r2aa.transpose(1, 0, 2, 3)
+    r2aa -= r2aa.transpose(0, 1, 3, 2)
+    return r2ab, r2aa
 
 # def spin_function2(C2, mult, no, nu):
 #     # Reshape the excitation vector into C2
@@ -86,9 +86,11 @@ def LH(l1, l2, t1, t2, H1, H2, o, v):
     return np.hstack( [LH1.flatten(), LH2.flatten()] )
 
 
-def kernel(T, fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core):
+def kernel(T, fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, L0=None, stats=None):
     """Solve the left-CCSD system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the L amplitudes are taken as T."""
+    with DIIS acceleration. The initial values of the L amplitudes are taken as T,
+    unless a starting guess L0 = (l1, l2) is provided.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"]."""
 
     omega = 0.0
     eps = np.diagonal(H1)
@@ -104,8 +106,11 @@ def kernel(T, fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    l1 = t1.copy() 
-    l2 = t2.copy()
+    if L0 is None:
+        l1 = t1.copy()
+        l2 = t2.copy()
+    else:
+        l1, l2 = (np.copy(l) for l in L0)
     lh1 = np.zeros((nunocc, nocc))
     lh2 = np.zeros((nunocc, nunocc, nocc, nocc))
 
@@ -147,6 +152,8 @@ def kernel(T, fock, H1, H2, o, v, maxit, convergence, energy_shift, diis_size, n
         print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(idx, current_energy, delta_e, res_norm, minutes, seconds, get_memory_usage()))
     else:
         raise ValueError("left-CCSD iterations did not converge")
+    if stats is not None:
+        stats["niter"] = idx + 1
 
     diis_engine.cleanup()
     e_corr = lcc_energy(l1, l2, lh1, lh2)
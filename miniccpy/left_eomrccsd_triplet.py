@@ -0,0 +1,208 @@
+import time
+import numpy as np
+from miniccpy.utilities import get_memory_usage
+from miniccpy.eomrccsd_triplet import unflatten
+
+def LT_intermediates(l2_ss, t2):
+    """Compute L2*T2-type one-body intermediates."""
+    # Allocate a dictionary to store the two intermediates
+    I = {"vv": None, "oo": None}
+    I["vv"] = -np.einsum("afmn,efmn->ea", l2_ss, t2, optimize=True)
+    I["oo"] = np.einsum("efin,efjn->ij", l2_ss, t2, optimize=True)
+    return I
+
+def LH_singles(l1, l2_ss, H1, H2, I, o, v):
+    """Compute the projection of the CCSD Hamiltonian on singles
+        X[a, i] = < 0 | (L1 + L2)*(H_N exp(T1+T2))_C | i_alpha a_alpha >
+    """
+    LH = np.einsum("ea,ei->ai", H1[v, v], l1, optimize=True)
+    LH -= np.einsum("im,am->ai", H1[o, o], l1, optimize=True)
+    LH -= np.einsum("eiam,em->ai", H2[v, o, v, o], l1, optimize=True)
+    LH += np.einsum("fena,efin->ai", H2[v, v, o, v], l2_ss, optimize=True)
+    LH -= np.einsum("finm,afmn->ai", H2[v, o, o, o], l2_ss, optimize=True)
+    LH += np.einsum("ge,eiag->ai", I["vv"], H2[v, o, v, v], optimize=True)
+    LH += np.einsum("mn,inma->ai", I["oo"], H2[o, o, o, v], optimize=True)
+    return LH
+
+def LH_doubles_ab(l1, l2ab, l2aa, H1, H2, I, o, v):
+    """Compute the projection of the CCSD Hamiltonian on the opposite-spin doubles
+        X[a, b, i, j] = < 0 | (L1 + L2) * (H_N exp(T1+T2))_C | i_alpha j_beta a_alpha b_beta >
+    """
+    LH = -np.einsum("ijmb,am->abij", H2[o, o, o, v], l1, optimize=True)
+    LH += np.einsum("ejab,ei->abij", H2[v, o, v, v], l1, optimize=True)
+    LH += np.einsum("jb,ai->abij", H1[o, v], l1, optimize=True)
+    LH += np.einsum("ea,ebij->abij", H1[v, v], l2ab, optimize=True)
+    LH -= np.einsum("im,abmj->abij", H1[o, o], l2ab, optimize=True)
+    LH += 0.5 * np.einsum("ijmn,abmn->abij", H2[o, o, o, o], l2ab, optimize=True)
+    LH += 0.5 * np.einsum("efab,efij->abij", H2[v, v, v, v], l2ab, optimize=True)
+    LH += np.einsum("eima,ebmj->abij", H2[v, o, o, v], l2ab - l2aa, optimize=True)
+    LH -= np.einsum("eiam,ebmj->abij", H2[v, o, v, o], l2ab, optimize=True)
+    LH -= np.einsum("ejam,ebim->abij", H2[v, o, v, o], l2ab, optimize=True)
+    LH += np.einsum("ea,ijeb->abij", I["vv"], H2[o, o, v, v], optimize=True)
+    LH -= np.einsum("im,mjab->abij", I["oo"], H2[o, o, v, v], optimize=True)
+    # apply antisymmetrizer (ij)(ab)
+    LH -= LH.transpose(1, 0, 3, 2)
+    return LH
+
+def LH_doubles_aa(l1, l2ab, l2aa, H1, H2, I, o, v):
+    """Compute the projection of the CCSD Hamiltonian on the same-spin doubles
+        X[a, b, i, j] = < 0 | (L1 + L2) * (H_N exp(T1+T2))_C | i_alpha j_alpha a_alpha b_alpha >
+    """
+    # same-spin 2-body HBar elements
+    h_oovv = H2[o, o, v, v] - H2[o, o, v, v].transpose(0, 1, 3, 2)
+    h_voov = H2[v, o, o, v] - H2[v, o, v, o].transpose(0, 1, 3, 2)
+
+    # terms antisymmetrized in (ab)
+    LH = np.einsum("ea,ebij->abij", H1[v, v], l2aa, optimize=True)
+    LH -= np.einsum("ijmb,am->abij", H2[o, o, o, v] - H2[o, o, v, o].transpose(0, 1, 3, 2), l1, optimize=True)
+    LH += np.einsum("ea,ijeb->abij", I["vv"], h_oovv, optimize=True)
+    LH -= LH.transpose(1, 0, 2, 3)
+    # terms antisymmetrized in (ij)
+    Y = -np.einsum("im,abmj->abij", H1[o, o], l2aa, optimize=True)
+    Y += np.einsum("ejab,ei->abij", H2[v, o, v, v] - H2[v, o, v, v].transpose(0, 1, 3, 2), l1, optimize=True)
+    Y -= np.einsum("im,mjab->abij", I["oo"], h_oovv, optimize=True)
+    LH += Y - Y.transpose(0, 1, 3, 2)
+    # terms antisymmetrized in both (ab) and (ij)
+    Z = np.einsum("jb,ai->abij", H1[o, v], l1, optimize=True)
+    Z += np.einsum("eima,ebmj->abij", h_voov, l2aa, optimize=True)
+    Z -= np.einsum("eima,ebmj->abij", H2[v, o, o, v], l2ab, optimize=True)
+    Z -= Z.transpose(1, 0, 2, 3)
+    LH += Z - Z.transpose(0, 1, 3, 2)
+    LH += np.einsum("ijmn,abmn->abij", H2[o, o, o, o], l2aa, optimize=True)
+    LH += np.einsum("efab,efij->abij", H2[v, v, v, v], l2aa, optimize=True)
+    return LH
+
+def update(l1, l2ab, l2aa, omega, e_ai, e_abij):
+    """Perform the diagonally preconditioned residual (DPR) update
+    to get the next correction vector."""
+
+    l1 /= (omega - e_ai)
+    l2ab /= (omega - e_abij)
+    l2aa /= (omega - e_abij)
+
+    return np.hstack([l1.flatten(), l2ab.flatten(), l2aa.flatten()])
+
+def LH(l1, l2ab, l2aa, t1, t2, H1, H2, o, v):
+    """Compute the matrix-vector product L * H, where
+    H is the CCSD similarity-transformed Hamiltonian and L is
+    the triplet left-EOMCCSD linear deexcitation operator."""
+
+    l2_ss = l2ab + l2aa
+    I = LT_intermediates(l2_ss, t2)
+    LH1 = LH_singles(l1, l2_ss, H1, H2, I, o, v)
+    LH2ab = LH_doubles_ab(l1, l2ab, l2aa, H1, H2, I, o, v)
+    LH2aa = LH_doubles_aa(l1, l2ab, l2aa, H1, H2, I, o, v)
+
+    return np.hstack( [LH1.flatten(), LH2ab.flatten(), LH2aa.flatten()] )
+
+def calc_LR(L, R, nocc, nunocc):
+    # unpack L
+    l1, l2ab, l2aa = unflatten(L, nunocc, nocc)
+    # unpack R
+    r1, r2ab, r2aa = R
+    # compute LR; the beta-beta and flipped opposite-spin parts double the alpha-alpha ones
+    LR = 2.0 * np.einsum("ai,ai->", l1, r1, optimize=True)
+    LR += np.einsum("abij,abij->", l2ab, r2ab, optimize=True)
+    LR += 0.5 * np.einsum("abij,abij->", l2aa, r2aa, optimize=True)
+    return LR
+
+def kernel(R, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1):
+    """
+    Diagonalize the similarity-transformed CCSD Hamiltonian using the
+    non-Hermitian Davidson algorithm for the left eigenvector of the M_s = 0
+    triplet root defined by the right eigenvector R = (r1, r2ab, r2aa)
+    obtained from eomrccsd_triplet.
+    """
+    eps = np.diagonal(H1)
+    n = np.newaxis
+    e_abij = (eps[v, n, n, n] + eps[n, v, n, n] - eps[n, n, o, n] - eps[n, n, n, o])
+    e_ai = (eps[v, n] - eps[n, o])
+
+    t1, t2 = T
+
+    nunocc, nocc = e_ai.shape
+    n1 = nunocc * nocc
+    n2 = nocc**2 * nunocc**2
+    ndim = n1 + 2 * n2
+
+    # Set the initial vector to be R
+    L = np.hstack([r.flatten() for r in R])
+
+    # Allocate the B and sigma matrices
+    sigma = np.zeros((ndim, max_size))
+    B = np.zeros((ndim, max_size))
+    restart_block = np.zeros((ndim, nrest))
+
+    # Initial values
+    B[:, 0] = L
+    sigma[:, 0] = LH(*unflatten(L, nunocc, nocc), t1, t2, H1, H2, o, v)
+
+    print("    ==> Left-EOMCCSD (triplet) iterations <==")
+    print("    The initial guess energy = ", omega)
+    print("")
+    print("     Iter               Energy                 |dE|                 |dL|     Wall Time     Memory")
+    curr_size = 1
+    for niter in range(maxit):
+        tic = time.time()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem
+        G = np.dot(B[:, :curr_size].T, sigma[:, :curr_size])
+        e, alpha = np.linalg.eig(G)
+
+        # select root based on maximum overlap with initial guess
+        idx = np.argsort(abs(alpha[0, :]))
+        alpha = np.real(alpha[:, idx[-1]])
+
+        # Get the eigenpair of interest
+        omega = np.real(e[idx[-1]])
+        L = np.dot(B[:, :curr_size], alpha)
+        restart_block[:, niter % nrest] = L
+
+        # calculate residual vector
+        residual = np.dot(sigma[:, :curr_size], alpha) - omega * L
+        res_norm = np.linalg.norm(residual)
+        delta_e = omega - omega_old
+
+        if res_norm < convergence and abs(delta_e) < convergence:
+            toc = time.time()
+            minutes, seconds = divmod(toc - tic, 60)
+            print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+            break
+
+        # update residual vector
+        q = update(*unflatten(residual, nunocc, nocc), omega, e_ai, e_abij)
+        for p in range(curr_size):
+            b = B[:, p] / np.linalg.norm(B[:, p])
+            q -= np.dot(b.T, q) * b
+        q /= np.linalg.norm(q)
+
+        # If below maximum subspace size, expand the subspace
+        if curr_size < max_size:
+            B[:, curr_size] = q
+            sigma[:, curr_size] = LH(*unflatten(q, nunocc, nocc), t1, t2, H1, H2, o, v)
+        else:
+            # Basic restart - use the last approximation to the eigenvector
+            print("       **Deflating subspace**")
+            restart_block, _ = np.linalg.qr(restart_block)
+            for j in range(restart_block.shape[1]):
+                B[:, j] = restart_block[:, j]
+                sigma[:, j] = LH(*unflatten(restart_block[:, j], nunocc, nocc), t1, t2, H1, H2, o, v)
+            curr_size = restart_block.shape[1] - 1
+
+        curr_size += 1
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        print("Left-EOMCCSD iterations did not converge")
+
+    # Normalize <L|R> = 1
+    LR = calc_LR(L, R, nocc, nunocc)
+    L /= LR
+    # Save the final converged root in an excitation tuple
+    L = unflatten(L, nunocc, nocc)
+
+    return L, omega
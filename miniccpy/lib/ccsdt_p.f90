@@ -16,7 +16,7 @@ module ccsdt_p
                                     no, nu)
 
                       integer, intent(in) :: no, nu, n3
-                      integer, intent(in) :: t3_excits(n3,6)
+                      integer(kind=2), intent(in) :: t3_excits(n3,6)
                       real(kind=8), intent(in) :: t3_amps(n3)
                       real(kind=8), intent(in) :: singles_res(1:nu,1:no),&
                                                   h2_oovv(1:no,1:no,1:nu,1:nu),&
@@ -34,6 +34,10 @@ module ccsdt_p
                       ! store x1a in resid container
                       resid(:,:) = singles_res(:,:)
                       ! compute < ia | (H(2) * T3)_C | 0 >
+                      !!!! BEGIN OMP PARALLEL SECTION !!!!
+                      !$omp parallel private(a,e,f,i,m,n,t_amp),&
+                      !$omp reduction(+:resid)
+                      !$omp do schedule(static)
                       do idet = 1, n3
                           t_amp = t3_amps(idet)
                           ! A(a/ef)A(i/mn) h2(mnef) * t3(aefimn)
@@ -49,6 +53,9 @@ module ccsdt_p
                           resid(e,n) = resid(e,n) + h2_oovv(m,i,a,f) * t_amp ! (ae)(in)
                           resid(f,n) = resid(f,n) + h2_oovv(m,i,e,a) * t_amp ! (af)(in)
                       end do
+                      !$omp end do
+                      !$omp end parallel
+                      !!!! END OMP PARALLEL SECTION !!!!
                       ! update loop
                       do i = 1,no
                           do a = 1,nu
@@ -72,7 +79,7 @@ module ccsdt_p
                                    no, nu)
 
                   integer, intent(in) :: no, nu, n3
-                  integer, intent(in) :: t3_excits(n3,6)
+                  integer(kind=2), intent(in) :: t3_excits(n3,6)
                   real(kind=8), intent(in) :: t3_amps(n3)
                   real(kind=8), intent(in) :: doubles_res(1:nu,1:nu,1:no,1:no),&
                                               h1_ov(1:no,1:nu),&
@@ -92,6 +99,10 @@ module ccsdt_p
                   ! Store x2a in residual container
                   resid(:,:,:,:) = doubles_res(:,:,:,:)
                   ! compute < ijab | (H(2) * T3)_C | 0 >
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,e,f,i,j,m,n,t_amp),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
                   do idet = 1, n3
                       t_amp = t3_amps(idet)
 
@@ -134,6 +145,9 @@ module ccsdt_p
                       resid(:,f,n,j) = resid(:,f,n,j) + h2_vovv(:,i,e,b) * t_amp ! (in)(bf)
                       resid(:,f,i,n) = resid(:,f,i,n) + h2_vovv(:,j,e,b) * t_amp ! (jn)(bf)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
                   ! update loop
                   do i = 1,no
                       do j = i+1,no
@@ -170,13 +184,15 @@ module ccsdt_p
 
               subroutine update_t3_p(resid,&
                                      t3_amps,t3_excits,&
+                                     plan_perm,plan_loc,plan_idx,&
                                      t2,&
                                      h1_oo,h1_vv,&
                                      h2_oovv,h2_vvov,h2_vooo,&
                                      h2_oooo,h2_voov,h2_vvvv,&
                                      f_oo,f_vv,&
                                      shift,&
-                                     n3,& 
+                                     n3,&
+                                     nperm,nloc_tot,nidx_tot,&
                                      no,nu)
 
                   integer, intent(in) :: no, nu, n3
@@ -194,18 +210,20 @@ module ccsdt_p
                                               f_vv(nu,nu), f_oo(no,no),&
                                               shift
 
-                  integer, intent(inout) :: t3_excits(n3,6)
-                  !f2py intent(in,out) :: t3_excits(0:n3-1,0:5)
+                  integer(kind=2), intent(in) :: t3_excits(n3,6)
                   real(kind=8), intent(inout) :: t3_amps(n3)
                   !f2py intent(in,out) :: t3_amps(0:n3-1)
 
                   real(kind=8), intent(out) :: resid(n3)
 
+                  integer, intent(in) :: nperm, nloc_tot, nidx_tot
+                  integer, intent(in) :: plan_perm(n3,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
                   integer, allocatable :: idx_table(:,:,:,:)
                   integer, allocatable :: loc_arr(:,:)
 
                   real(kind=8), allocatable :: t3_amps_buff(:), xbuf(:,:,:,:)
-                  integer, allocatable :: t3_excits_buff(:,:)
+                  integer(kind=2), allocatable :: t3_excits_buff(:,:)
 
                   !real(kind=8) :: I2_vvov(nu,nu,no,nu)
                   real(kind=8) :: I2_vvov(nu,nu,nu,no) ! reordered
@@ -213,7 +231,7 @@ module ccsdt_p
                   real(kind=8) :: I2_vooo(no,nu,no,no) ! reordered
                   real(kind=8) :: val, denom, t_amp, res_mm23, hmatel
                   real(kind=8) :: hmatel1, hmatel2, hmatel3, hmatel4
-                  integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet, jdet
+                  integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet, jdet, ibra
                   integer :: idx, nloc
                   
                   ! Start the VT3 intermediates at Hbar (factor of 1/2 to compensate for antisymmetrization)
@@ -231,6 +249,10 @@ module ccsdt_p
                   ! Zero the residual container
                   resid = 0.0d0
 
+                  ! Each sort is applied to the copies below, while t3_excits, t3_amps, and
+                  ! resid keep their original order; the bra loops add to resid through plan_perm
+                  allocate(t3_excits_buff(n3,6), t3_amps_buff(n3))
+
                   !!!! diagram 1: -A(i/jk) h1a(mi) * t3(abcmjk)
                   !!!! diagram 3: 1/2 A(i/jk) h2(mnij) * t3(abcmnk)
                   ! NOTE: WITHIN THESE LOOPS, H1A(OO) TERMS ARE DOUBLE-COUNTED SO COMPENSATE BY FACTOR OF 1/2  
@@ -239,26 +261,27 @@ module ccsdt_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(nu,nu,nu,no))
                   !!! ABCK LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-1,nu-1/), (/-1,nu/), (/3,no/), nu, nu, nu, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,2,3,6/), nu, nu, nu, no, nloc, n3, resid)
+                  call apply_sort_plan(1, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h1_oo,h2_oooo,&
                   !$omp no,nu,n3),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
-                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,1)
                      ! (1)
                      idx = idx_table(a,b,c,k)
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        l = t3_excits(jdet,4); m = t3_excits(jdet,5);
+                        l = t3_excits_buff(jdet,4); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(oooo) | lmkabc >
                         !hmatel = h2_oooo(l,m,i,j)
                         hmatel = h2_oooo(m,l,j,i)
@@ -269,13 +292,13 @@ module ccsdt_p
                         if (l==j) hmatel3 = h1_oo(m,i) ! (lm)     < ijkabc | h1a(oo) | jmkabc >
                         if (l==i) hmatel4 = -h1_oo(m,j) ! (ij)(lm) < ijkabc | h1a(oo) | imkabc >
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3  + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      ! (ik)
                      idx = idx_table(a,b,c,i)
                      if (idx/=0) then
                         do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                           l = t3_excits(jdet,4); m = t3_excits(jdet,5);
+                           l = t3_excits_buff(jdet,4); m = t3_excits_buff(jdet,5);
                            ! compute < ijkabc | h2(oooo) | lmiabc >
                            !hmatel = -h2_oooo(l,m,k,j)
                            hmatel = h2_oooo(m,l,k,j)
@@ -286,14 +309,14 @@ module ccsdt_p
                            if (l==j) hmatel3 = -h1_oo(m,k) ! (lm)
                            if (l==k) hmatel4 = h1_oo(m,j) ! (jk)(lm)
                            hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                           resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                           resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                         end do
                      end if
                      ! (jk)
                      idx = idx_table(a,b,c,j)
                      if (idx/=0) then
                         do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                           l = t3_excits(jdet,4); m = t3_excits(jdet,5);
+                           l = t3_excits_buff(jdet,4); m = t3_excits_buff(jdet,5);
                            ! compute < ijkabc | h2(oooo) | lmjabc >
                            !hmatel = -h2_oooo(l,m,i,k)
                            hmatel = -h2_oooo(m,l,k,i)
@@ -304,7 +327,7 @@ module ccsdt_p
                            if (l==k) hmatel3 = -h1_oo(m,i) ! (lm)
                            if (l==i) hmatel4 = h1_oo(m,k) ! (ik)(lm)
                            hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                           resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                           resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                         end do
                      end if
                   end do
@@ -312,26 +335,27 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ABCI LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-1,nu-1/), (/-1,nu/), (/1,no-2/), nu, nu, nu, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,2,3,4/), nu, nu, nu, no, nloc, n3, resid)
+                  call apply_sort_plan(2, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h1_oo,h2_oooo,&
                   !$omp no,nu,n3),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
-                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,2)
                      ! (1)
                      idx = idx_table(a,b,c,i)
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        m = t3_excits(jdet,5); n = t3_excits(jdet,6);
+                        m = t3_excits_buff(jdet,5); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(oooo) | imnabc >
                         !hmatel = h2_oooo(m,n,j,k)
                         hmatel = h2_oooo(n,m,k,j)
@@ -342,13 +366,13 @@ module ccsdt_p
                         if (m==k) hmatel3 = h1_oo(n,j)
                         if (m==j) hmatel4 = -h1_oo(n,k)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      ! (ij)
                      idx = idx_table(a,b,c,j)
                      if (idx/=0) then
                         do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                           m = t3_excits(jdet,5); n = t3_excits(jdet,6);
+                           m = t3_excits_buff(jdet,5); n = t3_excits_buff(jdet,6);
                            ! compute < ijkabc | h2(oooo) | jmnabc >
                            !hmatel = -h2_oooo(m,n,i,k)
                            hmatel = -h2_oooo(n,m,k,i)
@@ -359,14 +383,14 @@ module ccsdt_p
                            if (m==k) hmatel3 = -h1_oo(n,i)
                            if (m==i) hmatel4 = h1_oo(n,k)
                            hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                           resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                           resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                         end do
                      end if
                      ! (ik)
                      idx = idx_table(a,b,c,k)
                      if (idx/=0) then
                         do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                           m = t3_excits(jdet,5); n = t3_excits(jdet,6);
+                           m = t3_excits_buff(jdet,5); n = t3_excits_buff(jdet,6);
                            ! compute < ijkabc | h2(oooo) | kmnabc >
                            !hmatel = -h2_oooo(m,n,j,i)
                            hmatel = h2_oooo(n,m,j,i)
@@ -377,7 +401,7 @@ module ccsdt_p
                            if (m==i) hmatel3 = h1_oo(n,j)
                            if (m==j) hmatel4 = -h1_oo(n,i)
                            hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                           resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                           resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                         end do
                      end if
                   end do
@@ -385,26 +409,27 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ABCJ LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-1,nu-1/), (/-1,nu/), (/2,no-1/), nu, nu, nu, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,2,3,5/), nu, nu, nu, no, nloc, n3, resid)
+                  call apply_sort_plan(3, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h1_oo,h2_oooo,&
                   !$omp no,nu,n3),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
-                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,3)
                      ! (1)
                      idx = idx_table(a,b,c,j)
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        l = t3_excits(jdet,4); n = t3_excits(jdet,6);
+                        l = t3_excits_buff(jdet,4); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(oooo) | ljnabc >
                         !hmatel = h2_oooo(l,n,i,k)
                         hmatel = h2_oooo(n,l,k,i)
@@ -415,13 +440,13 @@ module ccsdt_p
                         if (l==k) hmatel3 = h1_oo(n,i)
                         if (l==i) hmatel4 = -h1_oo(n,k)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      ! (ij)
                      idx = idx_table(a,b,c,i)
                      if (idx/=0) then
                         do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                           l = t3_excits(jdet,4); n = t3_excits(jdet,6);
+                           l = t3_excits_buff(jdet,4); n = t3_excits_buff(jdet,6);
                            ! compute < ijkabc | h2(oooo) | linabc >
                            !hmatel = -h2_oooo(l,n,j,k)
                            hmatel = -h2_oooo(n,l,k,j)
@@ -432,14 +457,14 @@ module ccsdt_p
                            if (l==k) hmatel3 = -h1_oo(n,j)
                            if (l==j) hmatel4 = h1_oo(n,k)
                            hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                           resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                           resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                         end do
                      end if
                      ! (jk)
                      idx = idx_table(a,b,c,k)
                      if (idx/=0) then
                         do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                           l = t3_excits(jdet,4); n = t3_excits(jdet,6);
+                           l = t3_excits_buff(jdet,4); n = t3_excits_buff(jdet,6);
                            ! compute < ijkabc | h2(oooo) | lknabc >
                            !hmatel = -h2_oooo(l,n,i,j)
                            hmatel = -h2_oooo(n,l,j,i)
@@ -450,7 +475,7 @@ module ccsdt_p
                            if (l==j) hmatel3 = -h1_oo(n,i)
                            if (l==i) hmatel4 = h1_oo(n,j)
                            hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                           resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                           resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                         end do
                      end if
                   end do
@@ -468,26 +493,27 @@ module ccsdt_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(no,no,no,nu))
                   !!! IJKA LOOP !!!
-                  call get_index_table(idx_table, (/1,no-2/), (/-1,no-1/), (/-1,no/), (/1,nu-2/), no, no, no, nu)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/4,5,6,1/), no, no, no, nu, nloc, n3, resid)
+                  call apply_sort_plan(4, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h1_vv,h2_vvvv,&
                   !$omp no,nu,n3),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
-                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,4)
                      ! (1)
                      idx = idx_table(i,j,k,a)
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); f = t3_excits(jdet,3);
+                        e = t3_excits_buff(jdet,2); f = t3_excits_buff(jdet,3);
                         ! compute < ijkabc | h2(vvvv) | ijkaef >
                         !hmatel = h2_vvvv(b,c,e,f)
                         !hmatel = h2_vvvv(e,f,b,c)
@@ -499,13 +525,13 @@ module ccsdt_p
                         if (c==e) hmatel3 = -h1_vv(f,b) !-h1_vv(b,f) ! (ef)
                         if (b==e) hmatel4 = h1_vv(f,c)  ! h1_vv(c,f) ! (bc)(ef)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      ! (ab)
                      idx = idx_table(i,j,k,b)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); f = t3_excits(jdet,3);
+                        e = t3_excits_buff(jdet,2); f = t3_excits_buff(jdet,3);
                         ! compute < ijkabc | h2(vvvv) | ijkbef >
                         !hmatel = -h2_vvvv(a,c,e,f)
                         !hmatel = -h2_vvvv(e,f,a,c)
@@ -517,14 +543,14 @@ module ccsdt_p
                         if (c==e) hmatel3 = h1_vv(f,a)  !h1_vv(a,f) ! (ef)
                         if (a==e) hmatel4 = -h1_vv(f,c) !-h1_vv(c,f) ! (ac)(ef)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(i,j,k,c)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); f = t3_excits(jdet,3);
+                        e = t3_excits_buff(jdet,2); f = t3_excits_buff(jdet,3);
                         ! compute < ijkabc | h2(vvvv) | ijkcef >
                         !hmatel = -h2_vvvv(b,a,e,f)
                         !hmatel = -h2_vvvv(e,f,b,a)
@@ -536,7 +562,7 @@ module ccsdt_p
                         if (a==e) hmatel3 = h1_vv(f,b)  !h1_vv(b,f) ! (ef)
                         if (b==e) hmatel4 = -h1_vv(f,a) !-h1_vv(a,f) ! (ab)(ef)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -544,26 +570,27 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! IJKB LOOP !!!
-                  call get_index_table(idx_table, (/1,no-2/), (/-1,no-1/), (/-1,no/), (/2,nu-1/), no, no, no, nu)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/4,5,6,2/), no, no, no, nu, nloc, n3, resid)
+                  call apply_sort_plan(5, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h1_vv,h2_vvvv,&
                   !$omp no,nu,n3),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
-                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,5)
                      ! (1)
                      idx = idx_table(i,j,k,b)
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); f = t3_excits(jdet,3);
+                        d = t3_excits_buff(jdet,1); f = t3_excits_buff(jdet,3);
                         ! compute < ijkabc | h2(vvvv) | ijkdbf >
                         !hmatel = h2_vvvv(a,c,d,f)
                         !hmatel = h2_vvvv(d,f,a,c)
@@ -575,13 +602,13 @@ module ccsdt_p
                         if (c==d) hmatel3 = -h1_vv(f,a) !-h1_vv(a,f) ! (df)
                         if (a==d) hmatel4 = h1_vv(f,c)  !h1_vv(c,f) ! (ac)(df)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      ! (ab)
                      idx = idx_table(i,j,k,a)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); f = t3_excits(jdet,3);
+                        d = t3_excits_buff(jdet,1); f = t3_excits_buff(jdet,3);
                         ! compute < ijkabc | h2(vvvv) | ijkdaf >
                         !hmatel = -h2_vvvv(b,c,d,f)
                         !hmatel = -h2_vvvv(d,f,b,c)
@@ -593,14 +620,14 @@ module ccsdt_p
                         if (c==d) hmatel3 = h1_vv(f,b)  !h1_vv(b,f) ! (df)
                         if (b==d) hmatel4 = -h1_vv(f,c) !-h1_vv(c,f) ! (bc)(df)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(i,j,k,c)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); f = t3_excits(jdet,3);
+                        d = t3_excits_buff(jdet,1); f = t3_excits_buff(jdet,3);
                         ! compute < ijkabc | h2(vvvv) | ijkdcf >
                         !hmatel = -h2_vvvv(a,b,d,f)
                         !hmatel = -h2_vvvv(d,f,a,b)
@@ -612,7 +639,7 @@ module ccsdt_p
                         if (b==d) hmatel3 = h1_vv(f,a)  !h1_vv(a,f) ! (df)
                         if (a==d) hmatel4 = -h1_vv(f,b) !-h1_vv(b,f) ! (ab)(df)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      end if 
                   end do
@@ -620,26 +647,27 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! IJKC LOOP !!!
-                  call get_index_table(idx_table, (/1,no-2/), (/-1,no-1/), (/-1,no/), (/3,nu/), no, no, no, nu)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/4,5,6,3/), no, no, no, nu, nloc, n3, resid)
+                  call apply_sort_plan(6, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h1_vv,h2_vvvv,&
                   !$omp no,nu,n3),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
-                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,6)
                      ! (1)
                      idx = idx_table(i,j,k,c)
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); e = t3_excits(jdet,2);
+                        d = t3_excits_buff(jdet,1); e = t3_excits_buff(jdet,2);
                         ! compute < ijkabc | h2(vvvv) | ijkdec >
                         !hmatel = h2_vvvv(a,b,d,e)
                         !hmatel = h2_vvvv(d,e,a,b)
@@ -651,13 +679,13 @@ module ccsdt_p
                         if (b==d) hmatel3 = -h1_vv(e,a) !-h1_vv(a,e) ! (de)
                         if (a==d) hmatel4 = h1_vv(e,b)  !h1_vv(b,e) ! (ab)(de)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      ! (ac)
                      idx = idx_table(i,j,k,a)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); e = t3_excits(jdet,2);
+                        d = t3_excits_buff(jdet,1); e = t3_excits_buff(jdet,2);
                         ! compute < ijkabc | h2(vvvv) | ijkdea >
                         !hmatel = -h2_vvvv(c,b,d,e)
                         !hmatel = -h2_vvvv(d,e,c,b)
@@ -669,14 +697,14 @@ module ccsdt_p
                         if (b==d) hmatel3 = h1_vv(e,c)  !h1_vv(c,e) ! (de)
                         if (c==d) hmatel4 = -h1_vv(e,b) !-h1_vv(b,e) ! (bc)(de)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(i,j,k,b)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); e = t3_excits(jdet,2);
+                        d = t3_excits_buff(jdet,1); e = t3_excits_buff(jdet,2);
                         ! compute < ijkabc | h2(vvvv) | ijkdeb >
                         !hmatel = -h2_vvvv(a,c,d,e)
                         !hmatel = -h2_vvvv(d,e,a,c)
@@ -688,7 +716,7 @@ module ccsdt_p
                         if (c==d) hmatel3 = h1_vv(e,a)  !h1_vv(a,e) ! (de)
                         if (a==d) hmatel4 = -h1_vv(e,c) !-h1_vv(c,e) ! (ac)(de)
                         hmatel = hmatel + 0.5d0*(hmatel1 + hmatel2 + hmatel3 + hmatel4)
-                        resid(idet) = resid(idet) + hmatel*t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel*t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -704,118 +732,119 @@ module ccsdt_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(nu,nu,no,no))
                   !!! ABIJ LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-1,nu-1/), (/1,no-2/), (/-1,no-1/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,2,4,5/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(7, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,7)
                      ! (1)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijnabf >
                         !hmatel = h2_voov(c,n,k,f)
                         hmatel = h2_voov(n,f,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijnbcf >
                         !hmatel = h2_voov(a,n,k,f)
                         hmatel = h2_voov(n,f,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijnacf >
                         !hmatel = -h2_voov(b,n,k,f)
                         hmatel = -h2_voov(n,f,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ik)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jknabf >
                         !hmatel = h2_voov(c,n,i,f)
                         hmatel = h2_voov(n,f,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ik)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jknbcf >
                         !hmatel = h2_voov(a,n,i,f)
                         hmatel = h2_voov(n,f,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ik)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jknacf >
                         !hmatel = -h2_voov(b,n,i,f)
                         hmatel = -h2_voov(n,f,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (jk)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | iknabf >
                         !hmatel = -h2_voov(c,n,j,f)
                         hmatel = -h2_voov(n,f,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(jk)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | iknbcf >
                         !hmatel = -h2_voov(a,n,j,f)
                         hmatel = -h2_voov(n,f,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(jk)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); n = t3_excits(jdet,6);
+                        f = t3_excits_buff(jdet,3); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | iknacf >
                         !hmatel = h2_voov(b,n,j,f)
                         hmatel = h2_voov(n,f,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -823,118 +852,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ACIJ LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-2,nu/), (/1,no-2/), (/-1,no-1/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,3,4,5/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(8, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,8)
                      ! (1)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijnaec >
                         !hmatel = h2_voov(b,n,k,e)
                         hmatel = h2_voov(n,e,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijnbec >
                         !hmatel = -h2_voov(a,n,k,e)
                         hmatel = -h2_voov(n,e,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijnaeb >
                         !hmatel = -h2_voov(c,n,k,e)
                         hmatel = -h2_voov(n,e,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ik)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jknaec >
                         !hmatel = h2_voov(b,n,i,e)
                         hmatel = h2_voov(n,e,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ik)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jknbec >
                         !hmatel = -h2_voov(a,n,i,e)
                         hmatel = -h2_voov(n,e,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ik)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jknaeb >
                         !hmatel = -h2_voov(c,n,i,e)
                         hmatel = -h2_voov(n,e,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (jk)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | iknaec >
                         !hmatel = -h2_voov(b,n,j,e)
                         hmatel = -h2_voov(n,e,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(jk)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | iknbec >
                         !hmatel = h2_voov(a,n,j,e)
                         hmatel = h2_voov(n,e,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(jk)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); n = t3_excits(jdet,6);
+                        e = t3_excits_buff(jdet,2); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | iknaeb >
                         !hmatel = h2_voov(c,n,j,e)
                         hmatel = h2_voov(n,e,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -942,118 +972,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! BCIJ LOOP !!!
-                  call get_index_table(idx_table, (/2,nu-1/), (/-1,nu/), (/1,no-2/), (/-1,no-1/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/2,3,4,5/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(9, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,9)
                      ! (1)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijndbc >
                         !hmatel = h2_voov(a,n,k,d)
                         hmatel = h2_voov(n,d,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijndac >
                         !hmatel = -h2_voov(b,n,k,d)
                         hmatel = -h2_voov(n,d,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ijndab >
                         !hmatel = h2_voov(c,n,k,d)
                         hmatel = h2_voov(n,d,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ik)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jkndbc >
                         !hmatel = h2_voov(a,n,i,d)
                         hmatel = h2_voov(n,d,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ik)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jkndac >
                         !hmatel = -h2_voov(b,n,i,d)
                         hmatel = -h2_voov(n,d,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ik)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | jkndab >
                         !hmatel = h2_voov(c,n,i,d)
                         hmatel = h2_voov(n,d,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (jk)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ikndbc >
                         !hmatel = -h2_voov(a,n,j,d)
                         hmatel = -h2_voov(n,d,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(jk)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ikndac >
                         !hmatel = h2_voov(b,n,j,d)
                         hmatel = h2_voov(n,d,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(jk)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); n = t3_excits(jdet,6);
+                        d = t3_excits_buff(jdet,1); n = t3_excits_buff(jdet,6);
                         ! compute < ijkabc | h2(voov) | ikndab >
                         !hmatel = -h2_voov(c,n,j,d)
                         hmatel = -h2_voov(n,d,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1061,118 +1092,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ABIK LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-1,nu-1/), (/1,no-2/), (/-2,no/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,2,4,6/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(10, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,10)
                      ! (1)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkabf >
                         !hmatel = h2_voov(c,m,j,f)
                         hmatel = h2_voov(m,f,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkbcf >
                         !hmatel = h2_voov(a,m,j,f)
                         hmatel = h2_voov(m,f,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkacf >
                         !hmatel = -h2_voov(b,m,j,f)
                         hmatel = -h2_voov(m,f,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ij)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkabf >
                         !hmatel = -h2_voov(c,m,i,f)
                         hmatel = -h2_voov(m,f,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ij)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkbcf >
                         !hmatel = -h2_voov(a,m,i,f)
                         hmatel = -h2_voov(m,f,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ij)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkacf >
                         !hmatel = h2_voov(b,m,i,f)
                         hmatel = h2_voov(m,f,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (jk)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjabf >
                         !hmatel = -h2_voov(c,m,k,f)
                         hmatel = -h2_voov(m,f,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(jk)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjbcf >
                         !hmatel = -h2_voov(a,m,k,f)
                         hmatel = -h2_voov(m,f,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(jk)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); m = t3_excits(jdet,5);
+                        f = t3_excits_buff(jdet,3); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjacf >
                         !hmatel = h2_voov(b,m,k,f)
                         hmatel = h2_voov(m,f,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1180,118 +1212,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ACIK LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-2,nu/), (/1,no-2/), (/-2,no/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,3,4,6/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(11, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,11)
                      ! (1)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkaec >
                         !hmatel = h2_voov(b,m,j,e)
                         hmatel = h2_voov(m,e,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkbec >
                         !hmatel = -h2_voov(a,m,j,e)
                         hmatel = -h2_voov(m,e,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkaeb >
                         !hmatel = -h2_voov(c,m,j,e)
                         hmatel = -h2_voov(m,e,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ij)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkaec >
                         !hmatel = -h2_voov(b,m,i,e)
                         hmatel = -h2_voov(m,e,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ij)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkbec >
                         !hmatel = h2_voov(a,m,i,e)
                         hmatel = h2_voov(m,e,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ij)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkaeb >
                         !hmatel = h2_voov(c,m,i,e)
                         hmatel = h2_voov(m,e,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (jk)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjaec >
                         !hmatel = -h2_voov(b,m,k,e)
                         hmatel = -h2_voov(m,e,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(jk)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjbec >
                         !hmatel = h2_voov(a,m,k,e)
                         hmatel = h2_voov(m,e,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(jk)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); m = t3_excits(jdet,5);
+                        e = t3_excits_buff(jdet,2); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjaeb >
                         !hmatel = h2_voov(c,m,k,e)
                         hmatel = h2_voov(m,e,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1299,118 +1332,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! BCIK LOOP !!!
-                  call get_index_table(idx_table, (/2,nu-1/), (/-1,nu/), (/1,no-2/), (/-2,no/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/2,3,4,6/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(12, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,12)
                      ! (1)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkdbc >
                         !hmatel = h2_voov(a,m,j,d)
                         hmatel = h2_voov(m,d,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkdac >
                         !hmatel = -h2_voov(b,m,j,d)
                         hmatel = -h2_voov(m,d,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imkdab >
                         !hmatel = h2_voov(c,m,j,d)
                         hmatel = h2_voov(m,d,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ij)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkdbc >
                         !hmatel = -h2_voov(a,m,i,d)
                         hmatel = -h2_voov(m,d,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ij)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkdac >
                         !hmatel = h2_voov(b,m,i,d)
                         hmatel = h2_voov(m,d,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ij)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | jmkdab >
                         !hmatel = -h2_voov(c,m,i,d)
                         hmatel = -h2_voov(m,d,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (jk)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjdbc >
                         !hmatel = -h2_voov(a,m,k,d)
                         hmatel = -h2_voov(m,d,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(jk)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjdac >
                         !hmatel = h2_voov(b,m,k,d)
                         hmatel = h2_voov(m,d,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(jk)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); m = t3_excits(jdet,5);
+                        d = t3_excits_buff(jdet,1); m = t3_excits_buff(jdet,5);
                         ! compute < ijkabc | h2(voov) | imjdab >
                         !hmatel = -h2_voov(c,m,k,d)
                         hmatel = -h2_voov(m,d,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1418,118 +1452,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ABJK LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-1,nu-1/), (/2,no-1/), (/-1,no/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,2,5,6/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(13, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,13)
                      ! (1)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkabf >
                         !hmatel = h2_voov(c,l,i,f)
                         hmatel = h2_voov(l,f,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkbcf >
                         !hmatel = h2_voov(a,l,i,f)
                         hmatel = h2_voov(l,f,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkacf >
                         !hmatel = -h2_voov(b,l,i,f)
                         hmatel = -h2_voov(l,f,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ij)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likabf >
                         !hmatel = -h2_voov(c,l,j,f)
                         hmatel = -h2_voov(l,f,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ij)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likbcf >
                         !hmatel = -h2_voov(a,l,j,f)
                         hmatel = -h2_voov(l,f,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ij)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likacf >
                         !hmatel = h2_voov(b,l,j,f)
                         hmatel = h2_voov(l,f,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ik)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijabf >
                         !hmatel = h2_voov(c,l,k,f)
                         hmatel = h2_voov(l,f,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ik)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijbcf >
                         !hmatel = h2_voov(a,l,k,f)
                         hmatel = h2_voov(l,f,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ik)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        f = t3_excits(jdet,3); l = t3_excits(jdet,4);
+                        f = t3_excits_buff(jdet,3); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijacf >
                         !hmatel = -h2_voov(b,l,k,f)
                         hmatel = -h2_voov(l,f,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1537,118 +1572,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! ACJK LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-2/), (/-2,nu/), (/2,no-1/), (/-1,no/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/1,3,5,6/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(14, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,14)
                      ! (1)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkaec >
                         !hmatel = h2_voov(b,l,i,e)
                         hmatel = h2_voov(l,e,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkbec >
                         !hmatel = -h2_voov(a,l,i,e)
                         hmatel = -h2_voov(l,e,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkaeb >
                         !hmatel = -h2_voov(c,l,i,e)
                         hmatel = -h2_voov(l,e,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ij)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likaec >
                         !hmatel = -h2_voov(b,l,j,e)
                         hmatel = -h2_voov(l,e,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ij)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likbec >
                         !hmatel = h2_voov(a,l,j,e)
                         hmatel = h2_voov(l,e,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ij)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likaeb >
                         !hmatel = h2_voov(c,l,j,e)
                         hmatel = h2_voov(l,e,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ik)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijaec >
                         !hmatel = h2_voov(b,l,k,e)
                         hmatel = h2_voov(l,e,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ik)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijbec >
                         !hmatel = -h2_voov(a,l,k,e)
                         hmatel = -h2_voov(l,e,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (bc)(ik)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        e = t3_excits(jdet,2); l = t3_excits(jdet,4);
+                        e = t3_excits_buff(jdet,2); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijaeb >
                         !hmatel = -h2_voov(c,l,k,e)
                         hmatel = -h2_voov(l,e,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1656,118 +1692,119 @@ module ccsdt_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! BCJK LOOP !!!
-                  call get_index_table(idx_table, (/2,nu-1/), (/-1,nu/), (/2,no-1/), (/-1,no/), nu, nu, no, no)
-                  call sort4(t3_excits, t3_amps, loc_arr, idx_table, (/2,3,5,6/), nu, nu, no, no, nloc, n3, resid)
+                  call apply_sort_plan(15, t3_excits, t3_amps, t3_excits_buff, t3_amps_buff, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n3, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
-                  !$omp t3_excits,&
-                  !$omp t3_amps,&
+                  !$omp plan_perm,&
+                  !$omp t3_excits_buff,t3_amps_buff,&
                   !$omp loc_arr,idx_table,&
                   !$omp h2_voov,&
                   !$omp no,nu,n3),&
-                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
+                  !$omp private(hmatel,a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,ibra,&
                   !$omp idx)
                   !$omp do schedule(static)
                   do idet = 1, n3
-                     a = t3_excits(idet,1); b = t3_excits(idet,2); c = t3_excits(idet,3);
-                     i = t3_excits(idet,4); j = t3_excits(idet,5); k = t3_excits(idet,6);
+                     a = t3_excits_buff(idet,1); b = t3_excits_buff(idet,2); c = t3_excits_buff(idet,3);
+                     i = t3_excits_buff(idet,4); j = t3_excits_buff(idet,5); k = t3_excits_buff(idet,6);
+                     ibra = plan_perm(idet,15)
                      ! (1)
                      idx = idx_table(b,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkdbc >
                         !hmatel = h2_voov(a,l,i,d)
                         hmatel = h2_voov(l,d,a,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)
                      idx = idx_table(a,c,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkdac >
                         !hmatel = -h2_voov(b,l,i,d)
                         hmatel = -h2_voov(l,d,b,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)
                      idx = idx_table(a,b,j,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | ljkdab >
                         !hmatel = h2_voov(c,l,i,d)
                         hmatel = h2_voov(l,d,c,i)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ij)
                      idx = idx_table(b,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likdbc >
                         !hmatel = -h2_voov(a,l,j,d)
                         hmatel = -h2_voov(l,d,a,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ij)
                      idx = idx_table(a,c,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likdac >
                         !hmatel = h2_voov(b,l,j,d)
                         hmatel = h2_voov(l,d,b,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ij)
                      idx = idx_table(a,b,i,k)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | likdab >
                         !hmatel = -h2_voov(c,l,j,d)
                         hmatel = -h2_voov(l,d,c,j)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ik)
                      idx = idx_table(b,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijdbc >
                         !hmatel = h2_voov(a,l,k,d)
                         hmatel = h2_voov(l,d,a,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ab)(ik)
                      idx = idx_table(a,c,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijdac >
                         !hmatel = -h2_voov(b,l,k,d)
                         hmatel = -h2_voov(l,d,b,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                      ! (ac)(ik)
                      idx = idx_table(a,b,i,j)
                      if (idx/=0) then
                      do jdet = loc_arr(1,idx), loc_arr(2,idx)
-                        d = t3_excits(jdet,1); l = t3_excits(jdet,4);
+                        d = t3_excits_buff(jdet,1); l = t3_excits_buff(jdet,4);
                         ! compute < ijkabc | h2(voov) | lijdab >
                         !hmatel = h2_voov(c,l,k,d)
                         hmatel = h2_voov(l,d,c,k)
-                        resid(idet) = resid(idet) + hmatel * t3_amps(jdet)
+                        resid(ibra) = resid(ibra) + hmatel * t3_amps_buff(jdet)
                      end do
                      end if
                   end do
@@ -1776,6 +1813,7 @@ module ccsdt_p
                   !!!! END OMP PARALLEL SECTION !!!!
                   ! deallocate sorting arrays
                   deallocate(loc_arr,idx_table)
+                  deallocate(t3_excits_buff,t3_amps_buff)
 
                   !
                   ! Moment contributions
@@ -1860,7 +1898,7 @@ module ccsdt_p
                               n3,no,nu)
 
                   integer, intent(in) :: no, nu, n3
-                  integer, intent(in) :: t3_excits(n3,6)
+                  integer(kind=2), intent(in) :: t3_excits(n3,6)
                   real(kind=8), intent(in) :: t3_amps(n3)
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
                   real(kind=8), intent(inout) :: I2_vooo(no,nu,no,no)
@@ -1868,6 +1906,10 @@ module ccsdt_p
                   integer :: idet, a, b, c, i, j, k, m, n, e, f
                   real(kind=8) :: t_amp 
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,e,f,i,j,n,t_amp),&
+                  !$omp reduction(+:I2_vooo)
+                  !$omp do schedule(static)
                   do idet = 1, n3
                       t_amp = t3_amps(idet)
                       ! I2(amij) <- A(ij) [A(n/ij)A(a/ef) h2(mnef) * t3(aefijn)]
@@ -1883,6 +1925,9 @@ module ccsdt_p
                       I2_vooo(:,f,n,j) = I2_vooo(:,f,n,j) + h2_oovv(:,i,e,a) * t_amp ! (in)(af)
                       I2_vooo(:,f,i,n) = I2_vooo(:,f,i,n) + h2_oovv(:,j,e,a) * t_amp ! (jn)(af)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
                   ! antisymmetrize
                   do i = 1,no
                      do j = i+1,no
@@ -1902,7 +1947,7 @@ module ccsdt_p
                               n3,no,nu)
 
                   integer, intent(in) :: no, nu, n3
-                  integer, intent(in) :: t3_excits(n3,6)
+                  integer(kind=2), intent(in) :: t3_excits(n3,6)
                   real(kind=8), intent(in) :: t3_amps(n3)
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
 
@@ -1922,6 +1967,10 @@ module ccsdt_p
                         end do
                      end do
                   end do
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,f,i,m,n,t_amp),&
+                  !$omp reduction(+:I2_vvov)
+                  !$omp do schedule(static)
                   do idet = 1, n3
                       t_amp = t3_amps(idet)
                       ! I2(abie) <- A(ab) [A(i/mn)A(f/ab) -h2(mnef) * t3(abfimn)]
@@ -1937,6 +1986,9 @@ module ccsdt_p
                       I2_vvov(:,a,f,m) = I2_vvov(:,a,f,m) - intbuf(:,b,i,n) * t_amp ! (im)(bf)
                       I2_vvov(:,a,f,n) = I2_vvov(:,a,f,n) - intbuf(:,b,m,i) * t_amp ! (in)(bf)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
                   deallocate(intbuf)
                   ! antisymmetrize
                   do i = 1,no
@@ -1955,6 +2007,217 @@ module ccsdt_p
       !!!!!!!!!!!!!!!!!!!!!!!!!!!!! SORTING FUNCTIONS !!!!!!!!!!!!!!!!!!!!!!!!!!!!
       !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
+      subroutine get_plan_dims(nperm, nloc_tot, nidx_tot, no, nu)
+      ! Return the dimensions of the sorting plan of update_t3_p built by build_sort_plan.
+      ! Out:
+      !   nperm: number of sorts
+      !   nloc_tot: total number of index blocks (columns of plan_loc) over all sorts
+      !   nidx_tot: total size of the index tables (plan_idx) over all sorts
+
+              integer, intent(in) :: no, nu
+              integer, intent(out) :: nperm, nloc_tot, nidx_tot
+
+              integer :: isort, ndim, nloc
+              integer :: idims(5), rng(2,5), n(5)
+
+              nperm = 0; nloc_tot = 0; nidx_tot = 0
+              isort = 1
+              do
+                 call get_sort_spec(isort, ndim, idims, rng, n, nloc, no, nu)
+                 if (ndim == 0) exit
+                 nperm = nperm + 1
+                 nloc_tot = nloc_tot + nloc
+                 nidx_tot = nidx_tot + product(n)
+                 isort = isort + 1
+              end do
+
+      end subroutine get_plan_dims
+
+      subroutine build_sort_plan(plan_perm, plan_loc, plan_idx, excits_in, n3p, nperm, nloc_tot, nidx_tot, no, nu)
+      ! Carry out the sequence of sorts used by update_t3_p once for a fixed list of
+      ! excitations and record the outcome so that the kernels do not need to repeat it.
+      ! In:
+      !   excits_in: excitation array in the order in which it is passed to the kernels
+      ! Out:
+      !   plan_perm: plan_perm(:,isort) lists the positions in excits_in of the excitations
+      !              in the ordering of sort isort
+      !   plan_loc: loc_arr of each sort, stored one after another
+      !   plan_idx: index table of each sort, flattened and stored one after another
+
+              integer, intent(in) :: n3p, nperm, nloc_tot, nidx_tot, no, nu
+              integer(kind=2), intent(in) :: excits_in(n3p,6)
+
+              integer, intent(out) :: plan_perm(n3p,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
+              integer(kind=2), allocatable :: excits(:,:)
+              integer, allocatable :: loc_arr(:,:), idx_table(:,:,:,:)
+              real(kind=8), allocatable :: track(:)
+              integer :: isort, ndim, nloc, nidx, loc_off, idx_off, idet
+              integer :: idims(5), rng(2,5), n(5)
+
+              allocate(excits(n3p,6), track(n3p))
+              loc_off = 0; idx_off = 0
+              do isort = 1, nperm
+                 call get_sort_spec(isort, ndim, idims, rng, n, nloc, no, nu)
+                 nidx = product(n)
+                 allocate(loc_arr(2,nloc))
+                 ! sort a list of positions alongside a fresh copy of the excitations
+                 ! to obtain the permutation from the original ordering
+                 excits = excits_in
+                 do idet = 1, n3p
+                    track(idet) = dble(idet)
+                 end do
+                 if (ndim == 4) then
+                    allocate(idx_table(n(1),n(2),n(3),n(4)))
+                    call get_index_table(idx_table, rng(:,1), rng(:,2), rng(:,3), rng(:,4), n(1), n(2), n(3), n(4))
+                    call sort4(excits, track, loc_arr, idx_table, idims(1:4), n(1), n(2), n(3), n(4), nloc, n3p)
+                    plan_idx(idx_off+1:idx_off+nidx) = reshape(idx_table, (/nidx/))
+                    deallocate(idx_table)
+                 end if
+                 plan_loc(:,loc_off+1:loc_off+nloc) = loc_arr
+                 plan_perm(:,isort) = nint(track)
+                 loc_off = loc_off + nloc; idx_off = idx_off + nidx
+                 deallocate(loc_arr)
+              end do
+              deallocate(excits, track)
+
+      end subroutine build_sort_plan
+
+      subroutine apply_sort_plan(isort, excits, amps, excits_buff, amps_buff, loc_arr, idx_table, nloc, nidx,&
+                                 plan_perm, plan_loc, plan_idx, n3p, nperm, nloc_tot, nidx_tot, no, nu)
+      ! Replay sort isort of a plan built by build_sort_plan: gather the excitations and
+      ! amplitudes into the ordering of sort isort and copy out the corresponding loc_arr
+      ! and index table. The input arrays keep their order, so that the residual does not
+      ! need to be reordered. This replaces the get_index_table/sort4 pair in the kernels.
+
+              integer, intent(in) :: isort, nloc, nidx, n3p, nperm, nloc_tot, nidx_tot, no, nu
+              integer, intent(in) :: plan_perm(n3p,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
+              integer(kind=2), intent(in) :: excits(n3p,6)
+              real(kind=8), intent(in) :: amps(n3p)
+              integer(kind=2), intent(out) :: excits_buff(n3p,6)
+              real(kind=8), intent(out) :: amps_buff(n3p)
+              integer, intent(out) :: loc_arr(2,nloc), idx_table(nidx)
+
+              integer :: jsort, ndim, nloc_j, loc_off, idx_off
+              integer :: idims(5), rng(2,5), n(5)
+
+              loc_off = 0; idx_off = 0
+              do jsort = 1, isort-1
+                 call get_sort_spec(jsort, ndim, idims, rng, n, nloc_j, no, nu)
+                 loc_off = loc_off + nloc_j; idx_off = idx_off + product(n)
+              end do
+              excits_buff = excits(plan_perm(:,isort),:)
+              amps_buff = amps(plan_perm(:,isort))
+              loc_arr = plan_loc(:,loc_off+1:loc_off+nloc)
+              idx_table = plan_idx(idx_off+1:idx_off+nidx)
+
+      end subroutine apply_sort_plan
+
+      subroutine get_sort_spec(isort, ndim, idims, rng, n, nloc, no, nu)
+      ! Return the sort carried out at step isort of update_t3_p: the sorting dimensions
+      ! (idims), index ranges (rng) and dimensions (n) of the index table, and the number
+      ! of index blocks (nloc). ndim = 0 signals that there are no more sorts.
+
+              integer, intent(in) :: isort, no, nu
+              integer, intent(out) :: ndim, idims(5), rng(2,5), n(5), nloc
+
+              ndim = 0; idims = 0; rng = 0; n = 1; nloc = 0
+              select case (isort)
+              case (1)
+                 ndim = 4
+                 idims(1:4) = (/1,2,3,6/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-1,nu-1/); rng(:,3) = (/-1,nu/); rng(:,4) = (/3,no/)
+                 n(1:4) = (/nu,nu,nu,no/)
+                 nloc = nu*(nu-1)*(nu-2)/6*no
+              case (2)
+                 ndim = 4
+                 idims(1:4) = (/1,2,3,4/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-1,nu-1/); rng(:,3) = (/-1,nu/); rng(:,4) = (/1,no-2/)
+                 n(1:4) = (/nu,nu,nu,no/)
+                 nloc = nu*(nu-1)*(nu-2)/6*no
+              case (3)
+                 ndim = 4
+                 idims(1:4) = (/1,2,3,5/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-1,nu-1/); rng(:,3) = (/-1,nu/); rng(:,4) = (/2,no-1/)
+                 n(1:4) = (/nu,nu,nu,no/)
+                 nloc = nu*(nu-1)*(nu-2)/6*no
+              case (4)
+                 ndim = 4
+                 idims(1:4) = (/4,5,6,1/)
+                 rng(:,1) = (/1,no-2/); rng(:,2) = (/-1,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/1,nu-2/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = no*(no-1)*(no-2)/6*nu
+              case (5)
+                 ndim = 4
+                 idims(1:4) = (/4,5,6,2/)
+                 rng(:,1) = (/1,no-2/); rng(:,2) = (/-1,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/2,nu-1/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = no*(no-1)*(no-2)/6*nu
+              case (6)
+                 ndim = 4
+                 idims(1:4) = (/4,5,6,3/)
+                 rng(:,1) = (/1,no-2/); rng(:,2) = (/-1,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/3,nu/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = no*(no-1)*(no-2)/6*nu
+              case (7)
+                 ndim = 4
+                 idims(1:4) = (/1,2,4,5/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-1,nu-1/); rng(:,3) = (/1,no-2/); rng(:,4) = (/-1,no-1/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (8)
+                 ndim = 4
+                 idims(1:4) = (/1,3,4,5/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-2,nu/); rng(:,3) = (/1,no-2/); rng(:,4) = (/-1,no-1/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (9)
+                 ndim = 4
+                 idims(1:4) = (/2,3,4,5/)
+                 rng(:,1) = (/2,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-2/); rng(:,4) = (/-1,no-1/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (10)
+                 ndim = 4
+                 idims(1:4) = (/1,2,4,6/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-1,nu-1/); rng(:,3) = (/1,no-2/); rng(:,4) = (/-2,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (11)
+                 ndim = 4
+                 idims(1:4) = (/1,3,4,6/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-2,nu/); rng(:,3) = (/1,no-2/); rng(:,4) = (/-2,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (12)
+                 ndim = 4
+                 idims(1:4) = (/2,3,4,6/)
+                 rng(:,1) = (/2,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-2/); rng(:,4) = (/-2,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (13)
+                 ndim = 4
+                 idims(1:4) = (/1,2,5,6/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-1,nu-1/); rng(:,3) = (/2,no-1/); rng(:,4) = (/-1,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (14)
+                 ndim = 4
+                 idims(1:4) = (/1,3,5,6/)
+                 rng(:,1) = (/1,nu-2/); rng(:,2) = (/-2,nu/); rng(:,3) = (/2,no-1/); rng(:,4) = (/-1,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              case (15)
+                 ndim = 4
+                 idims(1:4) = (/2,3,5,6/)
+                 rng(:,1) = (/2,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/2,no-1/); rng(:,4) = (/-1,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = (nu-1)*(nu-2)/2*(no-1)*(no-2)/2
+              end select
+
+      end subroutine get_sort_spec
+
       subroutine get_index_table(idx_table, rng1, rng2, rng3, rng4, n1, n2, n3, n4)
 
               integer, intent(in) :: n1, n2, n3, n4
@@ -2051,7 +2314,7 @@ module ccsdt_p
               integer, intent(in) :: idx_table(n1,n2,n3,n4)
 
               integer, intent(inout) :: loc_arr(2,nloc)
-              integer, intent(inout) :: excits(n3p,6)
+              integer(kind=2), intent(inout) :: excits(n3p,6)
               real(kind=8), intent(inout) :: amps(n3p)
               real(kind=8), intent(inout), optional :: resid(n3p)
 
@@ -2202,4 +2465,26 @@ module ccsdt_p
 
       end subroutine sum4
 
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!! THREAD CONTROL !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      subroutine set_num_threads(nthreads)
+          ! Set the number of OpenMP threads used by the kernels. This only affects
+          ! the OpenMP runtime, not the thread pool of the BLAS library.
+          integer, intent(in) :: nthreads
+
+          !$ call omp_set_num_threads(nthreads)
+
+      end subroutine set_num_threads
+
+      subroutine get_num_threads(nthreads)
+          ! Return the number of OpenMP threads used by the kernels (1 if the
+          ! module was compiled without OpenMP).
+          integer, intent(out) :: nthreads
+
+          nthreads = 1
+          !$ nthreads = omp_get_max_threads()
+
+      end subroutine get_num_threads
+
 end module ccsdt_p
@@ -0,0 +1,477 @@
+module deaeom4_p
+    
+      use omp_lib
+
+      implicit none
+
+      contains
+
+              subroutine build_hr1(resid,&
+                                   r3_amps,r3_excits,&
+                                   h2_oovv,&
+                                   n3,&
+                                   no,nu)
+
+                  integer, intent(in) :: no, nu, n3
+                  real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
+                  integer(kind=2), intent(in) :: r3_excits(n3,6)
+                  real(kind=8), intent(in) :: r3_amps(n3)
+
+                  real(kind=8), intent(inout) :: resid(nu,nu)
+                  !f2py intent(in,out) :: resid(0:nu-1,0:nu-1)
+
+                  real(kind=8) :: rval
+                  integer :: a, b, c, d, k, l, idet
+
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,c,d,k,l,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
+                  do idet = 1,n3
+                     rval = r3_amps(idet)
+                     a = r3_excits(idet,1); b = r3_excits(idet,2); c = r3_excits(idet,3); d = r3_excits(idet,4);
+                     k = r3_excits(idet,5); l = r3_excits(idet,6);
+                     ! x1(ab) <- 1/8 h2(mnef)*r3(abefmn)
+                     resid(a,b) = resid(a,b) + h2_oovv(k,l,c,d)*rval
+                     resid(a,c) = resid(a,c) - h2_oovv(k,l,b,d)*rval
+                     resid(a,d) = resid(a,d) + h2_oovv(k,l,b,c)*rval
+                     resid(b,c) = resid(b,c) + h2_oovv(k,l,a,d)*rval
+                     resid(b,d) = resid(b,d) - h2_oovv(k,l,a,c)*rval
+                     resid(c,d) = resid(c,d) + h2_oovv(k,l,a,b)*rval
+                  end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+              end subroutine build_hr1
+
+              subroutine build_hr2(resid,&
+                                   r3_amps,r3_excits,&
+                                   h1_ov,h2_vovv,h2_ooov,&
+                                   n3,&
+                                   no,nu)
+
+                  integer, intent(in) :: no, nu, n3
+                  real(kind=8), intent(in) :: h1_ov(no,nu),&
+                                              h2_vovv(nu,no,nu,nu),&
+                                              h2_ooov(no,no,no,nu)
+                  integer(kind=2), intent(in) :: r3_excits(n3,6)
+                  real(kind=8), intent(in) :: r3_amps(n3)
+
+                  real(kind=8), intent(inout) :: resid(nu,nu,nu,no)
+                  !f2py intent(in,out) :: resid(0:nu-1,0:nu-1,0:nu-1,0:no-1)
+
+                  real(kind=8) :: rval
+                  integer :: a, b, c, d, k, l, idet
+
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,c,d,k,l,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
+                  do idet = 1,n3
+                     rval = r3_amps(idet)
+                     a = r3_excits(idet,1); b = r3_excits(idet,2); c = r3_excits(idet,3); d = r3_excits(idet,4);
+                     k = r3_excits(idet,5); l = r3_excits(idet,6);
+                     ! x2(abck) <- 1/6 h1(me)*r3(abcekm)
+                     ! x2(abck) <- 3/12 h2(cnef)*r3(abefkn)
+                     ! x2(abck) <- -1/12 h2(mnkf)*r3(abcfmn)
+                     resid(a,b,c,k) = resid(a,b,c,k) + h1_ov(l,d)*rval
+                     resid(a,b,c,l) = resid(a,b,c,l) - h1_ov(k,d)*rval
+                     resid(a,b,d,k) = resid(a,b,d,k) - h1_ov(l,c)*rval
+                     resid(a,b,d,l) = resid(a,b,d,l) + h1_ov(k,c)*rval
+                     resid(a,c,d,k) = resid(a,c,d,k) + h1_ov(l,b)*rval
+                     resid(a,c,d,l) = resid(a,c,d,l) - h1_ov(k,b)*rval
+                     resid(b,c,d,k) = resid(b,c,d,k) - h1_ov(l,a)*rval
+                     resid(b,c,d,l) = resid(b,c,d,l) + h1_ov(k,a)*rval
+                     resid(a,b,:,k) = resid(a,b,:,k) + h2_vovv(:,l,c,d)*rval
+                     resid(a,b,:,l) = resid(a,b,:,l) - h2_vovv(:,k,c,d)*rval
+                     resid(a,c,:,k) = resid(a,c,:,k) - h2_vovv(:,l,b,d)*rval
+                     resid(a,c,:,l) = resid(a,c,:,l) + h2_vovv(:,k,b,d)*rval
+                     resid(a,d,:,k) = resid(a,d,:,k) + h2_vovv(:,l,b,c)*rval
+                     resid(a,d,:,l) = resid(a,d,:,l) - h2_vovv(:,k,b,c)*rval
+                     resid(b,c,:,k) = resid(b,c,:,k) + h2_vovv(:,l,a,d)*rval
+                     resid(b,c,:,l) = resid(b,c,:,l) - h2_vovv(:,k,a,d)*rval
+                     resid(b,d,:,k) = resid(b,d,:,k) - h2_vovv(:,l,a,c)*rval
+                     resid(b,d,:,l) = resid(b,d,:,l) + h2_vovv(:,k,a,c)*rval
+                     resid(c,d,:,k) = resid(c,d,:,k) + h2_vovv(:,l,a,b)*rval
+                     resid(c,d,:,l) = resid(c,d,:,l) - h2_vovv(:,k,a,b)*rval
+                     resid(a,b,c,:) = resid(a,b,c,:) - h2_ooov(k,l,:,d)*rval
+                     resid(a,b,d,:) = resid(a,b,d,:) + h2_ooov(k,l,:,c)*rval
+                     resid(a,c,d,:) = resid(a,c,d,:) - h2_ooov(k,l,:,b)*rval
+                     resid(b,c,d,:) = resid(b,c,d,:) + h2_ooov(k,l,:,a)*rval
+                  end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+              end subroutine build_hr2
+
+              subroutine build_i_vvvv(resid,&
+                                   r3_amps,r3_excits,&
+                                   h2_oovv,&
+                                   n3,&
+                                   no,nu)
+
+                  integer, intent(in) :: no, nu, n3
+                  real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
+                  integer(kind=2), intent(in) :: r3_excits(n3,6)
+                  real(kind=8), intent(in) :: r3_amps(n3)
+
+                  real(kind=8), intent(inout) :: resid(nu,nu,nu,nu)
+                  !f2py intent(in,out) :: resid(0:nu-1,0:nu-1,0:nu-1,0:nu-1)
+
+                  real(kind=8) :: rval
+                  integer :: a, b, c, d, k, l, x, idet
+
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,c,d,k,l,x,rval)
+                  do idet = 1,n3
+                     rval = r3_amps(idet)
+                     a = r3_excits(idet,1); b = r3_excits(idet,2); c = r3_excits(idet,3); d = r3_excits(idet,4);
+                     k = r3_excits(idet,5); l = r3_excits(idet,6);
+                     ! x(abce) <- -1/12 h2(mnef)*r3(abcfmn)
+                     do x = 1,nu
+                        !$omp atomic
+                        resid(a,b,c,x) = resid(a,b,c,x) + h2_oovv(k,l,d,x)*rval
+                     end do
+                     do x = 1,nu
+                        !$omp atomic
+                        resid(a,b,d,x) = resid(a,b,d,x) - h2_oovv(k,l,c,x)*rval
+                     end do
+                     do x = 1,nu
+                        !$omp atomic
+                        resid(a,c,d,x) = resid(a,c,d,x) + h2_oovv(k,l,b,x)*rval
+                     end do
+                     do x = 1,nu
+                        !$omp atomic
+                        resid(b,c,d,x) = resid(b,c,d,x) - h2_oovv(k,l,a,x)*rval
+                     end do
+                  end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+              end subroutine build_i_vvvv
+
+              subroutine build_i_vvoo(resid,&
+                                   r3_amps,r3_excits,&
+                                   h2_oovv,&
+                                   n3,&
+                                   no,nu)
+
+                  integer, intent(in) :: no, nu, n3
+                  real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
+                  integer(kind=2), intent(in) :: r3_excits(n3,6)
+                  real(kind=8), intent(in) :: r3_amps(n3)
+
+                  real(kind=8), intent(inout) :: resid(nu,nu,no,no)
+                  !f2py intent(in,out) :: resid(0:nu-1,0:nu-1,0:no-1,0:no-1)
+
+                  real(kind=8) :: rval
+                  integer :: a, b, c, d, k, l, idet
+
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,c,d,k,l,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
+                  do idet = 1,n3
+                     rval = r3_amps(idet)
+                     a = r3_excits(idet,1); b = r3_excits(idet,2); c = r3_excits(idet,3); d = r3_excits(idet,4);
+                     k = r3_excits(idet,5); l = r3_excits(idet,6);
+                     ! x(abmk) <- 1/4 h2(mnef)*r3(abefkn)
+                     resid(a,b,:,k) = resid(a,b,:,k) - h2_oovv(l,:,c,d)*rval
+                     resid(a,b,:,l) = resid(a,b,:,l) + h2_oovv(k,:,c,d)*rval
+                     resid(a,c,:,k) = resid(a,c,:,k) + h2_oovv(l,:,b,d)*rval
+                     resid(a,c,:,l) = resid(a,c,:,l) - h2_oovv(k,:,b,d)*rval
+                     resid(a,d,:,k) = resid(a,d,:,k) - h2_oovv(l,:,b,c)*rval
+                     resid(a,d,:,l) = resid(a,d,:,l) + h2_oovv(k,:,b,c)*rval
+                     resid(b,c,:,k) = resid(b,c,:,k) - h2_oovv(l,:,a,d)*rval
+                     resid(b,c,:,l) = resid(b,c,:,l) + h2_oovv(k,:,a,d)*rval
+                     resid(b,d,:,k) = resid(b,d,:,k) + h2_oovv(l,:,a,c)*rval
+                     resid(b,d,:,l) = resid(b,d,:,l) - h2_oovv(k,:,a,c)*rval
+                     resid(c,d,:,k) = resid(c,d,:,k) - h2_oovv(l,:,a,b)*rval
+                     resid(c,d,:,l) = resid(c,d,:,l) + h2_oovv(k,:,a,b)*rval
+                  end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+              end subroutine build_i_vvoo
+
+              subroutine build_hr3_p(resid,&
+                                     r3_amps,r3_excits,&
+                                     plan_keys,plan_loc,plan_det,plan_ind,plan_sgn,&
+                                     t2,r2,&
+                                     h1_oo,h1_vv,&
+                                     h2_vvov,h2_vooo,x2_vvvv,x2_vvoo,&
+                                     h2_oooo,h2_voov,h2_vvvv,&
+                                     n3,&
+                                     nkeys,nent,&
+                                     no,nu)
+              ! Compute the projection of HR on the P-space 4p-2h excitations. The moment
+              ! terms are evaluated directly for each determinant, while the terms linear
+              ! in r3 loop over the kets found through the lookup plan built by build_lookup_plan
+              ! in deaeom4_p.py. Neither r3_amps nor r3_excits is reordered. The array
+              ! h2_vvvv is passed in the transposed order h2(fe,ba) = h2(abef).
+
+                  integer, intent(in) :: no, nu, n3, nkeys, nent
+                  real(kind=8), intent(in) :: t2(nu,nu,no,no),r2(nu,nu,nu,no),&
+                                              h1_oo(no,no),h1_vv(nu,nu),&
+                                              h2_vvov(nu,nu,no,nu),&
+                                              h2_vooo(nu,no,no,no),&
+                                              x2_vvvv(nu,nu,nu,nu),&
+                                              x2_vvoo(nu,nu,no,no),&
+                                              h2_oooo(no,no,no,no),&
+                                              h2_voov(nu,no,no,nu),&
+                                              h2_vvvv(nu,nu,nu,nu)
+                  integer(kind=2), intent(in) :: r3_excits(n3,6)
+                  real(kind=8), intent(in) :: r3_amps(n3)
+                  integer(kind=8), intent(in) :: plan_keys(nkeys)
+                  integer, intent(in) :: plan_loc(nkeys+1), plan_det(nent)
+                  integer(kind=2), intent(in) :: plan_ind(2,nent)
+                  integer(kind=1), intent(in) :: plan_sgn(nent)
+
+                  real(kind=8), intent(out) :: resid(n3)
+
+                  real(kind=8) :: val, hmatel, sgn
+                  integer :: a, b, c, d, k, l, e, f, m, n, idet, jdet
+                  integer :: vb(4), ob(2), kept(3), p, q, p1, p2, pb, obb, ik, ipos
+                  integer(kind=8) :: key
+
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(dynamic,64),&
+                  !$omp private(val,hmatel,sgn,a,b,c,d,k,l,e,f,m,n,idet,jdet,&
+                  !$omp vb,ob,kept,p,q,p1,p2,pb,obb,ik,ipos,key)
+                  do idet = 1,n3
+                     a = r3_excits(idet,1); b = r3_excits(idet,2); c = r3_excits(idet,3); d = r3_excits(idet,4);
+                     k = r3_excits(idet,5); l = r3_excits(idet,6);
+                     vb = (/a, b, c, d/); ob = (/k, l/)
+                     val = 0.0d0
+                     !!! Moment terms !!!
+                     ! -A(d/abc)A(kl) h2(dmlk)*r2(abcm)
+                     ! A(cd/ab)A(kl) h2(dcle)*r2(abek)
+                     ! A(d/abc)A(kl) x2(abce)*t2(edkl)
+                     ! -A(cd/ab)A(kl) x2(abmk)*t2(cdml)
+                     do m = 1,no
+                        val = val + h2_vooo(d,m,k,l)*r2(a,b,c,m)
+                        val = val - h2_vooo(c,m,k,l)*r2(a,b,d,m)
+                        val = val + h2_vooo(b,m,k,l)*r2(a,c,d,m)
+                        val = val - h2_vooo(a,m,k,l)*r2(b,c,d,m)
+                        val = val + x2_vvoo(a,b,m,k)*t2(c,d,l,m)
+                        val = val - x2_vvoo(a,b,m,l)*t2(c,d,k,m)
+                        val = val - x2_vvoo(a,c,m,k)*t2(b,d,l,m)
+                        val = val + x2_vvoo(a,c,m,l)*t2(b,d,k,m)
+                        val = val + x2_vvoo(a,d,m,k)*t2(b,c,l,m)
+                        val = val - x2_vvoo(a,d,m,l)*t2(b,c,k,m)
+                        val = val + x2_vvoo(b,c,m,k)*t2(a,d,l,m)
+                        val = val - x2_vvoo(b,c,m,l)*t2(a,d,k,m)
+                        val = val - x2_vvoo(b,d,m,k)*t2(a,c,l,m)
+                        val = val + x2_vvoo(b,d,m,l)*t2(a,c,k,m)
+                        val = val + x2_vvoo(c,d,m,k)*t2(a,b,l,m)
+                        val = val - x2_vvoo(c,d,m,l)*t2(a,b,k,m)
+                     end do
+                     do e = 1,nu
+                        val = val - h2_vvov(c,d,l,e)*r2(a,b,e,k)
+                        val = val + h2_vvov(c,d,k,e)*r2(a,b,e,l)
+                        val = val + h2_vvov(b,d,l,e)*r2(a,c,e,k)
+                        val = val - h2_vvov(b,d,k,e)*r2(a,c,e,l)
+                        val = val - h2_vvov(b,c,l,e)*r2(a,d,e,k)
+                        val = val + h2_vvov(b,c,k,e)*r2(a,d,e,l)
+                        val = val - h2_vvov(a,d,l,e)*r2(b,c,e,k)
+                        val = val + h2_vvov(a,d,k,e)*r2(b,c,e,l)
+                        val = val + h2_vvov(a,c,l,e)*r2(b,d,e,k)
+                        val = val - h2_vvov(a,c,k,e)*r2(b,d,e,l)
+                        val = val - h2_vvov(a,b,l,e)*r2(c,d,e,k)
+                        val = val + h2_vvov(a,b,k,e)*r2(c,d,e,l)
+                        val = val - x2_vvvv(a,b,c,e)*t2(d,e,k,l)
+                        val = val + x2_vvvv(a,b,d,e)*t2(c,e,k,l)
+                        val = val - x2_vvvv(a,c,d,e)*t2(b,e,k,l)
+                        val = val + x2_vvvv(b,c,d,e)*t2(a,e,k,l)
+                     end do
+                     !!! Terms linear in r3 !!!
+                     ! < abcdkl | h2(oooo) + h1(oo) | abcdmn >
+                     key = 4_8*((((a - 1)*int(nu,8) + (b - 1))*nu + (c - 1))*nu + (d - 1))
+                     ik = find_key(key, plan_keys, nkeys)
+                     if (ik > 0) then
+                        do ipos = plan_loc(ik),plan_loc(ik + 1) - 1
+                           jdet = plan_det(ipos)
+                           m = plan_ind(1,ipos); n = plan_ind(2,ipos)
+                           hmatel = h2_oooo(m,n,k,l)
+                           if (k == m) hmatel = hmatel - h1_oo(n,l)
+                           if (k == n) hmatel = hmatel + h1_oo(m,l)
+                           if (l == n) hmatel = hmatel - h1_oo(m,k)
+                           if (l == m) hmatel = hmatel + h1_oo(n,k)
+                           val = val + hmatel*r3_amps(jdet)
+                        end do
+                     end if
+                     ! < abcdkl | h1(vv) | ebcdkl > and permutations
+                     do pb = 1,4
+                        q = 0
+                        do p = 1,4
+                           if (p /= pb) then
+                              q = q + 1; kept(q) = vb(p)
+                           end if
+                        end do
+                        key = 4_8*((((((kept(1) - 1)*int(nu,8) + (kept(2) - 1))*nu + (kept(3) - 1))*no + (k - 1))*no) + (l - 1)) + 1_8
+                        ik = find_key(key, plan_keys, nkeys)
+                        if (ik == 0) cycle
+                        sgn = (-1)**(pb - 1)
+                        do ipos = plan_loc(ik),plan_loc(ik + 1) - 1
+                           e = plan_ind(1,ipos)
+                           val = val + sgn*plan_sgn(ipos)*h1_vv(vb(pb),e)*r3_amps(plan_det(ipos))
+                        end do
+                     end do
+                     ! < abcdkl | h2(vvvv) | efcdkl > and permutations
+                     do p1 = 1,4
+                        do p2 = p1+1,4
+                           q = 0
+                           do p = 1,4
+                              if (p /= p1 .and. p /= p2) then
+                                 q = q + 1; kept(q) = vb(p)
+                              end if
+                           end do
+                           key = 4_8*((((kept(1) - 1)*int(nu,8) + (kept(2) - 1))*no + (k - 1))*no + (l - 1)) + 2_8
+                           ik = find_key(key, plan_keys, nkeys)
+                           if (ik == 0) cycle
+                           sgn = (-1)**(p1 + p2 + 1)
+                           do ipos = plan_loc(ik),plan_loc(ik + 1) - 1
+                              e = plan_ind(1,ipos); f = plan_ind(2,ipos)
+                              val = val + sgn*plan_sgn(ipos)*h2_vvvv(f,e,vb(p2),vb(p1))*r3_amps(plan_det(ipos))
+                           end do
+                        end do
+                     end do
+                     ! < abcdkl | h2(voov) | abcemk > and permutations
+                     do pb = 1,4
+                        q = 0
+                        do p = 1,4
+                           if (p /= pb) then
+                              q = q + 1; kept(q) = vb(p)
+                           end if
+                        end do
+                        do obb = 1,2
+                           key = 4_8*((((kept(1) - 1)*int(nu,8) + (kept(2) - 1))*nu + (kept(3) - 1))*no + (ob(3 - obb) - 1)) + 3_8
+                           ik = find_key(key, plan_keys, nkeys)
+                           if (ik == 0) cycle
+                           sgn = (-1)**(pb + obb)
+                           do ipos = plan_loc(ik),plan_loc(ik + 1) - 1
+                              e = plan_ind(1,ipos); m = plan_ind(2,ipos)
+                              val = val + sgn*plan_sgn(ipos)*h2_voov(vb(pb),m,ob(obb),e)*r3_amps(plan_det(ipos))
+                           end do
+                        end do
+                     end do
+                     resid(idet) = val
+                  end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+              end subroutine build_hr3_p
+
+              subroutine update_r(r1,r2,r3_amps,r3_excits,&
+                                  omega,&
+                                  h1_oo,h1_vv,&
+                                  n3,no,nu)
+
+                  integer, intent(in) :: no, nu, n3
+                  real(kind=8), intent(in) :: h1_oo(no,no),h1_vv(nu,nu)
+                  real(kind=8), intent(in) :: omega
+                  integer(kind=2), intent(in) :: r3_excits(n3,6)
+
+                  real(kind=8), intent(inout) :: r1(nu,nu)
+                  !f2py intent(in,out) :: r1(0:nu-1,0:nu-1)
+                  real(kind=8), intent(inout) :: r2(nu,nu,nu,no)
+                  !f2py intent(in,out) :: r2(0:nu-1,0:nu-1,0:nu-1,0:no-1)
+                  real(kind=8), intent(inout) :: r3_amps(n3)
+                  !f2py intent(in,out) :: r3_amps(0:n3-1)
+
+                  integer :: idet, a, b, c, d, k, l
+                  real(kind=8) :: denom
+
+                  do a = 1,nu
+                     do b = 1,nu
+                        if (a==b) then
+                           r1(a,b) = 0.0d0
+                           cycle
+                        end if
+                        denom = omega - h1_vv(a,a) - h1_vv(b,b)
+                        r1(a,b) = r1(a,b)/denom
+                     end do
+                  end do
+
+                  do a = 1,nu
+                     do b = 1,nu
+                        do c = 1,nu
+                           do k = 1,no
+                              if (a==b .or. b==c .or. a==c) then
+                                 r2(a,b,c,k) = 0.0d0
+                                 cycle
+                              end if
+                              denom = omega - h1_vv(a,a) - h1_vv(b,b) - h1_vv(c,c) + h1_oo(k,k)
+                              r2(a,b,c,k) = r2(a,b,c,k)/denom
+                           end do
+                        end do
+                     end do
+                  end do
+
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,c,d,k,l,denom)
+                  do idet = 1,n3
+                     a = r3_excits(idet,1); b = r3_excits(idet,2); c = r3_excits(idet,3); d = r3_excits(idet,4);
+                     k = r3_excits(idet,5); l = r3_excits(idet,6);
+                     denom = omega - h1_vv(a,a) - h1_vv(b,b) - h1_vv(c,c) - h1_vv(d,d) + h1_oo(k,k) + h1_oo(l,l)
+                     r3_amps(idet) = r3_amps(idet)/denom
+                  end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+              end subroutine update_r
+
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!! LOOKUP FUNCTIONS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+      pure function find_key(key, plan_keys, nkeys) result(ik)
+      ! Binary search for key in the sorted array plan_keys. Returns its (1-based)
+      ! position, or 0 if the key is not present.
+
+              integer, intent(in) :: nkeys
+              integer(kind=8), intent(in) :: key, plan_keys(nkeys)
+              integer :: ik, lo, hi, mid
+
+              ik = 0
+              lo = 1; hi = nkeys
+              do while (lo <= hi)
+                 mid = (lo + hi)/2
+                 if (plan_keys(mid) == key) then
+                    ik = mid
+                    return
+                 else if (plan_keys(mid) < key) then
+                    lo = mid + 1
+                 else
+                    hi = mid - 1
+                 end if
+              end do
+
+      end function find_key
+
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!! THREAD CONTROL !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      subroutine set_num_threads(nthreads)
+          ! Set the number of OpenMP threads used by the kernels. This only affects
+          ! the OpenMP runtime, not the thread pool of the BLAS library.
+          integer, intent(in) :: nthreads
+
+          !$ call omp_set_num_threads(nthreads)
+
+      end subroutine set_num_threads
+
+      subroutine get_num_threads(nthreads)
+          ! Return the number of OpenMP threads used by the kernels (1 if the
+          ! module was compiled without OpenMP).
+          integer, intent(out) :: nthreads
+
+          nthreads = 1
+          !$ nthreads = omp_get_max_threads()
+
+      end subroutine get_num_threads
+
+end module deaeom4_p
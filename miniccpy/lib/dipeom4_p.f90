@@ -13,7 +13,7 @@ module dipeom4_p
 
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: resid(no,no)
@@ -22,6 +22,10 @@ module dipeom4_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(e,f,i,j,m,n,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! x1(ij) <- A(ij/mn) v(mnef)*r3(efijmn)
@@ -34,6 +38,9 @@ module dipeom4_p
                      resid(i,n) = resid(i,n) - h2_oovv(m,j,e,f)*rval ! (jn)
                      resid(m,n) = resid(m,n) + h2_oovv(i,j,e,f)*rval ! (im)(jn)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ij)
                   do i = 1,no
@@ -58,7 +65,7 @@ module dipeom4_p
                   real(kind=8), intent(in) :: h1_ov(no,nu)
                   real(kind=8), intent(in) :: h2_vovv(nu,no,nu,nu)
                   real(kind=8), intent(in) :: h2_ooov(no,no,no,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: resid(no,no,nu,no)
@@ -67,6 +74,10 @@ module dipeom4_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(c,e,f,i,j,k,m,n,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! x2(ijck) <- A(m/ijk)A(ce) h1(me)*r3(ceijkm)
@@ -107,6 +118,9 @@ module dipeom4_p
                      resid(i,k,:,n) = resid(i,k,:,n) + h2_vovv(:,j,e,f)*rval ! (jn)
                      resid(i,j,:,n) = resid(i,j,:,n) - h2_vovv(:,k,e,f)*rval ! (kn)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ijk)
                   do i = 1,no-2
@@ -135,11 +149,13 @@ module dipeom4_p
 
               subroutine build_hr4_p(resid,&
                                      r4_amps,r4_excits,&
+                                     plan_perm,plan_loc,plan_idx,&
                                      t2,r2,&
                                      h1_oo,h1_vv,&
                                      h2_vvov,h2_vooo,x2_oooo,x2_oovv,&
                                      h2_oooo,h2_voov,h2_vvvv,&
-                                     n4,& 
+                                     n4,&
+                                     nperm,nloc_tot,nidx_tot,&
                                      no,nu)
 
                   integer, intent(in) :: no, nu, n4
@@ -153,19 +169,22 @@ module dipeom4_p
                                               h2_voov(nu,no,no,nu),&
                                               h2_vvvv(nu,nu,nu,nu)
 
-                  integer, intent(inout) :: r4_excits(n4,6)
+                  integer(kind=2), intent(inout) :: r4_excits(n4,6)
                   !f2py intent(in,out) :: r4_excits(0:n4-1,0:5)
                   real(kind=8), intent(inout) :: r4_amps(n4)
                   !f2py intent(in,out) :: r4_amps(0:n4-1)
 
                   real(kind=8), intent(out) :: resid(n4)
 
+                  integer, intent(in) :: nperm, nloc_tot, nidx_tot
+                  integer, intent(in) :: plan_perm(n4,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
                   integer, allocatable :: idx_table(:,:,:,:)
                   integer, allocatable :: idx_table5(:,:,:,:,:)
                   integer, allocatable :: loc_arr(:,:)
 
                   real(kind=8), allocatable :: amps_buff(:), xbuf(:,:,:,:)
-                  integer, allocatable :: excits_buff(:,:)
+                  integer(kind=2), allocatable :: excits_buff(:,:)
 
                   real(kind=8) :: val, denom, t_amp, res_mm23, hmatel
                   real(kind=8) :: hmatel1, hmatel2, hmatel3, hmatel4
@@ -188,8 +207,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(no,no,no,no))
                   !!! SB: (3,4,5,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-1,no-1/), (/-1,no/), no, no, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,5,6/), no, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(1, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -234,8 +253,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(nu,nu,no,no))
                   !!! SB: (1,2,5,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/3,no-1/), (/-1,no/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,5,6/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(2, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -355,8 +374,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-3,no/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,3,6/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(3, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -476,8 +495,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,4,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/2,no-2/), (/-2,no/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,4,6/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(4, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -597,8 +616,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,5) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-2,no-1/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,3,5/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(5, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -718,8 +737,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,4,5) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/2,no-2/), (/-1,no-1/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,4,5/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(6, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -839,8 +858,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,4) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-1,no-2/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,3,4/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(7, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -967,8 +986,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table5(nu,nu,no,no,no))
                   !!! SB: (1,2,4,5,6) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/2,no-2/), (/-1,no-1/), (/-1,no/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,4,5,6/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(8, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1026,8 +1045,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,5,6) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-2,no-1/), (/-1,no/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,3,5,6/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(9, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1085,8 +1104,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,4,6) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-1,no-2/), (/-2,no/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,3,4,6/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(10, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1144,8 +1163,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,4,5) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-1,no-2/), (/-1,no-1/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,3,4,5/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(11, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1210,8 +1229,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(no,no,no,nu))
                   !!! SB: (3,4,5,1) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-1,no-1/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,5,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(12, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1309,8 +1328,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,4,6,1) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-2,no/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,6,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(13, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1408,8 +1427,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,5,6,1) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-2,no-1/), (/-1,no/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,5,6,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(14, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1507,8 +1526,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (4,5,6,1) LOOP !!!
-                  call get_index_table(idx_table, (/2,no-2/), (/-1,no-1/), (/-1,no/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/4,5,6,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(15, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1606,8 +1625,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,4,5,2) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-1,no-1/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,5,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(16, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1705,8 +1724,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,4,6,2) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-2,no/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,6,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(17, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1804,8 +1823,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,5,6,2) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-2,no-1/), (/-1,no/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,5,6,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(18, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -1903,8 +1922,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (4,5,6,2) LOOP !!!
-                  call get_index_table(idx_table, (/2,no-2/), (/-1,no-1/), (/-1,no/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/4,5,6,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(19, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2068,16 +2087,21 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
 
+                  ! return to the ordering in which the sorting plan was built
+                  call restore_sort_plan(r4_excits, r4_amps, resid, plan_perm(:,nperm), n4)
+
               end subroutine build_hr4_p
          
               subroutine build_hr4_p_cvs(resid,&
                                      r4_amps,r4_excits,&
+                                     plan_perm,plan_loc,plan_idx,&
                                      t2,r2,&
                                      h1_oo,h1_vv,&
                                      h2_vvov,h2_vooo,x2_oooo,x2_oovv,&
                                      h2_oooo,h2_voov,h2_vvvv,&
                                      cvsmin,cvsmax,&
                                      n4,&
+                                     nperm,nloc_tot,nidx_tot,&
                                      no,nu)
 
                   integer, intent(in) :: no, nu, n4, cvsmin, cvsmax
@@ -2091,19 +2115,22 @@ module dipeom4_p
                                               h2_voov(nu,no,no,nu),&
                                               h2_vvvv(nu,nu,nu,nu)
 
-                  integer, intent(inout) :: r4_excits(n4,6)
+                  integer(kind=2), intent(inout) :: r4_excits(n4,6)
                   !f2py intent(in,out) :: r4_excits(0:n4-1,0:5)
                   real(kind=8), intent(inout) :: r4_amps(n4)
                   !f2py intent(in,out) :: r4_amps(0:n4-1)
 
                   real(kind=8), intent(out) :: resid(n4)
 
+                  integer, intent(in) :: nperm, nloc_tot, nidx_tot
+                  integer, intent(in) :: plan_perm(n4,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
                   integer, allocatable :: idx_table(:,:,:,:)
                   integer, allocatable :: idx_table5(:,:,:,:,:)
                   integer, allocatable :: loc_arr(:,:)
 
                   real(kind=8), allocatable :: amps_buff(:), xbuf(:,:,:,:)
-                  integer, allocatable :: excits_buff(:,:)
+                  integer(kind=2), allocatable :: excits_buff(:,:)
 
                   real(kind=8) :: val, denom, t_amp, res_mm23, hmatel
                   real(kind=8) :: hmatel1, hmatel2, hmatel3, hmatel4
@@ -2126,8 +2153,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(no,no,no,no))
                   !!! SB: (3,4,5,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-1,no-1/), (/-1,no/), no, no, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,5,6/), no, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(1, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2172,8 +2199,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(nu,nu,no,no))
                   !!! SB: (1,2,5,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/3,no-1/), (/-1,no/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,5,6/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(2, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2293,8 +2320,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-3,no/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,3,6/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(3, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2414,8 +2441,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,4,6) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/2,no-2/), (/-2,no/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,4,6/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(4, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2535,8 +2562,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,5) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-2,no-1/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,3,5/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(5, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2656,8 +2683,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,4,5) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/2,no-2/), (/-1,no-1/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,4,5/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(6, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2777,8 +2804,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,4) LOOP !!!
-                  call get_index_table(idx_table, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-1,no-2/), nu, nu, no, no)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/1,2,3,4/), nu, nu, no, no, nloc, n4, resid)
+                  call apply_sort_plan(7, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2905,8 +2932,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table5(nu,nu,no,no,no))
                   !!! SB: (1,2,4,5,6) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/2,no-2/), (/-1,no-1/), (/-1,no/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,4,5,6/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(8, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -2964,8 +2991,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,5,6) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-2,no-1/), (/-1,no/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,3,5,6/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(9, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3023,8 +3050,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,4,6) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-1,no-2/), (/-2,no/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,3,4,6/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(10, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3082,8 +3109,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (1,2,3,4,5) LOOP !!!
-                  call get_index_table5(idx_table5, (/1,nu-1/), (/-1,nu/), (/1,no-3/), (/-1,no-2/), (/-1,no-1/), nu, nu, no, no, no)
-                  call sort5(r4_excits, r4_amps, loc_arr, idx_table5, (/1,2,3,4,5/), nu, nu, no, no, no, nloc, n4, resid)
+                  call apply_sort_plan(11, r4_excits, r4_amps, resid, loc_arr, idx_table5, nloc, size(idx_table5),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3148,8 +3175,8 @@ module dipeom4_p
                   allocate(loc_arr(2,nloc))
                   allocate(idx_table(no,no,no,nu))
                   !!! SB: (3,4,5,1) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-1,no-1/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,5,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(12, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3247,8 +3274,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,4,6,1) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-2,no/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,6,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(13, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3346,8 +3373,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,5,6,1) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-2,no-1/), (/-1,no/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,5,6,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(14, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3445,8 +3472,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (4,5,6,1) LOOP !!!
-                  call get_index_table(idx_table, (/2,no-2/), (/-1,no-1/), (/-1,no/), (/1,nu-1/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/4,5,6,1/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(15, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3544,8 +3571,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,4,5,2) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-1,no-1/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,5,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(16, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3643,8 +3670,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,4,6,2) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-1,no-2/), (/-2,no/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,4,6,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(17, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3742,8 +3769,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (3,5,6,2) LOOP !!!
-                  call get_index_table(idx_table, (/1,no-3/), (/-2,no-1/), (/-1,no/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/3,5,6,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(18, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -3841,8 +3868,8 @@ module dipeom4_p
                   !$omp end parallel
                   !!!! END OMP PARALLEL SECTION !!!!
                   !!! SB: (4,5,6,2) LOOP !!!
-                  call get_index_table(idx_table, (/2,no-2/), (/-1,no-1/), (/-1,no/), (/2,nu/), no, no, no, nu)
-                  call sort4(r4_excits, r4_amps, loc_arr, idx_table, (/4,5,6,2/), no, no, no, nu, nloc, n4, resid)
+                  call apply_sort_plan(19, r4_excits, r4_amps, resid, loc_arr, idx_table, nloc, size(idx_table),&
+                                       plan_perm, plan_loc, plan_idx, n4, nperm, nloc_tot, nidx_tot, no, nu)
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
                   !$omp parallel shared(resid,&
                   !$omp r4_excits,&
@@ -4009,6 +4036,8 @@ module dipeom4_p
                   !
                   ! Zero out CVS
                   !
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,i,j,k,l)
                   do idet=1,n4
                      a = r4_excits(idet,1); b = r4_excits(idet,2);
                      i = r4_excits(idet,3); j = r4_excits(idet,4); k = r4_excits(idet,5); l = r4_excits(idet,6);
@@ -4019,6 +4048,11 @@ module dipeom4_p
                         resid(idet) = 0.0d0
                      end if
                   end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
+
+                  ! return to the ordering in which the sorting plan was built
+                  call restore_sort_plan(r4_excits, r4_amps, resid, plan_perm(:,nperm), n4)
 
               end subroutine build_hr4_p_cvs
 
@@ -4030,7 +4064,7 @@ module dipeom4_p
 
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: I_oooo(no,no,no,no)
@@ -4039,6 +4073,10 @@ module dipeom4_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,i,j,k,l,rval),&
+                  !$omp reduction(+:I_oooo)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! I(ijmk) <- 1/2 g(mlab) * r3(abijkl)
@@ -4049,6 +4087,9 @@ module dipeom4_p
                      I_oooo(i,k,:,l) = I_oooo(i,k,:,l) + h2_oovv(:,j,a,b)*rval ! (jl)
                      I_oooo(i,j,:,l) = I_oooo(i,j,:,l) - h2_oovv(:,k,a,b)*rval ! (kl)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ijk)
                   do i = 1,no
@@ -4085,7 +4126,7 @@ module dipeom4_p
 
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: I_oovv(no,no,nu,nu)
@@ -4094,6 +4135,10 @@ module dipeom4_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,i,j,k,l,rval),&
+                  !$omp reduction(+:I_oovv)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! I(ijae) <- 1/2 A(ab)A(kl/ij) g(kleb) * r3(abijkl)
@@ -4114,6 +4159,9 @@ module dipeom4_p
                      I_oovv(i,l,b,:) = I_oovv(i,l,b,:) - h2_oovv(k,j,:,a)*rval ! (jl)
                      I_oovv(k,l,b,:) = I_oovv(k,l,b,:) + h2_oovv(i,j,:,a)*rval ! (ik)(jl)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ij)
                   do i = 1,no
@@ -4142,7 +4190,7 @@ module dipeom4_p
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h1_oo(no,no),h1_vv(nu,nu)
                   real(kind=8), intent(in) :: omega
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
 
                   real(kind=8), intent(inout) :: r1(no,no)
                   !f2py intent(in,out) :: r1(0:no-1,0:no-1)
@@ -4178,6 +4226,8 @@ module dipeom4_p
                      end do
                   end do
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,i,j,k,l,denom)
                   do idet = 1,n4
                      a = r4_excits(idet,1); b = r4_excits(idet,2); 
                      i = r4_excits(idet,3); j = r4_excits(idet,4); k = r4_excits(idet,5); l = r4_excits(idet,6);
@@ -4185,6 +4235,8 @@ module dipeom4_p
                      denom = omega + h1_oo(i,i) + h1_oo(j,j) + h1_oo(k,k) + h1_oo(l,l) - h1_vv(a,a) - h1_vv(b,b)
                      r4_amps(idet) = r4_amps(idet)/denom
                   end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
 
               end subroutine update_r
          
@@ -4199,7 +4251,7 @@ module dipeom4_p
                   real(kind=8), intent(in) :: h1_oo(no,no),h1_vv(nu,nu)
                   real(kind=8), intent(in) :: h2_oooo(no,no,no,no),h2_voov(nu,no,no,nu),h2_vvvv(nu,nu,nu,nu)
                   real(kind=8), intent(in) :: omega
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
 
                   real(kind=8), intent(inout) :: r1(no,no)
                   !f2py intent(in,out) :: r1(0:no-1,0:no-1)
@@ -4245,6 +4297,8 @@ module dipeom4_p
                      end do
                   end do
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,i,j,k,l,denom)
                   do idet = 1,n4
                      a = r4_excits(idet,1); b = r4_excits(idet,2);
                      i = r4_excits(idet,3); j = r4_excits(idet,4); k = r4_excits(idet,5); l = r4_excits(idet,6);
@@ -4262,6 +4316,8 @@ module dipeom4_p
                                  r4_amps(idet) = r4_amps(idet)/denom
                      end if
                   end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
 
               end subroutine update_r_cvs
 
@@ -4269,6 +4325,269 @@ module dipeom4_p
       !!!!!!!!!!!!!!!!!!!!!!!!!!!!! SORTING FUNCTIONS !!!!!!!!!!!!!!!!!!!!!!!!!!!!
       !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
+      subroutine get_plan_dims(nperm, nloc_tot, nidx_tot, no, nu)
+      ! Return the dimensions of the sorting plan of build_hr4_p built by build_sort_plan.
+      ! Out:
+      !   nperm: number of sorts + 1 (the last column of plan_perm restores the original order)
+      !   nloc_tot: total number of index blocks (columns of plan_loc) over all sorts
+      !   nidx_tot: total size of the index tables (plan_idx) over all sorts
+
+              integer, intent(in) :: no, nu
+              integer, intent(out) :: nperm, nloc_tot, nidx_tot
+
+              integer :: isort, ndim, nloc
+              integer :: idims(5), rng(2,5), n(5)
+
+              nperm = 1; nloc_tot = 0; nidx_tot = 0
+              isort = 1
+              do
+                 call get_sort_spec(isort, ndim, idims, rng, n, nloc, no, nu)
+                 if (ndim == 0) exit
+                 nperm = nperm + 1
+                 nloc_tot = nloc_tot + nloc
+                 nidx_tot = nidx_tot + product(n)
+                 isort = isort + 1
+              end do
+
+      end subroutine get_plan_dims
+
+      subroutine build_sort_plan(plan_perm, plan_loc, plan_idx, excits_in, n3p, nperm, nloc_tot, nidx_tot, no, nu)
+      ! Carry out the sequence of sorts used by build_hr4_p once for a fixed list of
+      ! excitations and record the outcome so that the kernels do not need to repeat it.
+      ! In:
+      !   excits_in: excitation array in the order in which it is passed to the kernels
+      ! Out:
+      !   plan_perm: plan_perm(:,isort) takes the excitations from the ordering of sort isort-1
+      !              (or the original ordering for isort = 1) to that of sort isort; the last
+      !              column takes them from the ordering of the final sort back to the original one
+      !   plan_loc: loc_arr of each sort, stored one after another
+      !   plan_idx: index table of each sort, flattened and stored one after another
+
+              integer, intent(in) :: n3p, nperm, nloc_tot, nidx_tot, no, nu
+              integer(kind=2), intent(in) :: excits_in(n3p,6)
+
+              integer, intent(out) :: plan_perm(n3p,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
+              integer(kind=2), allocatable :: excits(:,:)
+              integer, allocatable :: pos(:), loc_arr(:,:), idx_table(:,:,:,:), idx_table5(:,:,:,:,:)
+              real(kind=8), allocatable :: track(:)
+              integer :: isort, ndim, nloc, nidx, loc_off, idx_off, idet
+              integer :: idims(5), rng(2,5), n(5)
+
+              allocate(excits(n3p,6), pos(n3p), track(n3p))
+              excits = excits_in
+              do idet = 1, n3p
+                 pos(idet) = idet
+              end do
+              loc_off = 0; idx_off = 0
+              do isort = 1, nperm-1
+                 call get_sort_spec(isort, ndim, idims, rng, n, nloc, no, nu)
+                 nidx = product(n)
+                 allocate(loc_arr(2,nloc))
+                 ! sort a list of positions alongside the excitations to obtain the permutation
+                 do idet = 1, n3p
+                    track(idet) = dble(idet)
+                 end do
+                 if (ndim == 4) then
+                    allocate(idx_table(n(1),n(2),n(3),n(4)))
+                    call get_index_table(idx_table, rng(:,1), rng(:,2), rng(:,3), rng(:,4), n(1), n(2), n(3), n(4))
+                    call sort4(excits, track, loc_arr, idx_table, idims(1:4), n(1), n(2), n(3), n(4), nloc, n3p)
+                    plan_idx(idx_off+1:idx_off+nidx) = reshape(idx_table, (/nidx/))
+                    deallocate(idx_table)
+                 else
+                    allocate(idx_table5(n(1),n(2),n(3),n(4),n(5)))
+                    call get_index_table5(idx_table5, rng(:,1), rng(:,2), rng(:,3), rng(:,4), rng(:,5), n(1), n(2), n(3), n(4), n(5))
+                    call sort5(excits, track, loc_arr, idx_table5, idims, n(1), n(2), n(3), n(4), n(5), nloc, n3p)
+                    plan_idx(idx_off+1:idx_off+nidx) = reshape(idx_table5, (/nidx/))
+                    deallocate(idx_table5)
+                 end if
+                 plan_loc(:,loc_off+1:loc_off+nloc) = loc_arr
+                 plan_perm(:,isort) = nint(track)
+                 pos = pos(plan_perm(:,isort))
+                 loc_off = loc_off + nloc; idx_off = idx_off + nidx
+                 deallocate(loc_arr)
+              end do
+              ! permutation restoring the original order after the final sort
+              do idet = 1, n3p
+                 plan_perm(pos(idet),nperm) = idet
+              end do
+              deallocate(excits, pos, track)
+
+      end subroutine build_sort_plan
+
+      subroutine apply_sort_plan(isort, excits, amps, resid, loc_arr, idx_table, nloc, nidx,&
+                                 plan_perm, plan_loc, plan_idx, n3p, nperm, nloc_tot, nidx_tot, no, nu)
+      ! Replay sort isort of a plan built by build_sort_plan: reorder the excitation,
+      ! amplitude, and residual arrays and copy out the corresponding loc_arr and index table.
+      ! This replaces the get_index_table/sort4 (sort5) pair in the kernels.
+
+              integer, intent(in) :: isort, nloc, nidx, n3p, nperm, nloc_tot, nidx_tot, no, nu
+              integer, intent(in) :: plan_perm(n3p,nperm), plan_loc(2,nloc_tot), plan_idx(nidx_tot)
+
+              integer(kind=2), intent(inout) :: excits(n3p,6)
+              real(kind=8), intent(inout) :: amps(n3p), resid(n3p)
+              integer, intent(out) :: loc_arr(2,nloc), idx_table(nidx)
+
+              integer :: jsort, ndim, nloc_j, loc_off, idx_off
+              integer :: idims(5), rng(2,5), n(5)
+
+              loc_off = 0; idx_off = 0
+              do jsort = 1, isort-1
+                 call get_sort_spec(jsort, ndim, idims, rng, n, nloc_j, no, nu)
+                 loc_off = loc_off + nloc_j; idx_off = idx_off + product(n)
+              end do
+              excits = excits(plan_perm(:,isort),:)
+              amps = amps(plan_perm(:,isort))
+              resid = resid(plan_perm(:,isort))
+              loc_arr = plan_loc(:,loc_off+1:loc_off+nloc)
+              idx_table = plan_idx(idx_off+1:idx_off+nidx)
+
+      end subroutine apply_sort_plan
+
+      subroutine restore_sort_plan(excits, amps, resid, perm, n3p)
+      ! Bring the excitation, amplitude, and residual arrays back to the ordering in
+      ! which the sorting plan was built.
+
+              integer, intent(in) :: n3p
+              integer, intent(in) :: perm(n3p)
+
+              integer(kind=2), intent(inout) :: excits(n3p,6)
+              real(kind=8), intent(inout) :: amps(n3p), resid(n3p)
+
+              excits = excits(perm,:)
+              amps = amps(perm)
+              resid = resid(perm)
+
+      end subroutine restore_sort_plan
+
+      subroutine get_sort_spec(isort, ndim, idims, rng, n, nloc, no, nu)
+      ! Return the sort carried out at step isort of build_hr4_p: the sorting dimensions
+      ! (idims), index ranges (rng) and dimensions (n) of the index table, and the number
+      ! of index blocks (nloc). ndim = 0 signals that there are no more sorts.
+
+              integer, intent(in) :: isort, no, nu
+              integer, intent(out) :: ndim, idims(5), rng(2,5), n(5), nloc
+
+              ndim = 0; idims = 0; rng = 0; n = 1; nloc = 0
+              select case (isort)
+              case (1)
+                 ndim = 4
+                 idims(1:4) = (/3,4,5,6/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-1,no-2/); rng(:,3) = (/-1,no-1/); rng(:,4) = (/-1,no/)
+                 n(1:4) = (/no,no,no,no/)
+                 nloc = no*(no - 1)*(no - 2)*(no - 3)/24
+              case (2)
+                 ndim = 4
+                 idims(1:4) = (/1,2,5,6/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/3,no-1/); rng(:,4) = (/-1,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 2)*(no - 3)/2
+              case (3)
+                 ndim = 4
+                 idims(1:4) = (/1,2,3,6/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-3/); rng(:,4) = (/-3,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 2)*(no - 3)/2
+              case (4)
+                 ndim = 4
+                 idims(1:4) = (/1,2,4,6/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/2,no-2/); rng(:,4) = (/-2,no/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 2)*(no - 3)/2
+              case (5)
+                 ndim = 4
+                 idims(1:4) = (/1,2,3,5/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-3/); rng(:,4) = (/-2,no-1/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 2)*(no - 3)/2
+              case (6)
+                 ndim = 4
+                 idims(1:4) = (/1,2,4,5/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/2,no-2/); rng(:,4) = (/-1,no-1/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 2)*(no - 3)/2
+              case (7)
+                 ndim = 4
+                 idims(1:4) = (/1,2,3,4/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-3/); rng(:,4) = (/-1,no-2/)
+                 n(1:4) = (/nu,nu,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 2)*(no - 3)/2
+              case (8)
+                 ndim = 5
+                 idims(1:5) = (/1,2,4,5,6/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/2,no-2/); rng(:,4) = (/-1,no-1/); rng(:,5) = (/-1,no/)
+                 n(1:5) = (/nu,nu,no,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 1)*(no - 2)*(no - 3)/6
+              case (9)
+                 ndim = 5
+                 idims(1:5) = (/1,2,3,5,6/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-3/); rng(:,4) = (/-2,no-1/); rng(:,5) = (/-1,no/)
+                 n(1:5) = (/nu,nu,no,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 1)*(no - 2)*(no - 3)/6
+              case (10)
+                 ndim = 5
+                 idims(1:5) = (/1,2,3,4,6/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-3/); rng(:,4) = (/-1,no-2/); rng(:,5) = (/-2,no/)
+                 n(1:5) = (/nu,nu,no,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 1)*(no - 2)*(no - 3)/6
+              case (11)
+                 ndim = 5
+                 idims(1:5) = (/1,2,3,4,5/)
+                 rng(:,1) = (/1,nu-1/); rng(:,2) = (/-1,nu/); rng(:,3) = (/1,no-3/); rng(:,4) = (/-1,no-2/); rng(:,5) = (/-1,no-1/)
+                 n(1:5) = (/nu,nu,no,no,no/)
+                 nloc = nu*(nu - 1)/2 * (no - 1)*(no - 2)*(no - 3)/6
+              case (12)
+                 ndim = 4
+                 idims(1:4) = (/3,4,5,1/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-1,no-2/); rng(:,3) = (/-1,no-1/); rng(:,4) = (/1,nu-1/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (13)
+                 ndim = 4
+                 idims(1:4) = (/3,4,6,1/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-1,no-2/); rng(:,3) = (/-2,no/); rng(:,4) = (/1,nu-1/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (14)
+                 ndim = 4
+                 idims(1:4) = (/3,5,6,1/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-2,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/1,nu-1/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (15)
+                 ndim = 4
+                 idims(1:4) = (/4,5,6,1/)
+                 rng(:,1) = (/2,no-2/); rng(:,2) = (/-1,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/1,nu-1/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (16)
+                 ndim = 4
+                 idims(1:4) = (/3,4,5,2/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-1,no-2/); rng(:,3) = (/-1,no-1/); rng(:,4) = (/2,nu/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (17)
+                 ndim = 4
+                 idims(1:4) = (/3,4,6,2/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-1,no-2/); rng(:,3) = (/-2,no/); rng(:,4) = (/2,nu/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (18)
+                 ndim = 4
+                 idims(1:4) = (/3,5,6,2/)
+                 rng(:,1) = (/1,no-3/); rng(:,2) = (/-2,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/2,nu/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              case (19)
+                 ndim = 4
+                 idims(1:4) = (/4,5,6,2/)
+                 rng(:,1) = (/2,no-2/); rng(:,2) = (/-1,no-1/); rng(:,3) = (/-1,no/); rng(:,4) = (/2,nu/)
+                 n(1:4) = (/no,no,no,nu/)
+                 nloc = (no - 1)*(no - 2)*(no - 3)/6 * (nu - 1)
+              end select
+
+      end subroutine get_sort_spec
+
       subroutine get_index_table(idx_table, rng1, rng2, rng3, rng4, n1, n2, n3, n4)
 
               integer, intent(in) :: n1, n2, n3, n4
@@ -4393,7 +4712,7 @@ module dipeom4_p
               integer, intent(in) :: idx_table(n1,n2,n3,n4)
 
               integer, intent(inout) :: loc_arr(2,nloc)
-              integer, intent(inout) :: excits(n3p,6)
+              integer(kind=2), intent(inout) :: excits(n3p,6)
               real(kind=8), intent(inout) :: amps(n3p)
               real(kind=8), intent(inout), optional :: resid(n3p)
 
@@ -4452,7 +4771,7 @@ module dipeom4_p
               integer, intent(in) :: idx_table(n1,n2,n3,n4,n5)
 
               integer, intent(inout) :: loc_arr(2,nloc)
-              integer, intent(inout) :: excits(n3p,6)
+              integer(kind=2), intent(inout) :: excits(n3p,6)
               real(kind=8), intent(inout) :: amps(n3p)
               real(kind=8), intent(inout), optional :: resid(n3p)
 
@@ -4608,4 +4927,26 @@ module dipeom4_p
 
       end subroutine sum4
 
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!! THREAD CONTROL !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      subroutine set_num_threads(nthreads)
+          ! Set the number of OpenMP threads used by the kernels. This only affects
+          ! the OpenMP runtime, not the thread pool of the BLAS library.
+          integer, intent(in) :: nthreads
+
+          !$ call omp_set_num_threads(nthreads)
+
+      end subroutine set_num_threads
+
+      subroutine get_num_threads(nthreads)
+          ! Return the number of OpenMP threads used by the kernels (1 if the
+          ! module was compiled without OpenMP).
+          integer, intent(out) :: nthreads
+
+          nthreads = 1
+          !$ nthreads = omp_get_max_threads()
+
+      end subroutine get_num_threads
+
 end module dipeom4_p
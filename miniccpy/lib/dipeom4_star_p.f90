@@ -13,7 +13,7 @@ module dipeom4_star_p
 
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: resid(no,no)
@@ -22,6 +22,10 @@ module dipeom4_star_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(e,f,i,j,m,n,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! x1(ij) <- A(ij/mn) v(mnef)*r3(efijmn)
@@ -34,6 +38,9 @@ module dipeom4_star_p
                      resid(i,n) = resid(i,n) - h2_oovv(m,j,e,f)*rval ! (jn)
                      resid(m,n) = resid(m,n) + h2_oovv(i,j,e,f)*rval ! (im)(jn)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ij)
                   do i = 1,no
@@ -58,7 +65,7 @@ module dipeom4_star_p
                   real(kind=8), intent(in) :: h1_ov(no,nu)
                   real(kind=8), intent(in) :: h2_vovv(nu,no,nu,nu)
                   real(kind=8), intent(in) :: h2_ooov(no,no,no,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: resid(no,no,nu,no)
@@ -67,6 +74,10 @@ module dipeom4_star_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(c,e,f,i,j,k,m,n,rval),&
+                  !$omp reduction(+:resid)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! x2(ijck) <- A(m/ijk)A(ce) h1(me)*r3(ceijkm)
@@ -107,6 +118,9 @@ module dipeom4_star_p
                      resid(i,k,:,n) = resid(i,k,:,n) + h2_vovv(:,j,e,f)*rval ! (jn)
                      resid(i,j,:,n) = resid(i,j,:,n) - h2_vovv(:,k,e,f)*rval ! (kn)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ijk)
                   do i = 1,no-2
@@ -149,7 +163,7 @@ module dipeom4_star_p
                                               x2_oooo(no,no,no,no),&
                                               x2_oovv(no,no,nu,nu)
 
-                  integer, intent(inout) :: r4_excits(n4,6)
+                  integer(kind=2), intent(inout) :: r4_excits(n4,6)
                   !f2py intent(in,out) :: r4_excits(0:n4-1,0:5)
                   real(kind=8), intent(inout) :: r4_amps(n4)
                   !f2py intent(in,out) :: r4_amps(0:n4-1)
@@ -161,7 +175,7 @@ module dipeom4_star_p
                   integer, allocatable :: loc_arr(:,:)
 
                   real(kind=8), allocatable :: amps_buff(:), xbuf(:,:,:,:)
-                  integer, allocatable :: excits_buff(:,:)
+                  integer(kind=2), allocatable :: excits_buff(:,:)
 
                   real(kind=8) :: val, denom, t_amp, res_mm23, hmatel
                   real(kind=8) :: hmatel1, hmatel2, hmatel3, hmatel4
@@ -190,7 +204,7 @@ module dipeom4_star_p
                   !$omp r4_excits,&
                   !$omp r4_amps,&
                   !$omp loc_arr,idx_table,&
-                  !$omp h1_vv,h2_vvvv,&
+                  !$omp h1_vv,&
                   !$omp no,nu,n4),&
                   !$omp private(hmatel,hmatel1,hmatel2,hmatel3,hmatel4,&
                   !$omp a,b,c,d,i,j,k,l,e,f,m,n,idet,jdet,&
@@ -553,14 +567,15 @@ module dipeom4_star_p
                   delta_star = 0.0d0
 
                   !!!! BEGIN OMP PARALLEL SECTION !!!!
-                  !$omp parallel shared(delta_star,&
+                  !$omp parallel shared(&
                   !$omp r2,t2,omega,&
                   !$omp h1_oo,h1_vv,&
                   !$omp h2_vvov,h2_vooo,&
                   !$omp x2_oovv,x2_oooo,&
                   !$omp no,nu),&
                   !$omp private(a,b,c,d,i,j,k,l,m,n,e,f,&
-                  !$omp res_mm23,denom)
+                  !$omp res_mm23,denom),&
+                  !$omp reduction(+:delta_star)
                   !$omp do schedule(static)
                   do a=1,nu; do b=a+1,nu;
                   do i=1,no; do j=i+1,no; do k=j+1,no; do l=k+1,no;
@@ -628,7 +643,7 @@ module dipeom4_star_p
 
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: I_oooo(no,no,no,no)
@@ -637,6 +652,10 @@ module dipeom4_star_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,i,j,k,l,rval),&
+                  !$omp reduction(+:I_oooo)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! I(ijmk) <- 1/2 g(mlab) * r3(abijkl)
@@ -647,6 +666,9 @@ module dipeom4_star_p
                      I_oooo(i,k,:,l) = I_oooo(i,k,:,l) + h2_oovv(:,j,a,b)*rval ! (jl)
                      I_oooo(i,j,:,l) = I_oooo(i,j,:,l) - h2_oovv(:,k,a,b)*rval ! (kl)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ijk)
                   do i = 1,no
@@ -683,7 +705,7 @@ module dipeom4_star_p
 
                   integer, intent(in) :: no, nu, n4
                   real(kind=8), intent(in) :: h2_oovv(no,no,nu,nu)
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
                   real(kind=8), intent(in) :: r4_amps(n4)
 
                   real(kind=8), intent(inout) :: I_oovv(no,no,nu,nu)
@@ -692,6 +714,10 @@ module dipeom4_star_p
                   real(kind=8) :: val, rval
                   integer :: a, b, c, d, i, j, k, l, e, f, m, n, idet
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel private(a,b,i,j,k,l,rval),&
+                  !$omp reduction(+:I_oovv)
+                  !$omp do schedule(static)
                   do idet = 1,n4
                      rval = r4_amps(idet)
                      ! I(ijae) <- 1/2 A(ab)A(kl/ij) g(kleb) * r3(abijkl)
@@ -712,6 +738,9 @@ module dipeom4_star_p
                      I_oovv(i,l,b,:) = I_oovv(i,l,b,:) - h2_oovv(k,j,:,a)*rval ! (jl)
                      I_oovv(k,l,b,:) = I_oovv(k,l,b,:) + h2_oovv(i,j,:,a)*rval ! (ik)(jl)
                   end do
+                  !$omp end do
+                  !$omp end parallel
+                  !!!! END OMP PARALLEL SECTION !!!!
 
                   ! antisymmetrize A(ij)
                   do i = 1,no
@@ -742,7 +771,7 @@ module dipeom4_star_p
                   real(kind=8), intent(in) :: h1_oo(no,no),h1_vv(nu,nu)
                   real(kind=8), intent(in) :: fock_oo(no,no),fock_vv(nu,nu)
                   real(kind=8), intent(in) :: omega
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
 
                   real(kind=8), intent(inout) :: r1(no,no)
                   !f2py intent(in,out) :: r1(0:no-1,0:no-1)
@@ -778,6 +807,8 @@ module dipeom4_star_p
                      end do
                   end do
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,i,j,k,l,denom)
                   do idet = 1,n4
                      a = r4_excits(idet,1); b = r4_excits(idet,2); 
                      i = r4_excits(idet,3); j = r4_excits(idet,4); k = r4_excits(idet,5); l = r4_excits(idet,6);
@@ -785,6 +816,8 @@ module dipeom4_star_p
                      denom = omega + fock_oo(i,i) + fock_oo(j,j) + fock_oo(k,k) + fock_oo(l,l) - fock_vv(a,a) - fock_vv(b,b)
                      r4_amps(idet) = r4_amps(idet)/denom
                   end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
 
               end subroutine update_r
          
@@ -802,7 +835,7 @@ module dipeom4_star_p
                   real(kind=8), intent(in) :: h1_oo(no,no),h1_vv(nu,nu)
                   real(kind=8), intent(in) :: h2_oooo(no,no,no,no),h2_voov(nu,no,no,nu),h2_vvvv(nu,nu,nu,nu)
                   real(kind=8), intent(in) :: omega
-                  integer, intent(in) :: r4_excits(n4,6)
+                  integer(kind=2), intent(in) :: r4_excits(n4,6)
 
                   real(kind=8), intent(inout) :: r1(no,no)
                   !f2py intent(in,out) :: r1(0:no-1,0:no-1)
@@ -841,6 +874,8 @@ module dipeom4_star_p
                      end do
                   end do
 
+                  !!!! BEGIN OMP PARALLEL SECTION !!!!
+                  !$omp parallel do schedule(static) private(a,b,i,j,k,l,denom)
                   do idet = 1,n4
                      a = r4_excits(idet,1); b = r4_excits(idet,2);
                      i = r4_excits(idet,3); j = r4_excits(idet,4); k = r4_excits(idet,5); l = r4_excits(idet,6);
@@ -853,6 +888,8 @@ module dipeom4_star_p
                                    - g_vvvv(a,b,a,b)
                      r4_amps(idet) = r4_amps(idet)/denom
                   end do
+                  !$omp end parallel do
+                  !!!! END OMP PARALLEL SECTION !!!!
 
               end subroutine update_r_full_denom
 
@@ -984,7 +1021,7 @@ module dipeom4_star_p
               integer, intent(in) :: idx_table(n1,n2,n3,n4)
 
               integer, intent(inout) :: loc_arr(2,nloc)
-              integer, intent(inout) :: excits(n3p,6)
+              integer(kind=2), intent(inout) :: excits(n3p,6)
               real(kind=8), intent(inout) :: amps(n3p)
               real(kind=8), intent(inout), optional :: resid(n3p)
 
@@ -1043,7 +1080,7 @@ module dipeom4_star_p
               integer, intent(in) :: idx_table(n1,n2,n3,n4,n5)
 
               integer, intent(inout) :: loc_arr(2,nloc)
-              integer, intent(inout) :: excits(n3p,6)
+              integer(kind=2), intent(inout) :: excits(n3p,6)
               real(kind=8), intent(inout) :: amps(n3p)
               real(kind=8), intent(inout), optional :: resid(n3p)
 
@@ -1199,4 +1236,26 @@ module dipeom4_star_p
 
       end subroutine sum4
 
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!! THREAD CONTROL !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+      subroutine set_num_threads(nthreads)
+          ! Set the number of OpenMP threads used by the kernels. This only affects
+          ! the OpenMP runtime, not the thread pool of the BLAS library.
+          integer, intent(in) :: nthreads
+
+          !$ call omp_set_num_threads(nthreads)
+
+      end subroutine set_num_threads
+
+      subroutine get_num_threads(nthreads)
+          ! Return the number of OpenMP threads used by the kernels (1 if the
+          ! module was compiled without OpenMP).
+          integer, intent(out) :: nthreads
+
+          nthreads = 1
+          !$ nthreads = omp_get_max_threads()
+
+      end subroutine get_num_threads
+
 end module dipeom4_star_p
@@ -11,3 +11,13 @@ def kernel(fock, g, o, v):
                     denom = fock[o, o][i, i] + fock[o, o][j, j] - fock[v, v][a, a] - fock[v, v][b, b]
                     energy += g[o, o, v, v][i, j, a, b] * g[v, v, o, o][a, b, i, j] / denom
     return energy
+
+def get_amplitudes(fock, g, o, v):
+    """Compute the first-order (MP2) T2 amplitudes
+    t2[a, b, i, j] = < ab | v | ij > / (e_i + e_j - e_a - e_b).
+    The same expression holds for the antisymmetrized spin-orbital
+    integrals and for the spin-free integrals of RHF-based methods."""
+    eps = np.diagonal(fock)
+    n = np.newaxis
+    e_abij = (eps[n, n, o, n] + eps[n, n, n, o] - eps[v, n, n, n] - eps[n, v, n, n])
+    return g[v, v, o, o] / e_abij
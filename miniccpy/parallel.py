@@ -0,0 +1,145 @@
+"""Process-parallel solution of independent EOMCC roots. The large arrays
+(T, HBar, and the integrals) are copied once into POSIX shared memory and every
+worker process attaches to them instead of receiving its own pickled copy."""
+import atexit
+import io
+import os
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+import numpy as np
+
+# environment variables controlling the size of the BLAS/OpenMP thread pools
+THREAD_VARIABLES = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                    "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"]
+
+# shared-memory segments attached by this (worker) process, keyed by name
+_attached = {}
+
+def share_arrays(obj, blocks):
+    """Copy every numpy array contained in `obj` (arbitrarily nested tuples,
+    lists, and dictionaries are allowed) into a new shared-memory segment. The
+    segments are appended to `blocks` and a picklable descriptor of `obj` is
+    returned."""
+    if isinstance(obj, np.ndarray):
+        shm = shared_memory.SharedMemory(create=True, size=max(obj.nbytes, 1))
+        buf = np.ndarray(obj.shape, dtype=obj.dtype, buffer=shm.buf)
+        buf[...] = obj
+        blocks.append(shm)
+        return ("__shm__", shm.name, obj.shape, obj.dtype.str)
+    if isinstance(obj, dict):
+        return {key: share_arrays(x, blocks) for key, x in obj.items()}
+    if isinstance(obj, (tuple, list)):
+        return type(obj)(share_arrays(x, blocks) for x in obj)
+    return obj
+
+def attach_arrays(desc):
+    """Rebuild the object described by `desc` (see `share_arrays`) using
+    read-only numpy views of the shared-memory segments. The views are marked
+    read-only so that a kernel updating one of them in place raises an error
+    instead of silently changing the data seen by the other workers; arrays that
+    a kernel modifies must be passed as private arguments instead. Fortran
+    kernels accept read-only arrays for intent(in) arguments and, as in a serial
+    run, only copy the blocks that are not Fortran contiguous."""
+    if isinstance(desc, tuple) and len(desc) == 4 and desc[0] == "__shm__":
+        _, name, shape, dtype = desc
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+        arr = np.ndarray(shape, dtype=dtype, buffer=_attached[name].buf)
+        arr.flags.writeable = False
+        return arr
+    if isinstance(desc, dict):
+        return {key: attach_arrays(x) for key, x in desc.items()}
+    if isinstance(desc, (tuple, list)):
+        return type(desc)(attach_arrays(x) for x in desc)
+    return desc
+
+def detach_arrays():
+    """Close the shared-memory segments attached by this (worker) process. A
+    segment still referenced by a live view is left to be unmapped at exit."""
+    for shm in _attached.values():
+        try:
+            shm.close()
+        except BufferError:
+            pass
+    _attached.clear()
+
+def release_arrays(blocks):
+    """Close and unlink the shared-memory segments created by `share_arrays`."""
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+    blocks.clear()
+
+def available_cores():
+    """Return the number of CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _init_worker(scratch_root, nthreads):
+    """Give each worker its own BLAS thread budget and its own scratch directory,
+    so that out-of-core files (e.g., eomcc-vectors.hdf5) do not collide. The
+    shared-memory segments attached by the worker are closed when it exits."""
+    for var in THREAD_VARIABLES:
+        os.environ[var] = str(nthreads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=nthreads)
+    except ImportError:
+        pass
+    os.chdir(tempfile.mkdtemp(prefix=f"worker-{os.getpid()}-", dir=scratch_root))
+    atexit.register(detach_arrays)
+
+def _run_job(func, args, shared, private):
+    """Solve one root in the worker. Output printed by the kernel is captured
+    so that the parent can print it in order."""
+    log = io.StringIO()
+    tic = time.time()
+    with redirect_stdout(log):
+        result = func(*args, **attach_arrays(shared), **private)
+    toc = time.time()
+    return result, toc - tic, log.getvalue()
+
+def solve_roots_parallel(func, jobs, shared, nproc, nthreads=None, private=None):
+    """Evaluate `func(*job, **shared, **private)` for every job in `jobs` using a
+    pool of `nproc` processes. The arrays in the dictionary `shared` are placed in
+    shared memory and are common to all jobs, while those in `private` are copied
+    to every job and may be modified by `func`. Each worker uses `nthreads` BLAS threads
+    (default: the available cores divided evenly among the workers). Returns a
+    list of (result, elapsed time, printed output) in the order of `jobs`."""
+    nproc = max(1, min(nproc, len(jobs)))
+    if private is None:
+        private = {}
+    ncore = available_cores()
+    if nthreads is None:
+        nthreads = max(1, ncore // nproc)
+    if nproc * nthreads > ncore:
+        print(f"    WARNING: {nproc} processes x {nthreads} threads oversubscribe the {ncore} available cores")
+
+    blocks = []
+    scratch_root = tempfile.mkdtemp(prefix="miniccpy-", dir=os.getcwd())
+    # workers are spawned with the thread-count variables already in place so that
+    # the BLAS library picks them up at import time
+    saved_env = {var: os.environ.get(var) for var in THREAD_VARIABLES}
+    try:
+        shared_desc = share_arrays(shared, blocks)
+        for var in THREAD_VARIABLES:
+            os.environ[var] = str(nthreads)
+        with ProcessPoolExecutor(max_workers=nproc, mp_context=get_context("spawn"),
+                                 initializer=_init_worker, initargs=(scratch_root, nthreads)) as pool:
+            futures = [pool.submit(_run_job, func, job, shared_desc, private) for job in jobs]
+            results = [future.result() for future in futures]
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        release_arrays(blocks)
+        shutil.rmtree(scratch_root, ignore_errors=True)
+    return results
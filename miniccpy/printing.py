@@ -263,6 +263,24 @@ def print_1h_vector(r, nu, print_threshold):
             n += 1
     return 
 
+def print_r1p_vector(r, no, print_threshold):
+    nu, = r.shape
+    n = 1
+    for a in range(nu):
+        if abs(r[a]) > print_threshold:
+            print(f"     [{n}]  -> {a + no + 1}    {r[a]}")
+            n += 1
+    return
+
+def print_r1h_vector(r, nu, print_threshold):
+    no, = r.shape
+    n = 1
+    for i in range(no):
+        if abs(r[i]) > print_threshold:
+            print(f"     [{n}]  {i + 1} ->     {r[i]}")
+            n += 1
+    return
+
 def spatial_index(p):
     if p % 2 == 0:
         return int(p / 2)
@@ -311,6 +329,37 @@ def print_amplitudes(t1, t2, print_threshold, rhf=False):
                         n += 1
     return
 
+def print_rhf_triplet_amplitudes(r1, r2ab, r2aa, print_threshold):
+    """Print the unique amplitudes of an RHF-based M_s = 0 triplet vector
+    stored as (r1, r2ab, r2aa) (see eomrccsd_triplet)."""
+
+    nu, no = r1.shape
+    n = 1
+    print("          I -> A")
+    for a in range(nu):
+        for i in range(no):
+            if abs(r1[a, i]) <= print_threshold: continue
+            print(f"     [{n}]  {i + 1} -> {a + no + 1}    {r1[a, i]}")
+            n += 1
+    print("          I j -> A b")
+    for a in range(nu):
+        for b in range(a, nu):
+            for i in range(no):
+                for j in range(no):
+                    if a == b and i >= j: continue
+                    if abs(r2ab[a, b, i, j]) <= print_threshold: continue
+                    print(f"     [{n}]  {i + 1} {j + 1} -> {a + no + 1} {b + no + 1}    {r2ab[a, b, i, j]}")
+                    n += 1
+    print("          I J -> A B")
+    for a in range(nu):
+        for b in range(a + 1, nu):
+            for i in range(no):
+                for j in range(i + 1, no):
+                    if abs(r2aa[a, b, i, j]) <= print_threshold: continue
+                    print(f"     [{n}]  {i + 1} {j + 1} -> {a + no + 1} {b + no + 1}    {r2aa[a, b, i, j]}")
+                    n += 1
+    return
+
 def print_dip_amplitudes(r1, r2, print_threshold):
 
     no, _, nu, _ = r2.shape
@@ -1,7 +1,17 @@
-import numpy as np
+import hashlib
+import itertools
+import os
 import time
+from math import comb
+import numpy as np
 from miniccpy.utilities import get_memory_usage
 
+# Default directory for the on-disk cache of excitation lists (None disables caching)
+PSPACE_CACHE_DIR = os.environ.get("MINICCPY_PSPACE_CACHE")
+# Integer type of the orbital indices in P-space excitation lists, matching the
+# integer(kind=2) excitation arrays of the Fortran kernels in miniccpy/lib
+EXCITATION_DTYPE = np.int16
+
 def active_hole(x, nocc, nact):
     if x < nocc - nact:
         return 0
@@ -20,24 +30,100 @@ def cvs_core_occ(x, cvsmin, cvsmax):
     else:
         return 1
 
-def get_active_triples_pspace(no, nu, nacto=0, nactu=0, num_active=1, point_group="C1", orbsym=None, target_irrep="A"):
-    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
+def as_excitation_list(excitations):
+    """Return `excitations` as a Fortran-ordered EXCITATION_DTYPE array, the form
+    that the P-space Fortran kernels take (and update in place) without copying."""
+    excitations = np.asarray(excitations)
+    if excitations.size > 0 and excitations.max() > np.iinfo(EXCITATION_DTYPE).max:
+        raise ValueError("Orbital indices in the excitation list exceed the range of {}".format(np.dtype(EXCITATION_DTYPE).name))
+    return np.asfortranarray(excitations, dtype=EXCITATION_DTYPE)
 
-    def count_active_occ(occ):
-        return sum([active_hole(i, no, nacto) for i in occ])
+def empty_pspace():
+    """Placeholder excitation list of an empty P space. f2py cannot pass arrays of
+    length 0, so an empty P space is represented by a single (invalid) row of ones."""
+    return np.ones((1, 6), dtype=EXCITATION_DTYPE, order="F")
 
-    def count_active_unocc(unocc):
-        return sum([active_particle(a, nactu) for a in unocc])
+def is_empty_pspace(excitations):
+    """Check whether `excitations` is the placeholder returned by empty_pspace."""
+    return excitations.shape[0] == 1 and np.all(excitations[0, :] == 1)
 
+def get_combinations(n, k):
+    """Return all strictly increasing k-tuples of orbital indices drawn from
+    range(n) as the rows of an (n choose k, k) integer array, in lexicographic order."""
+    ncomb = comb(n, k)
+    flat = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(n), k)),
+                       dtype=np.int32, count=ncomb * k)
+    return flat.reshape(ncomb, k)
+
+def build_excitation_list(unocc, occ, no, isym, sym_ref, sym_target):
+    """Pair each occupied string (row of `occ`) with every unoccupied string (row of
+    `unocc`) such that the excitation connects the reference of symmetry `sym_ref` to
+    a state of symmetry `sym_target`. The result is a preallocated, Fortran-ordered
+    EXCITATION_DTYPE array with rows [unocc + 1, occ + 1], ordered as in the nested loops
+    with the occupied indices outermost."""
+    isym = np.asarray(isym, dtype=np.int32)
+    nirrep = 8
+    ku, ko = unocc.shape[1], occ.shape[1]
+    occ_sym = sym_ref ^ np.bitwise_xor.reduce(isym[occ], axis=1) ^ sym_target
+    unocc_sym = np.bitwise_xor.reduce(isym[unocc + no], axis=1)
+    # group the unoccupied strings by irrep; every occupied string of (target-adjusted)
+    # symmetry s is paired with the contiguous block of unoccupied strings of symmetry s
+    by_sym = [unocc[unocc_sym == s] for s in range(nirrep)]
+    counts = np.array([len(block) for block in by_sym])[occ_sym]
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    excitations = np.empty((offsets[-1], ku + ko), dtype=EXCITATION_DTYPE, order="F")
+    for s in range(nirrep):
+        idx = np.flatnonzero(occ_sym == s)
+        block = by_sym[s]
+        if len(idx) == 0 or len(block) == 0: continue
+        rows = offsets[idx][:, None] + np.arange(len(block))[None, :]
+        excitations[rows, :ku] = block + 1
+        excitations[rows, ku:] = occ[idx][:, None, :] + 1
+    return excitations
+
+def load_or_build_pspace(name, key, builder, cache_dir=None):
+    """Return the excitation list produced by `builder()`, reusing a copy saved in
+    `cache_dir` (default: PSPACE_CACHE_DIR) under a file name derived from `key`
+    when available. With no cache directory, the list is always built."""
+    if cache_dir is None:
+        cache_dir = PSPACE_CACHE_DIR
+    if cache_dir is None:
+        return builder()
+    fid = os.path.join(cache_dir, f"{name}-{hashlib.sha1(repr(key).encode()).hexdigest()[:16]}.npy")
+    if os.path.exists(fid):
+        print(f"   Loaded excitation list from {fid}")
+        return as_excitation_list(np.load(fid))
+    excitations = builder()
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(fid, excitations)
+    return excitations
+
+def _symmetry_setup(no, nu, point_group, orbsym, target_irrep):
+    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
 
     pg_irrep_to_number = get_pg_irreps(point_group)
     if orbsym is None:
         orbsym = ["A" for i in range(no + nu)]
 
-    isym = [pg_irrep_to_number[p] for p in orbsym]
+    isym = np.array([pg_irrep_to_number[p] for p in orbsym], dtype=np.int32)
     reference_irrep = get_reference_symmetry(no, point_group, isym)
     sym_target = pg_irrep_to_number[target_irrep]
     sym_ref = pg_irrep_to_number[reference_irrep]
+    return isym, reference_irrep, sym_ref, sym_target
+
+def get_sort_plan(lib, excitations, no, nu):
+    """Build the sorting plan of the P-space Fortran kernels in `lib` (ccsdt_p.ccsdt_p
+    or dipeom4_p.dipeom4_p) for a fixed excitation list. The plan holds the permutation,
+    block locations, and index table of every sort carried out by update_t3_p/build_hr4_p,
+    so that these are computed once per P space instead of on every call. It is returned
+    as the tuple (perm, loc_arr, idx_table), which is passed to the kernels right after
+    the excitation list, and is only valid for the list in its current order."""
+    excitations = as_excitation_list(excitations)
+    nperm, nloc, nidx = lib.get_plan_dims(no, nu)
+    return lib.build_sort_plan(excitations, nperm, nloc, nidx, no, nu)
+
+def get_active_triples_pspace(no, nu, nacto=0, nactu=0, num_active=1, point_group="C1", orbsym=None, target_irrep="A", cache_dir=None):
+    isym, reference_irrep, sym_ref, sym_target = _symmetry_setup(no, nu, point_group, orbsym, target_irrep)
 
     print(f"   Constructing triples list for CCSDt({'I' * num_active})-type P space")
     print("   ---------------------------------------------------")
@@ -48,24 +134,18 @@ def get_active_triples_pspace(no, nu, nacto=0, nactu=0, num_active=1, point_grou
     print("   Reference Irrep = ", reference_irrep)
     print(f"   Target Irrep = {target_irrep} ({point_group})")
 
+    def builder():
+        occ = get_combinations(no, 3)
+        occ = occ[np.sum(occ >= no - nacto, axis=1) >= num_active]
+        unocc = get_combinations(nu, 3)
+        unocc = unocc[np.sum(unocc < nactu, axis=1) >= num_active]
+        return build_excitation_list(unocc, occ, no, isym, sym_ref, sym_target)
+
     tic = time.perf_counter()
-    t3_excitations = []
-    for i in range(no):
-        for j in range(i + 1, no):
-            for k in range(j + 1, no):
-                if count_active_occ([i, j, k]) < num_active: continue
-                sym_occ = sym_ref ^ isym[i] ^ isym[j] ^ isym[k]
-                for a in range(nu):
-                    for b in range(a + 1, nu):
-                        for c in range(b + 1, nu):
-                            if count_active_unocc([a, b, c]) >= num_active:
-                                sym_unocc = isym[a + no] ^ isym[b + no] ^ isym[c + no]
-                                if sym_occ ^ sym_unocc != sym_target: continue
-                                t3_excitations.append([a + 1, b + 1, c + 1, i + 1, j + 1, k + 1])
-    # Convert the lists into Numpy arrays
-    t3_excitations = np.asarray(t3_excitations, order="F")
-    if len(t3_excitations.shape) < 2:
-        t3_excitations = np.ones((1, 6))
+    key = (no, nu, nacto, nactu, num_active, point_group.upper(), tuple(isym.tolist()), target_irrep)
+    t3_excitations = load_or_build_pspace("triples", key, builder, cache_dir)
+    if t3_excitations.shape[0] == 0:
+        t3_excitations = empty_pspace()
     # Print the number of triples of a given spincase 
     print(f"   Active space contains {t3_excitations.shape[0]} triples")
     toc = time.perf_counter()
@@ -74,20 +154,15 @@ def get_active_triples_pspace(no, nu, nacto=0, nactu=0, num_active=1, point_grou
     print(f"   Completed in {minutes:.1f}m {seconds:.1f}s\n")
     return t3_excitations
 
-def get_active_4h2p_pspace(no, nu, nacto=0, num_active=2, point_group="C1", orbsym=None, target_irrep="A"):
-    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
-
-    def count_active_occ(occ):
-        return sum([active_hole(i, no, nacto) for i in occ])
+def get_active_4h2p_excitations(no, nu, nacto, num_active, isym, sym_ref, sym_target):
+    """Vectorized construction of the list of active-space 4h-2p excitations."""
+    occ = get_combinations(no, 4)
+    occ = occ[np.sum(occ >= no - nacto, axis=1) >= num_active]
+    unocc = get_combinations(nu, 2)
+    return build_excitation_list(unocc, occ, no, isym, sym_ref, sym_target)
 
-    pg_irrep_to_number = get_pg_irreps(point_group)
-    if orbsym is None:
-        orbsym = ["A" for i in range(no + nu)]
-
-    isym = [pg_irrep_to_number[p] for p in orbsym]
-    reference_irrep = get_reference_symmetry(no, point_group, isym)
-    sym_target = pg_irrep_to_number[target_irrep]
-    sym_ref = pg_irrep_to_number[reference_irrep]
+def get_active_4h2p_pspace(no, nu, nacto=0, num_active=2, point_group="C1", orbsym=None, target_irrep="A", cache_dir=None):
+    isym, reference_irrep, sym_ref, sym_target = _symmetry_setup(no, nu, point_group, orbsym, target_irrep)
 
     print(f"   Constructing triples list for DIP-EOMCCSD(4h-2p)({'I' * num_active})-type P space")
     print("   ---------------------------------------------------")
@@ -97,22 +172,12 @@ def get_active_4h2p_pspace(no, nu, nacto=0, num_active=2, point_group="C1", orbs
     print(f"   Target Irrep = {target_irrep} ({point_group})")
 
     tic = time.perf_counter()
-    r3_excitations = []
-    for i in range(no):
-        for j in range(i + 1, no):
-            for k in range(j + 1, no):
-                for l in range(k + 1, no):
-                    if count_active_occ([i, j, k, l]) < num_active: continue
-                    sym_occ = sym_ref ^ isym[i] ^ isym[j] ^ isym[k] ^ isym[l]
-                    for c in range(nu):
-                        for d in range(c + 1, nu):
-                            sym_unocc = isym[c + no] ^ isym[d + no]
-                            if sym_occ ^ sym_unocc != sym_target: continue
-                            r3_excitations.append([c + 1, d + 1, i + 1, j + 1, k + 1, l + 1])
-    # Convert the lists into Numpy arrays
-    r3_excitations = np.asarray(r3_excitations, order="F")
-    if len(r3_excitations.shape) < 2:
-        r3_excitations = np.ones((1, 6))
+    key = (no, nu, nacto, 0, num_active, point_group.upper(), tuple(isym.tolist()), target_irrep)
+    r3_excitations = load_or_build_pspace(
+        "4h2p", key, lambda: get_active_4h2p_excitations(no, nu, nacto, num_active, isym, sym_ref, sym_target), cache_dir
+    )
+    if r3_excitations.shape[0] == 0:
+        r3_excitations = empty_pspace()
     # Print the number of triples of a given spincase 
     print(f"   Active space contains {r3_excitations.shape[0]} 4h2p excitations")
     toc = time.perf_counter()
@@ -122,19 +187,7 @@ def get_active_4h2p_pspace(no, nu, nacto=0, num_active=2, point_group="C1", orbs
     return r3_excitations
 
 def get_active_4h2p_pspace_array(no, nu, nacto=0, num_active=2, point_group="C1", orbsym=None, target_irrep="A"):
-    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
-
-    def count_active_occ(occ):
-        return sum([active_hole(i, no, nacto) for i in occ])
-
-    pg_irrep_to_number = get_pg_irreps(point_group)
-    if orbsym is None:
-        orbsym = ["A" for i in range(no + nu)]
-
-    isym = [pg_irrep_to_number[p] for p in orbsym]
-    reference_irrep = get_reference_symmetry(no, point_group, isym)
-    sym_target = pg_irrep_to_number[target_irrep]
-    sym_ref = pg_irrep_to_number[reference_irrep]
+    isym, reference_irrep, sym_ref, sym_target = _symmetry_setup(no, nu, point_group, orbsym, target_irrep)
 
     print(f"   Constructing triples list for DIP-EOMCCSD(4h-2p)({'I' * num_active})-type P space")
     print("   ---------------------------------------------------")
@@ -145,19 +198,9 @@ def get_active_4h2p_pspace_array(no, nu, nacto=0, num_active=2, point_group="C1"
 
     tic = time.perf_counter()
     pspace = np.zeros((nu, nu, no, no, no, no), dtype=np.int32)
-    cnt = 0
-    for i in range(no):
-        for j in range(i + 1, no):
-            for k in range(j + 1, no):
-                for l in range(k + 1, no):
-                    if count_active_occ([i, j, k, l]) < num_active: continue
-                    sym_occ = sym_ref ^ isym[i] ^ isym[j] ^ isym[k] ^ isym[l]
-                    for c in range(nu):
-                        for d in range(c + 1, nu):
-                            sym_unocc = isym[c + no] ^ isym[d + no]
-                            if sym_occ ^ sym_unocc != sym_target: continue
-                            pspace[c, d, i, j, k, l] = 1
-                            cnt += 1
+    r3_excitations = get_active_4h2p_excitations(no, nu, nacto, num_active, isym, sym_ref, sym_target)
+    pspace[tuple((r3_excitations - 1).T)] = 1
+    cnt = r3_excitations.shape[0]
     # Print the number of triples of a given spincase 
     print(f"   Active space contains {cnt} 4h2p excitations")
     toc = time.perf_counter()
@@ -166,20 +209,39 @@ def get_active_4h2p_pspace_array(no, nu, nacto=0, num_active=2, point_group="C1"
     print(f"   Completed in {minutes:.1f}m {seconds:.1f}s\n")
     return pspace
 
-def get_cvs_4h2p_pspace(no, nu, cvsmin, cvsmax, num_core=1, point_group="C1", orbsym=None, target_irrep="A"):
-    from miniccpy.symmetry import get_pg_irreps, get_reference_symmetry
+def get_active_4p2h_excitations(no, nu, nactu, num_active, isym, sym_ref, sym_target):
+    """Vectorized construction of the list of active-space 4p-2h excitations."""
+    unocc = get_combinations(nu, 4)
+    unocc = unocc[np.sum(unocc < nactu, axis=1) >= num_active]
+    occ = get_combinations(no, 2)
+    return build_excitation_list(unocc, occ, no, isym, sym_ref, sym_target)
 
-    def count_cvs_core(occ):
-        return sum([cvs_core_occ(i, cvsmin, cvsmax) for i in occ])
+def get_active_4p2h_pspace(no, nu, nactu=0, num_active=2, point_group="C1", orbsym=None, target_irrep="A", cache_dir=None):
+    isym, reference_irrep, sym_ref, sym_target = _symmetry_setup(no, nu, point_group, orbsym, target_irrep)
 
-    pg_irrep_to_number = get_pg_irreps(point_group)
-    if orbsym is None:
-        orbsym = ["A" for i in range(no + nu)]
+    print(f"   Constructing 4p-2h list for DEA-EOMCCSD(4p-2h)({'I' * num_active})-type P space")
+    print("   ---------------------------------------------------")
+    print("   Total number of unoccupied orbitals = ", nu)
+    print("   Number of active unoccupied orbitals = ", nactu)
+    print("   Reference Irrep = ", reference_irrep)
+    print(f"   Target Irrep = {target_irrep} ({point_group})")
 
-    isym = [pg_irrep_to_number[p] for p in orbsym]
-    reference_irrep = get_reference_symmetry(no, point_group, isym)
-    sym_target = pg_irrep_to_number[target_irrep]
-    sym_ref = pg_irrep_to_number[reference_irrep]
+    tic = time.perf_counter()
+    key = (no, nu, 0, nactu, num_active, point_group.upper(), tuple(isym.tolist()), target_irrep)
+    r3_excitations = load_or_build_pspace(
+        "4p2h", key, lambda: get_active_4p2h_excitations(no, nu, nactu, num_active, isym, sym_ref, sym_target), cache_dir
+    )
+    if r3_excitations.shape[0] == 0:
+        r3_excitations = empty_pspace()
+    print(f"   Active space contains {r3_excitations.shape[0]} 4p2h excitations")
+    toc = time.perf_counter()
+    minutes, seconds = divmod(toc - tic, 60)
+    print(f"   Memory usage: {get_memory_usage()} MB")
+    print(f"   Completed in {minutes:.1f}m {seconds:.1f}s\n")
+    return r3_excitations
+
+def get_cvs_4h2p_pspace(no, nu, cvsmin, cvsmax, num_core=1, point_group="C1", orbsym=None, target_irrep="A", cache_dir=None):
+    isym, reference_irrep, sym_ref, sym_target = _symmetry_setup(no, nu, point_group, orbsym, target_irrep)
 
     print(f"   Constructing 4h-2p list for CVS-DIP-EOMCCSD(4h-2p)-type P space")
     print("   ---------------------------------------------------")
@@ -189,27 +251,21 @@ def get_cvs_4h2p_pspace(no, nu, cvsmin, cvsmax, num_core=1, point_group="C1", or
     print("   Reference Irrep = ", reference_irrep)
     print(f"   Target Irrep = {target_irrep} ({point_group})")
 
+    def builder():
+        occ = get_combinations(no, 4)
+        occ = occ[np.sum((occ >= cvsmin) & (occ <= cvsmax), axis=1) >= num_core]
+        unocc = get_combinations(nu, 2)
+        return build_excitation_list(unocc, occ, no, isym, sym_ref, sym_target)
+
     tic = time.perf_counter()
-    r3_excitations = []
-    for i in range(no):
-        for j in range(i + 1, no):
-            for k in range(j + 1, no):
-                for l in range(k + 1, no):
-                    if count_cvs_core([i, j, k, l]) < num_core: continue
-                    sym_occ = sym_ref ^ isym[i] ^ isym[j] ^ isym[k] ^ isym[l]
-                    for c in range(nu):
-                        for d in range(c + 1, nu):
-                            sym_unocc = isym[c + no] ^ isym[d + no]
-                            if sym_occ ^ sym_unocc != sym_target: continue
-                            r3_excitations.append([c + 1, d + 1, i + 1, j + 1, k + 1, l + 1])
-    # Convert the lists into Numpy arrays
-    r3_excitations = np.asarray(r3_excitations, order="F")
-    if len(r3_excitations.shape) < 2:
-        r3_excitations = np.ones((1, 6))
+    key = (no, nu, cvsmin, cvsmax, num_core, point_group.upper(), tuple(isym.tolist()), target_irrep)
+    r3_excitations = load_or_build_pspace("cvs-4h2p", key, builder, cache_dir)
+    if r3_excitations.shape[0] == 0:
+        r3_excitations = empty_pspace()
     # Print the number of triples of a given spincase
     print(f"   CVS space contains {r3_excitations.shape[0]} 4h2p excitations")
     toc = time.perf_counter()
     minutes, seconds = divmod(toc - tic, 60)
     print(f"   Memory usage: {get_memory_usage()} MB")
     print(f"   Completed in {minutes:.1f}m {seconds:.1f}s\n")
-    return r3_excitations
\ No newline at end of file
+    return r3_excitations
@@ -225,9 +225,10 @@ def compute_t3(I_vooo, I_vvov, t2, e_abcijk, fock, e_abc):
     # print(error)
     return triples_res * e_abcijk
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, T0=None):
     """Solve the CCSDT system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2) is provided."""
 
     eps = np.diagonal(fock)
     n = np.newaxis
@@ -242,8 +243,11 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc))
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    else:
+        t1, t2 = (np.copy(t) for t in T0)
 
     old_energy = rcc_energy(t1, t2, fock, g, o, v)
 
@@ -3,6 +3,7 @@ import numpy as np
 from miniccpy.energy import rcc_energy
 from miniccpy.helper_cc import get_rccs_intermediates
 from miniccpy.diis import DIIS
+from miniccpy.checkpoint import save_checkpoint, load_checkpoint
 from miniccpy.utilities import get_memory_usage
 
 def singles_residual(t1, t2, f, g, o, v):
@@ -95,9 +96,16 @@ def doubles_residual(t1, t2, f, g, o, v):
     return doubles_res
 
 
-def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi):
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, T0=None,
+           checkpoint=None, checkpoint_interval=1, restart=None, return_unconverged=False, stats=None):
     """Solve the CCSD system of nonlinear equations using Jacobi iterations
-    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0."""
+    with DIIS acceleration. The initial values of the T amplitudes are taken to be 0,
+    unless a starting guess T0 = (t1, t2) is provided or the solve is resumed
+    from the checkpoint file `restart`. If `checkpoint` is given, T and the DIIS
+    history are written to it every `checkpoint_interval` iterations. With
+    `return_unconverged`, the amplitudes with the smallest residual are returned
+    instead of raising an error if the iterations do not converge.
+    If a dictionary `stats` is given, the number of iterations is stored in stats["niter"]."""
 
     eps = np.diagonal(fock)
     n = np.newaxis
@@ -111,14 +119,22 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
     diis_engine = DIIS(ndim, diis_size, out_of_core)
 
-    t1 = np.zeros((nunocc, nocc))
-    t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    if T0 is None:
+        t1 = np.zeros((nunocc, nocc))
+        t2 = np.zeros((nunocc, nunocc, nocc, nocc))
+    else:
+        t1, t2 = (np.copy(t) for t in T0)
     old_energy = rcc_energy(t1, t2, fock, g, o, v)
+    idx0 = 0
+    if restart is not None:
+        idx0, old_energy = load_checkpoint(restart, (t1, t2), diis_engine)
+        idx0 += 1
+    best_norm, T_best = np.inf, None
 
     print("    ==> R-CCSD amplitude equations <==")
     print("")
     print("     Iter               Energy                 |dE|                 |dT|     Wall Time     Memory")
-    for idx in range(maxit):
+    for idx in range(idx0, idx0 + maxit):
 
         tic = time.time()
 
@@ -127,6 +143,10 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
 
         res_norm = np.linalg.norm(residual_singles) + np.linalg.norm(residual_doubles)
 
+        # the residual belongs to the amplitudes before the update
+        if return_unconverged and res_norm < best_norm:
+            best_norm, T_best = res_norm, tuple(t.copy() for t in (t1, t2))
+
         t1 += residual_singles * e_ai
         t2 += residual_doubles * e_abij
 
@@ -143,13 +163,21 @@ def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_d
             t1 = T_extrap[:n1].reshape((nunocc, nocc))
             t2 = T_extrap[n1:].reshape((nunocc, nunocc, nocc, nocc))
 
+        if checkpoint is not None and (idx + 1) % checkpoint_interval == 0:
+            save_checkpoint(checkpoint, (t1, t2), diis_engine, idx, current_energy)
+
         old_energy = current_energy
 
         toc = time.time()
         minutes, seconds = divmod(toc - tic, 60)
         print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(idx, current_energy, delta_e, res_norm, minutes, seconds, get_memory_usage()))
     else:
-        raise ValueError("CCSD iterations did not converge")
+        if not return_unconverged:
+            raise ValueError("CCSD iterations did not converge")
+        print("    CCSD iterations did not converge; returning the amplitudes with the smallest residual")
+        t1, t2 = T_best
+    if stats is not None:
+        stats["niter"] = idx - idx0 + 1
 
     diis_engine.cleanup()
     e_corr = rcc_energy(t1, t2, fock, g, o, v)
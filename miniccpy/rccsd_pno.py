@@ -0,0 +1,258 @@
+import time
+import numpy as np
+from miniccpy.helper_cc import get_rccs_intermediates
+from miniccpy.mp2 import get_amplitudes
+from miniccpy.diis import DIIS
+from miniccpy.utilities import get_memory_usage
+
+def get_pair_natural_orbitals(t2, f, o, v, pno_threshold):
+    """Construct the pair natural orbitals (PNOs) of each occupied pair (i, j)
+    by diagonalizing the MP2 pair density
+        D(ij) = 2/(1 + delta_ij) * [T~(ij)^+ T(ij) + T~(ij) T(ij)^+],
+    where T(ij)[a, b] = t2[a, b, i, j] and T~(ij) = 2 T(ij) - T(ij)^+, and
+    keeping those with occupation numbers of magnitude at least `pno_threshold`. The
+    retained PNOs are semicanonicalized, so that each pair space has its own
+    diagonal virtual orbital energies. Pairs (i, j) and (j, i) share the same PNOs."""
+    nu, _, no, _ = t2.shape
+    Q = [None for ij in range(no**2)]
+    eps = [None for ij in range(no**2)]
+    for i in range(no):
+        for j in range(i, no):
+            T = t2[:, :, i, j]
+            Tt = 2.0 * T - T.T
+            D = 2.0 / (1.0 + float(i == j)) * (Tt.T @ T + Tt @ T.T)
+            occupation, C = np.linalg.eigh(0.5 * (D + D.T))
+            C = C[:, np.abs(occupation) >= pno_threshold]
+            # semicanonicalize the PNOs of the pair
+            eps_ij, W = np.linalg.eigh(C.T @ f[v, v] @ C)
+            Q[i * no + j] = Q[j * no + i] = C @ W
+            eps[i * no + j] = eps[j * no + i] = eps_ij
+    return Q, eps
+
+def decompress(t2_pno, Q, nu, no):
+    """Back-transform the PNO doubles of each pair to the canonical virtual basis."""
+    t2 = np.zeros((nu, nu, no, no))
+    for i in range(no):
+        for j in range(no):
+            t2[:, :, i, j] = Q[i * no + j] @ t2_pno[i * no + j] @ Q[i * no + j].T
+    return t2
+
+def get_pair_overlaps(Q):
+    """Compute the overlaps S(ij, kl) = Q(ij)^+ Q(kl) between the PNO spaces of
+    every two pairs, which project the doubles of pair (k, l) onto the PNO space of pair (i, j)."""
+    return [[Qij.T @ Qkl for Qkl in Q] for Qij in Q]
+
+def rcc_energy_pno(t1, t2_pno, Q, f, g, o, v):
+    """Calculate the RHF-based CC correlation energy with the doubles of each pair
+    (i, j) given in its own PNO space,
+        E = 2 * f(ia) t1(ai) + sum_{ij} sum_{ab} [2 <ij|ab> - <ij|ba>] [t2(ij)[a, b] + t1(ai) t1(bj)]."""
+    no = t1.shape[1]
+    energy = 2.0 * np.einsum("ia,ai->", f[o, v], t1, optimize=True)
+    for i in range(no):
+        for j in range(no):
+            ij = i * no + j
+            v_ss = 2.0 * g[o, o, v, v][i, j, :, :] - g[o, o, v, v][i, j, :, :].T
+            energy += np.sum((Q[ij].T @ v_ss @ Q[ij]) * t2_pno[ij])
+            energy += t1[:, i] @ v_ss @ t1[:, j]
+    return energy
+
+def singles_residual(t1, t2_pno, Q, f, g, o, v):
+    """Compute the projection of the CCSD Hamiltonian on singles
+        X[a, i] = < ia | (H_N exp(T1+T2))_C | 0 >
+    with the doubles of each pair (i, j) given in its own PNO space. The
+    T2 contractions are carried out pair by pair."""
+    no = t1.shape[1]
+    # intermediates
+    I_ov = (
+             f[o, v]
+           + 2.0 * np.einsum("mnef,fn->me", g[o, o, v, v], t1, optimize=True)
+           - np.einsum("mnfe,fn->me", g[o, o, v, v], t1, optimize=True)
+    )
+    I_vv = (
+            f[v, v]
+            + 2.0 * np.einsum("anef,fn->ae", g[v, o, v, v], t1, optimize=True)
+            - np.einsum("anfe,fn->ae", g[v, o, v, v], t1, optimize=True)
+    )
+    I_oo = (
+            f[o, o]
+            + 2.0 * np.einsum("mnif,fn->mi", g[o, o, o, v], t1, optimize=True)
+            - np.einsum("nmif,fn->mi", g[o, o, o, v], t1, optimize=True)
+            + np.einsum("me,ei->mi", I_ov, t1, optimize=True)
+    )
+    I_ooov = g[o, o, o, v] + np.einsum("mnfe,fi->mnie", g[o, o, v, v], t1, optimize=True)
+    I_vovv = g[v, o, v, v] - np.einsum("nmef,an->amef", g[o, o, v, v], t1, optimize=True)
+
+    singles_res = -np.einsum("mi,am->ai", I_oo, t1, optimize=True)
+    singles_res += np.einsum("ae,ei->ai", I_vv, t1, optimize=True)
+    singles_res += 2.0 * np.einsum("anif,fn->ai", g[v, o, o, v], t1, optimize=True)
+    singles_res -= np.einsum("anfi,fn->ai", g[v, o, v, o], t1, optimize=True)
+    singles_res += f[v, o]
+    for i in range(no):
+        for m in range(no):
+            Qim, Tim = Q[i * no + m], t2_pno[i * no + m]
+            # t2(mi) = t2(im)^+ in the shared PNO space of (i, m)
+            singles_res[:, i] += Qim @ ((2.0 * Tim - Tim.T) @ (Qim.T @ I_ov[m, :]))
+            Z = 2.0 * I_vovv[:, m, :, :] - I_vovv[:, m, :, :].transpose(0, 2, 1)
+            singles_res[:, i] += np.einsum("aef,eE,EF,fF->a", Z, Qim, Tim, Qim, optimize=True)
+            X = -2.0 * I_ooov[i, m, :, :] + I_ooov[m, i, :, :]
+            singles_res += Qim @ (Tim @ (Qim.T @ X.T))
+    return singles_res
+
+def doubles_residual(t1, t2_pno, Q, S, f, g, o, v):
+    """Compute the projection of the CCSD Hamiltonian on doubles
+        X(ij)[a', b'] = sum_{ab} Q(ij)[a, a'] < ijab | (H_N exp(T1+T2))_C | 0 > Q(ij)[b, b']
+    directly in the PNO space of each pair (i, j). The doubles of pair (k, l)
+    enter the residual of pair (i, j) through the overlaps S(ij, kl) between
+    the two PNO spaces, so that the canonical T2 is never formed."""
+    no = t1.shape[1]
+    H1, H2 = get_rccs_intermediates(t1, f, g, o, v)
+    # intermediates
+    L = 2.0 * g[o, o, v, v] - g[o, o, v, v].transpose(0, 1, 3, 2)
+    W = g[v, o, v, v] + 0.5 * H2[v, o, v, v]
+    I_vv = H1[v, v].copy()
+    I_oo = H1[o, o].copy()
+    I_voov = H2[v, o, o, v].copy()
+    I_oooo = H2[o, o, o, o].copy()
+    I_vovo = H2[v, o, v, o].copy()
+    I_ovoo = H2[o, v, o, o].copy()
+    I_vooo = H2[v, o, o, o].copy()
+    for i in range(no):
+        for j in range(no):
+            Qij, Tij = Q[i * no + j], t2_pno[i * no + j]
+            I_vv -= Qij @ (Tij @ (Qij.T @ (2.0 * g[o, o, v, v][i, j, :, :] - g[o, o, v, v][j, i, :, :]).T))
+            I_oo[:, i] += np.einsum("mef,eE,fF,EF->m", L[:, j, :, :], Qij, Qij, Tij, optimize=True)
+            I_oooo[:, :, i, j] += np.einsum("mnef,eE,fF,EF->mn", g[o, o, v, v], Qij, Qij, Tij, optimize=True)
+            I_voov[:, :, i, :] += (
+                np.einsum("aA,AE,eE,nef->anf", Qij, Tij, Qij, L[j, :, :, :], optimize=True)
+                - np.einsum("aA,AE,eE,nef->anf", Qij, Tij.T, Qij, g[o, o, v, v][j, :, :, :], optimize=True)
+            )
+            I_vovo[:, :, :, j] -= np.einsum("aA,AF,fF,nef->ane", Qij, Tij, Qij, g[o, o, v, v][i, :, :, :], optimize=True)
+            I_ovoo[:, :, i, j] += np.einsum("amfe,eE,EF,fF->ma", W, Qij, Tij, Qij, optimize=True)
+            I_vooo[:, :, i, j] += np.einsum("amef,eE,EF,fF->am", W, Qij, Tij, Qij, optimize=True)
+    # collect terms that can be symmetrized
+    doubles_res = [None for ij in range(no**2)]
+    for i in range(no):
+        for j in range(no):
+            ij = i * no + j
+            Qij, Tij = Q[ij], t2_pno[ij]
+            X = np.einsum("bae,e->ab", H2[v, v, o, v][:, :, j, :], t1[:, i], optimize=True) + 0.5 * g[v, v, o, o][:, :, i, j]
+            res = Qij.T @ X @ Qij
+            res += (Qij.T @ I_vv @ Qij) @ Tij
+            for m in range(no):
+                mj = m * no + j
+                res -= I_oo[m, i] * S[ij][mj] @ t2_pno[mj] @ S[ij][mj].T
+                for n in range(no):
+                    mn = m * no + n
+                    res += 0.5 * I_oooo[m, n, i, j] * S[ij][mn] @ t2_pno[mn] @ S[ij][mn].T
+            g_pno = np.einsum("abef,aA,bB->ABef", g[v, v, v, v], Qij, Qij, optimize=True)
+            res += 0.5 * np.einsum("ABef,eE,EF,fF->AB", g_pno, Qij, Tij, Qij, optimize=True)
+            res += 0.5 * np.einsum("ABef,e,f->AB", g_pno, t1[:, i], t1[:, j], optimize=True)
+            doubles_res[ij] = res
+    doubles_res = [doubles_res[i * no + j] + doubles_res[j * no + i].T for i in range(no) for j in range(no)]
+    # remaining terms
+    for i in range(no):
+        for j in range(no):
+            ij = i * no + j
+            Qij = Q[ij]
+            X = -t1 @ I_ovoo[:, :, i, j] - I_vooo[:, :, i, j] @ t1.T
+            res = Qij.T @ X @ Qij
+            for m in range(no):
+                im, mi, mj, jm = i * no + m, m * no + i, m * no + j, j * no + m
+                # ring terms coupling pair (i, j) to the pairs (i, m), (m, j), and their transposes
+                res += (Qij.T @ (2.0 * I_voov[:, m, i, :] @ Q[mj])) @ t2_pno[mj] @ S[mj][ij]
+                res -= (Qij.T @ I_voov[:, m, i, :] @ Q[jm]) @ t2_pno[jm] @ S[jm][ij]
+                res += S[ij][im] @ t2_pno[im] @ (Q[im].T @ (2.0 * H2[v, o, o, v][:, m, j, :].T - H2[v, o, v, o][:, m, :, j].T) @ Qij)
+                res -= S[ij][mi] @ t2_pno[mi] @ (Q[mi].T @ H2[v, o, o, v][:, m, j, :].T @ Qij)
+                res -= (Qij.T @ I_vovo[:, m, :, i] @ Q[jm]) @ t2_pno[jm].T @ S[jm][ij]
+                res -= S[ij][mj] @ t2_pno[mj] @ (Q[mj].T @ H2[v, o, v, o][:, m, :, i].T @ Qij)
+                res -= (Qij.T @ I_vovo[:, m, :, j] @ Q[im]) @ t2_pno[im] @ S[im][ij]
+            doubles_res[ij] += res
+    return doubles_res
+
+def kernel(fock, g, o, v, maxit, convergence, energy_shift, diis_size, n_start_diis, out_of_core, use_quasi, pno_threshold=1.0e-08):
+    """Solve the CCSD system of nonlinear equations with the doubles expanded in
+    a truncated pair natural orbital (PNO) space built from the MP2 pair densities.
+    The T2 amplitudes of each pair (i, j) are stored in its own PNO basis; in each
+    iteration, the doubles residual of each pair is evaluated directly in its PNO
+    space, with the amplitudes of the other pairs brought in through the PNO overlap
+    matrices, and the amplitudes are updated using the semicanonical PNO orbital
+    energies. The canonical T2 is only formed once the iterations have converged.
+    The singles are kept in the canonical virtual space. The initial values of the
+    T amplitudes are taken to be 0."""
+
+    eps = np.diagonal(fock)
+    n = np.newaxis
+    e_ai = 1.0 / (-eps[v, n] + eps[n, o] + energy_shift)
+    eps_o = eps[o]
+
+    nunocc, nocc = e_ai.shape
+
+    # Build the PNO space of each pair from the MP2 amplitudes
+    Q, eps_pno = get_pair_natural_orbitals(get_amplitudes(fock, g, o, v), fock, o, v, pno_threshold)
+    S = get_pair_overlaps(Q)
+    npno = np.array([q.shape[1] for q in Q])
+    e_pno = [
+        1.0 / (-eps_pno[i * nocc + j][:, n] - eps_pno[i * nocc + j][n, :] + eps_o[i] + eps_o[j] + energy_shift)
+        for i in range(nocc) for j in range(nocc)
+    ]
+
+    n1 = nocc * nunocc
+    n2 = int(np.sum(npno**2))
+    ndim = n1 + n2
+
+    print("    ==> PNO-R-CCSD amplitude equations <==")
+    print("")
+    print("    PNO threshold = {:.2e}".format(pno_threshold))
+    print("    Average number of PNOs per pair = {:.2f} (of {})".format(np.mean(npno), nunocc))
+    print("    Number of T2 amplitudes = {} (canonical: {}; {:.2f}%)".format(n2, nocc**2 * nunocc**2, 100.0 * n2 / (nocc**2 * nunocc**2)))
+    print("")
+
+    diis_engine = DIIS(ndim, diis_size, out_of_core)
+
+    t1 = np.zeros((nunocc, nocc))
+    t2_pno = [np.zeros((m, m)) for m in npno]
+    old_energy = rcc_energy_pno(t1, t2_pno, Q, fock, g, o, v)
+
+    print("     Iter               Energy                 |dE|                 |dT|     Wall Time     Memory")
+    for idx in range(maxit):
+
+        tic = time.time()
+
+        residual_singles = singles_residual(t1, t2_pno, Q, fock, g, o, v)
+        residual_doubles = doubles_residual(t1, t2_pno, Q, S, fock, g, o, v)
+
+        res_norm = np.linalg.norm(residual_singles) + np.sqrt(sum(np.sum(r**2) for r in residual_doubles))
+
+        t1 += residual_singles * e_ai
+        for ij in range(nocc**2):
+            t2_pno[ij] += residual_doubles[ij] * e_pno[ij]
+
+        current_energy = rcc_energy_pno(t1, t2_pno, Q, fock, g, o, v)
+        delta_e = np.abs(old_energy - current_energy)
+
+        if delta_e < convergence and res_norm < convergence:
+            break
+
+        if idx >= n_start_diis:
+            diis_engine.push( (t1, *t2_pno), (residual_singles, *residual_doubles), idx)
+        if idx >= diis_size + n_start_diis:
+            T_extrap = diis_engine.extrapolate()
+            t1 = T_extrap[:n1].reshape((nunocc, nocc))
+            offset = n1
+            for ij in range(nocc**2):
+                t2_pno[ij] = T_extrap[offset:offset + npno[ij]**2].reshape((npno[ij], npno[ij]))
+                offset += npno[ij]**2
+
+        old_energy = current_energy
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(idx, current_energy, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        raise ValueError("PNO-CCSD iterations did not converge")
+
+    diis_engine.cleanup()
+    e_corr = rcc_energy_pno(t1, t2_pno, Q, fock, g, o, v)
+    t2 = decompress(t2_pno, Q, nunocc, nocc)
+
+    return (t1, t2), e_corr
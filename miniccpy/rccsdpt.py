@@ -0,0 +1,82 @@
+import itertools
+import numpy as np
+from miniccpy.hbar_diagonal import vv_denom_abc
+
+def kernel(T, L, fock, H1, g, o, v):
+    # Note: As in ccsdpt, L and H1 are not used. They are only there to make the
+    # call in run_correction the same for CCSD(T) as for CR-CC(2,3). Here, T are
+    # the spin-free amplitudes of rccsd and g are the spatial-orbital integrals.
+
+    # unpack T amplitudes
+    t1, t2 = T
+    # Perform correction in loop
+    delta_A = correction_in_loop(t1, t2, fock, g, o, v)
+    # Store triples corrections in dictionary
+    delta_T = {"A": delta_A, "B": 0.0, "C": 0.0, "D": 0.0}
+    return delta_T
+
+def moments_ijk(i, j, k, g_vooo, g_vvov, t2):
+    '''Computes the spin-free connected moment W(abc) = P(ia/jb/kc) [ (bd|ai) t(cd,kj) - (ck|lj) t(ab,il) ]
+    for a fixed i,j,k, where P(ia/jb/kc) is the sum over the 6 simultaneous permutations of the pairs (ia), (jb), (kc).'''
+    def w(i, j, k):
+        W3 = np.einsum("abe,ce->abc", g_vvov[:, :, i, :], t2[:, :, k, j], optimize=True)
+        W3 -= np.einsum("cm,abm->abc", g_vooo[:, :, k, j], t2[:, :, i, :], optimize=True)
+        return W3
+    W3 = (
+            w(i, j, k)
+            + np.transpose(w(i, k, j), (0, 2, 1))
+            + np.transpose(w(j, i, k), (1, 0, 2))
+            + np.transpose(w(j, k, i), (2, 0, 1))
+            + np.transpose(w(k, i, j), (1, 2, 0))
+            + np.transpose(w(k, j, i), (2, 1, 0))
+    )
+    return W3
+
+def disconnected_ijk(i, j, k, f_ov, g_oovv, t1, t2):
+    '''Computes the spin-free disconnected term V(abc) - W(abc) = t(a,i) (jb|kc) + t(b,j) (ia|kc) + t(c,k) (ia|jb)
+    + f(ia) t(bc,jk) + f(jb) t(ac,ik) + f(kc) t(ab,ij) for a fixed i,j,k.'''
+    # Note: The Fock matrix terms vanish for canonical RHF orbitals. As in ccsdpt,
+    #       they are kept so that the correction is also correct for non-Brillouin orbitals.
+    V3 = (
+            np.einsum("a,bc->abc", t1[:, i], g_oovv[j, k, :, :], optimize=True)
+            + np.einsum("b,ac->abc", t1[:, j], g_oovv[i, k, :, :], optimize=True)
+            + np.einsum("c,ab->abc", t1[:, k], g_oovv[i, j, :, :], optimize=True)
+    )
+    V3 += (
+            np.einsum("a,bc->abc", f_ov[i, :], t2[:, :, j, k], optimize=True)
+            + np.einsum("b,ac->abc", f_ov[j, :], t2[:, :, i, k], optimize=True)
+            + np.einsum("c,ab->abc", f_ov[k, :], t2[:, :, i, j], optimize=True)
+    )
+    return V3
+
+def correction_in_loop(t1, t2, fock, g, o, v):
+    # orbital dimensions
+    no, nu = fock[o, v].shape
+    # precompute blocks of diagonal that do not depend on occupied indices
+    denom_A_v = vv_denom_abc(fock, v)
+    # E(T) = 1/3 sum_{ijkabc} (4W(abc) + W(bca) + W(cab)) (V(abc) - V(cba)) / D(abc). Since W and V
+    # are invariant to simultaneous permutations of (ia), (jb), (kc), the moments are only built for
+    # i <= j <= k and those for the other orderings of i,j,k are obtained by transposing a,b,c.
+    delta_A = 0.0
+    for i in range(no):
+        for j in range(i, no):
+            for k in range(j, no):
+                # compute i,j,k part of triples denominator
+                denom_A_o = fock[o, o][i, i] + fock[o, o][j, j] + fock[o, o][k, k]
+                denom = denom_A_o + denom_A_v
+                # compute a,b,c part of the connected and full moments
+                w3 = moments_ijk(i, j, k, g[v, o, o, o], g[v, v, o, v], t2)
+                v3 = w3 + disconnected_ijk(i, j, k, fock[o, v], g[o, o, v, v], t1, t2)
+                # loop over the distinct orderings of i,j,k
+                ijk = (i, j, k)
+                orderings = {tuple(ijk[p] for p in perm): perm for perm in itertools.permutations(range(3))}
+                for perm in orderings.values():
+                    w3_p = np.transpose(w3, perm)
+                    v3_p = np.transpose(v3, perm)
+                    # spin-adapted combinations
+                    z3 = 4.0 * w3_p + np.transpose(w3_p, (2, 0, 1)) + np.transpose(w3_p, (1, 2, 0))
+                    y3 = v3_p - np.transpose(v3_p, (2, 1, 0))
+                    # compute corrections in a vectorized manner
+                    delta_A += (1.0 / 3.0) * np.sum(z3 * y3 / denom)
+
+    return delta_A
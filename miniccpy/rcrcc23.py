@@ -0,0 +1,120 @@
+import itertools
+import numpy as np
+from miniccpy.hbar_diagonal import (get_3body_hbar_triples_diagonal_rhf, get_2body_hbar_triples_diagonal_rhf, vv_denom_abc,
+                                    vvvv_denom_abc_rhf, voov_denom_abc_rhf, oooo_denom_rhf, voo_denom_abc_rhf, vov_denom_abc_rhf)
+from miniccpy.rccsdpt import moments_ijk, disconnected_ijk
+
+# spin cases of the triples entering the correction, given as the spins of the (ai), (bj), (ck) pairs
+AAA = (0, 0, 0)
+AAB = (0, 0, 1)
+
+def kernel(T, L, fock, H1, H2, o, v):
+    # Note: T and L are the spin-free amplitudes of rccsd and left_rccsd and H1, H2
+    # are the RHF-based HBar matrix elements obtained from build_hbar_rccsd.
+
+    # unpack T and L vectors
+    t1, t2 = T
+    l1, l2 = L
+
+    # get the 2- and 3-body HBar diagonals entering the triples denominators
+    D = get_triples_diagonal(fock, H1, H2, t2, o, v)
+
+    I_vooo = H2[v, o, o, o] - np.einsum("me,aeij->amij", H1[o, v], t2, optimize=True)
+
+    # Perform correction in loop
+    delta_A, delta_B, delta_C, delta_D = correction_in_loop(t2, l1, l2, H1, H2, I_vooo, D, o, v)
+
+    # Store triples corrections in dictionary
+    delta_T = {"A": delta_A, "B": delta_B, "C": delta_C, "D": delta_D}
+    return delta_T
+
+def get_triples_diagonal(fock, H1, H2, t2, o, v):
+    """Collect the pieces of the spin-resolved triples denominators that do not depend on i,j,k."""
+    h_voov, h_oooo, h_vvvv = get_2body_hbar_triples_diagonal_rhf(H2, o, v)
+    d3v_ss, d3v_os, d3o_ss, d3o_os = get_3body_hbar_triples_diagonal_rhf(H2[o, o, v, v], t2)
+    D = {
+        "f_oo": np.diagonal(fock[o, o]),
+        "h_oo": np.diagonal(H1[o, o]),
+        "A_v": vv_denom_abc(fock, v),
+        "B_v": vv_denom_abc(H1, v),
+        "C_vvvv": {spins: vvvv_denom_abc_rhf(spins, h_vvvv) for spins in (AAA, AAB)},
+        "voov": h_voov,
+        "oooo": h_oooo,
+        "d3o": (d3o_ss, d3o_os),
+        "d3v": (d3v_ss, d3v_os),
+    }
+    return D
+
+def leftamps_ijk(i, j, k, h1_ov, h2_oovv, h2_vovv, h2_ooov, l1, l2):
+    '''Computes the spin-free left vector L(abc) = P(ia/jb/kc) [ h(ie,ab) l(ce,kj) - h(jk,cl) l(ab,il)
+    + l(a,i) h(jk,bc) + h(i,a) l(bc,jk) ] for a fixed i,j,k, where P(ia/jb/kc) is the sum over the 6
+    simultaneous permutations of the pairs (ia), (jb), (kc).'''
+    # The connected part has the same structure as the moment with h(ie,ab) and h(ij,am)
+    # taking the place of h(ab,ie) and h(am,ij), respectively.
+    L3 = moments_ijk(i, j, k, np.transpose(h2_ooov, (3, 2, 1, 0)), np.transpose(h2_vovv, (3, 2, 1, 0)), l2)
+    L3 += disconnected_ijk(i, j, k, h1_ov, h2_oovv, l1, l2)
+    return L3
+
+def correction_ijk(i, j, k, m3, l3, omega, D):
+    '''Computes the A-D corrections due to the triples with occupied indices given by the distinct
+    orderings of i <= j <= k using the spin-free moment m3 and left vector l3 for that i,j,k.
+    The aaa triples are obtained by fully antisymmetrizing in a,b,c, while the aab triples
+    are obtained by antisymmetrizing in a,b. The bbb and abb triples give identical contributions.'''
+    delta = np.zeros(4)
+    ijk = (i, j, k)
+    orderings = {tuple(ijk[p] for p in perm): perm for perm in itertools.permutations(range(3))}
+    for occ, perm in orderings.items():
+        if occ[0] >= occ[1]:
+            continue
+        m3_p = np.transpose(m3, perm)
+        l3_p = np.transpose(l3, perm)
+        # aab triples with i < j
+        m3_aab = m3_p - np.transpose(m3_p, (1, 0, 2))
+        l3_aab = l3_p - np.transpose(l3_p, (1, 0, 2))
+        delta += 0.5 * triples_sum(occ, AAB, m3_aab * l3_aab, omega, D)
+        # aaa triples with i < j < k
+        if occ[1] < occ[2]:
+            m3_aaa = m3_aab - np.transpose(m3_aab, (2, 1, 0)) - np.transpose(m3_aab, (0, 2, 1))
+            l3_aaa = l3_aab - np.transpose(l3_aab, (2, 1, 0)) - np.transpose(l3_aab, (0, 2, 1))
+            delta += (1.0 / 6.0) * triples_sum(occ, AAA, m3_aaa * l3_aaa, omega, D)
+    return 2.0 * delta
+
+def triples_sum(occ, spins, LM, omega, D):
+    '''Divides LM(abc) by the A-D triples denominators for the spin case and occupied indices occ and sums.'''
+    i, j, k = occ
+    denom_A_o = D["f_oo"][i] + D["f_oo"][j] + D["f_oo"][k]
+    denom_B_o = D["h_oo"][i] + D["h_oo"][j] + D["h_oo"][k]
+    denom_C_voov = voov_denom_abc_rhf(i, j, k, spins, D["voov"])
+    denom_C_oooo = oooo_denom_rhf(i, j, k, spins, D["oooo"])
+    denom_D_voo = voo_denom_abc_rhf(i, j, k, spins, D["d3o"])
+    denom_D_vov = vov_denom_abc_rhf(i, j, k, spins, D["d3v"])
+
+    denom_B = omega + denom_B_o + D["B_v"]
+    denom_C = denom_B + denom_C_voov + denom_C_oooo + D["C_vvvv"][spins]
+    denom_D = denom_C + denom_D_voo + denom_D_vov
+    return np.array([
+        np.sum(LM / (omega + denom_A_o + D["A_v"])),
+        np.sum(LM / denom_B),
+        np.sum(LM / denom_C),
+        np.sum(LM / denom_D),
+    ])
+
+def correction_in_loop(t2, l1, l2, H1, H2, I_vooo, D, o, v):
+    # orbital dimensions
+    nu, no = l1.shape
+    # The spin-free moments and left vectors are invariant to simultaneous permutations of (ia), (jb), (kc),
+    # so they are only built for i <= j <= k and those for the other orderings of i,j,k are obtained
+    # by transposing a,b,c.
+    delta = np.zeros(4)
+    for i in range(no):
+        for j in range(i, no):
+            for k in range(j, no):
+                if i == k:
+                    continue
+                # compute a,b,c part of moments and left vector
+                m3 = moments_ijk(i, j, k, I_vooo, H2[v, v, o, v], t2)
+                l3 = leftamps_ijk(i, j, k, H1[o, v], H2[o, o, v, v], H2[v, o, v, v], H2[o, o, o, v], l1, l2)
+                delta += correction_ijk(i, j, k, m3, l3, 0.0, D)
+
+    delta_A, delta_B, delta_C, delta_D = delta
+    return delta_A, delta_B, delta_C, delta_D
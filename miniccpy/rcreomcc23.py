@@ -0,0 +1,72 @@
+import numpy as np
+from miniccpy.rccsdpt import moments_ijk
+from miniccpy.rcrcc23 import get_triples_diagonal, leftamps_ijk, correction_ijk
+
+def kernel(T, R, L, r0, omega, fock, H1, H2, o, v):
+    # Note: T, R, and L are the spin-free amplitudes of rccsd, eomrccsd, and left_eomrccsd
+    # and H1, H2 are the RHF-based HBar matrix elements obtained from build_hbar_rccsd.
+
+    t1, t2 = T
+    r1, r2 = R
+    l1, l2 = L
+
+    # get the 2- and 3-body HBar diagonals entering the triples denominators
+    D = get_triples_diagonal(fock, H1, H2, t2, o, v)
+
+    # Intermediates
+    I_vooo = H2[v, o, o, o] - np.einsum("me,aeij->amij", H1[o, v], t2, optimize=True)
+
+    X_ov = (
+        2.0 * np.einsum("mnef,fn->me", H2[o, o, v, v], r1, optimize=True)
+        - np.einsum("mnfe,fn->me", H2[o, o, v, v], r1, optimize=True)
+    )
+    X_vvov = (
+        -np.einsum("amej,bm->baje", H2[v, o, v, o], r1, optimize=True)
+        - np.einsum("bmje,am->baje", H2[v, o, o, v], r1, optimize=True)
+        + np.einsum("abef,fj->baje", H2[v, v, v, v], r1, optimize=True)
+        + 2.0 * np.einsum("amef,bfjm->baje", H2[v, o, v, v], r2, optimize=True)
+        - np.einsum("amef,bfmj->baje", H2[v, o, v, v], r2, optimize=True)
+        - np.einsum("amfe,bfjm->baje", H2[v, o, v, v], r2, optimize=True)
+        - np.einsum("bmfe,afmj->baje", H2[v, o, v, v], r2, optimize=True)
+        + np.einsum("mnej,abmn->baje", H2[o, o, v, o], r2, optimize=True)
+        - np.einsum("me,abmj->baje", X_ov, t2, optimize=True)
+    )
+    X_vooo = (
+        np.einsum("bmei,ej->bmji", H2[v, o, v, o], r1, optimize=True)
+        + np.einsum("bmje,ei->bmji", H2[v, o, o, v], r1, optimize=True)
+        - np.einsum("mnij,bn->bmji", H2[o, o, o, o], r1, optimize=True)
+        + 2.0 * np.einsum("mnie,bejn->bmji", H2[o, o, o, v], r2, optimize=True)
+        - np.einsum("mnie,benj->bmji", H2[o, o, o, v], r2, optimize=True)
+        - np.einsum("mnei,bejn->bmji", H2[o, o, v, o], r2, optimize=True)
+        - np.einsum("mnej,beni->bmji", H2[o, o, v, o], r2, optimize=True)
+        + np.einsum("bmef,efji->bmji", H2[v, o, v, v], r2, optimize=True)
+    )
+
+    # The moment r0*<ijkabc|H(2)|0> + <ijkabc|(H(2)*(R1+R2))_C|0> is linear in the vooo and vvov
+    # pieces contracted with T2, so the ground-state and X-dependent terms are combined.
+    Y_vooo = r0 * I_vooo + X_vooo
+    Y_vvov = r0 * H2[v, v, o, v] + X_vvov
+
+    delta_A, delta_B, delta_C, delta_D = correction_in_loop(t2, l1, l2, r2, omega, H1, H2, Y_vooo, Y_vvov, D, o, v)
+
+    # Store triples corrections in dictionary
+    delta_T = {"A": delta_A, "B": delta_B, "C": delta_C, "D": delta_D}
+    return delta_T
+
+def correction_in_loop(t2, l1, l2, r2, omega, H1, H2, Y_vooo, Y_vvov, D, o, v):
+    # orbital dimensions
+    nu, no = l1.shape
+    # As in rcrcc23, the spin-free moments and left vectors are only built for i <= j <= k.
+    delta = np.zeros(4)
+    for i in range(no):
+        for j in range(i, no):
+            for k in range(j, no):
+                if i == k:
+                    continue
+                # compute a,b,c part of moments and left vector
+                m3 = moments_ijk(i, j, k, Y_vooo, Y_vvov, t2) + moments_ijk(i, j, k, H2[v, o, o, o], H2[v, v, o, v], r2)
+                l3 = leftamps_ijk(i, j, k, H1[o, v], H2[o, o, v, v], H2[v, o, v, v], H2[o, o, o, v], l1, l2)
+                delta += correction_ijk(i, j, k, m3, l3, omega, D)
+
+    delta_A, delta_B, delta_C, delta_D = delta
+    return delta_A, delta_B, delta_C, delta_D
@@ -0,0 +1,178 @@
+import time
+import numpy as np
+from miniccpy.utilities import get_memory_usage
+from miniccpy.davidson import select_root
+
+def kernel(R0, T, omega, H1, H2, o, v, maxit=80, convergence=1.0e-07, max_size=20, nrest=1, out_of_core=False, root_select="overlap", target_energy=None):
+    """
+    Diagonalize the RHF-based similarity-transformed CCSD Hamiltonian in the
+    spin-adapted doublet 1h and 2h-1p space using the non-Hermitian Davidson
+    algorithm for a specific root defined by an initial guess vector. The
+    spin-free amplitudes are r1(i) = r(i_a) and r2(i, b, j) = r(i_a b_b j_b),
+    while r(i_a b_a j_a) = r2(i, b, j) - r2(j, b, i).
+    """
+    from miniccpy.energy import calc_rel_ip_rhf
+
+    eps = np.diagonal(H1)
+    n = np.newaxis
+    e_ibj = (-eps[o, n, n] + eps[n, v, n] - eps[n, n, o])
+    e_i = -eps[o]
+
+    t1, t2 = T
+
+    nunocc, nocc = t1.shape
+    n1 = nocc
+    n2 = nocc**2 * nunocc
+    ndim = n1 + n2
+    
+    if len(R0) < ndim:
+        R = np.zeros(ndim)
+        R[:len(R0)] = R0
+
+    # Allocate the B and sigma matrices
+    sigma = np.zeros((ndim, max_size))
+    B = np.zeros((ndim, max_size))
+    restart_block = np.zeros((ndim, nrest))
+
+    # reference energy and vector used to target the root of interest
+    if target_energy is None:
+        target_energy = omega
+    R_guess = R.copy() if root_select == "guess" else None
+
+    # Initial values
+    B[:, 0] = R
+    sigma[:, 0] = HR(R[:n1].reshape(nocc),
+                     R[n1:].reshape(nocc, nunocc, nocc),
+                     t1, t2, H1, H2, o, v)
+
+    print("    ==> IP-EOMRCC(2h-1p) iterations <==")
+    print("")
+    print("     Iter               Energy                 |dE|                 |dR|     Wall Time     Memory")
+    curr_size = 1
+    for niter in range(maxit):
+        tic = time.time()
+        # store old energy
+        omega_old = omega
+
+        # solve projection subspace eigenproblem
+        G = np.dot(B[:, :curr_size].T, sigma[:, :curr_size])
+        # select the eigenpair of interest according to root_select
+        omega, alpha = select_root(G, B.T, sigma.T, root_select, target_energy, R_guess)
+        R = np.dot(B[:, :curr_size], alpha)
+        restart_block[:, niter % nrest] = R
+
+        # calculate residual vector
+        residual = np.dot(sigma[:, :curr_size], alpha) - omega * R
+        res_norm = np.linalg.norm(residual)
+        delta_e = omega - omega_old
+
+        if res_norm < convergence and abs(delta_e) < convergence:
+            toc = time.time()
+            minutes, seconds = divmod(toc - tic, 60)
+            print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+            break
+
+        # update residual vector
+        q = update(residual[:n1].reshape(nocc),
+                   residual[n1:].reshape(nocc, nunocc, nocc),
+                   omega,
+                   e_i,
+                   e_ibj)
+        for p in range(curr_size):
+            b = B[:, p] / np.linalg.norm(B[:, p])
+            q -= np.dot(b.T, q) * b
+        q *= 1.0 / np.linalg.norm(q)
+
+        # If below maximum subspace size, expand the subspace
+        if curr_size < max_size:
+            B[:, curr_size] = q
+            sigma[:, curr_size] = HR(q[:n1].reshape(nocc),
+                                     q[n1:].reshape(nocc, nunocc, nocc),
+                                     t1, t2, H1, H2, o, v)
+        else:
+            # Basic restart - use the last approximation to the eigenvector
+            print("       **Deflating subspace**")
+            restart_block, _ = np.linalg.qr(restart_block)
+            for j in range(restart_block.shape[1]):
+                B[:, j] = restart_block[:, j]
+                sigma[:, j] = HR(restart_block[:n1, j].reshape(nocc),
+                                 restart_block[n1:, j].reshape(nocc, nunocc, nocc),
+                                 t1, t2, H1, H2, o, v)
+            curr_size = restart_block.shape[1] - 1
+
+        curr_size += 1
+
+        toc = time.time()
+        minutes, seconds = divmod(toc - tic, 60)
+        print("    {: 5d} {: 20.12f} {: 20.12f} {: 20.12f}    {:.2f}m {:.2f}s    {:.2f} MB".format(niter, omega, delta_e, res_norm, minutes, seconds, get_memory_usage()))
+    else:
+        print("IP-EOMRCC(2h-1p) iterations did not converge")
+
+    # Save the final converged root in an excitation tuple
+    R = (R[:n1].reshape(nocc), R[n1:].reshape(nocc, nunocc, nocc))
+    # Set the r0 trivially to 0
+    r0 = 0.0
+    # Compute the REL metric
+    rel = calc_rel_ip_rhf(R[0], R[1])
+    return R, omega, r0, rel
+
+def update(r1, r2, omega, e_i, e_ibj):
+    """Perform the diagonally preconditioned residual (DPR) update
+    to get the next correction vector."""
+
+    for i, d_i in enumerate(e_i):
+        denom = omega - d_i
+        if denom == 0: continue
+        r1[i] /= denom
+    r2 /= (omega - e_ibj)
+
+    return np.hstack([r1.flatten(), r2.flatten()])
+
+
+def HR(r1, r2, t1, t2, H1, H2, o, v):
+    """Compute the matrix-vector product H * R, where
+    H is the CCSD similarity-transformed Hamiltonian and R is
+    the spin-adapted IP-EOMCC linear excitation operator."""
+
+    # update R1
+    HR1 = build_HR1(r1, r2, H1, H2, o, v)
+    # update R2
+    HR2 = build_HR2(r1, r2, t1, t2, H1, H2, o, v)
+
+    return np.hstack( [HR1.flatten(), HR2.flatten()] )
+
+
+
+
+def build_HR1(r1, r2, H1, H2, o, v):
+    """Compute the projection of HR on 1h excitations
+        X[i] = < i | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+    X1 = -np.einsum("mi,m->i", H1[o, o], r1, optimize=True)
+    X1 -= 2.0 * np.einsum("mnif,mfn->i", H2[o, o, o, v], r2, optimize=True)
+    X1 += np.einsum("mnif,nfm->i", H2[o, o, o, v], r2, optimize=True)
+    X1 += 2.0 * np.einsum("me,iem->i", H1[o, v], r2, optimize=True)
+    X1 -= np.einsum("me,mei->i", H1[o, v], r2, optimize=True)
+    return X1
+
+
+def build_HR2(r1, r2, t1, t2, H1, H2, o, v):
+    """Compute the projection of HR on 2h-1p excitations
+        X[i, b, j] = < ijb | [ HBar(CCSD) * (R1 + R2) ]_C | 0 >
+    """
+    I1_v = (
+            -2.0 * np.einsum("mnef,mfn->e", H2[o, o, v, v], r2, optimize=True)
+            + np.einsum("mnfe,mfn->e", H2[o, o, v, v], r2, optimize=True)
+    )
+
+    X2 = -np.einsum("bmji,m->ibj", H2[v, o, o, o], r1, optimize=True)
+    X2 += np.einsum("be,iej->ibj", H1[v, v], r2, optimize=True)
+    X2 += np.einsum("mnij,mbn->ibj", H2[o, o, o, o], r2, optimize=True)
+    X2 += np.einsum("e,beji->ibj", I1_v, t2, optimize=True)
+    X2 -= np.einsum("mi,mbj->ibj", H1[o, o], r2, optimize=True)
+    X2 -= np.einsum("mj,ibm->ibj", H1[o, o], r2, optimize=True)
+    X2 += 2.0 * np.einsum("bmje,iem->ibj", H2[v, o, o, v], r2, optimize=True)
+    X2 -= np.einsum("bmje,mei->ibj", H2[v, o, o, v], r2, optimize=True)
+    X2 -= np.einsum("bmej,iem->ibj", H2[v, o, v, o], r2, optimize=True)
+    X2 -= np.einsum("bmei,mej->ibj", H2[v, o, v, o], r2, optimize=True)
+    return X2
@@ -0,0 +1,35 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+def align_orbitals(mol_ref, mo_coeff_ref, mol, mo_coeff, mo_energy, mo_occ):
+    """Reorder the MOs `mo_coeff` of the molecule `mol` and fix their phases so that
+    they match the reference MOs `mo_coeff_ref` of the molecule `mol_ref` (e.g., at a
+    neighboring geometry) as closely as possible. The overlap
+        O[p, q] = < phi_p(ref) | phi_q >
+    is computed using the mixed AO overlap between the two molecules, and, within each
+    block of MOs sharing the same occupation number, the ordering maximizing sum_p |O[p, p]|
+    is found by solving the linear assignment problem. Each MO is then multiplied by the
+    sign of its overlap with the matching reference MO. Since MOs are only permuted within
+    blocks of equal occupation, the canonical Fock operator stays diagonal.
+    Returns the aligned MO coefficients and orbital energies."""
+    from pyscf import gto
+
+    S = gto.intor_cross("int1e_ovlp", mol_ref, mol)
+    O = mo_coeff_ref.T @ S @ mo_coeff
+
+    perm = np.arange(len(mo_occ))
+    for occupation in np.unique(mo_occ):
+        block = np.flatnonzero(mo_occ == occupation)
+        _, col = linear_sum_assignment(-np.abs(O[np.ix_(block, block)]))
+        perm[block] = block[col]
+
+    mo_coeff = mo_coeff[:, perm]
+    mo_energy = mo_energy[perm]
+    phase = np.sign(np.diagonal(O[:, perm]))
+    phase[phase == 0] = 1.0
+    return mo_coeff * phase[np.newaxis, :], mo_energy
+
+def flatten_vectors(R):
+    """Stack a list of EOM excitation tuples (r1, r2, ...) as the columns
+    of a matrix of initial guess vectors."""
+    return np.stack([np.hstack([r.flatten() for r in Rn]) for Rn in R], axis=1)
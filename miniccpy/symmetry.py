@@ -1,3 +1,6 @@
+import itertools
+import numpy as np
+
 
 def get_reference_symmetry(no, point_group, isym):
     # Get the point group symmetry of the reference state by exploiting
@@ -66,3 +69,344 @@ def sym_table(pg):
     }
 
     return sym_mult[pg]
+
+class SymmetryBlocking:
+    """Partition of the correlated occupied ("o") and unoccupied ("v") spinorbitals
+    into the irreps of an Abelian point group. Symmetry-blocked tensors store only
+    the sub-blocks (one for each tuple of irreps) whose direct product equals the
+    symmetry of the tensor, which is given by the XOR of the irrep numbers.
+
+    Attributes
+    ----------
+    point_group : str
+        Name of the Abelian point group (see get_pg_irreps)
+    nirrep : int
+        Number of irreps in the point group
+    isym : ndarray
+        Irrep numbers of the correlated spinorbitals (occupied first)
+    index : dict
+        index["o"][h] (index["v"][h]) holds the occupied (unoccupied) orbitals of irrep h.
+        When the numbers of active orbitals `nacto` and `nactu` are given, index["O"][h]
+        (index["V"][h]) holds the active occupied (unoccupied) orbitals of irrep h, i.e.,
+        those among the last nacto occupied (first nactu unoccupied) orbitals, numbered
+        as in the full occupied (unoccupied) space
+    reference_irrep : int
+        Irrep number of the reference determinant
+    """
+    def __init__(self, orbsym, point_group, no, nu, nacto=None, nactu=None):
+        pg_irrep_to_number = get_pg_irreps(point_group)
+        self.point_group = point_group.upper()
+        self.irrep_labels = {n: label for label, n in pg_irrep_to_number.items()}
+        self.irrep_numbers = pg_irrep_to_number
+        self.nirrep = len(pg_irrep_to_number)
+        self.isym = np.array([pg_irrep_to_number[p.upper()] for p in orbsym[:no + nu]], dtype=np.int32)
+        self.index = {"o": [np.where(self.isym[:no] == h)[0] for h in range(self.nirrep)],
+                      "v": [np.where(self.isym[no:] == h)[0] for h in range(self.nirrep)]}
+        if nacto is not None and nactu is not None:
+            self.index["O"] = [x[x >= no - min(nacto, no)] for x in self.index["o"]]
+            self.index["V"] = [x[x < min(nactu, nu)] for x in self.index["v"]]
+        self.dims = {space: [len(x) for x in self.index[space]] for space in self.index}
+        self.reference_irrep = pg_irrep_to_number[get_reference_symmetry(no, point_group, self.isym)]
+        self._keys = {}
+        self._assignments = {}
+
+    def keys(self, spaces, sym):
+        """List of the (non-empty) symmetry-allowed irrep tuples of a tensor with
+        index spaces `spaces` (e.g., "vvoo") and total symmetry `sym`."""
+        if (spaces, sym) not in self._keys:
+            allowed = [[h for h in range(self.nirrep) if self.dims[s][h] > 0] for s in spaces]
+            keys = []
+            for key in itertools.product(*allowed[:-1]):
+                h = sym
+                for x in key:
+                    h ^= x
+                if self.dims[spaces[-1]][h] > 0:
+                    keys.append(key + (h,))
+            self._keys[(spaces, sym)] = keys
+        return self._keys[(spaces, sym)]
+
+    def shape(self, spaces, key):
+        return tuple(self.dims[s][h] for s, h in zip(spaces, key))
+
+    def ix(self, spaces, key):
+        """Open mesh selecting block `key` out of the dense tensor with index spaces `spaces`."""
+        return np.ix_(*[self.index[s][h] for s, h in zip(spaces, key)])
+
+    def subspace_ix(self, spaces, subspaces, key):
+        """Open mesh selecting the elements of block `key` of a tensor with index spaces
+        `subspaces` (e.g., "VO") out of the same block of a tensor with index spaces
+        `spaces` (e.g., "vo"), where every active space lies within the full one."""
+        return np.ix_(*[np.searchsorted(self.index[s][h], self.index[t][h]) for s, t, h in zip(spaces, subspaces, key)])
+
+    def irrep_of_excitation(self, sym):
+        """Label of the state reached from the reference by an excitation operator of symmetry `sym`."""
+        return self.irrep_labels[sym ^ self.reference_irrep]
+
+    def assignments(self, terms, spaces, syms):
+        """Enumerate the irrep assignments of the labels of an einsum contraction that are
+        compatible with the symmetry `syms[k]` of every term (operands and output) `terms[k]`,
+        where `spaces` maps each label onto its index space. The result is cached, and each
+        element holds the block keys of the terms."""
+        cache_key = (tuple(terms), tuple(sorted(spaces.items())), tuple(syms))
+        if cache_key not in self._assignments:
+            labels = []
+            for x in terms:
+                for label in x:
+                    if label not in labels:
+                        labels.append(label)
+            allowed = {label: [h for h in range(self.nirrep) if self.dims[spaces[label]][h] > 0] for label in labels}
+            # repeated labels (e.g., traces) cancel out in the direct product
+            constraints = [([label for label in set(x) if x.count(label) % 2 == 1], sym) for x, sym in zip(terms, syms)]
+            result = []
+
+            def _assign(current):
+                # propagate the constraints that are left with a single unassigned label
+                changed = True
+                while changed:
+                    changed = False
+                    for x, sym in constraints:
+                        free = [label for label in x if label not in current]
+                        h = sym
+                        for label in x:
+                            if label in current:
+                                h ^= current[label]
+                        if not free and h != 0:
+                            return
+                        if len(free) == 1:
+                            if h not in allowed[free[0]]:
+                                return
+                            current[free[0]] = h
+                            changed = True
+                free = [label for label in labels if label not in current]
+                if not free:
+                    result.append(tuple(tuple(current[label] for label in x) for x in terms))
+                    return
+                for h in allowed[free[0]]:
+                    _assign({**current, free[0]: h})
+
+            _assign({})
+            self._assignments[cache_key] = result
+        return self._assignments[cache_key]
+
+class SymTensor:
+    """Symmetry-blocked tensor over the occupied/unoccupied index spaces `spaces`
+    with total symmetry `sym`. The blocks are stored in the dictionary `blocks`,
+    keyed by the tuple of irreps of each index."""
+    def __init__(self, blocking, spaces, sym=0, blocks=None):
+        self.blocking = blocking
+        self.spaces = spaces
+        self.sym = sym
+        if blocks is None:
+            blocks = {key: np.zeros(blocking.shape(spaces, key)) for key in blocking.keys(spaces, sym)}
+        self.blocks = blocks
+
+    @classmethod
+    def from_dense(cls, blocking, dense, spaces, sym=0):
+        """Extract the symmetry-allowed blocks of the dense tensor `dense`."""
+        blocks = {key: dense[blocking.ix(spaces, key)] for key in blocking.keys(spaces, sym)}
+        return cls(blocking, spaces, sym, blocks)
+
+    @classmethod
+    def from_diagonal(cls, blocking, spaces, e_o, e_v, sym=0):
+        """Build the energy differences sum(e_v) - sum(e_o) over the indices of each block."""
+        n = np.newaxis
+        blocks = {}
+        for key in blocking.keys(spaces, sym):
+            x = np.zeros(blocking.shape(spaces, key))
+            for k, (s, h) in enumerate(zip(spaces, key)):
+                shape = [1] * len(spaces)
+                shape[k] = blocking.dims[s][h]
+                if s == "v":
+                    x += e_v[blocking.index[s][h]].reshape(shape)
+                else:
+                    x -= e_o[blocking.index[s][h]].reshape(shape)
+            blocks[key] = x
+        return cls(blocking, spaces, sym, blocks)
+
+    def to_dense(self):
+        """Expand into a dense tensor, with zeros in the symmetry-forbidden blocks."""
+        b = self.blocking
+        dense = np.zeros(tuple(sum(b.dims[s]) for s in self.spaces))
+        for key, x in self.blocks.items():
+            dense[b.ix(self.spaces, key)] = x
+        return dense
+
+    @property
+    def size(self):
+        return sum(x.size for x in self.blocks.values())
+
+    def flatten(self):
+        """Pack the blocks into a 1D array (in the fixed order of blocking.keys)."""
+        keys = self.blocking.keys(self.spaces, self.sym)
+        if not keys:
+            return np.zeros(0)
+        return np.concatenate([self.blocks[key].flatten() for key in keys])
+
+    def from_vector(self, x):
+        """Unpack the 1D array `x` (see flatten) into a new tensor with the structure of self."""
+        blocks = {}
+        offset = 0
+        for key in self.blocking.keys(self.spaces, self.sym):
+            shape = self.blocking.shape(self.spaces, key)
+            size = int(np.prod(shape))
+            blocks[key] = np.reshape(x[offset:offset + size], shape).copy()
+            offset += size
+        return SymTensor(self.blocking, self.spaces, self.sym, blocks)
+
+    def restrict(self, spaces):
+        """Return the elements of self over the (active) index spaces `spaces`, e.g., r1.restrict("Vo")."""
+        blocks = {key: self.blocks[key][self.blocking.subspace_ix(self.spaces, spaces, key)]
+                  for key in self.blocking.keys(spaces, self.sym)}
+        return SymTensor(self.blocking, spaces, self.sym, blocks)
+
+    def accumulate(self, other):
+        """Add the tensor `other`, defined over (active) subspaces of the index spaces of self, in place."""
+        for key, x in other.blocks.items():
+            self.blocks[key][self.blocking.subspace_ix(self.spaces, other.spaces, key)] += x
+        return self
+
+    def copy(self):
+        return SymTensor(self.blocking, self.spaces, self.sym, {key: x.copy() for key, x in self.blocks.items()})
+
+    def transpose(self, axes):
+        spaces = "".join(self.spaces[k] for k in axes)
+        blocks = {tuple(key[k] for k in axes): np.transpose(x, axes) for key, x in self.blocks.items()}
+        return SymTensor(self.blocking, spaces, self.sym, blocks)
+
+    def _binary(self, other, op):
+        if isinstance(other, SymTensor):
+            if other.spaces != self.spaces or other.sym != self.sym:
+                raise ValueError("Symmetry-blocked tensors {}({}) and {}({}) are incompatible".format(
+                    self.spaces, self.sym, other.spaces, other.sym))
+            blocks = {key: op(x, other.blocks[key]) for key, x in self.blocks.items()}
+        else:
+            blocks = {key: op(x, other) for key, x in self.blocks.items()}
+        return SymTensor(self.blocking, self.spaces, self.sym, blocks)
+
+    def __add__(self, other):
+        return self._binary(other, np.add)
+
+    def __sub__(self, other):
+        return self._binary(other, np.subtract)
+
+    def __mul__(self, other):
+        return self._binary(other, np.multiply)
+
+    def __truediv__(self, other):
+        return self._binary(other, np.divide)
+
+    def __rmul__(self, other):
+        return self._binary(other, np.multiply)
+
+    def __radd__(self, other):
+        return self._binary(other, np.add)
+
+    def __rsub__(self, other):
+        return self._binary(other, lambda x, y: y - x)
+
+    def __neg__(self):
+        return self._binary(-1.0, np.multiply)
+
+    def __pos__(self):
+        return self
+
+def sym_einsum(subscripts, *operands):
+    """Symmetry-blocked analog of np.einsum for SymTensor operands. Only the
+    combinations of blocks allowed by the symmetry of every operand are contracted.
+    Returns a SymTensor, or a float when the output has no indices."""
+    inputs, output = subscripts.replace(" ", "").split("->")
+    inputs = inputs.split(",")
+    blocking = operands[0].blocking
+
+    spaces = {}
+    for labels, op in zip(inputs, operands):
+        for label, space in zip(labels, op.spaces):
+            spaces[label] = space
+    sym = 0
+    for op in operands:
+        sym ^= op.sym
+    syms = [op.sym for op in operands] + [sym]
+    assignments = blocking.assignments(inputs + [output], spaces, syms)
+
+    if len(operands) == 2:
+        contract = _pairwise_contraction(inputs[0], inputs[1], output)
+    else:
+        contract = lambda *blocks: np.einsum(subscripts, *blocks, optimize=len(operands) > 2)
+    if output:
+        out = SymTensor(blocking, "".join(spaces[label] for label in output), sym)
+        for keys in assignments:
+            out.blocks[keys[-1]] += contract(*[op.blocks[key] for op, key in zip(operands, keys)])
+        return out
+    total = 0.0
+    for keys in assignments:
+        total += contract(*[op.blocks[key] for op, key in zip(operands, keys)])
+    return total
+
+_pairwise_plans = {}
+
+def _pairwise_contraction(x, y, output):
+    """Return a function evaluating the einsum x,y->output for a pair of blocks. Whenever
+    possible, this is a tensordot followed by a transpose, which skips the (comparatively
+    expensive) parsing and path search of np.einsum that would otherwise be repeated for
+    every block."""
+    if (x, y, output) not in _pairwise_plans:
+        summed = [label for label in x if label in y and label not in output]
+        simple = (len(set(x)) == len(x) and len(set(y)) == len(y)
+                  and all(label in output for label in set(x) ^ set(y))
+                  and all(label not in output for label in set(x) & set(y)))
+        if simple:
+            axes = ([x.index(label) for label in summed], [y.index(label) for label in summed])
+            remaining = [label for label in x if label not in summed] + [label for label in y if label not in summed]
+            perm = [remaining.index(label) for label in output]
+            plan = lambda a, b: np.tensordot(a, b, axes=axes).transpose(perm)
+        else:
+            subscripts = x + "," + y + "->" + output
+            plan = lambda a, b: np.einsum(subscripts, a, b, optimize=["einsum_path", (0, 1)])
+        _pairwise_plans[(x, y, output)] = plan
+    return _pairwise_plans[(x, y, output)]
+
+class BlockedOperator:
+    """Symmetry-blocked slices of a one- or two-body operator (e.g., the integrals
+    or HBar). The slices are addressed by their index spaces, as in H["vovv"], and
+    slices that were never set are zero. Only the blocks are stored: indexing with
+    the occupied/unoccupied slicing arrays, as in H[v, o, v, v], expands the slice
+    into a new dense array on every call, so that code written for dense operators
+    (e.g., the initial guesses) works unchanged as long as it takes each slice once."""
+    def __init__(self, blocking, o, v, sym=0):
+        self.blocking = blocking
+        self.o = o
+        self.v = v
+        self.sym = sym
+        self.blocks = {}
+
+    @classmethod
+    def from_dense(cls, blocking, dense, o, v, slices, sym=0):
+        """Extract the symmetry-allowed blocks of the slices `slices` (e.g., ["oovv", "vovv"])
+        of the dense operator `dense`. Each block is gathered directly, without forming
+        the dense slices, and `dense` is not referenced afterwards."""
+        op = cls(blocking, o, v, sym)
+        orbitals = np.arange(dense.shape[0])
+        index = {"o": [orbitals[o][x] for x in blocking.index["o"]],
+                 "v": [orbitals[v][x] for x in blocking.index["v"]]}
+        for spaces in slices:
+            blocks = {key: dense[np.ix_(*[index[s][h] for s, h in zip(spaces, key)])]
+                      for key in blocking.keys(spaces, sym)}
+            op.blocks[spaces] = SymTensor(blocking, spaces, sym, blocks)
+        return op
+
+    def _space(self, x):
+        if x == self.o:
+            return "o"
+        if x == self.v:
+            return "v"
+        raise IndexError("Symmetry-blocked operators can only be indexed by the occupied and unoccupied slices")
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self.blocks:
+                self.blocks[key] = SymTensor(self.blocking, key, self.sym)
+            return self.blocks[key]
+        return self["".join(self._space(x) for x in key)].to_dense()
+
+    def __setitem__(self, key, value):
+        self.blocks[key] = value
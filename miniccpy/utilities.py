@@ -24,6 +24,36 @@ def biorthogonalize(L, R):
     # R = np.linalg.solve(MU, R.T) # R/MU
 
 
+# Mixed-precision CC solves: the residual norm reachable in single precision is about
+# 1e-6, so the switch to double precision must happen above it. The switch also happens
+# once the single-precision residual has not dropped below MIXED_PRECISION_MIN_DECREASE
+# times its smallest value for MIXED_PRECISION_MAX_STALL iterations.
+MIXED_PRECISION_MIN_THRESHOLD = 1.0e-05
+MIXED_PRECISION_MIN_DECREASE = 0.5
+MIXED_PRECISION_MAX_STALL = 5
+
+def check_mixed_precision_threshold(threshold):
+    """Raise a ValueError if the residual norm `threshold` at which mixed-precision
+    iterations switch to double precision is below MIXED_PRECISION_MIN_THRESHOLD."""
+    if threshold < MIXED_PRECISION_MIN_THRESHOLD:
+        raise ValueError(f"mixed_precision_threshold = {threshold:.1e} is below the smallest residual "
+                         f"norm reachable in single precision; use at least {MIXED_PRECISION_MIN_THRESHOLD:.1e}")
+
+
+class SinglePrecisionView:
+    """Read-only view of the double-precision array `array` whose blocks, e.g.,
+    g[o, o, v, v], are converted to single precision when they are accessed, so
+    that no single-precision copy of the full array is kept alongside it."""
+
+    def __init__(self, array):
+        self.array = array
+        self.shape = array.shape
+        self.dtype = np.dtype(np.float32)
+
+    def __getitem__(self, key):
+        return self.array[key].astype(self.dtype)
+
+
 def get_memory_usage():
     """Returns the amount of memory currently used in MB. Useful for
     investigating the memory usages of various routines."""
@@ -34,6 +64,22 @@ def get_memory_usage():
     return memory / (1024 * 1024)
 
 
+def set_fortran_threads(nthreads):
+    """Set the number of OpenMP threads used by the Fortran P-space kernels in
+    miniccpy.lib. This is independent of the size of the BLAS thread pool used
+    by numpy, which is controlled by OMP_NUM_THREADS/MKL_NUM_THREADS, etc.
+    at start-up."""
+    from miniccpy.lib import ccsdt_p, eomccsdt_p, deaeom4_p, dipeom4_p, dipeom4_star_p
+    for lib in (ccsdt_p.ccsdt_p, eomccsdt_p.eomccsdt_p, deaeom4_p.deaeom4_p, dipeom4_p.dipeom4_p, dipeom4_star_p.dipeom4_star_p):
+        lib.set_num_threads(nthreads)
+
+
+def get_fortran_threads():
+    """Return the number of OpenMP threads used by the Fortran P-space kernels."""
+    from miniccpy.lib import ccsdt_p
+    return int(ccsdt_p.ccsdt_p.get_num_threads())
+
+
 def clean_up(fid, n):
     for i in range(n):
         remove_files(fid + "-" + str(i + 1) + ".npy")
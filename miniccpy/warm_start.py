@@ -0,0 +1,67 @@
+import numpy as np
+from miniccpy.mp2 import get_amplitudes
+
+# Number of stored T amplitude arrays in each ground-state CC method
+T_RANKS = {"ccsd": 2, "rccsd": 2, "cc3": 2, "rcc3": 2, "ccsdt": 3, "rccsdt": 3, "ccsdt_p": 3, "cc4": 3, "ccsdtq": 4}
+
+def get_mp2_guess(fock, g, o, v):
+    """Return the guess T = (0, t2(MP2))."""
+    nu, no = fock[v, o].shape
+    return (np.zeros((nu, no)), get_amplitudes(fock, g, o, v))
+
+def get_t3_estimate(t1, t2, fock, g, o, v, rhf=False):
+    """Estimate T3 from T1 and T2 using the perturbative approximation of CC3,
+    t3 = D3^{-1} < ijkabc | (V_N exp(T1) T2)_C | 0 >."""
+    if rhf:
+        from miniccpy.rcc3 import compute_ccs_intermediates, compute_t3
+        eps = np.diagonal(fock)
+        n = np.newaxis
+        e_abc = -eps[v, n, n] - eps[n, v, n] - eps[n, n, v]
+        e_abcijk = 1.0 / (- eps[v, n, n, n, n, n] - eps[n, v, n, n, n, n] - eps[n, n, v, n, n, n]
+                          + eps[n, n, n, o, n, n] + eps[n, n, n, n, o, n] + eps[n, n, n, n, n, o])
+        I_vooo, I_vvov = compute_ccs_intermediates(fock, g, t1, t2, o, v)
+        return compute_t3(I_vooo, I_vvov, t2, e_abcijk, fock, e_abc)
+    else:
+        from miniccpy.helper_cc3 import compute_t3
+        return compute_t3(t1, t2, fock, g, o, v)
+
+def get_initial_amplitudes(T0, method, fock, g, o, v, rhf=False, t3_excitations=None):
+    """Convert the starting guess `T0` into the T amplitudes of `method`.
+
+    `T0` is either "mp2", giving T = (0, t2(MP2)), or a tuple of amplitudes
+    (t1, t2, ...) from a calculation on the same integrals. Amplitudes beyond the
+    rank of `method` are dropped, a missing T3 is estimated from T1 and T2 using the
+    CC3 approximation, and a missing T4 is set to zero. For method="ccsdt_p", T3 is
+    restricted to the P space `t3_excitations`, and a missing T3 is only estimated
+    for the triples in it."""
+    method = method.lower()
+    if method not in T_RANKS:
+        raise ValueError("Starting guesses are not implemented for {}".format(method))
+    rank = T_RANKS[method]
+
+    if isinstance(T0, str):
+        if T0.lower() != "mp2":
+            raise ValueError("Unknown starting guess {}".format(T0))
+        T = list(get_mp2_guess(fock, g, o, v))
+    else:
+        T = [np.copy(t) for t in T0[:rank]]
+    if len(T) < 2:
+        raise ValueError("Starting guess must contain at least T1 and T2")
+
+    if rank >= 3 and len(T) == 2:
+        print("    Estimating T3 from T1 and T2 using the CC3 approximation")
+        if method == "ccsdt_p":
+            from miniccpy.helper_cc3 import compute_t3_pspace
+            T.append(compute_t3_pspace(T[0], T[1], fock, g, o, v, t3_excitations))
+        else:
+            T.append(get_t3_estimate(T[0], T[1], fock, g, o, v, rhf=rhf))
+    if rank >= 4 and len(T) == 3:
+        nu, no = fock[v, o].shape
+        T.append(np.zeros((nu, nu, nu, nu, no, no, no, no)))
+
+    # Gather the P-space elements of a full T3 array
+    if method == "ccsdt_p" and T[2].ndim == 6:
+        idx = np.asarray(t3_excitations) - 1
+        T[2] = T[2][idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3], idx[:, 4], idx[:, 5]]
+
+    return tuple(T)
@@ -0,0 +1,52 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, get_hbar
+from miniccpy.pspace import get_active_4p2h_pspace
+
+def test_deaeom4_p_ch2():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [["C", (0.0, 0.0, 0.0)],
+            ["H", (0.0, 1.644403, -1.32213)],
+            ["H", (0.0, -1.644403, -1.32213)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, cartesian=True, charge=2)
+
+    no, nu = fock[o, v].shape
+    # the full 4p-2h space reproduces DEA-EOMCCSD(4p-2h)
+    r3_excitations = get_active_4p2h_pspace(no, nu, nactu=nu)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+    R, omega_guess = run_guess(H1, H2, o, v, 10, method="deacis", mult=-1, nactu=10)
+
+    state_index = [0, 1]
+    R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="deaeom4_p", state_index=state_index, convergence=1.0e-08, maxit=100, r3_excitations=r3_excitations)
+
+    # active-space DEA-EOMCCSD(4p-2h){Nu} with 4 active unoccupied orbitals
+    r3_excitations = get_active_4p2h_pspace(no, nu, nactu=4)
+    R, omega_guess = run_guess(H1, H2, o, v, 10, method="deacis", mult=-1, nactu=10)
+    R, omega_act, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="deaeom4_p", state_index=state_index, convergence=1.0e-08, maxit=100, r3_excitations=r3_excitations)
+
+    # an empty 4p-2h space reproduces DEA-EOMCCSD(3p-1h)
+    r3_excitations = get_active_4p2h_pspace(no, nu, nactu=0)
+    R, omega_guess = run_guess(H1, H2, o, v, 10, method="deacis", mult=-1, nactu=10)
+    R, omega_empty, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="deaeom4_p", state_index=state_index, convergence=1.0e-08, maxit=100, r3_excitations=r3_excitations)
+
+    expected_vee = [-1.2063288624, -1.2280321410]
+    expected_vee_act = [-1.2024309082, -1.2236321833]
+    expected_vee_empty = [-1.197844286485, -1.215889088946]
+
+    #
+    # Check the results
+    #
+    for i, vee in enumerate(expected_vee):
+        assert np.allclose(omega[i], vee, atol=1.0e-07)
+    for i, vee in enumerate(expected_vee_act):
+        assert np.allclose(omega_act[i], vee, atol=1.0e-07)
+    for i, vee in enumerate(expected_vee_empty):
+        assert np.allclose(omega_empty[i], vee, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_deaeom4_p_ch2()
@@ -0,0 +1,34 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, get_hbar
+from guess_reference import dipcisd_cvs_guess_slow
+
+def test_dipcisd_cvs_guess_ch2():
+
+        basis = '6-31g'
+        nfrozen = 0
+
+        geom = [["C", (0.0, 0.0, 0.0)],
+                ["H", (0.0, 1.644403, -1.32213)],
+                ["H", (0.0, -1.644403, -1.32213)]]
+
+        fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, symmetry="C2V", unit="Bohr", cartesian=False, charge=-2)
+
+        T, Ecorr  = run_cc_calc(fock, g, o, v, method='ccsd')
+        H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+
+        # guesses for the states with a C 1s hole
+        nroot = 5
+        R, omega_guess = run_guess(H1, H2, o, v, nroot, method="dipcisd", nacto=4, nactu=4, cvsmin=0, cvsmax=1)
+        R_ref, omega_ref = dipcisd_cvs_guess_slow(H1, H2, o, v, nroot, 0, 1, 4, 4)
+
+        #
+        # Check the results
+        #
+        expected_omega = [24.5154639281, 11.4191017056, 11.3599252285, 11.3599252285, 11.3599252285]
+        assert np.allclose(omega_guess, expected_omega, atol=1.0e-08)
+        assert np.allclose(omega_guess, omega_ref, atol=1.0e-10)
+        # the guess vectors span the same space as the reference ones
+        assert np.allclose(np.linalg.svd(np.dot(R.T, R_ref), compute_uv=False), 1.0, atol=1.0e-08)
+
+if __name__ == "__main__":
+        test_dipcisd_cvs_guess_ch2()
@@ -17,12 +17,18 @@ def test_dipeom4_p_ch2():
     H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
 
     nroot = 10
-    R, omega_guess = run_guess(H1, H2, o, v, nroot, method="dipcisd", nacto=10, nactu=4)
+    R_guess, omega_guess = run_guess(H1, H2, o, v, nroot, method="dipcisd", nacto=10, nactu=4)
     # Set up the list of 4h2p excitations corresponding to the active-space DIP-EOMCCSD(4h-2p){No} method
     no, nu = fock[o, v].shape
     # Here, we are using 10 active occupied orbitals, which corresponds to full DIP-EOMCCSD(4h-2p)
     r3_excitations = get_active_4h2p_pspace(no, nu, nacto=10)
-    R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="dipeom4_p", state_index=[0, 3], r3_excitations=r3_excitations, out_of_core=True)
+    fock_stats = {}
+    R, omega, r0 = run_eomcc_calc(R_guess, omega_guess, T, H1, H2, o, v, method="dipeom4_p", state_index=[0, 3], r3_excitations=r3_excitations, out_of_core=True,
+                                  stats=fock_stats)
+    # Precondition with the HBar diagonal, including its 4h-2p part
+    hbar_stats = {}
+    R, omega_hbar, r0 = run_eomcc_calc(R_guess, omega_guess, T, H1, H2, o, v, method="dipeom4_p", state_index=[0, 3], r3_excitations=r3_excitations, out_of_core=True,
+                                       preconditioner="hbar", stats=hbar_stats)
 
     #
     # Check the results
@@ -30,6 +36,10 @@ def test_dipeom4_p_ch2():
     expected_vee = [-0.4700687744, -0.4490361545]
     for i, vee in enumerate(expected_vee):
         assert np.allclose(omega[i], vee, atol=1.0e-06)
+        assert np.allclose(omega_hbar[i], vee, atol=1.0e-06)
+    # the HBar-diagonal preconditioner needs fewer Davidson iterations for both roots
+    for n_fock, n_hbar in zip(fock_stats["niter"], hbar_stats["niter"]):
+        assert n_hbar < n_fock
 
 if __name__ == "__main__":
     test_dipeom4_p_ch2()
@@ -0,0 +1,41 @@
+import os
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, get_hbar, set_fortran_threads, get_fortran_threads
+from miniccpy.pspace import get_active_4h2p_pspace
+
+def test_dipeom4_p_threads_ch2():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [["C", (0.0, 0.0, 0.0)],
+            ["H", (0.0, 1.644403, -1.32213)],
+            ["H", (0.0, -1.644403, -1.32213)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, symmetry="C2V", unit="Bohr", cartesian=False, charge=-2)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+
+    nroot = 10
+    R0, omega_guess = run_guess(H1, H2, o, v, nroot, method="dipcisd", nacto=10, nactu=4)
+    no, nu = fock[o, v].shape
+
+    # The OpenMP P-space kernels give the same DIP-EOMCCSD(4h-2p) root for every thread count
+    nthreads_default = get_fortran_threads()
+    energies = {}
+    for nthreads in sorted({1, 2, os.cpu_count() or 1}):
+        set_fortran_threads(nthreads)
+        r3_excitations = get_active_4h2p_pspace(no, nu, nacto=10)
+        R, omega, r0 = run_eomcc_calc(R0, omega_guess, T, H1, H2, o, v, method="dipeom4_p", state_index=[0], r3_excitations=r3_excitations)
+        energies[nthreads] = omega[0]
+    set_fortran_threads(nthreads_default)
+
+    #
+    # Check the results
+    #
+    for nthreads, vee in energies.items():
+        assert np.allclose(vee, -0.4700687744, atol=1.0e-06)
+
+if __name__ == "__main__":
+    test_dipeom4_p_threads_ch2()
@@ -0,0 +1,31 @@
+from miniccpy.driver import run_scf, run_cc_calc, get_hbar
+from guess_reference import check_builder
+
+def test_guess_hamiltonian_ch2():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [["C", (0.0, 0.0, 0.0)],
+            ["H", (0.0, 1.644403, -1.32213)],
+            ["H", (0.0, -1.644403, -1.32213)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, symmetry="C2V", unit="Bohr", cartesian=False, charge=-2)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+
+    assert check_builder("build_cisd_hamiltonian", H1, H2, o, v, 4, 6)
+    assert check_builder("build_2p_hamiltonian", H1, H2, o, v, 10)
+    assert check_builder("build_2h_hamiltonian", H1, H2, o, v)
+    assert check_builder("build_dipcisd_hamiltonian", H1, H2, o, v, 10, 4)
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, symmetry="C2V", unit="Bohr", cartesian=False, charge=-2, rhf=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method='rccsd')
+
+    assert check_builder("build_rcisd_hamiltonian", H1, H2, o, v, 3, 4)
+
+if __name__ == "__main__":
+    test_guess_hamiltonian_ch2()
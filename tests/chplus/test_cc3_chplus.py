@@ -11,9 +11,13 @@ def test_cc3_chplus():
     T, Ecorr = run_cc_calc(fock, g, o, v, method='cc3')
     H1, H2 = get_hbar(T, fock, g, o, v, method='cc3')
     L = run_leftcc_calc(T, fock, H1, H2, o, v, method="left_cc3", g=g)
+    # lowest singlet
     R, omega_guess = run_guess(H1, H2, o, v, 20, method="cisd", mult=1, nacto=6, nactu=6)
-    R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method='eomcc3', state_index=[0, 2], fock=fock, g=g)
-    L, omega = run_lefteomcc_calc(R, omega, T, H1, H2, o, v, method="left_eomcc3", fock=fock, g=g)
+    R_s, omega_s, r0_s = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method='eomcc3', state_index=[0], fock=fock, g=g)
+    # triplet state from the third triplet guess root
+    R, omega_guess = run_guess(H1, H2, o, v, 20, method="cisd", mult=3, nacto=6, nactu=6)
+    R_t, omega_t, r0_t = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method='eomcc3', state_index=[2], fock=fock, g=g)
+    L, omega = run_lefteomcc_calc(R_s + R_t, omega_s + omega_t, T, H1, H2, o, v, method="left_eomcc3", fock=fock, g=g)
 
     #
     # Check the results
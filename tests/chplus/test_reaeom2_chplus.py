@@ -0,0 +1,31 @@
+import numpy as np
+from pathlib import Path
+from miniccpy.driver import run_scf_gamess, run_cc_calc, run_guess, run_eomcc_calc, run_lefteomcc_calc, get_hbar
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_reaeom2_chplus():
+
+    fock, g, e_hf, o, v = run_scf_gamess(TEST_DATA_DIR + "/chplus.FCIDUMP", 6, 26, 0, rhf=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method='rccsd')
+
+    R, omega_guess = run_guess(H1, H2, o, v, 10, method="reacis")
+    R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method='reaeom2', state_index=[0, 2])
+    L, omega_left = run_lefteomcc_calc(R, omega, T, H1, H2, o, v, method='left_reaeom2')
+
+    #
+    # Check the results against the spin-orbital EA-EOMCCSD values
+    #
+    assert np.allclose(Ecorr, -0.114901980505, atol=1.0e-07)
+
+    assert np.allclose(omega[0], -0.377942659908, atol=1.0e-07)
+    assert np.allclose(omega_left[0], -0.377942659908, atol=1.0e-07)
+    assert np.allclose(omega[1], -0.146301569046, atol=1.0e-07)
+    assert np.allclose(omega_left[1], -0.146301569046, atol=1.0e-07)
+    assert np.allclose(omega_left, omega, atol=1.0e-06)
+
+
+if __name__ == "__main__":
+    test_reaeom2_chplus()
@@ -0,0 +1,49 @@
+from pathlib import Path
+import numpy as np
+from miniccpy.driver import run_scf_gamess, run_guess
+from miniccpy.initial_guess import build_cis_hamiltonian, build_cisd_hamiltonian, get_spin_adapted_cisd_basis
+
+TEST_DATA_DIR = str(Path(__file__).parents[1].absolute() / "data")
+
+def test_spin_adapted_guess_chplus():
+
+    fock, g, e_hf, o, v = run_scf_gamess(TEST_DATA_DIR + "/chplus.FCIDUMP", 6, 26, 0)
+    rfock, rg, e_hf, ro, rv = run_scf_gamess(TEST_DATA_DIR + "/chplus.FCIDUMP", 6, 26, 0, rhf=True)
+    no, nu = fock[o, v].shape
+
+    # singlet and triplet CIS roots of the full spin-orbital problem
+    omega_full = np.sort(np.real(np.linalg.eigvals(build_cis_hamiltonian(fock, g, o, v))))
+
+    R_s, omega_s = run_guess(fock, g, o, v, 6, method="cis", mult=1)
+    R_t, omega_t = run_guess(fock, g, o, v, 6, method="cis", mult=3, solver="davidson")
+    R_rs, omega_rs = run_guess(rfock, rg, ro, rv, 6, method="rcis", mult=1)
+    R_rt, omega_rt = run_guess(rfock, rg, ro, rv, 6, method="rcis", mult=3)
+
+    # the spin-adapted CISd space spans the singlets and triplets of the full CISd space
+    H = build_cisd_hamiltonian(fock, g, o, v, 4, 4)
+    U_s = get_spin_adapted_cisd_basis(no, nu, 4, 4, 1).toarray()
+    U_t = get_spin_adapted_cisd_basis(no, nu, 4, 4, 3).toarray()
+    HU = np.dot(H, np.hstack((U_s, U_t)))
+    R_cisd, omega_cisd = run_guess(fock, g, o, v, 6, method="cisd", mult=1, nacto=4, nactu=4)
+    R_cisd_dav, omega_cisd_dav = run_guess(fock, g, o, v, 6, method="cisd", mult=1, nacto=4, nactu=4, solver="davidson")
+    # odd active spinorbital counts are rounded up to whole spatial orbitals
+    R_cisd_odd, omega_cisd_odd = run_guess(fock, g, o, v, 6, method="cisd", mult=1, nacto=3, nactu=3)
+
+    #
+    # Check the results
+    #
+    assert U_s.shape[1] == no * nu // 4 + 10
+    assert U_t.shape[1] == no * nu // 4 + 7
+    assert np.allclose(np.dot(U_s.T, U_t), 0.0, atol=1.0e-12)
+    assert np.allclose(np.dot(U_s.T, HU[:, U_s.shape[1]:]), 0.0, atol=1.0e-12)
+    for omega in omega_s:
+        assert np.min(abs(omega_full - omega)) < 1.0e-10
+    for omega in omega_t:
+        assert np.min(abs(omega_full - omega)) < 1.0e-10
+    assert np.allclose(omega_s, omega_rs, atol=1.0e-10)
+    assert np.allclose(omega_t, omega_rt, atol=1.0e-10)
+    assert np.allclose(omega_cisd, omega_cisd_dav, atol=1.0e-07)
+    assert np.allclose(omega_cisd_odd, omega_cisd, atol=1.0e-10)
+
+if __name__ == "__main__":
+    test_spin_adapted_guess_chplus()
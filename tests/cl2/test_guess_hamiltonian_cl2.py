@@ -0,0 +1,23 @@
+from miniccpy.driver import run_scf, run_cc_calc, get_hbar
+from guess_reference import check_builder
+
+def test_guess_hamiltonian_cl2():
+
+    basis = '6-31g'
+    nfrozen = 10
+
+    geom = [["Cl", (0.0, 0.0, 0.0)],
+            ["Cl", (0.0, 0.0, 1.9870)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, symmetry="D2H", unit="Angstrom", cartesian=False, charge=0, x2c=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+
+    # all 14 correlated occupied spinorbitals are active, as in the DIP-EOMCCSD(4h-2p) tests
+    assert check_builder("build_2h_hamiltonian", H1, H2, o, v)
+    assert check_builder("build_dipcisd_hamiltonian", H1, H2, o, v, 14, 4)
+    assert check_builder("build_cisd_hamiltonian", H1, H2, o, v, 6, 6)
+
+if __name__ == "__main__":
+    test_guess_hamiltonian_cl2()
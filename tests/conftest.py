@@ -0,0 +1,5 @@
+import os
+import sys
+
+# make the shared reference implementations in tests/ importable from the test subdirectories
+sys.path.insert(0, os.path.dirname(__file__))
@@ -0,0 +1,625 @@
+"""Element-by-element (loop) builders of the CI guess Hamiltonians, kept as
+reference implementations for the vectorized builders in miniccpy.initial_guess."""
+import numpy as np
+from miniccpy import initial_guess
+from miniccpy.initial_guess import get_cisd_index_arrays, get_rcisd_index_arrays, get_dipcisd_index_arrays
+
+def check_builder(name, *args):
+    """Compare the vectorized guess Hamiltonian `name` against its reference loop builder."""
+    H_ref = REFERENCE_BUILDERS[name](*args)
+    H = getattr(initial_guess, name)(*args)
+    return np.allclose(H, H_ref, atol=1.0e-12)
+
+def build_cisd_hamiltonian_slow(fock, g, o, v, nacto, nactu):
+
+    no, nu = fock[o, v].shape
+    # set dimensions of CISD problem
+    n1 = no * nu
+    n2 = int(nacto * (nacto - 1) / 2 * nactu * (nactu - 1) / 2)
+    # get index addressing arrays
+    idx_1, idx_2 = get_cisd_index_arrays(no, nu, nacto, nactu)
+    ###########
+    # SINGLES #
+    ###########
+    s_H_s = np.zeros((n1, n1))
+    s_H_d = np.zeros((n1, n2))
+    for a in range(nu):
+        for i in range(no):
+            idet = idx_1[a, i]
+            if idet == 0: continue
+            I = abs(idet) - 1
+            # -h1a(mi) * r1a(am)
+            for m in range(no):
+                jdet = idx_1[a, m]
+                if jdet == 0: continue
+                J = abs(jdet) - 1
+                s_H_s[I, J] -= fock[o, o][m, i]
+            # h1a(ae) * r1a(ei)
+            for e in range(nu):
+                jdet = idx_1[e, i]
+                if jdet == 0: continue
+                J = abs(jdet) - 1
+                s_H_s[I, J] += fock[v, v][a, e]
+            # h2a(amie) * r1a(em)
+            for e in range(nu):
+                for m in range(no):
+                    jdet = idx_1[e, m]
+                    if jdet == 0: continue
+                    J = abs(jdet) - 1
+                    s_H_s[I, J] += g[v, o, o, v][a, m, i, e]
+            # h1a(me) * r2a(aeim)
+            for e in range(nactu):
+                for m in range(no - nacto, no):
+                    jdet = idx_2[a, e, i, m]
+                    if jdet != 0:
+                        J = abs(jdet) - 1
+                        phase = np.sign(jdet)
+                        s_H_d[I, J] += fock[o, v][m, e] * phase
+            # -1/2 h2a(mnif) * r2a(afmn)
+            for m in range(no - nacto, no):
+                for n in range(m + 1, no):
+                    for f in range(nactu):
+                        jdet = idx_2[a, f, m, n]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            s_H_d[I, J] -= g[o, o, o, v][m, n, i, f] * phase
+            # 1/2 h2a(anef) * r2a(efin)
+            for e in range(nactu):
+                for f in range(e + 1, nactu):
+                    for n in range(no - nacto, no):
+                        jdet = idx_2[e, f, i, n]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            s_H_d[I, J] += g[v, o, v, v][a, n, e, f] * phase
+    ###########
+    # DOUBLES #
+    ###########
+    d_H_s = np.zeros((n2, n1))
+    d_H_d = np.zeros((n2, n2))
+    for a in range(nactu):
+        for b in range(a + 1, nactu):
+            for i in range(no - nacto, no):
+                for j in range(i + 1, no):
+                    idet = idx_2[a, b, i, j]
+                    if idet == 0: continue
+                    I = abs(idet) - 1
+                    # -A(ab) h2a(amij) * r1a(bm)
+                    for m in range(no):
+                        # (1)
+                        jdet = idx_1[b, m]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_s[I, J] -= g[v, o, o, o][a, m, i, j]
+                        # (ab)
+                        jdet = idx_1[a, m]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_s[I, J] += g[v, o, o, o][b, m, i, j]
+                    # A(ij) h2a(abie) * r1a(ej)
+                    for e in range(nu):
+                        # (1)
+                        jdet = idx_1[e, i]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_s[I, J] += g[v, v, o, v][b, a, j, e]
+                        # (ij)
+                        jdet = idx_1[e, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_s[I, J] -= g[v, v, o, v][b, a, i, e]
+                    # -A(ij) h1a(mi) * r2a(abmj)
+                    for m in range(no - nacto, no):
+                        # (1)
+                        jdet = idx_2[a, b, m, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] -= fock[o, o][m, i] * phase
+                        # (ij)
+                        jdet = idx_2[a, b, m, i]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] += fock[o, o][m, j] * phase
+                    # A(ab) h1a(ae) * r2a(ebij)
+                    for e in range(nactu):
+                        # (1)
+                        jdet = idx_2[e, b, i, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] += fock[v, v][a, e] * phase
+                        # (ab)
+                        jdet = idx_2[e, a, i, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] -= fock[v, v][b, e] * phase
+                    # 1/2 h2a(mnij) * r2a(abmn)
+                    for m in range(no - nacto, no):
+                        for n in range(m + 1, no):
+                            jdet = idx_2[a, b, m, n]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] += g[o, o, o, o][m, n, i, j] * phase
+                    # 1/2 h2a(abef) * r2a(efij)
+                    for e in range(nactu):
+                        for f in range(e + 1, nactu):
+                            jdet = idx_2[e, f, i, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] += g[v, v, v, v][a, b, e, f] * phase
+                    # A(ij)A(ab) h2a(amie) * r2a(ebmj)
+                    for e in range(nactu):
+                        for m in range(no - nacto, no):
+                            # (1)
+                            jdet = idx_2[e, b, m, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] += g[v, o, o, v][a, m, i, e] * phase
+                            # (ij)
+                            jdet = idx_2[e, b, m, i]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] -= g[v, o, o, v][a, m, j, e] * phase
+                            # (ab)
+                            jdet = idx_2[e, a, m, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] -= g[v, o, o, v][b, m, i, e] * phase
+                            # (ij)(ab)
+                            jdet = idx_2[e, a, m, i]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] += g[v, o, o, v][b, m, j, e] * phase
+
+    # Assemble and return full matrix
+    return np.concatenate((np.concatenate((s_H_s, s_H_d), axis=1),
+                           np.concatenate((d_H_s, d_H_d), axis=1),), axis=0)
+
+def build_rcisd_hamiltonian_slow(fock, g, o, v, nacto, nactu):
+
+    no, nu = fock[o, v].shape
+    # set dimensions of CISD problem
+    n1 = no * nu
+    n2 = int(nacto * (nacto + 1) / 2 * nactu * (nactu + 1) / 2)
+    # get index addressing arrays
+    idx_1, idx_2 = get_rcisd_index_arrays(no, nu, nacto, nactu)
+    ###########
+    # SINGLES #
+    ###########
+    s_H_s = np.zeros((n1, n1))
+    s_H_d = np.zeros((n1, n2))
+    for a in range(nu):
+        for i in range(no):
+            idet = idx_1[a, i]
+            if idet == 0: continue
+            I = abs(idet) - 1
+            # -h1a(mi) * r1a(am)
+            for m in range(no):
+                jdet = idx_1[a, m]
+                if jdet == 0: continue
+                J = abs(jdet) - 1
+                s_H_s[I, J] -= fock[o, o][m, i]
+            # h1a(ae) * r1a(ei)
+            for e in range(nu):
+                jdet = idx_1[e, i]
+                if jdet == 0: continue
+                J = abs(jdet) - 1
+                s_H_s[I, J] += fock[v, v][a, e]
+            # h2a(amie) * r1a(em) + h2b(amie) * r1b(em), with r1b = r1a for singlets
+            for e in range(nu):
+                for m in range(no):
+                    jdet = idx_1[e, m]
+                    if jdet == 0: continue
+                    J = abs(jdet) - 1
+                    s_H_s[I, J] += 2.0 * g[v, o, o, v][a, m, i, e] - g[v, o, v, o][a, m, e, i]
+            # h1b(me) * r2b(aeim)
+            for e in range(nactu):
+                for m in range(no - nacto, no):
+                    jdet = idx_2[a, e, i, m]
+                    if jdet != 0:
+                        J = abs(jdet) - 1
+                        s_H_d[I, J] += fock[o, v][m, e]
+            # -h2b(mnif) * r2b(afmn)
+            for m in range(no - nacto, no):
+                for n in range(no - nacto, no):
+                    for f in range(nactu):
+                        jdet = idx_2[a, f, m, n]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            s_H_d[I, J] -= g[o, o, o, v][m, n, i, f]
+            # h2b(anef) * r2b(efin)
+            for e in range(nactu):
+                for f in range(nactu):
+                    for n in range(no - nacto, no):
+                        jdet = idx_2[e, f, i, n]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            s_H_d[I, J] += g[v, o, v, v][a, n, e, f]
+    ###########
+    # DOUBLES #
+    ###########
+    d_H_s = np.zeros((n2, n1))
+    d_H_d = np.zeros((n2, n2))
+    for a in range(nactu):
+        for b in range(nactu):
+            for i in range(no - nacto, no):
+                for j in range(no - nacto, no):
+                    idet = idx_2[a, b, i, j]
+                    if idet == 0: continue
+                    I = abs(idet) - 1
+                    # -h2b(mbij) * r1a(am)
+                    for m in range(no):
+                        jdet = idx_1[a, m]
+                        if jdet == 0: continue
+                        J = abs(jdet) - 1
+                        d_H_s[I, J] -= g[o, v, o, o][m, b, i, j]
+                    # h2b(abej) * r1a(ei)
+                    for e in range(nu):
+                        jdet = idx_1[e, i]
+                        if jdet == 0: continue
+                        J = abs(jdet) - 1
+                        d_H_s[I, J] += g[v, v, v, o][a, b, e, j]
+                    # -h2b(amij) * r1b(bm)
+                    for m in range(no):
+                        jdet = idx_1[b, m]
+                        if jdet == 0: continue
+                        J = abs(jdet) - 1
+                        d_H_s[I, J] -= g[v, o, o, o][a, m, i, j]
+                    # h2b(abie) * r1b(ej)
+                    for e in range(nu):
+                        jdet = idx_1[e, j]
+                        if jdet == 0: continue
+                        J = abs(jdet) - 1
+                        d_H_s[I, J] += g[v, v, o, v][a, b, i, e]
+                    # -h1a(mi) * r2b(abmj)
+                    for m in range(no - nacto, no):
+                        jdet = idx_2[a, b, m, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_d[I, J] -= fock[o, o][m, i]
+                    # -h1b(mj) * r2b(abim)
+                    for m in range(no - nacto, no):
+                        jdet = idx_2[a, b, i, m]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_d[I, J] -= fock[o, o][m, j]
+                    # h1a(ae) * r2b(ebij)
+                    for e in range(nactu):
+                        jdet = idx_2[e, b, i, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_d[I, J] += fock[v, v][a, e]
+                    # h1a(be) * r2b(aeij)
+                    for e in range(nactu):
+                        jdet = idx_2[a, e, i, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            d_H_d[I, J] += fock[v, v][b, e]
+                    # h2b(mnij) * r2b(abmn)
+                    for m in range(no - nacto, no):
+                        for n in range(no - nacto, no):
+                            jdet = idx_2[a, b, m, n]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                d_H_d[I, J] += g[o, o, o, o][m, n, i, j]
+                    # h2b(abef) * r2b(efij)
+                    for e in range(nactu):
+                        for f in range(nactu):
+                            jdet = idx_2[e, f, i, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                d_H_d[I, J] += g[v, v, v, v][a, b, e, f]
+                    # h2a(amie) * r2b(ebmj)
+                    for e in range(nactu):
+                        for m in range(no - nacto, no):
+                            jdet = idx_2[e, b, m, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                d_H_d[I, J] += g[v, o, o, v][a, m, i, e] - g[v, o, v, o][a, m, e, i]
+                    # h2c(bmje) * r2b(aeim)
+                    for e in range(nactu):
+                        for m in range(no - nacto, no):
+                            jdet = idx_2[a, e, i, m]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                d_H_d[I, J] += g[v, o, o, v][b, m, j, e] - g[v, o, v, o][b, m, e, j]
+                    # -h2b(amej) * r2b(ebim)
+                    for e in range(nactu):
+                        for m in range(no - nacto, no):
+                            jdet = idx_2[e, b, i, m]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                d_H_d[I, J] -= g[v, o, v, o][a, m, e, j]
+                    # -h2b(mbie) * r2b(aemj)
+                    for e in range(nactu):
+                        for m in range(no - nacto, no):
+                            jdet = idx_2[a, e, m, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                d_H_d[I, J] -= g[o, v, o, v][m, b, i, e]
+
+    # Assemble and return full matrix
+    return np.concatenate((np.concatenate((s_H_s, s_H_d), axis=1),
+                           np.concatenate((d_H_s, d_H_d), axis=1),), axis=0)
+
+def build_2p_hamiltonian_slow(f, g, o, v, nactu):
+    # get orbital parameters
+    no, nu = f[o, v].shape
+    # set active space parameters
+    nactu = min(nactu, nu)
+    # allocate active-space 2p hamiltonian
+    ndim = int(nactu * (nactu - 1) / 2)
+    H = np.zeros((ndim, ndim))
+    ct1 = 0
+    for a in range(nactu):
+        for b in range(a + 1, nactu):
+            ct2 = 0
+            for c in range(nactu):
+                for d in range(c + 1, nactu):
+                    H[ct1, ct2] = (
+                        +(b == d) * f[v, v][a, c]
+                        -(a == d) * f[v, v][b, c]
+                        -(b == c) * f[v, v][a, d]
+                        +(a == c) * f[v, v][b, d]
+                        + g[v, v, v, v][a, b, c, d]
+                    )
+                    ct2 += 1
+            ct1 += 1
+
+    return H
+
+def build_2h_hamiltonian_slow(f, g, o, v):
+    """ Construct the 2h Hamiltonian with matrix elements
+        given by:
+        < ij | H_N | kl > = A(ij)A(kl)[d(i,k)f(l,j)] + g(k,l,i,j) 
+    """
+
+    # get orbital parameters
+    no, nu = f[o, v].shape
+    # allocate active-space 2p hamiltonian
+    ndim = int(no * (no - 1) / 2)
+    H = np.zeros((ndim, ndim))
+    ct1 = 0
+    for i in range(no):
+        for j in range(i + 1, no):
+            ct2 = 0
+            for k in range(no):
+                for l in range(k + 1, no):
+                    H[ct1, ct2] = (
+                        -(j == l) * f[o, o][k, i]
+                        +(i == l) * f[o, o][k, j]
+                        +(j == k) * f[o, o][l, i]
+                        -(i == k) * f[o, o][l, j]
+                        + g[o, o, o, o][k, l, i, j]
+                    )
+                    ct2 += 1
+            ct1 += 1
+    return H
+
+def build_dipcisd_hamiltonian_slow(fock, g, o, v, nacto, nactu):
+    """ Construct the 2h + active(3h-1p) Hamiltonian with matrix elements"""
+    no, nu = fock[o, v].shape
+    n1 = int(no*(no - 1)/2)
+    n2 = int(nacto*(nacto - 1)*(nacto - 2)/6 * nactu)
+    # get index addressing arrays
+    idx_1, idx_2 = get_dipcisd_index_arrays(no, nu, nacto, nactu)
+    ######
+    # 2h #
+    ######
+    s_H_s = np.zeros((n1, n1))
+    s_H_d = np.zeros((n1, n2))
+    for i in range(no):
+        for j in range(i + 1, no):
+            idet = idx_1[i, j]
+            if idet == 0: continue
+            I = abs(idet) - 1
+            # -A(ij) h1(mi)*r1(mj)
+            for m in range(no):
+                # (1)
+                jdet = idx_1[m, j]
+                if jdet != 0:
+                    J = abs(jdet) - 1
+                    phase = np.sign(jdet)
+                    s_H_s[I, J] -= fock[o, o][m, i] * phase
+                # (ij)
+                jdet = idx_1[m, i]
+                if jdet != 0:
+                    J = abs(jdet) - 1
+                    phase = np.sign(jdet)
+                    s_H_s[I, J] += fock[o, o][m, j] * phase
+            # h2(mnij)*r1(mn)
+            for m in range(no):
+                for n in range(m + 1, no):
+                    # (1)
+                    jdet = idx_1[m, n]
+                    if jdet != 0:
+                        J = abs(jdet) - 1
+                        phase = np.sign(jdet)
+                        s_H_s[I, J] += g[o, o, o, o][m, n, i, j] * phase
+            # h1(me)*r2(ijem)
+            for e in range(nactu):
+                for m in range(no - nacto, no):
+                    # (1)
+                    jdet = idx_2[i, j, e, m]
+                    if jdet != 0:
+                        J = abs(jdet) - 1
+                        phase = np.sign(jdet)
+                        s_H_d[I, J] += fock[o, v][m, e] * phase
+            # -A(ij) h2(mnif)*r2(mjfn)
+            for m in range(no - nacto, no):
+                for n in range(m + 1, no):
+                    for f in range(nactu):
+                        # (1)
+                        jdet = idx_2[m, j, f, n]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            s_H_d[I, J] -= g[o, o, o, v][m, n, i, f] * phase
+                        # (ij)
+                        jdet = idx_2[m, i, f, n]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            s_H_d[I, J] += g[o, o, o, v][m, n, j, f] * phase
+    ########
+    # 3h1p #
+    ########
+    d_H_s = np.zeros((n2, n1))
+    d_H_d = np.zeros((n2, n2))
+    for i in range(no - nacto, no):
+        for j in range(i + 1, no):
+            for c in range(nactu):
+                for k in range(j + 1, no):
+                    idet = idx_2[i, j, c, k]
+                    if idet == 0: continue
+                    I = abs(idet) - 1
+                    # -A(j/ik) h2(cmki)*r1(mj)
+                    for m in range(no):
+                        # (1)
+                        jdet = idx_1[m, j]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_s[I, J] -= g[v, o, o, o][c, m, k, i] * phase
+                        # (ij)
+                        jdet = idx_1[m, i]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_s[I, J] += g[v, o, o, o][c, m, k, j] * phase
+                        # (jk)
+                        jdet = idx_1[m, k]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_s[I, J] += g[v, o, o, o][c, m, j, i] * phase
+                    # h1(ce)*r2(ijek)
+                    for e in range(nactu):
+                        jdet = idx_2[i, j, e, k]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] += fock[v, v][c, e] * phase
+                    # -A(k/ij) h1(mk)*r2(ijcm)
+                    for m in range(no - nacto, no):
+                        # (1)
+                        jdet = idx_2[i, j, c, m]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] -= fock[o, o][m, k] * phase
+                        # (ik)
+                        jdet = idx_2[k, j, c, m]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] += fock[o, o][m, i] * phase
+                        # (jk)
+                        jdet = idx_2[i, k, c, m]
+                        if jdet != 0:
+                            J = abs(jdet) - 1
+                            phase = np.sign(jdet)
+                            d_H_d[I, J] += fock[o, o][m, j] * phase
+                    # A(k/ij) h2(mnij)*r2(mnck)
+                    for m in range(no - nacto, no):
+                        for n in range(m + 1, no):
+                            # (1)
+                            jdet = idx_2[m, n, c, k]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] += g[o, o, o, o][m, n, i, j] * phase
+                            # (ik)
+                            jdet = idx_2[m, n, c, i]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] -= g[o, o, o, o][m, n, k, j] * phase
+                            # (jk)
+                            jdet = idx_2[m, n, c, j]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] -= g[o, o, o, o][m, n, i, k] * phase
+                    # A(k/ij) h2(cmke)*r2(ijem)
+                    for m in range(no - nacto, no):
+                        for e in range(nactu):
+                            # (1)
+                            jdet = idx_2[i, j, e, m]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] += g[v, o, o, v][c, m, k, e] * phase
+                            # (ik)
+                            jdet = idx_2[k, j, e, m]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] -= g[v, o, o, v][c, m, i, e] * phase
+                            # (jk)
+                            jdet = idx_2[i, k, e, m]
+                            if jdet != 0:
+                                J = abs(jdet) - 1
+                                phase = np.sign(jdet)
+                                d_H_d[I, J] -= g[v, o, o, v][c, m, j, e] * phase
+    # Assemble and return full matrix
+    return np.concatenate((np.concatenate((s_H_s, s_H_d), axis=1),
+                           np.concatenate((d_H_s, d_H_d), axis=1),), axis=0)
+
+def dipcisd_cvs_guess_slow(f, g, o, v, nroot, cvsmin, cvsmax, nacto, nactu):
+    """Diagonalize the full 2h + active(3h-1p) Hamiltonian and apply the CVS
+    separation to the highest `nroot` eigenvectors element by element."""
+    from miniccpy.initial_guess import dipcisd_scatter
+    H = build_dipcisd_hamiltonian_slow(f, g, o, v, nacto, nactu)
+    omega, C = np.linalg.eig(H)
+    idx = np.argsort(omega)[::-1]
+    omega = np.real(omega[idx])
+    C = np.real(C[:, idx])
+
+    no, nu = f[o, v].shape
+    n1 = no**2
+    n2 = no**3 * nu
+
+    R_guess = np.zeros((n1 + n2, nroot))
+    for i in range(nroot):
+        R_guess_i = dipcisd_scatter(C[:, i], no, nu, nacto, nactu)
+        r1 = R_guess_i[:n1].reshape(no, no)
+        r2 = R_guess_i[n1:].reshape(no, no, nu, no)
+        # apply CVS separation to the guess vector
+        for j in range(no):
+            for k in range(j + 1, no):
+                if (j < cvsmin or j > cvsmax) and (k < cvsmin or k > cvsmax):
+                    r1[j, k] = 0.0
+                    r1[k, j] = 0.0
+        for j in range(no):
+            for k in range(j + 1, no):
+                for l in range(k + 1, no):
+                    for d in range(nu):
+                        if (j < cvsmin or j > cvsmax) and (k < cvsmin or k > cvsmax) and (l < cvsmin or l > cvsmax):
+                            r2[j, k, d, l] = 0.0
+                            r2[j, l, d, k] = 0.0
+                            r2[k, j, d, l] = 0.0
+                            r2[k, l, d, j] = 0.0
+                            r2[l, j, d, k] = 0.0
+                            r2[l, k, d, j] = 0.0
+        R_guess[:, i] = np.hstack((r1.flatten(), r2.flatten()))
+    R_guess, _ = np.linalg.qr(R_guess[:, :nroot])
+    return R_guess, omega[:nroot]
+
+REFERENCE_BUILDERS = {
+    "build_cisd_hamiltonian": build_cisd_hamiltonian_slow,
+    "build_rcisd_hamiltonian": build_rcisd_hamiltonian_slow,
+    "build_2p_hamiltonian": build_2p_hamiltonian_slow,
+    "build_2h_hamiltonian": build_2h_hamiltonian_slow,
+    "build_dipcisd_hamiltonian": build_dipcisd_hamiltonian_slow,
+}
@@ -0,0 +1,35 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_adaptive_ccpq
+
+def test_adaptive_ccpq_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    # Define molecule geometry and basis set
+    geom = [["O", (0.0, 0.0, -0.0180)],
+            ["H", (0.0, 3.030526, -2.117796)],
+            ["H", (0.0, -3.030526, -2.117796)]]
+
+    fock, g, e_hf, o, v, orbsym = run_scf(geom, basis, nfrozen, symmetry="C2V", return_orbsym=True)
+
+    # With an empty P space and no growth, CC(P;Q) reduces to CR-CC(2,3)
+    T, Ecorr, delta_T, t3_excitations = run_adaptive_ccpq(fock, g, o, v, growth_fraction=0.0, max_iter=1)
+    assert np.allclose(Ecorr, -0.291219152750, atol=1.0e-07)
+    assert np.allclose(delta_T["A"], -0.009907050495912655, atol=1.0e-07)
+    assert np.allclose(delta_T["D"], -0.01333695816624863, atol=1.0e-07)
+
+    # Grow the P space by 1% of the A1-symmetric triples per iteration
+    T, Ecorr, delta_T, t3_excitations = run_adaptive_ccpq(fock, g, o, v, growth_fraction=0.01, max_iter=4, point_group="C2V", orbsym=orbsym)
+
+    #
+    # Check the results
+    #
+    assert t3_excitations.shape[0] == 513
+    assert np.allclose(Ecorr, -0.303406976899, atol=1.0e-07)
+    assert np.allclose(Ecorr + delta_T["D"], -0.303698384053, atol=1.0e-07)
+    # within 0.1 millihartree of CCSDT using ~3% of the triples
+    assert abs(Ecorr + delta_T["D"] - (-0.303762602558)) < 1.0e-04
+
+if __name__ == "__main__":
+    test_adaptive_ccpq_h2o()
@@ -0,0 +1,38 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc
+
+def test_checkpoint_restart_h2o(tmp_path):
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    # Define molecule geometry and basis set
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+    # Stop the solve early, keeping the best amplitudes and a checkpoint
+    checkpoint = str(tmp_path / "ccsd-checkpoint.hdf5")
+    T, Ecorr_partial = run_cc_calc(fock, g, o, v, method='ccsd', maxit=4, checkpoint=checkpoint, return_unconverged=True)
+    # Resume the solve with the amplitudes and DIIS history of the checkpoint
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd', restart=checkpoint)
+
+    # Methods without checkpoint support reject the options
+    flag_error = False
+    try:
+        run_cc_calc(fock, g, o, v, method='cc3', checkpoint=checkpoint)
+    except ValueError:
+        flag_error = True
+
+    #
+    # Check the results
+    #
+    assert not np.allclose(Ecorr_partial, -0.136635197653, atol=1.0e-05)
+    assert np.allclose(Ecorr, -0.136635197653, atol=1.0e-07)
+    assert flag_error
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_checkpoint_restart_h2o(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,37 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, get_hbar
+
+def test_eomccsd_davidson_guess_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd')
+
+    H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+
+    # matrix-free CIS guess compared against the dense diagonalization
+    R_dense, omega_dense = run_guess(H1, H2, o, v, 5, method="cis", mult=1, solver="dense")
+    R, omega_guess = run_guess(H1, H2, o, v, 5, method="cis", mult=1, solver="davidson")
+    R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="eomccsd", state_index=[0], max_size=20)
+
+    # matrix-free CISd guess
+    R_cisd, omega_cisd = run_guess(H1, H2, o, v, 5, method="cisd", mult=1, nacto=4, nactu=4, solver="davidson")
+    R_cisd, omega_eom_cisd, r0 = run_eomcc_calc(R_cisd, omega_cisd, T, H1, H2, o, v, method="eomccsd", state_index=[0], max_size=20)
+
+    #
+    # Check the results
+    #
+    assert np.allclose(Ecorr, -0.136635197653, atol=1.0e-07)
+    assert np.allclose(omega_guess, omega_dense, atol=1.0e-07)
+    assert np.allclose(omega[0], 0.300453029036, atol=1.0e-07)
+    assert np.allclose(omega_eom_cisd[0], 0.300453029036, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_eomccsd_davidson_guess_h2o()
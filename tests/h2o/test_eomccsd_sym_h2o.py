@@ -0,0 +1,38 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, get_hbar
+
+def test_eomccsd_sym_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v, orbsym = run_scf(geom, basis, nfrozen, symmetry="C2V", return_orbsym=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd_sym', orbsym=orbsym, point_group="C2V")
+
+    H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd_sym', orbsym=orbsym, point_group="C2V")
+
+    R0, omega_guess = run_guess(H1, H2, o, v, 5, method="cis", mult=1)
+    R, omega, r0 = run_eomcc_calc(R0, omega_guess, T, H1, H2, o, v, method="eomccsd_sym", state_index=[0, 1, 2, 3, 4], max_size=20)
+    # a guess mixing all irreps is projected onto the requested one
+    R0_mixed = np.sum(R0, axis=1, keepdims=True)
+    R, omega_a1, r0 = run_eomcc_calc(R0_mixed, omega_guess, T, H1, H2, o, v, method="eomccsd_sym", state_index=[0], max_size=20, target_irrep="A1")
+    # the HBar diagonal preconditioner is assembled from the symmetry blocks
+    R, omega_hbar, r0 = run_eomcc_calc(R0, omega_guess, T, H1, H2, o, v, method="eomccsd_sym", state_index=[0], max_size=20, preconditioner="hbar")
+
+    #
+    # Check the results
+    #
+    assert np.allclose(Ecorr, -0.136635197653, atol=1.0e-07)
+    expected_vee = [0.300453029012, 0.384046181660, 0.384062433238, 0.472651583784, 0.570330851199]
+    for i in range(5):
+        assert np.allclose(omega[i], expected_vee[i], atol=1.0e-07)
+    assert np.allclose(omega_a1[0], 0.384062433238, atol=1.0e-07)
+    assert np.allclose(omega_hbar[0], expected_vee[0], atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_eomccsd_sym_h2o()
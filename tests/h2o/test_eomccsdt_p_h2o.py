@@ -0,0 +1,60 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_eomcc_calc, get_hbar, run_guess
+from miniccpy.pspace import get_active_triples_pspace
+
+def test_eomccsdt_p_h2o():
+
+        basis = 'dz'
+        nfrozen = 1
+
+        # Define molecule geometry and basis set
+        geom = [['H', (0, 1.515263, -1.058898)],
+                ['H', (0, -1.515263, -1.058898)],
+                ['O', (0.0, 0.0, -0.0090)]]
+
+        fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+        # With all triples in the P space, EOMCCSDT(P) reproduces EOMCCSDT
+        no, nu = fock[o, v].shape
+        t3_excitations = get_active_triples_pspace(no, nu, nacto=no, nactu=nu)
+
+        T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsdt_p', t3_excitations=t3_excitations)
+
+        H1, H2 = get_hbar(T, fock, g, o, v, method='ccsdt_p', t3_excitations=t3_excitations)
+
+        R, omega_guess = run_guess(H1, H2, o, v, 5, method="cis")
+        R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="eomccsdt_p", state_index=[0, 3],
+                                      r3_excitations=t3_excitations, t3_excitations=t3_excitations)
+
+        # Active-space CCSDt/EOMCCSDt with 4 active occupied and 4 active unoccupied orbitals,
+        # preconditioned with the Fock diagonal and with the HBar diagonal
+        t3_excitations = get_active_triples_pspace(no, nu, nacto=4, nactu=4)
+
+        T, Ecorr_act = run_cc_calc(fock, g, o, v, method='ccsdt_p', t3_excitations=t3_excitations)
+
+        H1, H2 = get_hbar(T, fock, g, o, v, method='ccsdt_p', t3_excitations=t3_excitations)
+
+        R_guess, omega_guess = run_guess(H1, H2, o, v, 5, method="cis")
+        fock_stats = {}
+        R, omega_act, r0 = run_eomcc_calc(R_guess, omega_guess, T, H1, H2, o, v, method="eomccsdt_p", state_index=[0, 3],
+                                          r3_excitations=t3_excitations, t3_excitations=t3_excitations, stats=fock_stats)
+        hbar_stats = {}
+        R, omega_hbar, r0 = run_eomcc_calc(R_guess, omega_guess, T, H1, H2, o, v, method="eomccsdt_p", state_index=[0, 3],
+                                           r3_excitations=t3_excitations, t3_excitations=t3_excitations,
+                                           preconditioner="hbar", stats=hbar_stats)
+
+        #
+        # Check the results
+        #
+        assert np.allclose(Ecorr, -0.134281761462, atol=1.0e-07)
+        assert np.allclose(omega[0], 0.290029031786, atol=1.0e-07)
+        assert np.allclose(omega[1], 0.319249079026, atol=1.0e-07)
+        assert t3_excitations.shape[0] == 23504
+        assert np.allclose(Ecorr_act, -0.133678325102, atol=1.0e-07)
+        assert np.allclose(omega_act[0], 0.290546454226, atol=1.0e-07)
+        assert np.allclose(omega_act[1], 0.319781475778, atol=1.0e-07)
+        assert np.allclose(omega_hbar, omega_act, atol=1.0e-07)
+        assert len(fock_stats["niter"]) == 2 and len(hbar_stats["niter"]) == 2
+
+if __name__ == "__main__":
+        test_eomccsdt_p_h2o()
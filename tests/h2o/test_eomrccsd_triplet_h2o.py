@@ -0,0 +1,35 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, run_lefteomcc_calc, get_hbar
+
+def test_eomrccsd_triplet_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    # Define molecule geometry and basis set
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, rhf=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+
+    H1, H2 = get_hbar(T, fock, g, o, v, method='rccsd')
+
+    R, omega_guess = run_guess(H1, H2, o, v, 5, method="rcisd", nacto=2, nactu=2, mult=3)
+    R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="eomrccsd_triplet", state_index=[0, 1], max_size=20)
+    L, omega_left = run_lefteomcc_calc(R, omega, T, H1, H2, o, v, method="left_eomrccsd_triplet")
+
+    #
+    # Check the results
+    #
+    # Reference excitation energies obtained from spin-orbital EOMCCSD using a triplet CIS guess
+    assert np.allclose(Ecorr, -0.136635197653, atol=1.0e-07)
+    assert np.allclose(omega[0], 0.272816282878, atol=1.0e-07)
+    assert np.allclose(omega[1], 0.344433179504, atol=1.0e-07)
+    assert np.allclose(omega_left[0], omega[0], atol=1.0e-07)
+    assert np.allclose(omega_left[1], omega[1], atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_eomrccsd_triplet_h2o()
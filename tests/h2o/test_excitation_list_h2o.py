@@ -0,0 +1,63 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc
+from miniccpy.pspace import (EXCITATION_DTYPE, as_excitation_list, empty_pspace, is_empty_pspace,
+                             get_active_triples_pspace)
+
+def test_excitation_list_h2o(tmp_path):
+
+    basis = 'sto-3g'
+    nfrozen = 0
+
+    # Define molecule geometry and basis set
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+    no, nu = fock[o, v].shape
+
+    # conversion to the Fortran-ordered int16 layout keeps the orbital indices, and an
+    # array that is already in that layout is passed through without a copy
+    rows = [[1, 2, 3, 1, 2, 3], [1, 2, 4, 2, 3, 4]]
+    excitations = as_excitation_list(rows)
+    excitations_again = as_excitation_list(excitations)
+    too_large = False
+    try:
+        as_excitation_list([[1, 2, np.iinfo(EXCITATION_DTYPE).max + 1, 1, 2, 3]])
+    except ValueError:
+        too_large = True
+
+    # excitation lists saved to and loaded from the on-disk cache are unchanged
+    t3_excitations = get_active_triples_pspace(no, nu, nacto=no, nactu=nu, cache_dir=tmp_path)
+    t3_excitations_cached = get_active_triples_pspace(no, nu, nacto=no, nactu=nu, cache_dir=tmp_path)
+
+    # an empty P space is represented by the single-row placeholder and gives CCSD
+    t3_empty = get_active_triples_pspace(no, nu, nacto=0, nactu=0)
+    T, E_ccsd = run_cc_calc(fock, g, o, v, method='ccsd')
+    T, E_empty = run_cc_calc(fock, g, o, v, method='ccsdt_p', t3_excitations=t3_empty)
+    # the full P space, passed as an int64 list, gives CCSDT
+    T, E_ccsdt = run_cc_calc(fock, g, o, v, method='ccsdt')
+    T, E_full = run_cc_calc(fock, g, o, v, method='ccsdt_p', t3_excitations=t3_excitations.astype(np.int64))
+
+    #
+    # Check the results
+    #
+    assert excitations.dtype == EXCITATION_DTYPE and excitations.flags.f_contiguous
+    assert np.array_equal(excitations, np.array(rows))
+    assert np.shares_memory(excitations_again, excitations)
+    assert too_large
+    assert t3_excitations.dtype == EXCITATION_DTYPE and t3_excitations_cached.dtype == EXCITATION_DTYPE
+    assert t3_excitations_cached.flags.f_contiguous
+    assert np.array_equal(t3_excitations_cached, t3_excitations)
+    assert t3_excitations.shape[0] == (nu * (nu - 1) * (nu - 2) // 6) * (no * (no - 1) * (no - 2) // 6)
+    assert not is_empty_pspace(t3_excitations)
+    assert not is_empty_pspace(excitations[:1, :])
+    assert is_empty_pspace(t3_empty)
+    assert is_empty_pspace(as_excitation_list(empty_pspace()))
+    assert np.allclose(E_empty, E_ccsd, atol=1.0e-09)
+    assert np.allclose(E_full, E_ccsdt, atol=1.0e-09)
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    with tempfile.TemporaryDirectory() as tmp:
+        test_excitation_list_h2o(pathlib.Path(tmp))
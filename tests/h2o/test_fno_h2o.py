@@ -0,0 +1,49 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_fno, run_cc_calc
+
+def test_fno_h2o():
+
+    basis = '6-31g'
+    nfrozen = 1
+
+    # Define molecule geometry and basis set
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, rhf=True)
+
+    fock, g, o, v, de_mp2 = run_fno(fock, g, o, v, threshold=1.0e-03, rhf=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+
+    # The spin-orbital path keeps the same spatial FNOs
+    fock_so, g_so, e_hf, o_so, v_so = run_scf(geom, basis, nfrozen)
+
+    fock_so, g_so, o_so, v_so, de_mp2_so = run_fno(fock_so, g_so, o_so, v_so, threshold=1.0e-03)
+
+    T, Ecorr_so = run_cc_calc(fock_so, g_so, o_so, v_so, method='ccsd')
+
+    # An open-shell reference (here, the H2O+ doublet) is rejected in the spin-orbital basis
+    fock_os, g_os, e_hf, o_os, v_os = run_scf(geom, basis, nfrozen, multiplicity=2, charge=1)
+    open_shell = False
+    try:
+        run_fno(fock_os, g_os, o_os, v_os, threshold=1.0e-03)
+    except ValueError:
+        open_shell = True
+
+    #
+    # Check the results
+    #
+    assert fock[v, v].shape[0] == 6
+    assert np.allclose(de_mp2, -0.001573337680, atol=1.0e-09)
+    assert np.allclose(Ecorr, -0.133781127732, atol=1.0e-07)
+    # FNO-CCSD with the MP2 correction is close to the full-basis CCSD energy (-0.135727787673)
+    assert np.allclose(Ecorr + de_mp2, -0.135727787673, atol=5.0e-04)
+    assert fock_so[v_so, v_so].shape[0] == 12
+    assert np.allclose(de_mp2_so, de_mp2, atol=1.0e-09)
+    assert np.allclose(Ecorr_so, Ecorr, atol=1.0e-07)
+    assert open_shell
+
+if __name__ == "__main__":
+    test_fno_h2o()
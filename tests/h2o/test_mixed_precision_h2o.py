@@ -0,0 +1,36 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc
+
+def test_mixed_precision_h2o():
+
+    basis = 'sto-3g'
+    nfrozen = 0
+
+    # Define molecule geometry and basis set
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+    # Iterate in single precision until the residual drops below 1e-4, then finish in double precision
+    T, E_ccsd = run_cc_calc(fock, g, o, v, method='ccsd', mixed_precision_threshold=1.0e-04)
+    T, E_ccsdt = run_cc_calc(fock, g, o, v, method='ccsdt', mixed_precision_threshold=1.0e-04)
+
+    # Thresholds below the residual norm reachable in single precision are rejected
+    flag_error = False
+    try:
+        run_cc_calc(fock, g, o, v, method='ccsd', mixed_precision_threshold=1.0e-07)
+    except ValueError:
+        flag_error = True
+
+    #
+    # Check the results
+    #
+    assert all(t.dtype == np.float64 for t in T)
+    assert np.allclose(E_ccsd, -0.050804194121, atol=1.0e-07)
+    assert np.allclose(E_ccsdt, -0.050922673989, atol=1.0e-07)
+    assert flag_error
+
+if __name__ == "__main__":
+    test_mixed_precision_h2o()
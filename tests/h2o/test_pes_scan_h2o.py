@@ -0,0 +1,45 @@
+import numpy as np
+from miniccpy.driver import run_pes_scan, run_scf
+
+def test_pes_scan_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    # Symmetric stretch of H2O, starting from the equilibrium geometry
+    geometries = [[['H', (0, 1.515263 * s, -1.058898 * s)],
+                   ['H', (0, -1.515263 * s, -1.058898 * s)],
+                   ['O', (0.0, 0.0, -0.0090)]] for s in (1.0, 1.1, 1.2)]
+
+    results = run_pes_scan(geometries, basis, "rccsd", nfrozen=nfrozen, left_method="left_rccsd", eom_method="eomrccsd",
+                           nroot=5, guess_method="rcis", mult=1, state_index=[0, 1])
+    # the last point computed from scratch
+    results_scratch = run_pes_scan(geometries[-1:], basis, "rccsd", nfrozen=nfrozen, left_method="left_rccsd", eom_method="eomrccsd",
+                                   nroot=5, guess_method="rcis", mult=1, state_index=[0, 1])
+
+    # MO alignment is not available for UHF references
+    mf = run_scf(geometries[0], basis, nfrozen, rhf=True, return_meanfield=True)[-1]
+    flag_error = False
+    try:
+        run_scf(geometries[1], basis, nfrozen, uhf=True, mo_reference=(mf.mol, mf.mo_coeff))
+    except ValueError:
+        flag_error = True
+
+    #
+    # Check the results
+    #
+    # Reference values obtained by running each geometry from scratch
+    assert np.allclose(results["e_corr"], [-0.136635197622, -0.146010795371, -0.156184164592], atol=1.0e-07)
+    assert np.allclose(results["omega"][0], [0.300453028984, 0.384046181970], atol=1.0e-07)
+    assert np.allclose(results["omega"][1], [0.257757611475, 0.336295994888], atol=1.0e-07)
+    assert np.allclose(results["omega"][2], [0.215588672533, 0.288965070404], atol=1.0e-07)
+    assert np.allclose(results_scratch["e_corr"][0], results["e_corr"][2], atol=1.0e-07)
+    assert np.allclose(results_scratch["omega"][0], results["omega"][2], atol=1.0e-07)
+    # continuation from the previous point saves CC, left-CC, and EOMCC iterations
+    assert results["cc_iterations"][2] < results_scratch["cc_iterations"][0]
+    assert results["left_iterations"][2] < results_scratch["left_iterations"][0]
+    assert sum(results["eom_iterations"][2]) < sum(results_scratch["eom_iterations"][0])
+    assert flag_error
+
+if __name__ == "__main__":
+    test_pes_scan_h2o()
@@ -0,0 +1,47 @@
+import itertools
+import numpy as np
+from miniccpy.driver import run_scf
+from miniccpy.pspace import get_active_triples_pspace
+from miniccpy.symmetry import get_pg_irreps
+
+def test_pspace_h2o(tmp_path):
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v, orbsym = run_scf(geom, basis, nfrozen, symmetry="C2V", return_orbsym=True)
+
+    no, nu = fock[o, v].shape
+    nacto, nactu = 4, 4
+    t3_excitations = get_active_triples_pspace(no, nu, nacto=nacto, nactu=nactu, point_group="C2V", target_irrep="B2", orbsym=orbsym)
+
+    # reference list from explicit loops over the excitation indices
+    irreps = get_pg_irreps("C2V")
+    isym = [irreps[x] for x in orbsym]
+    expected = []
+    for i, j, k in itertools.combinations(range(no), 3):
+        if sum(x >= no - nacto for x in (i, j, k)) < 1: continue
+        for a, b, c in itertools.combinations(range(nu), 3):
+            if sum(x < nactu for x in (a, b, c)) < 1: continue
+            if isym[i] ^ isym[j] ^ isym[k] ^ isym[no + a] ^ isym[no + b] ^ isym[no + c] != irreps["B2"]: continue
+            expected.append([a + 1, b + 1, c + 1, i + 1, j + 1, k + 1])
+
+    # the second call is served from the on-disk cache
+    get_active_triples_pspace(no, nu, nacto=nacto, nactu=nactu, point_group="C2V", target_irrep="B2", orbsym=orbsym, cache_dir=tmp_path)
+    t3_cached = get_active_triples_pspace(no, nu, nacto=nacto, nactu=nactu, point_group="C2V", target_irrep="B2", orbsym=orbsym, cache_dir=tmp_path)
+
+    #
+    # Check the results
+    #
+    assert np.array_equal(t3_excitations, np.array(expected))
+    assert t3_excitations.flags.f_contiguous
+    assert np.array_equal(t3_cached, t3_excitations)
+    assert len(list(tmp_path.iterdir())) == 1
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_pspace_h2o(pathlib.Path(tempfile.mkdtemp()))
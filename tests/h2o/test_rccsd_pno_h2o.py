@@ -0,0 +1,42 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc
+from miniccpy.mp2 import get_amplitudes
+from miniccpy import rccsd, rccsd_pno
+
+def test_rccsd_pno_h2o():
+
+    basis = 'cc-pvdz'
+    nfrozen = 1
+
+    # Define molecule geometry and basis set
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, rhf=True)
+
+    T, Ecorr_canonical = run_cc_calc(fock, g, o, v, method='rccsd')
+    T, Ecorr_pno_full = run_cc_calc(fock, g, o, v, method='rccsd_pno', pno_threshold=0.0)
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd_pno', pno_threshold=1.0e-06)
+
+    # the per-pair doubles residual equals the canonical one projected onto each PNO space
+    no = fock[o, o].shape[0]
+    t1, t2 = T
+    Q, _ = rccsd_pno.get_pair_natural_orbitals(get_amplitudes(fock, g, o, v), fock, o, v, 1.0e-06)
+    t2_pno = [Q[i * no + j].T @ t2[:, :, i, j] @ Q[i * no + j] for i in range(no) for j in range(no)]
+    res_pno = rccsd_pno.doubles_residual(t1, t2_pno, Q, rccsd_pno.get_pair_overlaps(Q), fock, g, o, v)
+    res = rccsd.doubles_residual(t1, t2, fock, g, o, v)
+
+    #
+    # Check the results
+    #
+    # Without truncation, PNO-CCSD reproduces the canonical result
+    assert np.allclose(Ecorr_pno_full, Ecorr_canonical, atol=1.0e-07)
+    assert np.allclose(Ecorr, -0.211958070174, atol=1.0e-07)
+    assert np.allclose(Ecorr, Ecorr_canonical, atol=1.0e-04)
+    for i in range(no):
+        for j in range(no):
+            assert np.allclose(res_pno[i * no + j], Q[i * no + j].T @ res[:, :, i, j] @ Q[i * no + j], atol=1.0e-12)
+
+if __name__ == "__main__":
+    test_rccsd_pno_h2o()
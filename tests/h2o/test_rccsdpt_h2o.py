@@ -0,0 +1,26 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_correction
+
+def test_rccsdpt_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    # Same system as test_ccsdpt_h2o at the 2Re structure
+    geom = [["O", (0.0, 0.0, -0.0180)],
+            ["H", (0.0, 3.030526, -2.117796)],
+            ["H", (0.0, -3.030526, -2.117796)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, rhf=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+    delta_T = run_correction(T, None, fock, None, g, o, v, method="rccsdpt")
+
+    #
+    # Check the results
+    #
+    assert np.allclose(Ecorr, -0.291219152750, atol=1.0e-07)
+    assert np.allclose(delta_T["A"], -0.018245145626911947, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_rccsdpt_h2o()
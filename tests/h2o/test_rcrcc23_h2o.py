@@ -0,0 +1,31 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, get_hbar, run_leftcc_calc, run_correction
+
+def test_rcrcc23_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    # Define molecule geometry and basis set
+    geom = [["O", (0.0, 0.0, -0.0180)],
+            ["H", (0.0, 3.030526, -2.117796)],
+            ["H", (0.0, -3.030526, -2.117796)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, rhf=True)
+
+    T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+    H1, H2 = get_hbar(T, fock, g, o, v, method="rccsd")
+    L = run_leftcc_calc(T, fock, H1, H2, o, v, method="left_rccsd")
+    delta_T = run_correction(T, L, fock, H1, H2, o, v, method="rcrcc23")
+
+    #
+    # Check the results against the spin-orbital CR-CC(2,3) values
+    #
+    assert np.allclose(Ecorr, -0.291219152750, atol=1.0e-07)
+    assert np.allclose(delta_T["A"], -0.009907050495912655, atol=1.0e-07)
+    assert np.allclose(delta_T["B"], -0.008737857624847037, atol=1.0e-07)
+    assert np.allclose(delta_T["C"], -0.013995217704460439, atol=1.0e-07)
+    assert np.allclose(delta_T["D"], -0.01333695816624863, atol=1.0e-07)
+
+if __name__ == "__main__":
+    test_rcrcc23_h2o()
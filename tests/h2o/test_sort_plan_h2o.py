@@ -0,0 +1,89 @@
+import numpy as np
+from miniccpy.driver import run_scf
+from miniccpy.pspace import get_active_triples_pspace, get_sort_plan
+from miniccpy.ccsdt_p import triples_residual
+from miniccpy.ccsdt import triples_residual as dense_triples_residual
+from miniccpy.lib import ccsdt_p
+
+def sort4_reference(t3_excitations, isort, no, nu):
+    """Carry out sort `isort` of update_t3_p on a copy of the excitation list
+    using get_index_table/sort4 directly, as the kernel did before the plan."""
+    lib = ccsdt_p.ccsdt_p
+    ndim, idims, rng, n, nloc = lib.get_sort_spec(isort, no, nu)
+    excits = np.asfortranarray(t3_excitations.copy())
+    track = np.arange(1, excits.shape[0] + 1, dtype=np.float64)
+    idx_table = np.zeros(n[:4], dtype=np.int32, order="F")
+    loc_arr = np.zeros((2, nloc), dtype=np.int32, order="F")
+    lib.get_index_table(idx_table, rng[:, 0], rng[:, 1], rng[:, 2], rng[:, 3])
+    lib.sort4(excits, track, loc_arr, idx_table, idims[:4])
+    return np.rint(track).astype(np.int32), loc_arr, idx_table.flatten(order="F")
+
+def test_sort_plan_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+    no, nu = fock[o, v].shape
+    t3_excitations = get_active_triples_pspace(no, nu, nacto=4, nactu=4)
+    n3 = t3_excitations.shape[0]
+
+    rng = np.random.default_rng(0)
+    t1 = np.zeros((nu, no))
+    t2 = 0.01 * rng.standard_normal((nu, nu, no, no))
+    t2 -= np.transpose(t2, (1, 0, 2, 3))
+    t2 -= np.transpose(t2, (0, 1, 3, 2))
+    t3 = 0.01 * rng.standard_normal(n3)
+
+    # every sort of the plan agrees with the sort4 path it replaces
+    plan = get_sort_plan(ccsdt_p.ccsdt_p, t3_excitations, no, nu)
+    plan_perm, plan_loc, plan_idx = plan
+    loc_off, idx_off = 0, 0
+    for isort in range(1, plan_perm.shape[1] + 1):
+        perm, loc_arr, idx_table = sort4_reference(t3_excitations, isort, no, nu)
+        assert np.array_equal(plan_perm[:, isort - 1], perm)
+        assert np.array_equal(plan_loc[:, loc_off:loc_off + loc_arr.shape[1]], loc_arr)
+        assert np.array_equal(plan_idx[idx_off:idx_off + idx_table.shape[0]], idx_table)
+        loc_off += loc_arr.shape[1]
+        idx_off += idx_table.shape[0]
+    assert loc_off == plan_loc.shape[1] and idx_off == plan_idx.shape[0]
+
+    # the plan is reused across calls and the list keeps its order
+    excitations = t3_excitations.copy()
+    t3_new, excitations, resid = triples_residual(t1, t2, t3.copy(), excitations, plan, fock, g, o, v, 0.0)
+    t3_again, excitations, resid_again = triples_residual(t1, t2, t3.copy(), excitations, plan, fock, g, o, v, 0.0)
+
+    # the residual agrees with the dense CCSDT one evaluated with T3 zero outside the P space
+    a, b, c, i, j, k = [t3_excitations[:, p] - 1 for p in range(6)]
+    t3_dense = np.zeros((nu, nu, nu, no, no, no))
+    for perm_v in [(a, b, c, 1), (b, c, a, 1), (c, a, b, 1), (a, c, b, -1), (c, b, a, -1), (b, a, c, -1)]:
+        for perm_o in [(i, j, k, 1), (j, k, i, 1), (k, i, j, 1), (i, k, j, -1), (k, j, i, -1), (j, i, k, -1)]:
+            t3_dense[perm_v[:3] + perm_o[:3]] = perm_v[3] * perm_o[3] * t3
+    e_o = np.diagonal(fock)[o]
+    e_v = np.diagonal(fock)[v]
+    denom = e_o[i] + e_o[j] + e_o[k] - e_v[a] - e_v[b] - e_v[c]
+    resid_dense = dense_triples_residual(t1, t2, t3_dense, fock, g, o, v)[a, b, c, i, j, k] / denom
+
+    # a plan built for a shuffled list gives the shuffled residual
+    perm = rng.permutation(n3)
+    shuffled = np.asfortranarray(t3_excitations[perm, :])
+    plan_shuffled = get_sort_plan(ccsdt_p.ccsdt_p, shuffled, no, nu)
+    _, shuffled_out, resid_shuffled = triples_residual(t1, t2, t3[perm].copy(), shuffled, plan_shuffled, fock, g, o, v, 0.0)
+
+    #
+    # Check the results
+    #
+    assert np.array_equal(excitations, t3_excitations)
+    assert np.allclose(resid, resid_dense, atol=1.0e-12)
+    assert np.allclose(resid_again, resid)
+    assert np.allclose(t3_again, t3_new)
+    assert np.array_equal(shuffled_out, t3_excitations[perm, :])
+    assert np.allclose(resid_shuffled, resid[perm])
+
+if __name__ == "__main__":
+    test_sort_plan_h2o()
@@ -0,0 +1,65 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_guess
+from miniccpy.symmetry import get_pg_irreps
+
+def test_symmetry_guess_h2o():
+
+    basis = '6-31g'
+    nfrozen = 0
+
+    geom = [['H', (0, 1.515263, -1.058898)],
+            ['H', (0, -1.515263, -1.058898)],
+            ['O', (0.0, 0.0, -0.0090)]]
+
+    fock, g, e_hf, o, v, orbsym = run_scf(geom, basis, nfrozen, symmetry="C2V", return_orbsym=True)
+
+    no, nu = fock[o, v].shape
+    irreps = get_pg_irreps("C2V")
+    isym = np.array([irreps[x.upper()] for x in orbsym])
+
+    # all singlet CIS roots and the irrep of each one
+    R_all, omega_all = run_guess(fock, g, o, v, no * nu, method="cis", mult=1)
+    r1 = R_all.reshape(nu, no, -1)
+    sym_all = []
+    for n in range(R_all.shape[1]):
+        a, i = np.unravel_index(np.argmax(abs(r1[:, :, n])), (nu, no))
+        sym_all.append(isym[no + a] ^ isym[i])
+    sym_all = np.array(sym_all)
+
+    for irrep in ["A1", "A2", "B1", "B2"]:
+        R0, omega0 = run_guess(fock, g, o, v, 3, method="cis", mult=1,
+                               orbsym=orbsym, point_group="C2V", target_irrep=irrep)
+        expected = omega_all[sym_all == irreps[irrep]][:3]
+        #
+        # Check the results
+        #
+        assert R0.shape == (no * nu, 3)
+        assert np.allclose(omega0, expected, atol=1.0e-09)
+        # the guess vectors vanish outside of the target irrep
+        for n in range(3):
+            mask = (isym[no:, None] ^ isym[None, :no]) == irreps[irrep]
+            assert np.allclose(R0[:, n].reshape(nu, no)[~mask], 0.0)
+
+    # the symmetry-blocked sigma of the Davidson solver reproduces the dense CISd guess
+    R_dense, omega_dense = run_guess(fock, g, o, v, 3, method="cisd", nacto=4, nactu=6, mult=1, solver="dense",
+                                     orbsym=orbsym, point_group="C2V", target_irrep="B2")
+    R_david, omega_david = run_guess(fock, g, o, v, 3, method="cisd", nacto=4, nactu=6, mult=1, solver="davidson",
+                                     orbsym=orbsym, point_group="C2V", target_irrep="B2")
+    assert np.allclose(omega_david, omega_dense, atol=1.0e-07)
+
+    # 2p guess restricted to the B1 symmetry
+    R_all, omega_all = run_guess(fock, g, o, v, nu * (nu - 1) // 2, method="deacis", nactu=nu)
+    r2p = R_all.reshape(nu, nu, -1)
+    sym_all = []
+    for n in range(R_all.shape[1]):
+        a, b = np.unravel_index(np.argmax(abs(r2p[:, :, n])), (nu, nu))
+        sym_all.append(isym[no + a] ^ isym[no + b])
+    sym_all = np.array(sym_all)
+    R0, omega0 = run_guess(fock, g, o, v, 3, method="deacis", nactu=nu,
+                           orbsym=orbsym, point_group="C2V", target_irrep="B1")
+    mask = (isym[no:, None] ^ isym[None, no:]) == irreps["B1"]
+    assert np.allclose(omega0, omega_all[sym_all == irreps["B1"]][:3], atol=1.0e-09)
+    assert np.allclose(R0.reshape(nu, nu, 3)[~mask], 0.0)
+
+if __name__ == "__main__":
+    test_symmetry_guess_h2o()
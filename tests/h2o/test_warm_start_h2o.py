@@ -0,0 +1,45 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc
+from miniccpy.pspace import get_active_triples_pspace
+
+def test_warm_start_h2o():
+
+        basis = 'sto-3g'
+        nfrozen = 0
+
+        # Define molecule geometry and basis set
+        geom = [["H", (0, 1.515263, -1.058898)],
+                ["H", (0, -1.515263, -1.058898)],
+                ["O", (0.0, 0.0, -0.0090)]]
+
+        fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+        # CCSD -> CCSDT (T3 estimated from CCSD T1 and T2) -> CCSDTQ (T4 = 0)
+        T, E_ccsd = run_cc_calc(fock, g, o, v, method="ccsd", T0="mp2")
+        T, E_ccsdt = run_cc_calc(fock, g, o, v, method="ccsdt", T0=T)
+        T, E_ccsdtq = run_cc_calc(fock, g, o, v, method="ccsdtq", T0=T)
+
+        # CCSD -> CCSDT(P) with T3 estimated only for the triples in the (full) P space
+        no, nu = fock[o, v].shape
+        t3_excitations = get_active_triples_pspace(no, nu, nacto=no, nactu=nu)
+        T, _ = run_cc_calc(fock, g, o, v, method="ccsd")
+        T, E_ccsdt_p = run_cc_calc(fock, g, o, v, method="ccsdt_p", T0=T, t3_excitations=t3_excitations)
+
+        # Methods without starting-guess support are rejected
+        flag_error = False
+        try:
+                run_cc_calc(fock, g, o, v, method="ccd", T0="mp2")
+        except ValueError:
+                flag_error = True
+
+        #
+        # Check the results
+        #
+        assert np.allclose(E_ccsd, -0.050804194121, atol=1.0e-07)
+        assert np.allclose(E_ccsdt, -0.050922673989, atol=1.0e-07)
+        assert np.allclose(E_ccsdtq, -0.050946152993, atol=1.0e-07)
+        assert np.allclose(E_ccsdt_p, -0.050922673989, atol=1.0e-07)
+        assert flag_error
+
+if __name__ == "__main__":
+        test_warm_start_h2o()
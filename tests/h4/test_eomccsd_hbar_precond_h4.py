@@ -0,0 +1,35 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, get_hbar
+
+def test_eomccsd_hbar_precond_h4():
+
+        basis = '6-31g'
+        nfrozen = 0
+
+        # Define molecule geometry and basis set
+        geom = [['H', (-2.000, -2.000, 0.000)],
+                ['H', (-2.000,  2.000, 0.000)],
+                ['H', ( 2.000, -2.000, 0.000)],
+                ['H', ( 2.000,  2.000, 0.000)]]
+
+        fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen)
+
+        T, Ecorr = run_cc_calc(fock, g, o, v, method='ccsd')
+
+        H1, H2 = get_hbar(T, fock, g, o, v, method='ccsd')
+
+        R, omega_guess = run_guess(H1, H2, o, v, 10, method="cis")
+        # Precondition with the HBar diagonal and apply the Olsen correction
+        R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method='eomccsd', state_index=[0, 3, 6],
+                                      preconditioner="hbar", olsen=True)
+
+        #
+        # Check the results
+        #
+        assert np.allclose(Ecorr, -0.202702610372, atol=1.0e-07)
+        assert np.allclose(omega[0], -0.033276262135, atol=1.0e-07)
+        assert np.allclose(omega[1], -0.035215139069, atol=1.0e-07)
+        assert np.allclose(omega[2], -0.069539030869, atol=1.0e-07)
+
+if __name__ == "__main__":
+        test_eomccsd_hbar_precond_h4()
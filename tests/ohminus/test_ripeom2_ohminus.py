@@ -0,0 +1,34 @@
+import numpy as np
+from miniccpy.driver import run_scf, run_cc_calc, run_guess, run_eomcc_calc, run_lefteomcc_calc, get_hbar
+
+def test_ripeom2_ohminus():
+
+        basis = 'dz'
+        nfrozen = 0
+
+        # Define molecule geometry and basis set
+        geom = [['H', (0.0, 0.0, -0.8)],
+                ['O', (0.0, 0.0,  0.8)]]
+
+        fock, g, e_hf, o, v = run_scf(geom, basis, nfrozen, charge=-1, unit="Angstrom", symmetry="C2V", rhf=True)
+
+        T, Ecorr = run_cc_calc(fock, g, o, v, method='rccsd')
+
+        H1, H2 = get_hbar(T, fock, g, o, v, method='rccsd')
+
+        R, omega_guess = run_guess(H1, H2, o, v, 5, method="ripcis")
+        R, omega, r0 = run_eomcc_calc(R, omega_guess, T, H1, H2, o, v, method="ripeom2", state_index=[0, 2])
+        L, omega_left = run_lefteomcc_calc(R, omega, T, H1, H2, o, v, method="left_ripeom2")
+
+        #
+        # Check the results against the spin-orbital IP-EOMCCSD values
+        #
+        assert np.allclose(Ecorr, -0.169726076437, atol=1.0e-07)
+        assert np.allclose(omega[0], 0.007103527103, atol=1.0e-07)
+        assert np.allclose(omega_left[0], 0.007103527103, atol=1.0e-07)
+        assert np.allclose(omega[1], 0.133067078325, atol=1.0e-07)
+        assert np.allclose(omega_left[1], 0.133067078325, atol=1.0e-07)
+        assert np.allclose(omega_left, omega, atol=1.0e-06)
+
+if __name__ == "__main__":
+        test_ripeom2_ohminus()